@@ -0,0 +1,138 @@
+#!/usr/bin/env node
+
+// Throughput benchmark for the Claude stdout line framing.
+//
+// Replays the stream-json fixtures in scripts/fixtures/stream-json in pipe-sized
+// chunks through the previous string-based splitting (toString + concatenation +
+// split('\n') on every chunk, with the whole output retained) and through
+// NdjsonFramer + OutputRingBuffer, checks the framed lines against the fixture
+// split as a whole and prints MB/s. (The legacy splitter decodes each chunk on
+// its own, so it garbles multi-byte characters that straddle a chunk boundary.)
+// A synthetic run with one multi-MB tool result line shows the quadratic case.
+//
+// Usage: node scripts/bench-ndjson-framer.js [--chunk-size 65536] [--iterations 20] [--large-mb 8]
+//
+// test/ndjson-framer.test.js reuses the fixtures and both splitters to assert
+// that framing output matches the legacy split.
+
+const fs = require('fs');
+const path = require('path');
+const NdjsonFramer = require('../src/main/ndjson-framer');
+const OutputRingBuffer = require('../src/main/output-ring-buffer');
+
+const FIXTURES_DIR = path.join(__dirname, 'fixtures', 'stream-json');
+
+function parseArgs(argv) {
+  const options = { chunkSize: 64 * 1024, iterations: 20, largeMB: 8 };
+  for (let i = 0; i < argv.length; i += 2) {
+    const value = Number(argv[i + 1]);
+    if (argv[i] === '--chunk-size') options.chunkSize = value;
+    if (argv[i] === '--iterations') options.iterations = value;
+    if (argv[i] === '--large-mb') options.largeMB = value;
+  }
+  return options;
+}
+
+function toChunks(data, chunkSize) {
+  const chunks = [];
+  for (let offset = 0; offset < data.length; offset += chunkSize) {
+    chunks.push(data.subarray(offset, offset + chunkSize));
+  }
+  return chunks;
+}
+
+// The framing handleClaudeProcess used before NdjsonFramer
+function legacySplit(chunks) {
+  let output = '';
+  let jsonBuffer = '';
+  const result = [];
+  for (const data of chunks) {
+    const chunk = data.toString();
+    output += chunk;
+    jsonBuffer += chunk;
+    const lines = jsonBuffer.split('\n');
+    jsonBuffer = lines.pop() || '';
+    for (const line of lines) {
+      if (line.trim()) result.push(line);
+    }
+  }
+  return { lines: result, retained: output.length + jsonBuffer.length };
+}
+
+function framerSplit(chunks) {
+  const framer = new NdjsonFramer();
+  const tail = new OutputRingBuffer(64 * 1024);
+  const result = [];
+  for (const data of chunks) {
+    tail.write(data);
+    for (const line of framer.push(data)) {
+      result.push(line);
+    }
+  }
+  const rest = framer.flush();
+  if (rest.trim()) result.push(rest);
+  return { lines: result, retained: tail.length };
+}
+
+function measure(fn, chunks, iterations) {
+  fn(chunks); // warm up
+  const started = process.hrtime.bigint();
+  let result;
+  for (let i = 0; i < iterations; i++) {
+    result = fn(chunks);
+  }
+  const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+  return { seconds: seconds / iterations, result };
+}
+
+function buildLargeToolResult(sizeMB) {
+  const text = 'x'.repeat(79) + '\n';
+  const content = text.repeat(Math.ceil((sizeMB * 1024 * 1024) / text.length));
+  const line = JSON.stringify({
+    type: 'user',
+    message: { role: 'user', content: [{ tool_use_id: 'toolu_large', type: 'tool_result', content }] }
+  });
+  return Buffer.from(`${line}\n${JSON.stringify({ type: 'result', subtype: 'success' })}\n`, 'utf8');
+}
+
+function run() {
+  const options = parseArgs(process.argv.slice(2));
+  const cases = fs.readdirSync(FIXTURES_DIR)
+    .filter(name => name.endsWith('.ndjson'))
+    .map(name => ({ name, data: fs.readFileSync(path.join(FIXTURES_DIR, name)), iterations: options.iterations }));
+
+  if (options.largeMB > 0) {
+    cases.push({ name: `large-tool-result (${options.largeMB} MB line)`, data: buildLargeToolResult(options.largeMB), iterations: 3 });
+  }
+
+  console.log(`chunk size ${options.chunkSize} bytes`);
+  for (const testCase of cases) {
+    const chunks = toChunks(testCase.data, options.chunkSize);
+    const megabytes = testCase.data.length / (1024 * 1024);
+
+    const legacy = measure(legacySplit, chunks, testCase.iterations);
+    const framed = measure(framerSplit, chunks, testCase.iterations);
+
+    const expected = testCase.data.toString('utf8').split('\n').filter(line => line.trim());
+    const matches = (lines) => lines.length === expected.length && lines.every((line, index) => line === expected[index]);
+    if (!matches(framed.result.lines)) {
+      console.error(`${testCase.name}: framed lines differ from the fixture`);
+      process.exitCode = 1;
+    }
+    if (!matches(legacy.result.lines)) {
+      console.warn(`${testCase.name}: legacy splitter corrupted lines split across chunks`);
+    }
+
+    console.log(
+      `${testCase.name}: ${megabytes.toFixed(2)} MB, ${framed.result.lines.length} lines | ` +
+      `legacy ${(megabytes / legacy.seconds).toFixed(1)} MB/s, retains ${legacy.result.retained} chars | ` +
+      `framer ${(megabytes / framed.seconds).toFixed(1)} MB/s, retains ${framed.result.retained} bytes`
+    );
+  }
+}
+
+if (require.main === module) {
+  run();
+}
+
+module.exports = { FIXTURES_DIR, toChunks, legacySplit, framerSplit };
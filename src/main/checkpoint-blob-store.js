@@ -0,0 +1,517 @@
+const fs = require('fs').promises;
+const fsSync = require('fs');
+const path = require('path');
+const crypto = require('crypto');
+const zlib = require('zlib');
+const diff = require('diff');
+const Logger = require('./logger');
+
+const log = Logger.scope('blob-store');
+
+// Content-addressed blob storage for checkpoint file contents.
+//
+// Every distinct file state is stored once, keyed by the SHA-256 of its UTF-8
+// content, under objects/<first two hex chars>/<hash>. Identical pre/post states
+// across checkpoints, files and sessions share a single blob. Each object file
+// starts with a one-byte codec tag followed by the (possibly compressed) payload,
+// so blobs stay readable whatever compression setting wrote them:
+//   0 - stored uncompressed
+//   1 - deflate
+//   2 - zstd (only when the runtime's zlib provides it)
+//
+// Large blobs can be stored as reverse deltas: when a file moves from version A
+// to version B, A is rewritten as a unified diff against B (the newer version
+// stays whole). Delta objects set the high bit of the codec tag and carry the
+// 32-byte base hash before the payload. A blob is kept whole (a keyframe) once
+// the longest chain of deltas leading into it reaches keyframeInterval, so
+// reconstructing any version walks fewer than keyframeInterval deltas.
+//
+// The blobs table tracks a reference count per hash. Counts are maintained by
+// triggers on the checkpoints table, so any insert, hash update or delete of a
+// checkpoint row keeps them correct; delta blobs additionally hold a reference
+// on their base. collectGarbage() removes unreferenced blobs; markReferences()
+// recomputes every count from the referencing tables (mark-and-sweep) in case
+// counts ever drift, e.g. after rows were edited outside the triggers.
+const CODEC_NONE = 0;
+const CODEC_DEFLATE = 1;
+const CODEC_ZSTD = 2;
+const DELTA_FLAG = 0x80;
+const MAX_DELTA_CHAIN_WALK = 256;
+
+const ORPHAN_FILE_GRACE_MS = 60 * 60 * 1000;
+
+class CheckpointBlobStore {
+  constructor(db, objectsDir, options = {}) {
+    this.db = db;
+    this.objectsDir = objectsDir;
+
+    // 'auto' prefers zstd when available and falls back to deflate
+    this.compression = options.compression || 'auto';
+    this.compressionMinBytes = options.compressionMinBytes ?? 1024;
+
+    // Only blobs at least this large are considered for delta storage
+    this.deltaMinBytes = options.deltaMinBytes ?? 4096;
+    this.keyframeInterval = options.keyframeInterval ?? 16;
+
+    // Columns holding blob hashes, counted by markReferences(). Other tables that
+    // reference blobs (with their own refcount triggers) add themselves here.
+    this.referenceSources = [
+      { table: 'checkpoints', column: 'old_hash' },
+      { table: 'checkpoints', column: 'new_hash' },
+      { table: 'blobs', column: 'base_hash' }
+    ];
+
+    this.statements = null;
+  }
+
+  // Register another table/column whose values reference blobs
+  addReferenceSource(table, column) {
+    if (!this.referenceSources.some(source => source.table === table && source.column === column)) {
+      this.referenceSources.push({ table, column });
+    }
+  }
+
+  static hashContent(content) {
+    return crypto.createHash('sha256').update(content, 'utf8').digest('hex');
+  }
+
+  static isZstdAvailable() {
+    return typeof zlib.zstdCompressSync === 'function';
+  }
+
+  // Prepare statements once the schema is current (see CheckpointManager migrations)
+  async initialize() {
+    await fs.mkdir(this.objectsDir, { recursive: true });
+
+    this.statements = {
+      insertBlob: this.db.prepare('INSERT OR IGNORE INTO blobs (hash, size, stored_size) VALUES (?, ?, ?)'),
+      selectBlob: this.db.prepare('SELECT hash, size, stored_size, base_hash, chain_depth FROM blobs WHERE hash = ?'),
+      setBlobBase: this.db.prepare('UPDATE blobs SET base_hash = ?, stored_size = ? WHERE hash = ?'),
+      raiseChainDepth: this.db.prepare('UPDATE blobs SET chain_depth = MAX(chain_depth, ?) WHERE hash = ?'),
+      selectUnreferenced: this.db.prepare('SELECT hash, stored_size FROM blobs WHERE refcount <= 0'),
+      deleteBlob: this.db.prepare('DELETE FROM blobs WHERE hash = ?'),
+      blobExists: this.db.prepare('SELECT 1 FROM blobs WHERE hash = ?'),
+      statistics: this.db.prepare(`
+        SELECT COUNT(*) as blob_count,
+               COALESCE(SUM(size), 0) as logical_bytes,
+               COALESCE(SUM(stored_size), 0) as stored_bytes,
+               COUNT(CASE WHEN base_hash IS NOT NULL THEN 1 END) as delta_blobs,
+               COUNT(CASE WHEN refcount <= 0 THEN 1 END) as unreferenced_blobs
+        FROM blobs
+      `)
+    };
+  }
+
+  // Create the blobs table and the reference counting triggers on checkpoints.
+  // Idempotent; run from the checkpoint database schema migrations.
+  createSchema() {
+    this.db.exec(`
+      CREATE TABLE IF NOT EXISTS blobs (
+        hash TEXT PRIMARY KEY,
+        size INTEGER NOT NULL,
+        stored_size INTEGER NOT NULL,
+        refcount INTEGER NOT NULL DEFAULT 0,
+        base_hash TEXT,
+        chain_depth INTEGER NOT NULL DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+      );
+
+      CREATE TRIGGER IF NOT EXISTS checkpoints_blob_ref_insert
+      AFTER INSERT ON checkpoints
+      BEGIN
+        UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.old_hash;
+        UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.new_hash;
+      END;
+
+      CREATE TRIGGER IF NOT EXISTS checkpoints_blob_ref_update
+      AFTER UPDATE OF old_hash, new_hash ON checkpoints
+      BEGIN
+        UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.old_hash;
+        UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.new_hash;
+        UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.old_hash;
+        UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.new_hash;
+      END;
+
+      CREATE TRIGGER IF NOT EXISTS checkpoints_blob_ref_delete
+      AFTER DELETE ON checkpoints
+      BEGIN
+        UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.old_hash;
+        UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.new_hash;
+      END;
+    `);
+
+    // Delta columns for blob tables created before delta storage
+    const columns = this.db.prepare('PRAGMA table_info(blobs)').all().map(c => c.name);
+    if (!columns.includes('base_hash')) {
+      this.db.exec('ALTER TABLE blobs ADD COLUMN base_hash TEXT');
+    }
+    if (!columns.includes('chain_depth')) {
+      this.db.exec('ALTER TABLE blobs ADD COLUMN chain_depth INTEGER NOT NULL DEFAULT 0');
+    }
+
+    this.db.exec(`
+      CREATE TRIGGER IF NOT EXISTS blobs_base_ref_update
+      AFTER UPDATE OF base_hash ON blobs
+      BEGIN
+        UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.base_hash;
+        UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.base_hash;
+      END;
+
+      CREATE TRIGGER IF NOT EXISTS blobs_base_ref_delete
+      AFTER DELETE ON blobs
+      BEGIN
+        UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.base_hash;
+      END;
+    `);
+  }
+
+  getObjectPath(hash) {
+    return path.join(this.objectsDir, hash.slice(0, 2), hash);
+  }
+
+  // Encode content into the on-disk object format (codec tag [+ base hash] + payload)
+  encode(content, baseHash = null) {
+    const raw = Buffer.from(content, 'utf8');
+    let codec = CODEC_NONE;
+    let payload = raw;
+
+    if (this.compression !== 'none' && raw.length >= this.compressionMinBytes) {
+      const useZstd = this.compression !== 'deflate' && CheckpointBlobStore.isZstdAvailable();
+      const compressed = useZstd ? zlib.zstdCompressSync(raw) : zlib.deflateRawSync(raw);
+      // Keep incompressible content as-is
+      if (compressed.length < raw.length) {
+        codec = useZstd ? CODEC_ZSTD : CODEC_DEFLATE;
+        payload = compressed;
+      }
+    }
+
+    if (baseHash) {
+      return Buffer.concat([Buffer.from([codec | DELTA_FLAG]), Buffer.from(baseHash, 'hex'), payload]);
+    }
+    return Buffer.concat([Buffer.from([codec]), payload]);
+  }
+
+  // Decode an object file into { baseHash, text }. For delta objects text is the
+  // patch that turns the base blob's content into this blob's content.
+  decode(data, hash) {
+    const isDelta = (data[0] & DELTA_FLAG) !== 0;
+    const codec = data[0] & ~DELTA_FLAG;
+    const baseHash = isDelta ? data.subarray(1, 33).toString('hex') : null;
+    const payload = data.subarray(isDelta ? 33 : 1);
+
+    let text;
+    switch (codec) {
+      case CODEC_NONE:
+        text = payload.toString('utf8');
+        break;
+      case CODEC_DEFLATE:
+        text = zlib.inflateRawSync(payload).toString('utf8');
+        break;
+      case CODEC_ZSTD:
+        if (!CheckpointBlobStore.isZstdAvailable()) {
+          throw new Error(`Blob ${hash} is zstd-compressed but zstd is not available in this runtime`);
+        }
+        text = zlib.zstdDecompressSync(payload).toString('utf8');
+        break;
+      default:
+        throw new Error(`Blob ${hash} has unknown codec ${codec}`);
+    }
+
+    return { baseHash, text };
+  }
+
+  // Write content to the object store (if not already present) and return its
+  // descriptor. The blob is not referenced until register() runs in the same
+  // synchronous block as the checkpoint row that points at it.
+  async write(content) {
+    const text = content || '';
+    const hash = CheckpointBlobStore.hashContent(text);
+    const size = Buffer.byteLength(text, 'utf8');
+    const objectPath = this.getObjectPath(hash);
+
+    try {
+      const stat = await fs.stat(objectPath);
+      return { hash, size, storedSize: stat.size, content: text };
+    } catch (error) {
+      // Not stored yet
+    }
+
+    const data = this.encode(text);
+    await fs.mkdir(path.dirname(objectPath), { recursive: true });
+    const tempPath = `${objectPath}.${process.pid}.${crypto.randomBytes(4).toString('hex')}.tmp`;
+    await fs.writeFile(tempPath, data);
+    await fs.rename(tempPath, objectPath);
+
+    return { hash, size, storedSize: data.length, content: text };
+  }
+
+  // Record a written blob in the blobs table. Synchronous so it can run inside a
+  // better-sqlite3 transaction together with the checkpoint row referencing it.
+  register(blob) {
+    const objectPath = this.getObjectPath(blob.hash);
+
+    // A garbage collection may have removed the object between write() and now
+    if (!fsSync.existsSync(objectPath)) {
+      const data = this.encode(blob.content);
+      fsSync.mkdirSync(path.dirname(objectPath), { recursive: true });
+      fsSync.writeFileSync(objectPath, data);
+      blob.storedSize = data.length;
+    }
+
+    this.statements.insertBlob.run(blob.hash, blob.size, blob.storedSize);
+
+    return blob.hash;
+  }
+
+  // Convenience for callers outside a transaction: write + register
+  async put(content) {
+    const blob = await this.write(content);
+    return this.register(blob);
+  }
+
+  // Read a blob's content by hash, resolving delta chains
+  async read(hash) {
+    if (!hash) {
+      return null;
+    }
+
+    // Walk to the nearest keyframe, then apply the patches back up the chain
+    const patches = [];
+    let currentHash = hash;
+    for (;;) {
+      const data = await fs.readFile(this.getObjectPath(currentHash));
+      const { baseHash, text } = this.decode(data, currentHash);
+      if (!baseHash) {
+        let content = text;
+        for (let i = patches.length - 1; i >= 0; i--) {
+          content = diff.applyPatch(content, patches[i].patch);
+          if (content === false) {
+            throw new Error(`Failed to apply delta for blob ${patches[i].hash}`);
+          }
+        }
+        return content;
+      }
+
+      patches.push({ hash: currentHash, patch: text });
+      if (patches.length > MAX_DELTA_CHAIN_WALK) {
+        throw new Error(`Delta chain for blob ${hash} is too long or cyclic`);
+      }
+      currentHash = baseHash;
+    }
+  }
+
+  // Re-store a blob as a reverse delta against a newer version of the same file.
+  // The base must currently be stored whole; since deltas only ever point at whole
+  // blobs when created, chains can't form cycles. Returns true if the blob was
+  // rewritten.
+  async rebaseOnto(hash, baseHash) {
+    if (!hash || !baseHash || hash === baseHash) {
+      return false;
+    }
+
+    const selectStmt = this.statements.selectBlob;
+    const blob = selectStmt.get(hash);
+    const base = selectStmt.get(baseHash);
+    if (!blob || !base || blob.base_hash || base.base_hash || blob.size < this.deltaMinBytes) {
+      return false;
+    }
+
+    // Keyframe: chains leading into this blob are already as long as allowed
+    if (blob.chain_depth + 1 >= this.keyframeInterval) {
+      return false;
+    }
+
+    try {
+      const content = await this.read(hash);
+      const baseContent = await this.read(baseHash);
+
+      let patch;
+      try {
+        patch = diff.createPatch('blob', baseContent, content, '', '', { context: 2 });
+      } catch (error) {
+        return false;
+      }
+
+      // Only keep deltas that reproduce the content exactly and actually save space
+      if (!patch || diff.applyPatch(baseContent, patch) !== content) {
+        return false;
+      }
+
+      const data = this.encode(patch, baseHash);
+      if (data.length >= blob.stored_size) {
+        return false;
+      }
+
+      const objectPath = this.getObjectPath(hash);
+      const tempPath = `${objectPath}.${process.pid}.${crypto.randomBytes(4).toString('hex')}.tmp`;
+      await fs.writeFile(tempPath, data);
+
+      // Update the row before swapping the file: if we crash in between the object
+      // is still whole and the extra reference on the base is harmless
+      const applied = this.db.transaction(() => {
+        const current = selectStmt.get(hash);
+        const currentBase = selectStmt.get(baseHash);
+        if (!current || !currentBase || current.base_hash || currentBase.base_hash ||
+            current.chain_depth + 1 >= this.keyframeInterval) {
+          return false;
+        }
+
+        this.statements.setBlobBase.run(baseHash, data.length, hash);
+        this.statements.raiseChainDepth.run(current.chain_depth + 1, baseHash);
+        return true;
+      })();
+
+      if (!applied) {
+        await fs.unlink(tempPath).catch(() => {});
+        return false;
+      }
+
+      fsSync.renameSync(tempPath, objectPath);
+      return true;
+    } catch (error) {
+      log.error(`Failed to store blob ${hash} as delta:`, error);
+      return false;
+    }
+  }
+
+  // Check whether a blob's object file exists
+  async has(hash) {
+    if (!hash) {
+      return false;
+    }
+
+    try {
+      await fs.access(this.getObjectPath(hash));
+      return true;
+    } catch (error) {
+      return false;
+    }
+  }
+
+  // Remove blobs no checkpoint references anymore, plus object files that never
+  // got registered (e.g. the app quit between write() and register())
+  async collectGarbage() {
+    let removedBlobs = 0;
+    let freedBytes = 0;
+
+    try {
+      // Unlink files and delete their rows in one synchronous pass so a concurrent
+      // register() either sees the row or re-creates the file. The file goes first:
+      // a crash in between leaves a row without a file (re-created on register)
+      // rather than a delta object nobody holds a base reference for.
+      // Deleting a delta releases its base, so repeat until nothing else frees up.
+      const selectStmt = this.statements.selectUnreferenced;
+      const deleteStmt = this.statements.deleteBlob;
+
+      let unreferenced = selectStmt.all();
+      while (unreferenced.length > 0) {
+        for (const blob of unreferenced) {
+          try {
+            fsSync.unlinkSync(this.getObjectPath(blob.hash));
+          } catch (error) {
+            // Already gone
+          }
+          deleteStmt.run(blob.hash);
+          removedBlobs++;
+          freedBytes += blob.stored_size;
+        }
+        unreferenced = selectStmt.all();
+      }
+
+      const orphanResult = await this.sweepOrphanObjects();
+      removedBlobs += orphanResult.removedFiles;
+      freedBytes += orphanResult.freedBytes;
+
+      if (removedBlobs > 0) {
+        log.info(`Checkpoint blob GC removed ${removedBlobs} blobs (${freedBytes} bytes)`);
+      }
+    } catch (error) {
+      log.error('Checkpoint blob garbage collection failed:', error);
+    }
+
+    return { removedBlobs, freedBytes };
+  }
+
+  // Mark phase of a mark-and-sweep: count the references to every blob from all
+  // reference sources and correct any refcount that disagrees. A following
+  // collectGarbage() sweeps what turned out to be unreachable. Returns the
+  // number of corrected blobs.
+  markReferences() {
+    const referenceSelects = this.referenceSources
+      .map(source => `SELECT ${source.column} AS hash FROM ${source.table} WHERE ${source.column} IS NOT NULL`)
+      .join(' UNION ALL ');
+
+    return this.db.transaction(() => {
+      this.db.exec(`
+        CREATE TEMP TABLE IF NOT EXISTS blob_marks (hash TEXT PRIMARY KEY, refs INTEGER NOT NULL);
+        DELETE FROM blob_marks;
+        INSERT INTO blob_marks (hash, refs)
+          SELECT hash, COUNT(*) FROM (${referenceSelects}) GROUP BY hash;
+      `);
+
+      const result = this.db.prepare(`
+        UPDATE blobs
+        SET refcount = COALESCE((SELECT refs FROM blob_marks WHERE blob_marks.hash = blobs.hash), 0)
+        WHERE refcount != COALESCE((SELECT refs FROM blob_marks WHERE blob_marks.hash = blobs.hash), 0)
+      `).run();
+
+      this.db.exec('DELETE FROM blob_marks');
+
+      if (result.changes > 0) {
+        log.warn(`Checkpoint blob mark phase corrected ${result.changes} reference counts`);
+      }
+      return result.changes;
+    })();
+  }
+
+  // Delete object files without a blobs row once they are older than the grace period
+  async sweepOrphanObjects() {
+    let removedFiles = 0;
+    let freedBytes = 0;
+    const knownStmt = this.statements.blobExists;
+    const cutoff = Date.now() - ORPHAN_FILE_GRACE_MS;
+
+    let shards = [];
+    try {
+      shards = await fs.readdir(this.objectsDir);
+    } catch (error) {
+      return { removedFiles, freedBytes };
+    }
+
+    for (const shard of shards) {
+      const shardDir = path.join(this.objectsDir, shard);
+      let entries = [];
+      try {
+        entries = await fs.readdir(shardDir);
+      } catch (error) {
+        continue;
+      }
+
+      for (const entry of entries) {
+        const filePath = path.join(shardDir, entry);
+        try {
+          const stat = await fs.stat(filePath);
+          if (stat.mtimeMs > cutoff) continue;
+
+          const hash = entry.endsWith('.tmp') ? null : entry;
+          if (hash && knownStmt.get(hash)) continue;
+
+          await fs.unlink(filePath);
+          removedFiles++;
+          freedBytes += stat.size;
+        } catch (error) {
+          // Raced with another writer or already removed
+        }
+      }
+    }
+
+    return { removedFiles, freedBytes };
+  }
+
+  // Totals for debugging/statistics
+  getStatistics() {
+    return this.statements.statistics.get();
+  }
+}
+
+module.exports = CheckpointBlobStore;
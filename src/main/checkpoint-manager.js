@@ -2,7 +2,18 @@ const fs = require('fs').promises;
 const path = require('path');
 const { v4: uuidv4 } = require('uuid');
 const Database = require('better-sqlite3');
-const diff = require('diff');
+const CheckpointBlobStore = require('./checkpoint-blob-store');
+const RevertEngine = require('./revert-engine');
+const { mapWithConcurrency } = require('./concurrency');
+const Logger = require('./logger');
+
+const log = Logger.scope('checkpoints');
+
+// A full VACUUM rewrites the whole database synchronously; without an explicit
+// request it only runs below this size
+const FULL_VACUUM_MAX_BYTES = 32 * 1024 * 1024;
+// Free pages released per incremental_vacuum step
+const INCREMENTAL_VACUUM_PAGES = 1024;
 
 class CheckpointManager {
   constructor(app) {
@@ -14,7 +25,46 @@ class CheckpointManager {
     this.checkpointDir = path.join(app.getPath('userData'), 'checkpoints');
     this.checkpointDbPath = path.join(this.checkpointDir, 'metadata.db');
     this.checkpointBlobsDir = path.join(this.checkpointDir, 'blobs');
+    this.checkpointObjectsDir = path.join(this.checkpointBlobsDir, 'objects');
     this.checkpointDb = null;
+    this.blobStore = null;
+    this.statements = null;
+
+    // Background integrity checking (see scheduleIntegrityChecks)
+    this.integrityCheckOptions = {
+      startDelayMs: 10000,          // let startup settle before touching the disk
+      batchSize: 200,
+      batchDelayMs: 250,            // pause between batches
+      fullPassIntervalMs: 7 * 24 * 60 * 60 * 1000 // re-verify old checkpoints weekly
+    };
+    this.integrityCheckTimer = null;
+    this.integrityCheckRunning = false;
+
+    // Max files read/written concurrently during revert and unrevert
+    this.revertConcurrency = 16;
+
+    // Retention policy (see ModelConfig.getCheckpointRetentionSettings and runRetention)
+    this.retentionSettings = {
+      maxAgeDays: 0,               // 0 keeps checkpoints regardless of age
+      maxStorageMB: 0,             // 0 disables the size budget
+      removeDeletedSessions: true  // drop checkpoints of sessions that no longer exist
+    };
+    this.retentionRunning = false;
+    // Returns the ids of existing sessions; set by main.js from SessionManager
+    this.getLiveSessionIds = null;
+  }
+
+  // Apply retention settings (see ModelConfig.getCheckpointRetentionSettings)
+  configureRetention(settings = {}) {
+    if (typeof settings.maxAgeDays === 'number' && settings.maxAgeDays >= 0) {
+      this.retentionSettings.maxAgeDays = settings.maxAgeDays;
+    }
+    if (typeof settings.maxStorageMB === 'number' && settings.maxStorageMB >= 0) {
+      this.retentionSettings.maxStorageMB = settings.maxStorageMB;
+    }
+    if (typeof settings.removeDeletedSessions === 'boolean') {
+      this.retentionSettings.removeDeletedSessions = settings.removeDeletedSessions;
+    }
   }
 
   // Initialize checkpoint system
@@ -24,107 +74,470 @@ class CheckpointManager {
       await fs.mkdir(this.checkpointDir, { recursive: true });
       await fs.mkdir(this.checkpointBlobsDir, { recursive: true });
 
-      // Initialize better-sqlite3 database
+      // Initialize better-sqlite3 database. WAL lets reads proceed while a write
+      // transaction commits and makes each commit a single sequential append.
       this.checkpointDb = new Database(this.checkpointDbPath);
+      this.checkpointDb.pragma('journal_mode = WAL');
+      this.checkpointDb.pragma('synchronous = NORMAL');
+
+      this.blobStore = new CheckpointBlobStore(this.checkpointDb, this.checkpointObjectsDir);
+      this.blobStore.addReferenceSource('file_backups', 'blob_hash');
+
+      // Bring metadata.db up to the current schema version
+      await this.runSchemaMigrations();
+
+      // Statements are prepared once against the migrated schema
+      this.statements = this.prepareStatements();
+      await this.blobStore.initialize();
+
+      log.info('Checkpoint system initialized successfully');
 
-      // Create checkpoints table
-      this.checkpointDb.exec(`
-        CREATE TABLE IF NOT EXISTS checkpoints (
-          id TEXT PRIMARY KEY,
-          session_id TEXT NOT NULL,
-          message_id TEXT NOT NULL,
-          file_path TEXT NOT NULL,
-          ts DATETIME DEFAULT CURRENT_TIMESTAMP,
-          patch_path TEXT,
-          full_snapshot INTEGER DEFAULT 0,
-          old_content TEXT,
-          new_content TEXT,
-          tool_type TEXT
-        )
-      `);
-
-      console.log('Checkpoint system initialized successfully');
-
-      // Run integrity checks at startup
-      await this.performStartupIntegrityChecks();
+      // Integrity checks run in the background so startup isn't blocked by history size
+      this.scheduleIntegrityChecks();
     } catch (error) {
-      console.error('Failed to initialize checkpoint system:', error);
-      console.log('Checkpoint system failed to initialize, running without checkpointing:', error.message);
+      log.error('Failed to initialize checkpoint system:', error);
+      log.warn('Checkpoint system failed to initialize, running without checkpointing:', error.message);
       // Set checkpointDb to null to indicate checkpoint system is disabled
       this.checkpointDb = null;
+      this.blobStore = null;
+      this.statements = null;
       // Don't throw the error - allow the app to continue without checkpointing
     }
   }
 
+  // Versioned schema migrations for metadata.db, applied in order and tracked in
+  // PRAGMA user_version. Each step is idempotent so databases created before the
+  // version was tracked (user_version 0) can replay all of them safely.
+  getSchemaMigrations() {
+    return [
+      {
+        version: 1,
+        description: 'Create checkpoints table',
+        up: () => {
+          this.checkpointDb.exec(`
+            CREATE TABLE IF NOT EXISTS checkpoints (
+              id TEXT PRIMARY KEY,
+              session_id TEXT NOT NULL,
+              message_id TEXT NOT NULL,
+              file_path TEXT NOT NULL,
+              ts DATETIME DEFAULT CURRENT_TIMESTAMP,
+              patch_path TEXT,
+              full_snapshot INTEGER DEFAULT 0,
+              old_content TEXT,
+              new_content TEXT,
+              tool_type TEXT
+            )
+          `);
+        }
+      },
+      {
+        version: 2,
+        description: 'Move checkpoint contents into the content-addressed blob store',
+        up: async () => {
+          this.ensureCheckpointColumns();
+          this.blobStore.createSchema();
+          await this.blobStore.initialize();
+          await this.migrateInlineCheckpointContent();
+        }
+      },
+      {
+        version: 3,
+        description: 'Add pending column and lookup indexes',
+        up: () => {
+          const columns = this.checkpointDb.prepare('PRAGMA table_info(checkpoints)').all().map(c => c.name);
+          this.checkpointDb.transaction(() => {
+            if (!columns.includes('pending')) {
+              this.checkpointDb.exec('ALTER TABLE checkpoints ADD COLUMN pending INTEGER NOT NULL DEFAULT 0');
+            }
+            this.checkpointDb.exec(`
+              UPDATE checkpoints SET pending = CASE WHEN new_hash IS NULL THEN 1 ELSE 0 END;
+
+              CREATE INDEX IF NOT EXISTS idx_checkpoints_session_message
+                ON checkpoints(session_id, message_id, ts);
+              CREATE INDEX IF NOT EXISTS idx_checkpoints_session_ts
+                ON checkpoints(session_id, ts);
+              CREATE INDEX IF NOT EXISTS idx_checkpoints_pending
+                ON checkpoints(session_id, message_id) WHERE pending = 1;
+              CREATE INDEX IF NOT EXISTS idx_blobs_unreferenced
+                ON blobs(hash) WHERE refcount <= 0;
+            `);
+          })();
+        }
+      },
+      {
+        version: 4,
+        description: 'Add maintenance state table',
+        up: () => {
+          this.checkpointDb.exec(`
+            CREATE TABLE IF NOT EXISTS maintenance_state (
+              key TEXT PRIMARY KEY,
+              value TEXT
+            )
+          `);
+        }
+      },
+      {
+        version: 5,
+        description: 'Keep pre-revert file backups in the blob store',
+        up: () => {
+          this.checkpointDb.exec(`
+            CREATE TABLE IF NOT EXISTS file_backups (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              session_id TEXT NOT NULL,
+              message_id TEXT NOT NULL,
+              file_path TEXT NOT NULL,
+              blob_hash TEXT NOT NULL,
+              kind TEXT NOT NULL,
+              created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_file_backups_created ON file_backups(created_at);
+
+            CREATE TRIGGER IF NOT EXISTS file_backups_blob_ref_insert
+            AFTER INSERT ON file_backups
+            BEGIN
+              UPDATE blobs SET refcount = refcount + 1 WHERE hash = NEW.blob_hash;
+            END;
+
+            CREATE TRIGGER IF NOT EXISTS file_backups_blob_ref_delete
+            AFTER DELETE ON file_backups
+            BEGIN
+              UPDATE blobs SET refcount = refcount - 1 WHERE hash = OLD.blob_hash;
+            END;
+          `);
+        }
+      },
+      {
+        version: 6,
+        description: 'Add retention indexes',
+        up: () => {
+          this.checkpointDb.exec(`
+            CREATE INDEX IF NOT EXISTS idx_checkpoints_ts ON checkpoints(ts);
+            CREATE INDEX IF NOT EXISTS idx_file_backups_session ON file_backups(session_id);
+          `);
+        }
+      }
+    ];
+  }
+
+  // Apply pending schema migrations
+  async runSchemaMigrations() {
+    const migrations = this.getSchemaMigrations();
+    const latestVersion = migrations[migrations.length - 1].version;
+    const currentVersion = this.checkpointDb.pragma('user_version', { simple: true });
+
+    if (currentVersion > latestVersion) {
+      log.warn(`Checkpoint database schema v${currentVersion} is newer than this app (v${latestVersion})`);
+      return;
+    }
+
+    for (const migration of migrations) {
+      if (migration.version <= currentVersion) continue;
+
+      log.info(`Migrating checkpoint database to v${migration.version}: ${migration.description}`);
+      await migration.up();
+      this.checkpointDb.pragma(`user_version = ${migration.version}`);
+    }
+  }
+
+  // Prepared statements used on hot paths, created once after migrations
+  prepareStatements() {
+    const db = this.checkpointDb;
+    return {
+      insertCheckpoint: db.prepare(`
+        INSERT INTO checkpoints
+        (id, session_id, message_id, file_path, full_snapshot, old_hash, new_hash, pending, tool_type)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+      `),
+      selectCheckpointHashes: db.prepare('SELECT id, old_hash, new_hash FROM checkpoints WHERE id = ?'),
+      resolvePendingCheckpoint: db.prepare('UPDATE checkpoints SET new_hash = ?, pending = 0 WHERE id = ?'),
+      deleteCheckpoint: db.prepare('DELETE FROM checkpoints WHERE id = ?'),
+      selectPendingCheckpoints: db.prepare(`
+        SELECT * FROM checkpoints
+        WHERE session_id = ? AND message_id = ? AND pending = 1
+        ORDER BY ts DESC
+      `),
+      selectMessageCheckpoints: db.prepare(`
+        SELECT * FROM checkpoints
+        WHERE session_id = ? AND message_id = ?
+        ORDER BY ts DESC
+      `),
+      selectMessageFirstTs: db.prepare(`
+        SELECT MIN(ts) as target_ts FROM checkpoints
+        WHERE message_id = ? AND session_id = ?
+      `),
+      selectSessionCheckpointsSince: db.prepare(`
+        SELECT * FROM checkpoints
+        WHERE session_id = ? AND ts >= ?
+        ORDER BY ts DESC
+      `),
+      selectSessionCheckpoints: db.prepare(`
+        SELECT * FROM checkpoints
+        WHERE session_id = ?
+        ORDER BY ts DESC
+      `),
+      markCheckpointInvalid: db.prepare(`
+        UPDATE checkpoints
+        SET invalid_reason = COALESCE(invalid_reason || ', ', '') || ?
+        WHERE id = ?
+      `),
+      deleteOldInvalidCheckpoints: db.prepare(`
+        DELETE FROM checkpoints
+        WHERE invalid_reason IS NOT NULL
+        AND ts < datetime(?)
+      `),
+      deleteCheckpointsBefore: db.prepare('DELETE FROM checkpoints WHERE ts < datetime(?)'),
+      deleteCheckpointsUpTo: db.prepare('DELETE FROM checkpoints WHERE ts <= ?'),
+      deleteFileBackupsBefore: db.prepare('DELETE FROM file_backups WHERE created_at < datetime(?)'),
+      deleteFileBackupsUpTo: db.prepare('DELETE FROM file_backups WHERE created_at <= ?'),
+      deleteSessionCheckpoints: db.prepare('DELETE FROM checkpoints WHERE session_id = ?'),
+      deleteSessionFileBackups: db.prepare('DELETE FROM file_backups WHERE session_id = ?'),
+      selectStoredSessionIds: db.prepare(`
+        SELECT session_id FROM checkpoints
+        UNION
+        SELECT session_id FROM file_backups
+      `),
+      selectOldestCheckpointTs: db.prepare('SELECT ts FROM checkpoints ORDER BY ts LIMIT 1 OFFSET ?'),
+      selectOldestFileBackupTs: db.prepare('SELECT created_at FROM file_backups ORDER BY created_at LIMIT 1 OFFSET ?'),
+      sessionCheckpointSummary: db.prepare(`
+        SELECT COUNT(*) as count,
+               MIN(ts) as earliest_checkpoint,
+               MAX(ts) as latest_checkpoint
+        FROM checkpoints
+        WHERE session_id = ?
+      `),
+      sessionStatistics: db.prepare(`
+        SELECT
+          COUNT(*) as total_checkpoints,
+          COUNT(DISTINCT message_id) as unique_messages,
+          COUNT(DISTINCT file_path) as unique_files,
+          COUNT(CASE WHEN pending = 1 THEN 1 END) as pending_checkpoints,
+          COUNT(CASE WHEN invalid_reason IS NOT NULL THEN 1 END) as invalid_checkpoints,
+          MIN(ts) as earliest_checkpoint,
+          MAX(ts) as latest_checkpoint
+        FROM checkpoints
+        WHERE session_id = ?
+      `),
+      countMessageCheckpoints: db.prepare(`
+        SELECT COUNT(*) as count FROM checkpoints
+        WHERE session_id = ? AND message_id = ?
+      `),
+      updateCheckpointMessageId: db.prepare(`
+        UPDATE checkpoints
+        SET message_id = ?
+        WHERE session_id = ? AND message_id = ?
+      `),
+      selectMessageIdCandidates: db.prepare(`
+        SELECT id, file_path, message_id FROM checkpoints
+        WHERE session_id = ? AND (message_id = ? OR message_id = ?)
+      `),
+      selectMaxCheckpointRowid: db.prepare('SELECT COALESCE(MAX(rowid), 0) as max_rowid FROM checkpoints'),
+      selectCheckpointBatch: db.prepare(`
+        SELECT rowid as row_id, * FROM checkpoints
+        WHERE rowid > ? AND rowid <= ?
+        ORDER BY rowid
+        LIMIT ?
+      `),
+      insertFileBackup: db.prepare(`
+        INSERT INTO file_backups (session_id, message_id, file_path, blob_hash, kind)
+        VALUES (?, ?, ?, ?, ?)
+      `),
+      getMaintenanceValue: db.prepare('SELECT value FROM maintenance_state WHERE key = ?'),
+      setMaintenanceValue: db.prepare(`
+        INSERT INTO maintenance_state (key, value) VALUES (?, ?)
+        ON CONFLICT(key) DO UPDATE SET value = excluded.value
+      `)
+    };
+  }
+
+  // Add blob reference columns to checkpoint tables created by older versions
+  ensureCheckpointColumns() {
+    const columns = this.checkpointDb.prepare('PRAGMA table_info(checkpoints)').all().map(c => c.name);
+    for (const column of ['old_hash', 'new_hash', 'invalid_reason']) {
+      if (!columns.includes(column)) {
+        this.checkpointDb.exec(`ALTER TABLE checkpoints ADD COLUMN ${column} TEXT`);
+      }
+    }
+  }
+
+  // Move old_content/new_content stored inline in checkpoint rows (and the legacy
+  // [INVALID: ...] markers appended to old_content) into the blob store, delete the
+  // per-checkpoint .patch files, then drop the inline columns.
+  async migrateInlineCheckpointContent() {
+    const columns = this.checkpointDb.prepare('PRAGMA table_info(checkpoints)').all().map(c => c.name);
+    if (!columns.includes('old_content')) {
+      return;
+    }
+
+    const selectBatch = this.checkpointDb.prepare(`
+      SELECT id, patch_path, old_content, new_content FROM checkpoints
+      WHERE old_hash IS NULL
+      ORDER BY ts ASC, rowid ASC
+      LIMIT 100
+    `);
+    const updateStmt = this.checkpointDb.prepare(`
+      UPDATE checkpoints
+      SET old_hash = ?, new_hash = ?, invalid_reason = COALESCE(?, invalid_reason),
+          old_content = NULL, new_content = NULL, patch_path = NULL
+      WHERE id = ?
+    `);
+
+    let migrated = 0;
+    let rows = selectBatch.all();
+    while (rows.length > 0) {
+      const updates = [];
+      for (const row of rows) {
+        let oldContent = row.old_content || '';
+        let invalidReason = null;
+        const invalidMatch = oldContent.match(/( \[INVALID: [^\]]*\])+$/);
+        if (invalidMatch) {
+          invalidReason = Array.from(invalidMatch[0].matchAll(/\[INVALID: ([^\]]*)\]/g), m => m[1]).join(', ');
+          oldContent = oldContent.slice(0, invalidMatch.index);
+        }
+
+        const oldBlob = await this.blobStore.write(oldContent);
+        const newBlob = row.new_content === CheckpointManager.LEGACY_PENDING_CONTENT
+          ? null
+          : await this.blobStore.write(row.new_content || '');
+        updates.push({ row, oldBlob, newBlob, invalidReason });
+      }
+
+      this.checkpointDb.transaction(() => {
+        for (const { row, oldBlob, newBlob, invalidReason } of updates) {
+          this.blobStore.register(oldBlob);
+          if (newBlob) {
+            this.blobStore.register(newBlob);
+          }
+          updateStmt.run(oldBlob.hash, newBlob ? newBlob.hash : null, invalidReason, row.id);
+        }
+      })();
+
+      for (const { row, oldBlob, newBlob } of updates) {
+        if (row.patch_path) {
+          await fs.unlink(path.resolve(this.checkpointDir, row.patch_path)).catch(() => {});
+        }
+        if (newBlob) {
+          await this.blobStore.rebaseOnto(oldBlob.hash, newBlob.hash);
+        }
+      }
+
+      migrated += updates.length;
+      rows = selectBatch.all();
+    }
+
+    try {
+      this.checkpointDb.exec('ALTER TABLE checkpoints DROP COLUMN old_content');
+      this.checkpointDb.exec('ALTER TABLE checkpoints DROP COLUMN new_content');
+    } catch (error) {
+      // Older SQLite without DROP COLUMN; the columns are simply left empty
+      log.debug('Could not drop inline checkpoint content columns:', error.message);
+    }
+
+    log.info(`Migrated ${migrated} checkpoints to the content-addressed blob store`);
+  }
+
+  // A checkpoint is pending until the post-edit content has been captured
+  isCheckpointPending(checkpoint) {
+    return checkpoint.pending === 1;
+  }
+
   // Create a checkpoint for a file edit
   async createCheckpoint(toolUse, sessionId, messageId) {
+    const [checkpointId] = await this.createCheckpoints([toolUse], sessionId, messageId);
+    return checkpointId;
+  }
+
+  // Create checkpoints for all file-modifying tool uses of one assistant turn.
+  // Target files are read and blobs written concurrently, then every row is
+  // committed in a single transaction. Returns checkpoint ids in input order
+  // (null for tool uses that aren't checkpointed or when checkpointing is off).
+  async createCheckpoints(toolUses, sessionId, messageId) {
     if (!this.checkpointDb) {
-      console.warn('Checkpoint database not initialized, skipping checkpoint');
-      return null;
+      log.warn('Checkpoint database not initialized, skipping checkpoint');
+      return toolUses.map(() => null);
     }
 
     try {
-      const { file_path } = toolUse.input;
-      let fullContentBeforeEdit = '';
-      try {
-        fullContentBeforeEdit = await fs.readFile(file_path, 'utf8');
-      } catch (err) {
-        // File doesn't exist, which is fine for a Write operation.
-      }
+      // Read each target file once, even if several tool uses touch it
+      const reads = new Map();
+      const readBeforeEdit = (filePath) => {
+        if (!reads.has(filePath)) {
+          reads.set(filePath, fs.readFile(filePath, 'utf8').catch(() => {
+            // File doesn't exist, which is fine for a Write operation.
+            return '';
+          }));
+        }
+        return reads.get(filePath);
+      };
 
-      // For any file modification, we create a single checkpoint with the full content.
-      const checkpointId = uuidv4();
-      const patchPath = path.join(this.checkpointBlobsDir, `${checkpointId}.patch`);
-      let newContentForCheckpoint;
-      let patch;
-
-      if (toolUse.name === 'Write') {
-        newContentForCheckpoint = toolUse.input.content || '';
-        patch = diff.createPatch(path.basename(file_path), fullContentBeforeEdit, newContentForCheckpoint, 'before', 'after');
-      } else if (toolUse.name === 'Edit' || toolUse.name === 'MultiEdit' || toolUse.name === 'NotebookEdit') {
-        // For edits, we need to capture the actual content after the edit is applied
-        // This is a placeholder that will be updated by updateCheckpointWithPostEditContent
-        newContentForCheckpoint = '...PENDING_POST_EDIT_CONTENT...';
-        patch = `--- before/${path.basename(file_path)}\n+++ after/${path.basename(file_path)}\n...edit applied...`;
-      } else {
-        // Not a tool we're checkpointing
-        return null;
-      }
+      const entries = await Promise.all(toolUses.map(async (toolUse) => {
+        const isWrite = toolUse.name === 'Write';
+        const isEdit = toolUse.name === 'Edit' || toolUse.name === 'MultiEdit' || toolUse.name === 'NotebookEdit';
+        if (!isWrite && !isEdit) {
+          // Not a tool we're checkpointing
+          return null;
+        }
 
-      const tempPatchPath = patchPath + '.tmp';
-      await fs.writeFile(tempPatchPath, patch);
-      await fs.rename(tempPatchPath, patchPath);
+        // For any file modification, we create a single checkpoint with the full content.
+        // Contents go to the blob store; identical states are stored only once.
+        // Edits stay pending until updateCheckpointWithPostEditContent fills them in.
+        const { file_path } = toolUse.input;
+        const fullContentBeforeEdit = await readBeforeEdit(file_path);
+        const [oldBlob, newBlob] = await Promise.all([
+          this.blobStore.write(fullContentBeforeEdit),
+          isWrite ? this.blobStore.write(toolUse.input.content || '') : null
+        ]);
+
+        return { checkpointId: uuidv4(), toolUse, filePath: file_path, oldBlob, newBlob };
+      }));
+
+      const insertCheckpoints = this.checkpointDb.transaction(() => {
+        for (const entry of entries) {
+          if (!entry) continue;
+
+          this.blobStore.register(entry.oldBlob);
+          if (entry.newBlob) {
+            this.blobStore.register(entry.newBlob);
+          }
 
-      const stmt = this.checkpointDb.prepare(`
-        INSERT INTO checkpoints
-        (id, session_id, message_id, file_path, patch_path, full_snapshot, old_content, new_content, tool_type)
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-      `);
-
-      stmt.run(
-        checkpointId,
-        sessionId,
-        messageId,
-        file_path,
-        path.relative(this.checkpointDir, patchPath),
-        1, // All checkpoints are now full snapshots for simplicity
-        fullContentBeforeEdit,
-        newContentForCheckpoint,
-        toolUse.name
-      );
-
-      console.log('Checkpoint created:', checkpointId, 'for', file_path);
-      return checkpointId;
+          this.statements.insertCheckpoint.run(
+            entry.checkpointId,
+            sessionId,
+            messageId,
+            entry.filePath,
+            1, // All checkpoints are now full snapshots for simplicity
+            entry.oldBlob.hash,
+            entry.newBlob ? entry.newBlob.hash : null,
+            entry.newBlob ? 0 : 1,
+            entry.toolUse.name
+          );
+        }
+      });
+      insertCheckpoints();
+
+      // Keep only the newest version whole; the previous one becomes a reverse delta
+      for (const entry of entries) {
+        if (entry && entry.newBlob) {
+          await this.blobStore.rebaseOnto(entry.oldBlob.hash, entry.newBlob.hash);
+        }
+      }
+
+      for (const entry of entries) {
+        if (entry) {
+          log.debug('Checkpoint created:', entry.checkpointId, 'for', entry.filePath);
+        }
+      }
+      return entries.map(entry => (entry ? entry.checkpointId : null));
     } catch (error) {
-      console.error('Failed to create checkpoint:', error);
-      return null;
+      log.error('Failed to create checkpoints:', error);
+      return toolUses.map(() => null);
     }
   }
 
   // Update checkpoint with actual post-edit content after edit operation completes
   async updateCheckpointWithPostEditContent(checkpointId, filePath) {
     if (!this.checkpointDb || !checkpointId) {
-      console.warn('Checkpoint database not initialized or no checkpoint ID provided');
+      log.warn('Checkpoint database not initialized or no checkpoint ID provided');
       return false;
     }
 
@@ -134,50 +547,40 @@ class CheckpointManager {
       try {
         postEditContent = await fs.readFile(filePath, 'utf8');
       } catch (err) {
-        console.error('Failed to read post-edit content for checkpoint update:', err);
+        log.error('Failed to read post-edit content for checkpoint update:', err);
         // Delete the orphaned pending checkpoint
-        this.checkpointDb.prepare('DELETE FROM checkpoints WHERE id = ?').run(checkpointId);
-        console.warn(`Deleted orphaned pending checkpoint: ${checkpointId}`);
+        this.statements.deleteCheckpoint.run(checkpointId);
+        log.warn(`Deleted orphaned pending checkpoint: ${checkpointId}`);
         return false;
       }
 
-      // Update the checkpoint with the actual new content
-      const updateStmt = this.checkpointDb.prepare(`
-        UPDATE checkpoints
-        SET new_content = ?, patch_path = ?
-        WHERE id = ?
-      `);
+      const newBlob = await this.blobStore.write(postEditContent);
+
+      // Update the checkpoint with the actual new content (triggers adjust blob refcounts)
+      const updateCheckpoint = this.checkpointDb.transaction(() => {
+        const checkpoint = this.statements.selectCheckpointHashes.get(checkpointId);
+        if (!checkpoint) {
+          return null;
+        }
+
+        this.blobStore.register(newBlob);
+        this.statements.resolvePendingCheckpoint.run(newBlob.hash, checkpointId);
+        return checkpoint;
+      });
 
-      // Create a proper patch with the actual content
-      const checkpoint = this.checkpointDb.prepare('SELECT * FROM checkpoints WHERE id = ?').get(checkpointId);
+      const checkpoint = updateCheckpoint();
       if (!checkpoint) {
-        console.error('Checkpoint not found for update:', checkpointId);
+        log.error('Checkpoint not found for update:', checkpointId);
         return false;
       }
 
-      const patch = diff.createPatch(
-        path.basename(filePath),
-        checkpoint.old_content,
-        postEditContent,
-        'before',
-        'after'
-      );
-
-      const patchPath = path.join(this.checkpointBlobsDir, `${checkpointId}.patch`);
-      const tempPatchPath = patchPath + '.tmp';
-      await fs.writeFile(tempPatchPath, patch);
-      await fs.rename(tempPatchPath, patchPath);
-
-      updateStmt.run(
-        postEditContent,
-        path.relative(this.checkpointDir, patchPath),
-        checkpointId
-      );
-
-      console.log('Checkpoint updated with post-edit content:', checkpointId, 'for', filePath);
+      // Store the pre-edit version as a reverse delta against the post-edit one
+      await this.blobStore.rebaseOnto(checkpoint.old_hash, newBlob.hash);
+
+      log.debug('Checkpoint updated with post-edit content:', checkpointId, 'for', filePath);
       return true;
     } catch (error) {
-      console.error('Failed to update checkpoint with post-edit content:', error);
+      log.error('Failed to update checkpoint with post-edit content:', error);
       return false;
     }
   }
@@ -189,15 +592,9 @@ class CheckpointManager {
     }
 
     try {
-      const stmt = this.checkpointDb.prepare(`
-        SELECT * FROM checkpoints
-        WHERE session_id = ? AND message_id = ? AND new_content = '...PENDING_POST_EDIT_CONTENT...'
-        ORDER BY ts DESC
-      `);
-
-      return stmt.all(sessionId, messageId);
+      return this.statements.selectPendingCheckpoints.all(sessionId, messageId);
     } catch (error) {
-      console.error('Failed to get pending checkpoints:', error);
+      log.error('Failed to get pending checkpoints:', error);
       return [];
     }
   }
@@ -211,89 +608,73 @@ class CheckpointManager {
 
   // Get checkpoints for a session up to a specific message
   async getCheckpointsToRevert(sessionId, messageId) {
-    console.log('=== GET CHECKPOINTS TO REVERT DEBUG START ===');
-    console.log('Parameters - sessionId:', sessionId, 'messageId:', messageId);
+    log.debug('=== GET CHECKPOINTS TO REVERT DEBUG START ===');
+    log.debug('Parameters - sessionId:', sessionId, 'messageId:', messageId);
 
     if (!this.checkpointDb) {
-      console.log('Checkpoint database not initialized');
-      console.log('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
+      log.debug('Checkpoint database not initialized');
+      log.debug('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
       return [];
     }
 
     // Validate input parameters
     if (!sessionId || !messageId) {
-      console.error('Invalid parameters: sessionId and messageId are required');
-      console.log('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
+      log.error('Invalid parameters: sessionId and messageId are required');
+      log.debug('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
       return [];
     }
 
     try {
-      console.log('Searching for checkpoints with direct message ID match...');
+      log.debug('Searching for checkpoints with direct message ID match...');
 
       // First, try direct message ID lookup (more reliable than timestamp-based)
-      const directMatchStmt = this.checkpointDb.prepare(`
-        SELECT * FROM checkpoints
-        WHERE session_id = ? AND message_id = ?
-        ORDER BY ts DESC
-      `);
-
-      const directMatches = directMatchStmt.all(sessionId, messageId);
-      console.log(`Direct message ID match found ${directMatches.length} checkpoints`);
+      const directMatches = this.statements.selectMessageCheckpoints.all(sessionId, messageId);
+      log.debug(`Direct message ID match found ${directMatches.length} checkpoints`);
 
       if (directMatches.length > 0) {
-        console.log('Using direct message ID matches');
-        console.log('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
+        log.debug('Using direct message ID matches');
+        log.debug('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
         return directMatches;
       }
 
-      console.log('No direct matches found, trying timestamp-based fallback...');
+      log.debug('No direct matches found, trying timestamp-based fallback...');
 
       // Fallback: Get the timestamp of the target message (original approach)
-      const messageStmt = this.checkpointDb.prepare(`
-        SELECT MIN(ts) as target_ts FROM checkpoints
-        WHERE message_id = ? AND session_id = ?
-      `);
-      const messageResult = messageStmt.get(messageId, sessionId);
-      console.log('Message timestamp query result:', messageResult);
+      const messageResult = this.statements.selectMessageFirstTs.get(messageId, sessionId);
+      log.debug('Message timestamp query result:', messageResult);
 
       if (!messageResult || !messageResult.target_ts) {
-        console.log(`No checkpoints found for message ${messageId} in session ${sessionId}`);
+        log.debug(`No checkpoints found for message ${messageId} in session ${sessionId}`);
 
         // Enhanced debugging: check for session and message separately
         await this.debugCheckpointLookup(sessionId, messageId);
 
-        console.log('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
+        log.debug('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
         return [];
       }
 
       // Get all checkpoints from this message's timestamp onwards
-      console.log('Querying for checkpoints from timestamp:', messageResult.target_ts);
-      const stmt = this.checkpointDb.prepare(`
-        SELECT * FROM checkpoints
-        WHERE session_id = ? AND ts >= ?
-        ORDER BY ts DESC
-      `);
-
-      const checkpoints = stmt.all(sessionId, messageResult.target_ts);
-      console.log('Found', checkpoints.length, 'checkpoints from timestamp query');
+      log.debug('Querying for checkpoints from timestamp:', messageResult.target_ts);
+      const checkpoints = this.statements.selectSessionCheckpointsSince.all(sessionId, messageResult.target_ts);
+      log.debug('Found', checkpoints.length, 'checkpoints from timestamp query');
 
       // Validate checkpoint integrity
       const validatedCheckpoints = await this.validateCheckpointIntegrity(checkpoints);
-      console.log('After validation:', validatedCheckpoints.length, 'valid checkpoints');
+      log.debug('After validation:', validatedCheckpoints.length, 'valid checkpoints');
 
-      console.log('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
+      log.debug('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
       return validatedCheckpoints;
     } catch (error) {
-      console.error('=== GET CHECKPOINTS TO REVERT DEBUG ERROR ===');
-      console.error('Failed to get checkpoints:', error);
-      console.error('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
+      log.error('=== GET CHECKPOINTS TO REVERT DEBUG ERROR ===');
+      log.error('Failed to get checkpoints:', error);
+      log.error('=== GET CHECKPOINTS TO REVERT DEBUG END ===');
       return [];
     }
   }
 
   // Enhanced debugging for checkpoint lookup failures
   async debugCheckpointLookup(sessionId, messageId) {
-    console.log('=== CHECKPOINT LOOKUP DEBUG ===');
+    log.debug('=== CHECKPOINT LOOKUP DEBUG ===');
 
     try {
       // Check if session exists at all in database
@@ -302,13 +683,13 @@ class CheckpointManager {
       `).all(sessionId);
 
       if (sessionCheckpoints.length === 0) {
-        console.log(`  Session ${sessionId} has no checkpoints in database`);
+        log.debug(`  Session ${sessionId} has no checkpoints in database`);
 
         // Show available sessions for debugging
         const availableSessions = this.checkpointDb.prepare(`
           SELECT DISTINCT session_id FROM checkpoints ORDER BY ts DESC LIMIT 5
         `).all();
-        console.log(`  Available sessions (last 5):`, availableSessions.map(s => s.session_id));
+        log.debug(`  Available sessions (last 5):`, availableSessions.map(s => s.session_id));
 
         // Check for similar session IDs (in case of UUID mismatch)
         const sessionPrefix = sessionId.substring(0, 8);
@@ -317,16 +698,16 @@ class CheckpointManager {
         `).all(`%${sessionPrefix}%`);
 
         if (similarSessions.length > 0) {
-          console.log(`  Similar session IDs found:`, similarSessions.map(s => s.session_id));
+          log.debug(`  Similar session IDs found:`, similarSessions.map(s => s.session_id));
         }
       } else {
-        console.log(`  Session ${sessionId} exists in database`);
+        log.debug(`  Session ${sessionId} exists in database`);
 
         // Check if message exists in this session
         const messageCheckpoints = this.checkpointDb.prepare(`
           SELECT message_id FROM checkpoints WHERE session_id = ?
         `).all(sessionId);
-        console.log(`  Available message IDs in this session:`, messageCheckpoints.map(m => m.message_id));
+        log.debug(`  Available message IDs in this session:`, messageCheckpoints.map(m => m.message_id));
 
         // Check for similar message IDs (in case of message ID update issues)
         const messagePrefix = messageId.substring(0, 10);
@@ -335,14 +716,14 @@ class CheckpointManager {
         `).all(`%${messagePrefix}%`);
 
         if (similarMessages.length > 0) {
-          console.log(`  Similar message IDs found:`, similarMessages.map(m => m.message_id));
+          log.debug(`  Similar message IDs found:`, similarMessages.map(m => m.message_id));
         }
       }
     } catch (debugError) {
-      console.error('Error during checkpoint lookup debugging:', debugError);
+      log.error('Error during checkpoint lookup debugging:', debugError);
     }
 
-    console.log('=== CHECKPOINT LOOKUP DEBUG END ===');
+    log.debug('=== CHECKPOINT LOOKUP DEBUG END ===');
   }
 
   // Validate checkpoint integrity
@@ -360,32 +741,29 @@ class CheckpointManager {
         } catch (error) {
           // File doesn't exist - this might be intentional (file was deleted)
           // Don't invalidate the checkpoint, but log it
-          console.log(`Checkpoint ${checkpoint.id} references missing file: ${checkpoint.file_path}`);
+          log.debug(`Checkpoint ${checkpoint.id} references missing file: ${checkpoint.file_path}`);
         }
       }
 
-      // Check if patch file exists and is readable
-      if (checkpoint.patch_path) {
-        const fullPatchPath = path.resolve(this.checkpointDir, checkpoint.patch_path);
-        try {
-          await fs.access(fullPatchPath);
-        } catch (error) {
-          console.error(`Checkpoint ${checkpoint.id} has missing patch file: ${fullPatchPath}`);
-          validationErrors.push(`Missing patch file: ${checkpoint.patch_path}`);
+      // Check that the referenced content blobs exist
+      for (const hash of [checkpoint.old_hash, checkpoint.new_hash]) {
+        if (hash && !(await this.blobStore.has(hash))) {
+          log.error(`Checkpoint ${checkpoint.id} has missing content blob: ${hash}`);
+          validationErrors.push(`Missing content blob: ${hash}`);
           isValid = false;
         }
       }
 
       // Check for pending content that was never updated
-      if (checkpoint.new_content === '...PENDING_POST_EDIT_CONTENT...') {
-        console.warn(`Checkpoint ${checkpoint.id} has unresolved pending content`);
+      if (this.isCheckpointPending(checkpoint)) {
+        log.warn(`Checkpoint ${checkpoint.id} has unresolved pending content`);
         validationErrors.push('Unresolved pending content');
         // Don't invalidate - this might be recoverable
       }
 
       // Check for required fields
       if (!checkpoint.id || !checkpoint.session_id || !checkpoint.message_id) {
-        console.error(`Checkpoint ${checkpoint.id || 'UNKNOWN'} missing required fields`);
+        log.error(`Checkpoint ${checkpoint.id || 'UNKNOWN'} missing required fields`);
         validationErrors.push('Missing required fields');
         isValid = false;
       }
@@ -393,7 +771,7 @@ class CheckpointManager {
       if (isValid) {
         validCheckpoints.push(checkpoint);
       } else {
-        console.error(`Checkpoint ${checkpoint.id} failed validation:`, validationErrors);
+        log.error(`Checkpoint ${checkpoint.id} failed validation:`, validationErrors);
         // Consider marking as invalid in database for cleanup
         await this.markCheckpointAsInvalid(checkpoint.id, validationErrors);
       }
@@ -405,95 +783,145 @@ class CheckpointManager {
   // Mark a checkpoint as invalid for potential cleanup
   async markCheckpointAsInvalid(checkpointId, errors) {
     try {
-      const updateStmt = this.checkpointDb.prepare(`
-        UPDATE checkpoints
-        SET old_content = old_content || ' [INVALID: ' || ? || ']'
-        WHERE id = ?
-      `);
-
-      updateStmt.run(errors.join(', '), checkpointId);
-      console.log(`Marked checkpoint ${checkpointId} as invalid`);
+      this.statements.markCheckpointInvalid.run(errors.join(', '), checkpointId);
+      log.debug(`Marked checkpoint ${checkpointId} as invalid`);
     } catch (error) {
-      console.error(`Failed to mark checkpoint ${checkpointId} as invalid:`, error);
+      log.error(`Failed to mark checkpoint ${checkpointId} as invalid:`, error);
     }
   }
 
-  // Perform integrity checks at startup
-  async performStartupIntegrityChecks() {
-    if (!this.checkpointDb) {
-      console.log('Checkpoint database not available for integrity checks');
+  // Small persistent key/value store for maintenance jobs
+  getMaintenanceValue(key) {
+    const row = this.statements.getMaintenanceValue.get(key);
+    return row ? row.value : null;
+  }
+
+  setMaintenanceValue(key, value) {
+    this.statements.setMaintenanceValue.run(key, String(value));
+  }
+
+  // Start the background integrity check after a short delay
+  scheduleIntegrityChecks(delayMs = this.integrityCheckOptions.startDelayMs) {
+    if (!this.checkpointDb || this.integrityCheckTimer || this.integrityCheckRunning) {
+      return;
+    }
+
+    // Only checkpoints that exist now are checked; ones created by runs in this
+    // session may still be legitimately pending and are left for the next start
+    const endRowid = this.statements.selectMaxCheckpointRowid.get().max_rowid;
+
+    this.integrityCheckTimer = setTimeout(() => {
+      this.integrityCheckTimer = null;
+      this.runIntegrityChecks(endRowid).catch(error => {
+        log.error('Background checkpoint integrity check failed:', error);
+      });
+    }, delayMs);
+  }
+
+  // Verify checkpoints up to endRowid in throttled batches, in rowid order. The last
+  // checked rowid is persisted as a high-water mark, so each start only looks at
+  // checkpoints created since the previous run (plus a full re-verification once a week).
+  async runIntegrityChecks(endRowid) {
+    if (!this.checkpointDb || this.integrityCheckRunning) {
       return;
     }
 
-    console.log('=== CHECKPOINT STARTUP INTEGRITY CHECKS ===');
+    this.integrityCheckRunning = true;
+    const { batchSize, batchDelayMs, fullPassIntervalMs } = this.integrityCheckOptions;
 
     try {
-      // Get all checkpoints for integrity checking
-      const allCheckpointsStmt = this.checkpointDb.prepare(`
-        SELECT * FROM checkpoints ORDER BY ts DESC
-      `);
-
-      const allCheckpoints = allCheckpointsStmt.all();
-      console.log(`Checking integrity of ${allCheckpoints.length} total checkpoints`);
-
-      let validCount = 0;
-      let invalidCount = 0;
-      let pendingCount = 0;
-      let orphanedCount = 0;
-
-      // Check each checkpoint
-      for (const checkpoint of allCheckpoints) {
-        const issues = [];
-
-        // Check for missing patch files
-        if (checkpoint.patch_path) {
-          const fullPatchPath = path.resolve(this.checkpointDir, checkpoint.patch_path);
-          try {
-            await fs.access(fullPatchPath);
-          } catch (error) {
-            issues.push('Missing patch file');
-          }
-        }
+      let highWaterMark = Number(this.getMaintenanceValue('integrity_high_water_mark') || 0);
+
+      // Start a fresh full pass once the current one is older than the interval
+      const passStartedAt = Date.parse(this.getMaintenanceValue('integrity_pass_started_at') || '');
+      if (highWaterMark === 0 || Number.isNaN(passStartedAt) || Date.now() - passStartedAt > fullPassIntervalMs) {
+        highWaterMark = 0;
+        this.setMaintenanceValue('integrity_high_water_mark', 0);
+        this.setMaintenanceValue('integrity_pass_started_at', new Date().toISOString());
+      }
 
-        // Check for pending content
-        if (checkpoint.new_content === '...PENDING_POST_EDIT_CONTENT...') {
-          pendingCount++;
-          console.log(`Found pending checkpoint: ${checkpoint.id} for file: ${checkpoint.file_path}`);
+      if (highWaterMark >= endRowid) {
+        log.debug('Checkpoint integrity check: no new checkpoints since last run');
+      } else {
+        log.debug(`Checkpoint integrity check: verifying rowids ${highWaterMark + 1}-${endRowid} in the background`);
+      }
 
-          // Try to resolve pending content
-          const resolved = await this.tryResolvePendingContent(checkpoint);
-          if (!resolved) {
-            issues.push('Unresolvable pending content');
-          }
+      const totals = { valid: 0, invalid: 0, pending: 0 };
+      while (highWaterMark < endRowid) {
+        const batch = this.statements.selectCheckpointBatch.all(highWaterMark, endRowid, batchSize);
+        if (batch.length === 0) break;
+
+        const blobExists = new Map();
+        for (const checkpoint of batch) {
+          const result = await this.checkCheckpointIntegrity(checkpoint, blobExists);
+          totals[result.valid ? 'valid' : 'invalid']++;
+          if (result.pending) totals.pending++;
+          if (!this.checkpointDb) return;
         }
 
-        // Check for required fields
-        if (!checkpoint.id || !checkpoint.session_id || !checkpoint.message_id) {
-          issues.push('Missing required fields');
-        }
+        highWaterMark = batch[batch.length - 1].row_id;
+        this.setMaintenanceValue('integrity_high_water_mark', highWaterMark);
 
-        // Check if already marked as invalid
-        if (checkpoint.old_content?.includes('[INVALID:')) {
-          invalidCount++;
-        } else if (issues.length > 0) {
-          console.warn(`Checkpoint ${checkpoint.id} has issues:`, issues);
-          await this.markCheckpointAsInvalid(checkpoint.id, issues);
-          invalidCount++;
-        } else {
-          validCount++;
-        }
+        await new Promise(resolve => setTimeout(resolve, batchDelayMs));
+        if (!this.checkpointDb) return;
       }
 
-      console.log(`Integrity check results: ${validCount} valid, ${invalidCount} invalid, ${pendingCount} pending`);
+      if (totals.valid + totals.invalid > 0) {
+        log.info(`Integrity check results: ${totals.valid} valid, ${totals.invalid} invalid, ${totals.pending} pending`);
+      }
 
-      // Clean up very old invalid checkpoints (older than 30 days)
-      await this.cleanupOldInvalidCheckpoints();
+      // Drop content blobs nothing references anymore, and apply the limits the user set
+      await this.runRetention({ automatic: true });
+    } finally {
+      this.integrityCheckRunning = false;
+    }
+  }
 
-    } catch (error) {
-      console.error('Failed to perform startup integrity checks:', error);
+  // Check a single checkpoint, marking it invalid if needed.
+  // blobExists caches blob lookups across a batch.
+  async checkCheckpointIntegrity(checkpoint, blobExists = new Map()) {
+    const issues = [];
+    let pending = false;
+
+    // Check for missing content blobs
+    for (const hash of [checkpoint.old_hash, checkpoint.new_hash]) {
+      if (!hash) continue;
+      if (!blobExists.has(hash)) {
+        blobExists.set(hash, await this.blobStore.has(hash));
+      }
+      if (!blobExists.get(hash)) {
+        issues.push('Missing content blob');
+        break;
+      }
     }
 
-    console.log('=== CHECKPOINT STARTUP INTEGRITY CHECKS COMPLETE ===');
+    // Check for pending content
+    if (this.isCheckpointPending(checkpoint)) {
+      pending = true;
+      log.debug(`Found pending checkpoint: ${checkpoint.id} for file: ${checkpoint.file_path}`);
+
+      // Try to resolve pending content
+      const resolved = await this.tryResolvePendingContent(checkpoint);
+      if (!resolved) {
+        issues.push('Unresolvable pending content');
+      }
+    }
+
+    // Check for required fields
+    if (!checkpoint.id || !checkpoint.session_id || !checkpoint.message_id) {
+      issues.push('Missing required fields');
+    }
+
+    // Check if already marked as invalid
+    if (checkpoint.invalid_reason) {
+      return { valid: false, pending };
+    }
+    if (issues.length > 0) {
+      log.warn(`Checkpoint ${checkpoint.id} has issues:`, issues);
+      await this.markCheckpointAsInvalid(checkpoint.id, issues);
+      return { valid: false, pending };
+    }
+    return { valid: true, pending };
   }
 
   // Try to resolve pending content for a checkpoint
@@ -506,20 +934,20 @@ class CheckpointManager {
       // Check if the file exists and try to read its current content
       const currentContent = await fs.readFile(checkpoint.file_path, 'utf8');
 
-      console.log(`Attempting to resolve pending content for checkpoint ${checkpoint.id}`);
+      log.debug(`Attempting to resolve pending content for checkpoint ${checkpoint.id}`);
 
       // Update the checkpoint with the current file content
       const success = await this.updateCheckpointWithPostEditContent(checkpoint.id, checkpoint.file_path);
 
       if (success) {
-        console.log(`Successfully resolved pending content for checkpoint ${checkpoint.id}`);
+        log.debug(`Successfully resolved pending content for checkpoint ${checkpoint.id}`);
         return true;
       } else {
-        console.warn(`Failed to resolve pending content for checkpoint ${checkpoint.id}`);
+        log.warn(`Failed to resolve pending content for checkpoint ${checkpoint.id}`);
         return false;
       }
     } catch (error) {
-      console.log(`Cannot resolve pending content for checkpoint ${checkpoint.id}: file not accessible`);
+      log.debug(`Cannot resolve pending content for checkpoint ${checkpoint.id}: file not accessible`);
       return false;
     }
   }
@@ -534,19 +962,256 @@ class CheckpointManager {
       const thirtyDaysAgo = new Date();
       thirtyDaysAgo.setDate(thirtyDaysAgo.getDate() - 30);
 
-      const cleanupStmt = this.checkpointDb.prepare(`
-        DELETE FROM checkpoints
-        WHERE old_content LIKE '%[INVALID:%'
-        AND ts < ?
-      `);
-
-      const result = cleanupStmt.run(thirtyDaysAgo.toISOString());
+      const result = this.statements.deleteOldInvalidCheckpoints.run(thirtyDaysAgo.toISOString());
 
       if (result.changes > 0) {
-        console.log(`Cleaned up ${result.changes} old invalid checkpoints`);
+        log.info(`Cleaned up ${result.changes} old invalid checkpoints`);
+      }
+    } catch (error) {
+      log.error('Failed to clean up old invalid checkpoints:', error);
+    }
+  }
+
+  // Delete all checkpoints and revert backups of a session (e.g. after the
+  // session itself was deleted). Their blobs are freed by the next retention run.
+  deleteSessionCheckpoints(sessionId) {
+    if (!this.checkpointDb || !sessionId) {
+      return 0;
+    }
+
+    try {
+      const deleted = this.checkpointDb.transaction(() => {
+        const checkpoints = this.statements.deleteSessionCheckpoints.run(sessionId).changes;
+        const backups = this.statements.deleteSessionFileBackups.run(sessionId).changes;
+        return checkpoints + backups;
+      })();
+
+      if (deleted > 0) {
+        log.info(`Deleted ${deleted} checkpoint records of session ${sessionId}`);
+      }
+      return deleted;
+    } catch (error) {
+      log.error('Failed to delete session checkpoints:', error);
+      return 0;
+    }
+  }
+
+  // Retention engine. Deletes checkpoints and revert backups by session (sessions
+  // no longer known to the SessionManager), by age and by total blob storage
+  // budget (oldest first), recounts blob references over the database
+  // (mark-and-sweep), removes unreferenced blobs and leftover files from older
+  // storage formats, then returns freed database pages to the filesystem.
+  // options override this.retentionSettings for a single run. The automatic
+  // run after the startup integrity check (options.automatic) leaves the
+  // deleted-sessions sweep to explicit runs and deletes by age or size only
+  // when the user set those limits (both default to 0, keeping everything).
+  async runRetention(options = {}) {
+    if (!this.checkpointDb || this.retentionRunning) {
+      return null;
+    }
+    this.retentionRunning = true;
+
+    const settings = { ...this.retentionSettings, ...options };
+    const startedAt = Date.now();
+    const report = {
+      deletedSessionRecords: 0,
+      deletedExpiredRecords: 0,
+      deletedOverBudgetRecords: 0,
+      correctedRefcounts: 0,
+      removedBlobs: 0,
+      freedBlobBytes: 0,
+      removedLegacyFiles: 0,
+      freedLegacyBytes: 0,
+      reclaimedDatabaseBytes: 0,
+      reclaimedBytes: 0,
+      durationMs: 0
+    };
+
+    try {
+      await this.cleanupOldInvalidCheckpoints();
+
+      // Sessions deleted in the SessionManager
+      const liveSessionIds = settings.removeDeletedSessions && !settings.automatic && typeof this.getLiveSessionIds === 'function'
+        ? new Set(this.getLiveSessionIds())
+        : new Set();
+      // An empty list more likely means sessions failed to load than that none
+      // exist (clearing all sessions deletes their checkpoints directly)
+      if (liveSessionIds.size > 0) {
+        for (const { session_id: sessionId } of this.statements.selectStoredSessionIds.all()) {
+          if (!liveSessionIds.has(sessionId)) {
+            report.deletedSessionRecords += this.deleteSessionCheckpoints(sessionId);
+          }
+        }
+      }
+
+      // Expired by age
+      if (settings.maxAgeDays > 0) {
+        const cutoff = new Date(Date.now() - settings.maxAgeDays * 24 * 60 * 60 * 1000).toISOString();
+        report.deletedExpiredRecords = this.checkpointDb.transaction(() =>
+          this.statements.deleteCheckpointsBefore.run(cutoff).changes +
+          this.statements.deleteFileBackupsBefore.run(cutoff).changes
+        )();
+      }
+
+      // Mark reachable blobs, then sweep everything else
+      report.correctedRefcounts = this.blobStore.markReferences();
+      this.addGarbageCollection(report, await this.blobStore.collectGarbage());
+
+      // Size budget: evict the oldest records until the blob store fits
+      if (settings.maxStorageMB > 0) {
+        const budgetBytes = settings.maxStorageMB * 1024 * 1024;
+        while (this.blobStore.getStatistics().stored_bytes > budgetBytes) {
+          const evicted = this.evictOldestRecords(200);
+          if (evicted === 0) break;
+          report.deletedOverBudgetRecords += evicted;
+          this.addGarbageCollection(report, await this.blobStore.collectGarbage());
+          if (!this.checkpointDb) return null;
+        }
+      }
+
+      const legacy = await this.removeLegacyBlobFiles();
+      report.removedLegacyFiles = legacy.removedFiles;
+      report.freedLegacyBytes = legacy.freedBytes;
+
+      report.reclaimedDatabaseBytes = await this.compactDatabase({ allowFullVacuum: !settings.automatic });
+      if (!this.checkpointDb) return null;
+      report.reclaimedBytes = report.freedBlobBytes + report.freedLegacyBytes + report.reclaimedDatabaseBytes;
+      report.durationMs = Date.now() - startedAt;
+
+      this.setMaintenanceValue('retention_last_report', JSON.stringify({ ...report, finishedAt: new Date().toISOString() }));
+      log.info(`Checkpoint retention reclaimed ${report.reclaimedBytes} bytes in ${report.durationMs}ms:`, report);
+      return report;
+    } catch (error) {
+      log.error('Checkpoint retention failed:', error);
+      return null;
+    } finally {
+      this.retentionRunning = false;
+    }
+  }
+
+  addGarbageCollection(report, gcResult) {
+    report.removedBlobs += gcResult.removedBlobs;
+    report.freedBlobBytes += gcResult.freedBytes;
+  }
+
+  // Delete the oldest batch of checkpoints together with revert backups that are
+  // no newer than them (or the oldest backups once no checkpoints are left).
+  // Returns the number of deleted rows.
+  evictOldestRecords(batchSize) {
+    return this.checkpointDb.transaction(() => {
+      const checkpointRow = this.statements.selectOldestCheckpointTs.get(batchSize - 1) ||
+        this.statements.selectOldestCheckpointTs.get(0);
+      if (checkpointRow) {
+        // Rows sharing the boundary timestamp go together so messages aren't split
+        return this.statements.deleteCheckpointsUpTo.run(checkpointRow.ts).changes +
+          this.statements.deleteFileBackupsUpTo.run(checkpointRow.ts).changes;
       }
+
+      const backupRow = this.statements.selectOldestFileBackupTs.get(batchSize - 1) ||
+        this.statements.selectOldestFileBackupTs.get(0);
+      return backupRow ? this.statements.deleteFileBackupsUpTo.run(backupRow.created_at).changes : 0;
+    })();
+  }
+
+  // Remove .patch and .bak/.unrevert-bak files written by older versions directly
+  // into the blobs directory; nothing reads them anymore
+  async removeLegacyBlobFiles() {
+    let removedFiles = 0;
+    let freedBytes = 0;
+    const legacySuffixes = ['.patch', '.patch.tmp', '.bak', '.unrevert-bak'];
+
+    let entries = [];
+    try {
+      entries = await fs.readdir(this.checkpointBlobsDir, { withFileTypes: true });
     } catch (error) {
-      console.error('Failed to clean up old invalid checkpoints:', error);
+      return { removedFiles, freedBytes };
+    }
+
+    for (const entry of entries) {
+      if (!entry.isFile() || !legacySuffixes.some(suffix => entry.name.endsWith(suffix))) continue;
+
+      const filePath = path.join(this.checkpointBlobsDir, entry.name);
+      try {
+        const stat = await fs.stat(filePath);
+        await fs.unlink(filePath);
+        removedFiles++;
+        freedBytes += stat.size;
+      } catch (error) {
+        // Already removed
+      }
+    }
+
+    if (removedFiles > 0) {
+      log.info(`Removed ${removedFiles} legacy checkpoint files (${freedBytes} bytes)`);
+    }
+    return { removedFiles, freedBytes };
+  }
+
+  // Return free database pages to the filesystem. Switching the database to
+  // incremental auto-vacuum needs one full VACUUM, which blocks the main
+  // process while it rewrites the file; it is done only on an explicit run
+  // (options.allowFullVacuum) or while the database is small. After that the
+  // free list is released in bounded incremental_vacuum steps with a pause
+  // between them, like the integrity check batches. Returns the number of
+  // bytes metadata.db (plus its WAL) shrank by.
+  async compactDatabase(options = {}) {
+    const sizeOnDisk = async () => {
+      let total = 0;
+      for (const filePath of [this.checkpointDbPath, `${this.checkpointDbPath}-wal`]) {
+        try {
+          total += (await fs.stat(filePath)).size;
+        } catch (error) {
+          // No WAL file
+        }
+      }
+      return total;
+    };
+
+    try {
+      const before = await sizeOnDisk();
+
+      // auto_vacuum: 0 = none, 1 = full, 2 = incremental
+      if (this.checkpointDb.pragma('auto_vacuum', { simple: true }) !== 2) {
+        if (!options.allowFullVacuum && before > FULL_VACUUM_MAX_BYTES) {
+          log.debug('Checkpoint database not compacted; a full VACUUM runs on the next explicit retention run');
+          return 0;
+        }
+        this.checkpointDb.pragma('auto_vacuum = INCREMENTAL');
+        this.checkpointDb.exec('VACUUM');
+      } else {
+        const { batchDelayMs } = this.integrityCheckOptions;
+        let freePages = this.checkpointDb.pragma('freelist_count', { simple: true });
+        while (freePages > 0) {
+          this.checkpointDb.exec(`PRAGMA incremental_vacuum(${INCREMENTAL_VACUUM_PAGES})`);
+          const remaining = this.checkpointDb.pragma('freelist_count', { simple: true });
+          if (remaining >= freePages) break;
+          freePages = remaining;
+          if (freePages > 0) {
+            await new Promise(resolve => setTimeout(resolve, batchDelayMs));
+            if (!this.checkpointDb) return 0;
+          }
+        }
+      }
+      this.checkpointDb.pragma('wal_checkpoint(TRUNCATE)');
+
+      return Math.max(0, before - await sizeOnDisk());
+    } catch (error) {
+      log.error('Failed to compact checkpoint database:', error);
+      return 0;
+    }
+  }
+
+  // Last retention report, or null if retention never ran
+  getLastRetentionReport() {
+    if (!this.checkpointDb) {
+      return null;
+    }
+
+    try {
+      const value = this.getMaintenanceValue('retention_last_report');
+      return value ? JSON.parse(value) : null;
+    } catch (error) {
+      return null;
     }
   }
 
@@ -557,15 +1222,7 @@ class CheckpointManager {
     }
 
     try {
-      const stmt = this.checkpointDb.prepare(`
-        SELECT COUNT(*) as count,
-               MIN(ts) as earliest_checkpoint,
-               MAX(ts) as latest_checkpoint
-        FROM checkpoints
-        WHERE session_id = ?
-      `);
-
-      const result = stmt.get(sessionId);
+      const result = this.statements.sessionCheckpointSummary.get(sessionId);
 
       return {
         valid: result.count > 0,
@@ -575,7 +1232,7 @@ class CheckpointManager {
         reason: result.count > 0 ? 'Session has checkpoints' : 'No checkpoints found for session'
       };
     } catch (error) {
-      console.error('Failed to validate session ID in checkpoints:', error);
+      log.error('Failed to validate session ID in checkpoints:', error);
       return { valid: false, reason: `Validation error: ${error.message}` };
     }
   }
@@ -587,30 +1244,18 @@ class CheckpointManager {
     }
 
     try {
-      const stmt = this.checkpointDb.prepare(`
-        SELECT
-          COUNT(*) as total_checkpoints,
-          COUNT(DISTINCT message_id) as unique_messages,
-          COUNT(DISTINCT file_path) as unique_files,
-          COUNT(CASE WHEN new_content = '...PENDING_POST_EDIT_CONTENT...' THEN 1 END) as pending_checkpoints,
-          COUNT(CASE WHEN old_content LIKE '%[INVALID:%' THEN 1 END) as invalid_checkpoints,
-          MIN(ts) as earliest_checkpoint,
-          MAX(ts) as latest_checkpoint
-        FROM checkpoints
-        WHERE session_id = ?
-      `);
-
-      return stmt.get(sessionId);
+      return this.statements.sessionStatistics.get(sessionId);
     } catch (error) {
-      console.error('Failed to get session statistics:', error);
+      log.error('Failed to get session statistics:', error);
       return null;
     }
   }
 
-  // Revert files to a checkpoint
-  async revertToCheckpoint(sessionId, messageId) {
-    console.log('=== REVERT TO CHECKPOINT OPERATION START ===');
-    console.log('Parameters:', { sessionId, messageId });
+  // Revert files to a checkpoint. All files are reverted together or not at all.
+  // Pass { report: {} } to receive per-file timings in report.timings.
+  async revertToCheckpoint(sessionId, messageId, options = {}) {
+    log.debug('=== REVERT TO CHECKPOINT OPERATION START ===');
+    log.debug('Parameters:', { sessionId, messageId });
 
     if (!this.checkpointDb) {
       throw new Error('Checkpoint database not initialized');
@@ -618,96 +1263,52 @@ class CheckpointManager {
 
     try {
       const checkpoints = await this.getCheckpointsToRevert(sessionId, messageId);
-      const revertedFiles = [];
-      const failedFiles = [];
 
-      console.log(`Found ${checkpoints.length} checkpoints to process for revert`);
+      log.debug(`Found ${checkpoints.length} checkpoints to process for revert`);
 
       // Check if any checkpoints were found
       if (checkpoints.length === 0) {
-        console.log(`No file changes to revert for message ${messageId} in session ${sessionId}`);
+        log.debug(`No file changes to revert for message ${messageId} in session ${sessionId}`);
         return [];
       }
 
-      // Group checkpoints by file and revert in reverse chronological order
-      const fileGroups = {};
-      checkpoints.forEach(checkpoint => {
-        if (!fileGroups[checkpoint.file_path]) {
-          fileGroups[checkpoint.file_path] = [];
-        }
-        fileGroups[checkpoint.file_path].push(checkpoint);
-      });
-
-      console.log(`Processing ${Object.keys(fileGroups).length} unique files for revert`);
-
-      for (const [filePath, checkpointList] of Object.entries(fileGroups)) {
-        // Get the most recent checkpoint for this file
-        const latestCheckpoint = checkpointList[0];
-        console.log(`Reverting file: ${filePath} using checkpoint ${latestCheckpoint.id}`);
+      // Use the most recent checkpoint of each file (rows are ordered newest first)
+      const latestCheckpoints = this.getLatestCheckpointPerFile(checkpoints);
+      log.debug(`Processing ${latestCheckpoints.length} unique files for revert`);
 
-        try {
-          // Create backup before reverting
-          const backupPath = path.join(this.checkpointBlobsDir, path.basename(filePath) + '.' + Date.now() + '.bak');
-          try {
-            await fs.copyFile(filePath, backupPath);
-            console.log(`Created backup: ${backupPath}`);
-          } catch (err) {
-            console.log('Could not create backup, file may not exist:', filePath);
-          }
-
-          // Revert to the old content
-          if (latestCheckpoint.full_snapshot) {
-            // For new files, we simply delete them or restore to old content
-            if (latestCheckpoint.old_content === '') {
-              await fs.unlink(filePath);
-              console.log('Deleted newly created file:', filePath);
-            } else {
-              await fs.writeFile(filePath, latestCheckpoint.old_content);
-              console.log('Restored file from full snapshot:', filePath);
-            }
-          } else {
-            // For edits, restore the old content
-            await fs.writeFile(filePath, latestCheckpoint.old_content);
-            console.log('Restored file content:', filePath);
-          }
-
-          revertedFiles.push(filePath);
-        } catch (error) {
-          console.error('Failed to revert file:', filePath, error);
-          failedFiles.push({ filePath, error: error.message });
+      const result = await this.applyCheckpointContents(sessionId, messageId, 'revert', latestCheckpoints, async (checkpoint) => {
+        // Revert to the old content; files that didn't exist before are deleted
+        const oldContent = (await this.blobStore.read(checkpoint.old_hash)) || '';
+        if (checkpoint.full_snapshot && oldContent === '') {
+          return null;
         }
-      }
+        return oldContent;
+      }, options.report);
 
-      console.log(`Revert operation completed: ${revertedFiles.length} files reverted, ${failedFiles.length} failed`);
-      console.log('Reverted files:', revertedFiles);
-      if (failedFiles.length > 0) {
-        console.warn('Failed files:', failedFiles);
-      }
-      console.log('=== REVERT TO CHECKPOINT OPERATION END ===');
+      log.debug('=== REVERT TO CHECKPOINT OPERATION END ===');
 
-      if (failedFiles.length > 0) {
-        console.warn(`Some files failed to revert:`, failedFiles);
-        // Still return successful files, but include failure information
+      if (result.failedFiles.length > 0) {
         return {
-          revertedFiles,
-          failedFiles,
-          partialSuccess: revertedFiles.length > 0
+          revertedFiles: [],
+          failedFiles: result.failedFiles,
+          partialSuccess: false
         };
       }
 
-      return revertedFiles;
+      return result.appliedFiles;
     } catch (error) {
-      console.error('=== REVERT TO CHECKPOINT OPERATION ERROR ===');
-      console.error('Failed to revert to checkpoint:', error);
-      console.error('=== REVERT TO CHECKPOINT OPERATION END ===');
+      log.error('=== REVERT TO CHECKPOINT OPERATION ERROR ===');
+      log.error('Failed to revert to checkpoint:', error);
+      log.error('=== REVERT TO CHECKPOINT OPERATION END ===');
       throw error;
     }
   }
 
-  // Revert files back to their state before a checkpoint
-  async unrevertFromCheckpoint(sessionId, messageId) {
-    console.log('=== UNREVERT FROM CHECKPOINT OPERATION START ===');
-    console.log('Parameters:', { sessionId, messageId });
+  // Revert files back to their state before a checkpoint. All files are restored
+  // together or not at all. Pass { report: {} } to receive per-file timings.
+  async unrevertFromCheckpoint(sessionId, messageId, options = {}) {
+    log.debug('=== UNREVERT FROM CHECKPOINT OPERATION START ===');
+    log.debug('Parameters:', { sessionId, messageId });
 
     if (!this.checkpointDb) {
       throw new Error('Checkpoint database not initialized');
@@ -715,108 +1316,144 @@ class CheckpointManager {
 
     try {
       const checkpoints = await this.getCheckpointsToRevert(sessionId, messageId);
-      const restoredFiles = [];
-      const failedFiles = [];
 
-      console.log(`Found ${checkpoints.length} checkpoints to process for unrevert`);
+      log.debug(`Found ${checkpoints.length} checkpoints to process for unrevert`);
 
       // Check if any checkpoints were found
       if (checkpoints.length === 0) {
-        console.log(`No file changes to unrevert for message ${messageId} in session ${sessionId}`);
+        log.debug(`No file changes to unrevert for message ${messageId} in session ${sessionId}`);
         return [];
       }
 
-      // Group checkpoints by file and restore to their "new content" state
-      const fileGroups = {};
-      checkpoints.forEach(checkpoint => {
-        if (!fileGroups[checkpoint.file_path]) {
-          fileGroups[checkpoint.file_path] = [];
-        }
-        fileGroups[checkpoint.file_path].push(checkpoint);
-      });
+      // Use the most recent checkpoint of each file and restore its "new content" state
+      const latestCheckpoints = this.getLatestCheckpointPerFile(checkpoints);
+      log.debug(`Processing ${latestCheckpoints.length} unique files for unrevert`);
 
-      console.log(`Processing ${Object.keys(fileGroups).length} unique files for unrevert`);
-
-      for (const [filePath, checkpointList] of Object.entries(fileGroups)) {
-        // Get the most recent checkpoint for this file
-        const latestCheckpoint = checkpointList[0];
-        console.log(`Unreverting file: ${filePath} using checkpoint ${latestCheckpoint.id}`);
-
-        try {
-          // Create backup before unreverting
-          const backupPath = path.join(this.checkpointBlobsDir, path.basename(filePath) + '.' + Date.now() + '.unrevert-bak');
+      const result = await this.applyCheckpointContents(sessionId, messageId, 'unrevert', latestCheckpoints, async (checkpoint) => {
+        if (this.isCheckpointPending(checkpoint)) {
+          // This checkpoint was created for an Edit/MultiEdit but never updated with actual content.
+          // The current file content is the "new" content, so the file is left as it is.
           try {
-            await fs.copyFile(filePath, backupPath);
-            console.log(`Created unrevert backup: ${backupPath}`);
+            await fs.access(checkpoint.file_path);
           } catch (err) {
-            console.log('Could not create backup, file may not exist:', filePath);
-          }
-
-          // Restore to the new content (post-edit state)
-          if (latestCheckpoint.new_content === '...PENDING_POST_EDIT_CONTENT...') {
-            // This checkpoint was created for an Edit/MultiEdit but never updated with actual content
-            // We need to read the current file content as the "new" content
-            try {
-              const currentContent = await fs.readFile(filePath, 'utf8');
-              console.log('Using current file content as post-edit state for unrevert:', filePath);
-              // The file is already in the correct state, no action needed
-            } catch (err) {
-              console.error('Cannot read current file content for unrevert:', filePath, err);
-              throw new Error(`Cannot unrevert ${filePath}: file not readable`);
-            }
-          } else if (latestCheckpoint.full_snapshot && latestCheckpoint.new_content !== '') {
-            // For new files, restore to the full new content
-            await fs.writeFile(filePath, latestCheckpoint.new_content);
-            console.log('Restored file from new content snapshot:', filePath);
-          } else if (latestCheckpoint.new_content !== '') {
-            // For edits, restore to the new content
-            await fs.writeFile(filePath, latestCheckpoint.new_content);
-            console.log('Restored file to post-edit state:', filePath);
-          } else if (latestCheckpoint.full_snapshot && latestCheckpoint.new_content === '') {
-            // Special case: new file that was created then reverted, recreate it
-            await fs.writeFile(filePath, '');
-            console.log('Recreated empty file:', filePath);
+            throw new Error(`Cannot unrevert ${checkpoint.file_path}: file not readable`);
           }
-
-          restoredFiles.push(filePath);
-        } catch (error) {
-          console.error('Failed to unrevert file:', filePath, error);
-          failedFiles.push({ filePath, error: error.message });
+          return undefined;
         }
-      }
 
-      console.log(`Unrevert operation completed: ${restoredFiles.length} files restored, ${failedFiles.length} failed`);
-      console.log('Restored files:', restoredFiles);
-      if (failedFiles.length > 0) {
-        console.warn('Failed files:', failedFiles);
-      }
-      console.log('=== UNREVERT FROM CHECKPOINT OPERATION END ===');
+        // Restore to the new content (post-edit state); new files are recreated, even if empty
+        return (await this.blobStore.read(checkpoint.new_hash)) || '';
+      }, options.report);
 
-      if (failedFiles.length > 0) {
-        console.warn(`Some files failed to unrevert:`, failedFiles);
-        // Still return successful files, but include failure information
+      log.debug('=== UNREVERT FROM CHECKPOINT OPERATION END ===');
+
+      if (result.failedFiles.length > 0) {
         return {
-          restoredFiles,
-          failedFiles,
-          partialSuccess: restoredFiles.length > 0
+          restoredFiles: [],
+          failedFiles: result.failedFiles,
+          partialSuccess: false
         };
       }
 
-      return restoredFiles;
+      return result.appliedFiles;
     } catch (error) {
-      console.error('=== UNREVERT FROM CHECKPOINT OPERATION ERROR ===');
-      console.error('Failed to unrevert from checkpoint:', error);
-      console.error('=== UNREVERT FROM CHECKPOINT OPERATION END ===');
+      log.error('=== UNREVERT FROM CHECKPOINT OPERATION ERROR ===');
+      log.error('Failed to unrevert from checkpoint:', error);
+      log.error('=== UNREVERT FROM CHECKPOINT OPERATION END ===');
       throw error;
     }
   }
 
+  // Most recent checkpoint per file, from rows ordered newest first
+  getLatestCheckpointPerFile(checkpoints) {
+    const latestByFile = new Map();
+    for (const checkpoint of checkpoints) {
+      if (!latestByFile.has(checkpoint.file_path)) {
+        latestByFile.set(checkpoint.file_path, checkpoint);
+      }
+    }
+    return Array.from(latestByFile.values());
+  }
+
+  // Shared revert/unrevert engine. resolveContent(checkpoint) returns the target
+  // content, null to delete the file, or undefined to leave it untouched.
+  // Target contents are resolved concurrently, the files' current contents are
+  // kept as backups in the blob store, and all files are swapped in with one
+  // RevertEngine transaction that rolls back entirely if any file fails.
+  async applyCheckpointContents(sessionId, messageId, kind, checkpoints, resolveContent, report) {
+    const startedAt = process.hrtime.bigint();
+    const engine = new RevertEngine({ concurrency: this.revertConcurrency });
+    const failedFiles = [];
+
+    // Resolve target contents (blob reads and delta chains) with the same worker pool
+    const resolved = await mapWithConcurrency(checkpoints, engine.concurrency, async (checkpoint) => {
+      try {
+        return { filePath: checkpoint.file_path, content: await resolveContent(checkpoint) };
+      } catch (error) {
+        failedFiles.push({ filePath: checkpoint.file_path, error: error.message });
+        return null;
+      }
+    });
+
+    if (failedFiles.length > 0) {
+      log.warn(`Some files failed to ${kind}, nothing was changed:`, failedFiles);
+      return { appliedFiles: [], failedFiles };
+    }
+
+    const operations = resolved.filter(operation => operation.content !== undefined);
+    const untouchedFiles = resolved.filter(operation => operation.content === undefined).map(operation => operation.filePath);
+
+    let timings = [];
+    try {
+      const staged = await engine.stage(operations);
+
+      // Keep what is on disk now as a backup before replacing it
+      await this.recordFileBackups(sessionId, messageId, kind, staged);
+
+      timings = await engine.commit(staged);
+    } catch (error) {
+      log.error(`Failed to ${kind} files, all changes rolled back:`, error.message);
+      return { appliedFiles: [], failedFiles: error.failedFiles || [{ filePath: null, error: error.message }] };
+    }
+
+    const appliedFiles = [...operations.map(operation => operation.filePath), ...untouchedFiles];
+    const totalMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+    log.info(`${kind} operation completed: ${appliedFiles.length} files in ${totalMs.toFixed(1)}ms`);
+
+    if (report) {
+      report.totalMs = totalMs;
+      report.timings = timings;
+    }
+
+    return { appliedFiles, failedFiles: [] };
+  }
+
+  // Store the current contents of files about to be overwritten in the blob store
+  // and record them in file_backups, replacing the old .bak/.unrevert-bak copies.
+  async recordFileBackups(sessionId, messageId, kind, staged) {
+    const existing = staged.filter(entry => entry.originalContent !== null);
+    if (existing.length === 0) {
+      return;
+    }
+
+    const blobs = await mapWithConcurrency(existing, this.revertConcurrency, entry =>
+      this.blobStore.write(entry.originalContent.toString('utf8'))
+    );
+
+    this.checkpointDb.transaction(() => {
+      existing.forEach((entry, index) => {
+        this.blobStore.register(blobs[index]);
+        this.statements.insertFileBackup.run(sessionId, messageId, entry.filePath, blobs[index].hash, kind);
+      });
+    })();
+  }
+
   // Get message checkpoints
   async getMessageCheckpoints(sessionId, messageId) {
     try {
       return await this.getCheckpointsToRevert(sessionId, messageId);
     } catch (error) {
-      console.error('Failed to get checkpoints:', error);
+      log.error('Failed to get checkpoints:', error);
       return [];
     }
   }
@@ -824,98 +1461,88 @@ class CheckpointManager {
   // Get all checkpoints for a session (for broader searches)
   async getAllCheckpointsForSession(sessionId) {
     if (!this.checkpointDb) {
-      console.warn('Checkpoint database not initialized');
+      log.warn('Checkpoint database not initialized');
       return [];
     }
 
     try {
-      const stmt = this.checkpointDb.prepare(`
-        SELECT * FROM checkpoints
-        WHERE session_id = ?
-        ORDER BY ts DESC
-      `);
-
-      const checkpoints = stmt.all(sessionId);
-      console.log(`Found ${checkpoints.length} total checkpoints for session ${sessionId}`);
+      const checkpoints = this.statements.selectSessionCheckpoints.all(sessionId);
+      log.debug(`Found ${checkpoints.length} total checkpoints for session ${sessionId}`);
       return checkpoints;
     } catch (error) {
-      console.error('Failed to get all checkpoints for session:', error);
+      log.error('Failed to get all checkpoints for session:', error);
       return [];
     }
   }
 
     // Check if there are file changes for a message
   async hasFileChanges(sessionId, messageId) {
-    console.log('=== HAS FILE CHANGES DEBUG START ===');
-    console.log('Parameters - sessionId:', sessionId, 'messageId:', messageId);
+    log.debug('=== HAS FILE CHANGES DEBUG START ===');
+    log.debug('Parameters - sessionId:', sessionId, 'messageId:', messageId);
 
     if (!sessionId || !messageId) {
-      console.warn('hasFileChanges called with invalid parameters:', { sessionId, messageId });
-      console.log('=== HAS FILE CHANGES DEBUG END ===');
+      log.warn('hasFileChanges called with invalid parameters:', { sessionId, messageId });
+      log.debug('=== HAS FILE CHANGES DEBUG END ===');
       return false;
     }
 
     if (!this.checkpointDb) {
-      console.warn('Checkpoint database not initialized, returning false for hasFileChanges');
-      console.log('=== HAS FILE CHANGES DEBUG END ===');
+      log.warn('Checkpoint database not initialized, returning false for hasFileChanges');
+      log.debug('=== HAS FILE CHANGES DEBUG END ===');
       return false;
     }
 
     try {
-      console.log('Calling getCheckpointsToRevert with sessionId:', sessionId, 'messageId:', messageId);
+      log.debug('Calling getCheckpointsToRevert with sessionId:', sessionId, 'messageId:', messageId);
       const checkpoints = await this.getCheckpointsToRevert(sessionId, messageId);
-      console.log('getCheckpointsToRevert returned', checkpoints.length, 'checkpoints');
+      log.debug('getCheckpointsToRevert returned', checkpoints.length, 'checkpoints');
 
       if (checkpoints.length > 0) {
-        console.log('Checkpoints found:', checkpoints.map(c => ({
+        log.debug('Checkpoints found:', checkpoints.map(c => ({
           id: c.id,
           file_path: c.file_path,
           message_id: c.message_id,
           ts: c.ts,
           tool_type: c.tool_type,
-          valid: !c.old_content?.includes('[INVALID:')
+          valid: !c.invalid_reason
         })));
 
         // Filter out invalid checkpoints for the final count
-        const validCheckpoints = checkpoints.filter(c => !c.old_content?.includes('[INVALID:'));
+        const validCheckpoints = checkpoints.filter(c => !c.invalid_reason);
         const hasValidChanges = validCheckpoints.length > 0;
 
         if (validCheckpoints.length !== checkpoints.length) {
-          console.warn(`Found ${checkpoints.length - validCheckpoints.length} invalid checkpoints, returning based on ${validCheckpoints.length} valid ones`);
+          log.warn(`Found ${checkpoints.length - validCheckpoints.length} invalid checkpoints, returning based on ${validCheckpoints.length} valid ones`);
         }
 
-        console.log(`Session ${sessionId}, Message ${messageId}: ${hasValidChanges ? 'has' : 'no'} valid file changes (${validCheckpoints.length}/${checkpoints.length} checkpoints)`);
-        console.log('=== HAS FILE CHANGES DEBUG END ===');
+        log.debug(`Session ${sessionId}, Message ${messageId}: ${hasValidChanges ? 'has' : 'no'} valid file changes (${validCheckpoints.length}/${checkpoints.length} checkpoints)`);
+        log.debug('=== HAS FILE CHANGES DEBUG END ===');
         return hasValidChanges;
       }
 
       // No checkpoints found - provide enhanced debugging
-      console.log(`No checkpoints found for message ${messageId} in session ${sessionId}`);
+      log.debug(`No checkpoints found for message ${messageId} in session ${sessionId}`);
       await this.debugCheckpointLookup(sessionId, messageId);
 
-      console.log(`Session ${sessionId}, Message ${messageId}: no file changes (0 checkpoints)`);
-      console.log('=== HAS FILE CHANGES DEBUG END ===');
+      log.debug(`Session ${sessionId}, Message ${messageId}: no file changes (0 checkpoints)`);
+      log.debug('=== HAS FILE CHANGES DEBUG END ===');
       return false;
     } catch (error) {
-      console.error('=== HAS FILE CHANGES DEBUG ERROR ===');
-      console.error('Failed to check file changes for session', sessionId, 'message', messageId, ':', error);
-      console.error('Stack trace:', error.stack);
+      log.error('=== HAS FILE CHANGES DEBUG ERROR ===');
+      log.error('Failed to check file changes for session', sessionId, 'message', messageId, ':', error);
+      log.error('Stack trace:', error.stack);
 
       // In case of error, try a simple direct query as fallback
       try {
-        console.log('Attempting fallback direct query...');
-        const fallbackStmt = this.checkpointDb.prepare(`
-          SELECT COUNT(*) as count FROM checkpoints
-          WHERE session_id = ? AND message_id = ?
-        `);
-        const result = fallbackStmt.get(sessionId, messageId);
+        log.debug('Attempting fallback direct query...');
+        const result = this.statements.countMessageCheckpoints.get(sessionId, messageId);
         const hasChanges = result.count > 0;
-        console.log(`Fallback query result: ${hasChanges ? 'has' : 'no'} changes (${result.count} checkpoints)`);
-        console.log('=== HAS FILE CHANGES DEBUG END ===');
+        log.debug(`Fallback query result: ${hasChanges ? 'has' : 'no'} changes (${result.count} checkpoints)`);
+        log.debug('=== HAS FILE CHANGES DEBUG END ===');
         return hasChanges;
       } catch (fallbackError) {
-        console.error('Fallback query also failed:', fallbackError);
-        console.log('=== HAS FILE CHANGES DEBUG END ===');
+        log.error('Fallback query also failed:', fallbackError);
+        log.debug('=== HAS FILE CHANGES DEBUG END ===');
         return false;
       }
     }
@@ -923,113 +1550,99 @@ class CheckpointManager {
 
     // Update checkpoint message IDs when Claude's real message ID becomes available
   async updateCheckpointMessageIds(sessionId, oldMessageId, newMessageId) {
-    console.log('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG START ===');
-    console.log('Parameters:', { sessionId, oldMessageId, newMessageId });
+    log.debug('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG START ===');
+    log.debug('Parameters:', { sessionId, oldMessageId, newMessageId });
 
     if (!this.checkpointDb) {
-      console.warn('Checkpoint database not initialized, skipping message ID update');
-      console.log('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
+      log.warn('Checkpoint database not initialized, skipping message ID update');
+      log.debug('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
       return false;
     }
 
     // Validate parameters
     if (!sessionId || !oldMessageId || !newMessageId) {
-      console.error('Invalid parameters for message ID update:', { sessionId, oldMessageId, newMessageId });
-      console.log('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
+      log.error('Invalid parameters for message ID update:', { sessionId, oldMessageId, newMessageId });
+      log.debug('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
       return false;
     }
 
     if (oldMessageId === newMessageId) {
-      console.log('Old and new message IDs are identical, no update needed');
-      console.log('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
+      log.debug('Old and new message IDs are identical, no update needed');
+      log.debug('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
       return true;
     }
 
     try {
       // First, check how many checkpoints need updating
-      const countStmt = this.checkpointDb.prepare(`
-        SELECT COUNT(*) as count FROM checkpoints
-        WHERE session_id = ? AND message_id = ?
-      `);
+      const countStmt = this.statements.countMessageCheckpoints;
 
       const countResult = countStmt.get(sessionId, oldMessageId);
-      console.log(`Found ${countResult.count} checkpoints to update`);
+      log.debug(`Found ${countResult.count} checkpoints to update`);
 
       if (countResult.count === 0) {
-        console.warn('No checkpoints found with old message ID - they may have already been updated or never created');
+        log.warn('No checkpoints found with old message ID - they may have already been updated or never created');
 
         // Check if checkpoints exist with the new message ID (already updated)
         const newIdCheck = countStmt.get(sessionId, newMessageId);
         if (newIdCheck.count > 0) {
-          console.log(`Found ${newIdCheck.count} checkpoints already using new message ID - assuming already updated`);
-          console.log('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
+          log.debug(`Found ${newIdCheck.count} checkpoints already using new message ID - assuming already updated`);
+          log.debug('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
           return true;
         }
 
-        console.log('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
+        log.debug('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
         return false;
       }
 
       // Perform the update in a transaction for atomicity
       const transaction = this.checkpointDb.transaction(() => {
-        const updateStmt = this.checkpointDb.prepare(`
-          UPDATE checkpoints
-          SET message_id = ?
-          WHERE session_id = ? AND message_id = ?
-        `);
-
-        const result = updateStmt.run(newMessageId, sessionId, oldMessageId);
-        return result;
+        return this.statements.updateCheckpointMessageId.run(newMessageId, sessionId, oldMessageId);
       });
 
       const result = transaction();
-      console.log(`Successfully updated ${result.changes} checkpoint(s) from ${oldMessageId} to ${newMessageId}`);
+      log.debug(`Successfully updated ${result.changes} checkpoint(s) from ${oldMessageId} to ${newMessageId}`);
 
       // Verify the update was successful
-      const verifyStmt = this.checkpointDb.prepare(`
-        SELECT COUNT(*) as count FROM checkpoints
-        WHERE session_id = ? AND message_id = ?
-      `);
+      const verifyStmt = this.statements.countMessageCheckpoints;
 
       const verifyOld = verifyStmt.get(sessionId, oldMessageId);
       const verifyNew = verifyStmt.get(sessionId, newMessageId);
 
-      console.log(`Verification: ${verifyOld.count} checkpoints with old ID, ${verifyNew.count} with new ID`);
+      log.debug(`Verification: ${verifyOld.count} checkpoints with old ID, ${verifyNew.count} with new ID`);
 
       if (verifyOld.count > 0) {
-        console.error(`WARNING: ${verifyOld.count} checkpoints still have old message ID after update`);
+        log.error(`WARNING: ${verifyOld.count} checkpoints still have old message ID after update`);
       }
 
       const success = result.changes > 0 && verifyOld.count === 0;
-      console.log(`Message ID update ${success ? 'successful' : 'failed'}`);
-      console.log('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
+      log.debug(`Message ID update ${success ? 'successful' : 'failed'}`);
+      log.debug('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
 
       return success;
     } catch (error) {
-      console.error('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG ERROR ===');
-      console.error('Failed to update checkpoint message IDs:', error);
-      console.error('Stack trace:', error.stack);
+      log.error('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG ERROR ===');
+      log.error('Failed to update checkpoint message IDs:', error);
+      log.error('Stack trace:', error.stack);
 
       // Attempt to provide recovery information
       try {
-        const recoveryStmt = this.checkpointDb.prepare(`
-          SELECT id, file_path, message_id FROM checkpoints
-          WHERE session_id = ? AND (message_id = ? OR message_id = ?)
-        `);
-
-        const recoveryCheckpoints = recoveryStmt.all(sessionId, oldMessageId, newMessageId);
-        console.error('Checkpoints that may need manual recovery:', recoveryCheckpoints);
+        const recoveryCheckpoints = this.statements.selectMessageIdCandidates.all(sessionId, oldMessageId, newMessageId);
+        log.error('Checkpoints that may need manual recovery:', recoveryCheckpoints);
       } catch (recoveryError) {
-        console.error('Could not gather recovery information:', recoveryError);
+        log.error('Could not gather recovery information:', recoveryError);
       }
 
-      console.log('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
+      log.debug('=== UPDATE CHECKPOINT MESSAGE IDS DEBUG END ===');
       return false;
     }
   }
 
   // Cleanup method
   close() {
+    if (this.integrityCheckTimer) {
+      clearTimeout(this.integrityCheckTimer);
+      this.integrityCheckTimer = null;
+    }
     if (this.checkpointDb) {
       this.checkpointDb.close();
       this.checkpointDb = null;
@@ -1037,4 +1650,7 @@ class CheckpointManager {
   }
 }
 
+// Placeholder older versions stored in new_content until the post-edit content was known
+CheckpointManager.LEGACY_PENDING_CONTENT = '...PENDING_POST_EDIT_CONTENT...';
+
 module.exports = CheckpointManager;
\ No newline at end of file
@@ -0,0 +1,339 @@
+const fsSync = require('fs');
+const path = require('path');
+const Database = require('better-sqlite3');
+const Logger = require('./logger');
+
+const log = Logger.scope('cli-history');
+
+/**
+ * Persistent summary index for Claude CLI transcripts.
+ *
+ * One row per .jsonl file, keyed by path and validated by size and mtime: a
+ * file whose size and mtime still match its row is listed from the row without
+ * being read. Files that hold no entries are kept with message_count 0 so they
+ * are not re-read either.
+ *
+ * parsed_offset is the byte offset just past the last entry the summary
+ * covers. Transcripts are append-only, so a file that grew is summarized by
+ * parsing only the bytes after it.
+ *
+ * Full-text search: transcript_docs holds one row per searchable entry (its
+ * user/assistant text and tool inputs), mirrored into the FTS5 table
+ * transcript_fts by triggers. search_offset is how far into the file the
+ * documents go, so appended lines are indexed without re-reading the rest.
+ */
+class ClaudeCliHistoryIndex {
+  constructor(dbPath) {
+    this.dbPath = dbPath;
+    this.db = null;
+    this.statements = null;
+  }
+
+  /**
+   * Open (or create) the index database. Throws if it cannot be opened.
+   */
+  open() {
+    if (this.db) {
+      return;
+    }
+    fsSync.mkdirSync(path.dirname(this.dbPath), { recursive: true });
+    this.db = new Database(this.dbPath);
+    this.db.pragma('journal_mode = WAL');
+    this.db.pragma('synchronous = NORMAL');
+    this.runSchemaMigrations();
+    this.statements = this.prepareStatements();
+  }
+
+  /**
+   * Versioned migrations tracked in PRAGMA user_version.
+   */
+  getSchemaMigrations() {
+    return [
+      {
+        version: 1,
+        description: 'Create session_files table',
+        up: () => {
+          this.db.exec(`
+            CREATE TABLE IF NOT EXISTS session_files (
+              file_path TEXT PRIMARY KEY,
+              session_id TEXT NOT NULL,
+              project_path TEXT NOT NULL,
+              size INTEGER NOT NULL,
+              mtime_ms REAL NOT NULL,
+              message_count INTEGER NOT NULL DEFAULT 0,
+              first_activity TEXT,
+              last_activity TEXT,
+              model_used TEXT,
+              git_branch TEXT,
+              version TEXT,
+              preview TEXT,
+              indexed_at TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_session_files_session_id ON session_files(session_id);
+          `);
+        }
+      },
+      {
+        version: 2,
+        description: 'Track parsed offset for incremental summaries',
+        up: () => {
+          const columns = this.db.prepare('PRAGMA table_info(session_files)').all().map(column => column.name);
+          if (!columns.includes('parsed_offset')) {
+            // 0 means unknown: the file is parsed from the start when it changes
+            this.db.exec('ALTER TABLE session_files ADD COLUMN parsed_offset INTEGER NOT NULL DEFAULT 0');
+          }
+        }
+      },
+      {
+        version: 3,
+        description: 'Create full-text search tables',
+        up: () => {
+          const columns = this.db.prepare('PRAGMA table_info(session_files)').all().map(column => column.name);
+          if (!columns.includes('search_offset')) {
+            this.db.exec('ALTER TABLE session_files ADD COLUMN search_offset INTEGER NOT NULL DEFAULT 0');
+          }
+          this.db.exec(`
+            CREATE TABLE IF NOT EXISTS transcript_docs (
+              id INTEGER PRIMARY KEY,
+              file_path TEXT NOT NULL,
+              message_uuid TEXT,
+              role TEXT,
+              timestamp TEXT,
+              text TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_transcript_docs_file_path ON transcript_docs(file_path);
+            CREATE VIRTUAL TABLE IF NOT EXISTS transcript_fts USING fts5(
+              text, content = 'transcript_docs', content_rowid = 'id', tokenize = 'porter unicode61', prefix = '2 3'
+            );
+            CREATE TRIGGER IF NOT EXISTS transcript_docs_ai AFTER INSERT ON transcript_docs BEGIN
+              INSERT INTO transcript_fts (rowid, text) VALUES (new.id, new.text);
+            END;
+            CREATE TRIGGER IF NOT EXISTS transcript_docs_ad AFTER DELETE ON transcript_docs BEGIN
+              INSERT INTO transcript_fts (transcript_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            END;
+          `);
+        }
+      }
+    ];
+  }
+
+  runSchemaMigrations() {
+    const currentVersion = this.db.pragma('user_version', { simple: true });
+    for (const migration of this.getSchemaMigrations()) {
+      if (migration.version <= currentVersion) {
+        continue;
+      }
+      this.db.transaction(() => {
+        migration.up();
+        this.db.pragma(`user_version = ${migration.version}`);
+      })();
+      log.info(`CLI history index migrated to schema version ${migration.version}: ${migration.description}`);
+    }
+  }
+
+  prepareStatements() {
+    return {
+      selectAll: this.db.prepare('SELECT * FROM session_files'),
+      upsert: this.db.prepare(`
+        INSERT INTO session_files (
+          file_path, session_id, project_path, size, mtime_ms, parsed_offset, message_count,
+          first_activity, last_activity, model_used, git_branch, version, preview, indexed_at
+        ) VALUES (
+          @filePath, @sessionId, @projectPath, @size, @mtimeMs, @parsedOffset, @messageCount,
+          @firstActivity, @lastActivity, @modelUsed, @gitBranch, @version, @preview, @indexedAt
+        )
+        ON CONFLICT(file_path) DO UPDATE SET
+          session_id = excluded.session_id,
+          project_path = excluded.project_path,
+          size = excluded.size,
+          mtime_ms = excluded.mtime_ms,
+          parsed_offset = excluded.parsed_offset,
+          message_count = excluded.message_count,
+          first_activity = excluded.first_activity,
+          last_activity = excluded.last_activity,
+          model_used = excluded.model_used,
+          git_branch = excluded.git_branch,
+          version = excluded.version,
+          preview = excluded.preview,
+          indexed_at = excluded.indexed_at
+      `),
+      deleteFile: this.db.prepare('DELETE FROM session_files WHERE file_path = ?'),
+      selectSearchBacklog: this.db.prepare(`
+        SELECT * FROM session_files
+        WHERE search_offset < parsed_offset
+        ORDER BY last_activity DESC
+      `),
+      hasSearchBacklog: this.db.prepare('SELECT 1 FROM session_files WHERE search_offset < parsed_offset LIMIT 1'),
+      insertDoc: this.db.prepare(`
+        INSERT INTO transcript_docs (file_path, message_uuid, role, timestamp, text)
+        VALUES (@filePath, @messageUuid, @role, @timestamp, @text)
+      `),
+      deleteDocs: this.db.prepare('DELETE FROM transcript_docs WHERE file_path = ?'),
+      setSearchOffset: this.db.prepare('UPDATE session_files SET search_offset = ? WHERE file_path = ?'),
+      advanceSearchOffset: this.db.prepare(`
+        UPDATE session_files SET search_offset = @toOffset
+        WHERE file_path = @filePath AND search_offset = @fromOffset
+      `),
+      // Best-ranked document per listed file; bm25 can't be aggregated directly
+      searchFiles: this.db.prepare(`
+        SELECT f.*, hits.doc_id, min(hits.score) AS score, count(*) AS hit_count
+        FROM (
+          SELECT rowid AS doc_id, rank AS score FROM transcript_fts WHERE transcript_fts MATCH @query
+        ) AS hits
+        JOIN transcript_docs d ON d.id = hits.doc_id
+        JOIN session_files f ON f.file_path = d.file_path
+        WHERE f.message_count > 0
+        GROUP BY d.file_path
+        ORDER BY score
+        LIMIT @limit OFFSET @offset
+      `),
+      snippet: this.db.prepare(`
+        SELECT snippet(transcript_fts, 0, @open, @close, '…', @tokens) AS snippet
+        FROM transcript_fts WHERE transcript_fts MATCH @query AND rowid = @docId
+      `),
+      selectDoc: this.db.prepare('SELECT message_uuid, role, timestamp FROM transcript_docs WHERE id = ?')
+    };
+  }
+
+  /**
+   * All indexed files as a Map of file path -> record.
+   */
+  getRecords() {
+    const records = new Map();
+    for (const row of this.statements.selectAll.all()) {
+      records.set(row.file_path, ClaudeCliHistoryIndex.rowToRecord(row));
+    }
+    return records;
+  }
+
+  /**
+   * Insert or replace records (see rowToRecord for the shape) in one transaction.
+   */
+  upsertRecords(records) {
+    if (records.length === 0) {
+      return;
+    }
+    const indexedAt = new Date().toISOString();
+    this.db.transaction(() => {
+      for (const record of records) {
+        this.statements.upsert.run({ ...record, indexedAt });
+      }
+    })();
+  }
+
+  removeFiles(filePaths) {
+    if (filePaths.length === 0) {
+      return;
+    }
+    this.db.transaction(() => {
+      for (const filePath of filePaths) {
+        this.statements.deleteDocs.run(filePath);
+        this.statements.deleteFile.run(filePath);
+      }
+    })();
+  }
+
+  /**
+   * Whether any file has lines not yet in the search index
+   */
+  hasSearchBacklog() {
+    return this.statements.hasSearchBacklog.get() !== undefined;
+  }
+
+  /**
+   * Records of files with lines not yet in the search index, newest first
+   */
+  getSearchBacklog() {
+    return this.statements.selectSearchBacklog.all().map(ClaudeCliHistoryIndex.rowToRecord);
+  }
+
+  /**
+   * Add search documents ({ messageUuid, role, timestamp, text }) read from a
+   * file between fromOffset and toOffset, in one transaction with the new
+   * offset. Returns false (adding nothing) if the file's indexed text no
+   * longer ends at fromOffset, e.g. it was reset while the slice was read.
+   */
+  addSearchDocs(filePath, docs, fromOffset, toOffset) {
+    return this.db.transaction(() => {
+      if (this.statements.advanceSearchOffset.run({ filePath, fromOffset, toOffset }).changes === 0) {
+        return false;
+      }
+      for (const doc of docs) {
+        this.statements.insertDoc.run({ ...doc, filePath });
+      }
+      return true;
+    })();
+  }
+
+  /**
+   * Drop a file's search documents, e.g. after it was rewritten
+   */
+  resetSearchDocs(filePath) {
+    this.db.transaction(() => {
+      this.statements.deleteDocs.run(filePath);
+      this.statements.setSearchOffset.run(0, filePath);
+    })();
+  }
+
+  /**
+   * Indexed files with entries that match an FTS5 query, best first, as
+   * { record, score, hitCount, messageUuid, role, timestamp, snippet } for the
+   * best-ranked document of each. The snippet marks matched terms with
+   * options.open/options.close.
+   */
+  search(query, options = {}) {
+    const rows = this.statements.searchFiles.all({
+      query,
+      limit: options.limit ?? 20,
+      offset: options.offset ?? 0
+    });
+    return rows.map((row) => {
+      const doc = this.statements.selectDoc.get(row.doc_id);
+      const { snippet } = this.statements.snippet.get({
+        query,
+        docId: row.doc_id,
+        open: options.open ?? '',
+        close: options.close ?? '',
+        tokens: options.snippetTokens ?? 16
+      });
+      return {
+        record: ClaudeCliHistoryIndex.rowToRecord(row),
+        score: row.score,
+        hitCount: row.hit_count,
+        messageUuid: doc?.message_uuid ?? null,
+        role: doc?.role ?? null,
+        timestamp: doc?.timestamp ?? null,
+        snippet
+      };
+    });
+  }
+
+  close() {
+    if (this.db) {
+      this.db.close();
+      this.db = null;
+      this.statements = null;
+    }
+  }
+
+  static rowToRecord(row) {
+    return {
+      filePath: row.file_path,
+      sessionId: row.session_id,
+      projectPath: row.project_path,
+      size: row.size,
+      mtimeMs: row.mtime_ms,
+      parsedOffset: row.parsed_offset,
+      searchOffset: row.search_offset ?? 0,
+      messageCount: row.message_count,
+      firstActivity: row.first_activity,
+      lastActivity: row.last_activity,
+      modelUsed: row.model_used,
+      gitBranch: row.git_branch,
+      version: row.version,
+      preview: row.preview
+    };
+  }
+}
+
+module.exports = ClaudeCliHistoryIndex;
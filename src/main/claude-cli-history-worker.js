@@ -0,0 +1,47 @@
+const { parentPort, workerData } = require('worker_threads');
+const Logger = require('./logger');
+const ClaudeCliHistory = require('./claude-cli-history');
+
+// Worker side of ClaudeCliHistory's parsing pool (see WorkerPool). Runs the
+// file reading and JSON parsing; the index and caches stay on the main thread.
+//
+//   scanProject { projectsDir, encodedPath, records } -> { sessions, changedRecords, seenFiles }
+//   readEntries { filePath, offset, partial }         -> { entries, offset, partial }
+//   readSearchDocs { filePath, offset }               -> { docs, offset }
+Logger.configure({ level: workerData?.logLevel || 'info' });
+
+const history = new ClaudeCliHistory();
+
+const tasks = {
+  async scanProject({ projectsDir, encodedPath, records }) {
+    history.projectsDir = projectsDir;
+    const scan = {
+      records: new Map(records.map(record => [record.filePath, record])),
+      seenFiles: new Set(),
+      changedRecords: []
+    };
+    const sessions = await history.getSessionsFromProject(encodedPath, scan);
+    return { sessions, changedRecords: scan.changedRecords, seenFiles: Array.from(scan.seenFiles) };
+  },
+
+  async readEntries({ filePath, offset, partial }) {
+    const entries = [];
+    const result = await history.readEntriesFrom(filePath, offset, entry => entries.push(entry), ClaudeCliHistory.toBuffer(partial));
+    return { entries, offset: result.offset, partial: result.partial };
+  },
+
+  readSearchDocs({ filePath, offset }) {
+    return history.collectSearchDocs(filePath, offset);
+  }
+};
+
+parentPort.on('message', async ({ id, type, payload }) => {
+  try {
+    if (!tasks[type]) {
+      throw new Error(`Unknown task type: ${type}`);
+    }
+    parentPort.postMessage({ id, result: await tasks[type](payload) });
+  } catch (error) {
+    parentPort.postMessage({ id, error: error.message });
+  }
+});
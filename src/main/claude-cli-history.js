@@ -1,6 +1,23 @@
 const fs = require('fs').promises;
 const path = require('path');
 const os = require('os');
+const { isMainThread } = require('worker_threads');
+const ClaudeCliHistoryIndex = require('./claude-cli-history-index');
+const WorkerPool = require('./worker-pool');
+const Logger = require('./logger');
+
+const log = Logger.scope('cli-history');
+
+const READ_CHUNK_BYTES = 1024 * 1024;
+const SCAN_CHUNK_BYTES = 64 * 1024;
+const HEAD_SCAN_MAX_LINES = 100;
+const NO_PREVIEW = 'No user message found';
+const SEARCH_READ_BYTES = 8 * 1024 * 1024;
+const SEARCH_DOC_MAX_CHARS = 32 * 1024;
+const SEARCH_INPUT_MAX_CHARS = 2000;
+// Around matched terms in search snippets
+const SNIPPET_OPEN = '\u0002';
+const SNIPPET_CLOSE = '\u0003';
 
 class ClaudeCliHistory {
   constructor() {
@@ -9,46 +26,182 @@ class ClaudeCliHistory {
     this.sessionsCache = new Map();
     this.lastCacheUpdate = 0;
     this.cacheValidityMs = 30000; // 30 seconds
+    // Persistent per-file summaries; only new or changed transcripts are read
+    this.index = new ClaudeCliHistoryIndex(path.join(os.homedir(), '.claude-code-chat', 'cli-history-index.db'));
+    this.indexAvailable = null; // null until the first open attempt
+    // Parsed transcripts by file path, extended with appended lines on each use
+    // (see loadTranscript); most recently used last
+    this.transcripts = new Map();
+    this.transcriptCacheSize = 4;
+    // File reading and parsing run on worker threads (see getWorkerPool)
+    this.workerPool = null;
+    this.scanInFlight = null;
+    this.searchIndexing = null;
   }
 
   /**
-   * Get all Claude CLI sessions from ~/.claude/projects/
+   * Pool of parsing workers, one task per project directory or transcript
+   * read. Null inside a worker; callers fall back to parsing in-process when
+   * a task fails.
    */
-  async getAllSessions() {
-    try {
-      // Check if we have valid cached data
-      const now = Date.now();
-      if (this.sessionsCache.size > 0 && (now - this.lastCacheUpdate) < this.cacheValidityMs) {
-        return Array.from(this.sessionsCache.values());
+  getWorkerPool() {
+    if (!this.workerPool && isMainThread) {
+      this.workerPool = new WorkerPool(path.join(__dirname, 'claude-cli-history-worker.js'), {
+        workerData: { logLevel: Logger.getLevel() }
+      });
+    }
+    return this.workerPool;
+  }
+
+  /**
+   * Stop the parsing workers
+   */
+  close() {
+    if (this.workerPool) {
+      this.workerPool.destroy();
+      this.workerPool = null;
+    }
+    this.index.close();
+    this.indexAvailable = null;
+  }
+
+  /**
+   * Buffer view of bytes that went through structured clone (a Uint8Array)
+   */
+  static toBuffer(data) {
+    if (!data || Buffer.isBuffer(data)) {
+      return data || null;
+    }
+    return Buffer.from(data.buffer, data.byteOffset, data.byteLength);
+  }
+
+  /**
+   * The opened summary index, or null if it cannot be used (listing then reads every file)
+   */
+  getIndex() {
+    if (this.indexAvailable === null) {
+      try {
+        this.index.open();
+        this.indexAvailable = true;
+      } catch (error) {
+        log.warn('CLI history index unavailable, reading transcripts without it:', error.message);
+        this.indexAvailable = false;
       }
+    }
+    return this.indexAvailable ? this.index : null;
+  }
 
-      // Clear cache and rebuild
-      this.sessionsCache.clear();
+  /**
+   * Get all Claude CLI sessions from ~/.claude/projects/. Projects are scanned
+   * on worker threads; options.onProgress(sessions) is called with each
+   * project's sessions as it finishes, before the sorted full list resolves.
+   * Concurrent calls share one scan.
+   */
+  async getAllSessions(options = {}) {
+    // Check if we have valid cached data
+    if (this.sessionsCache.size > 0 && (Date.now() - this.lastCacheUpdate) < this.cacheValidityMs) {
+      return Array.from(this.sessionsCache.values());
+    }
+
+    if (!this.scanInFlight) {
+      const progressListeners = new Set();
+      const scan = this.scanAllSessions(sessions => progressListeners.forEach(listener => listener(sessions)))
+        .finally(() => {
+          this.scanInFlight = null;
+        });
+      this.scanInFlight = { promise: scan, progressListeners };
+    }
+
+    const { promise, progressListeners } = this.scanInFlight;
+    if (options.onProgress) {
+      progressListeners.add(options.onProgress);
+    }
+    try {
+      return await promise;
+    } finally {
+      progressListeners.delete(options.onProgress);
+    }
+  }
+
+  async scanAllSessions(onProgress) {
+    try {
+      const now = Date.now();
 
       // Check if projects directory exists
       try {
         await fs.access(this.projectsDir);
       } catch (error) {
-        console.log('Claude CLI projects directory not found:', this.projectsDir);
+        log.debug('Claude CLI projects directory not found:', this.projectsDir);
+        this.sessionsCache.clear();
         return [];
       }
 
       const projectDirs = await fs.readdir(this.projectsDir);
       const allSessions = [];
 
-      for (const encodedPath of projectDirs) {
+      const index = this.getIndex();
+      const records = index ? index.getRecords() : new Map();
+      const recordsByProject = new Map();
+      for (const record of records.values()) {
+        const projectDir = path.dirname(record.filePath);
+        if (!recordsByProject.has(projectDir)) {
+          recordsByProject.set(projectDir, []);
+        }
+        recordsByProject.get(projectDir).push(record);
+      }
+
+      const seenFiles = new Set();
+      let changedCount = 0;
+
+      // One task per project; the pool runs as many at once as it has workers
+      await Promise.all(projectDirs.map(async (encodedPath) => {
+        const projectRecords = recordsByProject.get(path.join(this.projectsDir, encodedPath)) || [];
+        let result;
+        try {
+          result = await this.scanProject(encodedPath, projectRecords);
+        } catch (error) {
+          log.warn(`Failed to read sessions from ${encodedPath}:`, error.message);
+          return;
+        }
+
+        result.seenFiles.forEach(filePath => seenFiles.add(filePath));
+        changedCount += result.changedRecords.length;
+        if (index) {
+          try {
+            index.upsertRecords(result.changedRecords);
+            for (const record of result.changedRecords) {
+              if (record.rewritten) {
+                index.resetSearchDocs(record.filePath);
+              }
+            }
+          } catch (error) {
+            log.warn('Failed to update CLI history index:', error.message);
+          }
+        }
+
+        allSessions.push(...result.sessions);
+        if (result.sessions.length > 0) {
+          onProgress(result.sessions);
+        }
+      }));
+
+      if (index) {
         try {
-          const sessions = await this.getSessionsFromProject(encodedPath);
-          allSessions.push(...sessions);
+          index.removeFiles(Array.from(records.keys()).filter(filePath => !seenFiles.has(filePath)));
         } catch (error) {
-          console.warn(`Failed to read sessions from ${encodedPath}:`, error.message);
+          log.warn('Failed to update CLI history index:', error.message);
         }
       }
+      log.debug(`Listed ${allSessions.length} CLI sessions, re-read ${changedCount} changed transcripts`);
+      if (index) {
+        this.updateSearchIndex();
+      }
 
       // Sort by last activity (newest first)
       allSessions.sort((a, b) => new Date(b.lastActivity) - new Date(a.lastActivity));
 
       // Cache the results
+      this.sessionsCache.clear();
       allSessions.forEach(session => {
         this.sessionsCache.set(session.id, session);
       });
@@ -56,232 +209,660 @@ class ClaudeCliHistory {
 
       return allSessions;
     } catch (error) {
-      console.error('Error getting Claude CLI sessions:', error);
+      log.error('Error getting Claude CLI sessions:', error);
       return [];
     }
   }
 
   /**
-   * Get sessions from a specific project directory
+   * Scan one project directory on a worker (in-process if the worker fails).
+   * Resolves to { sessions, changedRecords, seenFiles }.
+   */
+  async scanProject(encodedPath, records) {
+    const pool = this.getWorkerPool();
+    if (pool) {
+      try {
+        return await pool.run('scanProject', { projectsDir: this.projectsDir, encodedPath, records });
+      } catch (error) {
+        log.warn(`Scanning ${encodedPath} on a worker failed, scanning in-process:`, error.message);
+      }
+    }
+
+    const scan = {
+      records: new Map(records.map(record => [record.filePath, record])),
+      seenFiles: new Set(),
+      changedRecords: []
+    };
+    const sessions = await this.getSessionsFromProject(encodedPath, scan);
+    return { sessions, changedRecords: scan.changedRecords, seenFiles: Array.from(scan.seenFiles) };
+  }
+
+  /**
+   * Get sessions from a specific project directory. Files whose size and mtime
+   * match their record in scan.records are listed without being read; re-read
+   * files are added to scan.changedRecords.
    */
-  async getSessionsFromProject(encodedProjectPath) {
+  async getSessionsFromProject(encodedProjectPath, scan = { records: new Map(), seenFiles: new Set(), changedRecords: [] }) {
     const projectDir = path.join(this.projectsDir, encodedProjectPath);
     const decodedPath = this.decodeProjectPath(encodedProjectPath);
 
     try {
       const files = await fs.readdir(projectDir);
       const jsonlFiles = files.filter(file => file.endsWith('.jsonl'));
+      const stats = await Promise.all(jsonlFiles.map(file => fs.stat(path.join(projectDir, file)).catch(() => null)));
 
       const sessions = [];
 
-      for (const file of jsonlFiles) {
+      for (let i = 0; i < jsonlFiles.length; i++) {
+        const file = jsonlFiles[i];
+        const stat = stats[i];
+        const filePath = path.join(projectDir, file);
+        const sessionId = path.basename(file, '.jsonl');
+        scan.seenFiles.add(filePath);
+        let record = scan.records.get(filePath);
+
         try {
-          const sessionId = path.basename(file, '.jsonl');
-          const session = await this.parseSessionFile(path.join(projectDir, file), sessionId, decodedPath);
-          if (session) {
-            sessions.push(session);
+          if (!stat) {
+            throw new Error('could not stat file');
+          }
+          if (!record || record.size !== stat.size || record.mtimeMs !== stat.mtimeMs) {
+            // A grown transcript only needs its appended lines; one that shrank was rewritten
+            const base = record && record.parsedOffset > 0 && stat.size >= record.parsedOffset ? record : null;
+            const session = await this.parseSessionFile(filePath, sessionId, decodedPath, base);
+            const previous = record;
+            record = ClaudeCliHistory.toIndexRecord(session, { filePath, sessionId, projectPath: decodedPath, size: stat.size, mtimeMs: stat.mtimeMs });
+            // Summarized from byte 0 again: whatever was indexed from the old content is stale
+            record.rewritten = Boolean(previous) && !base;
+            scan.changedRecords.push(record);
           }
         } catch (error) {
-          console.warn(`Failed to parse session file ${file}:`, error.message);
+          // Unreadable for now (locked, mid-rotation): no changed record, so
+          // the file is read again on the next scan; keep listing what we had
+          log.warn(`Failed to parse session file ${file}:`, error.message);
+        }
+
+        if (record && record.messageCount > 0) {
+          sessions.push(ClaudeCliHistory.recordToSession(record));
         }
       }
 
       return sessions;
     } catch (error) {
-      console.warn(`Failed to read project directory ${encodedProjectPath}:`, error.message);
+      log.warn(`Failed to read project directory ${encodedProjectPath}:`, error.message);
       return [];
     }
   }
 
   /**
-   * Parse a single .jsonl session file
+   * Index record for a parsed session (or for a file without entries)
    */
-  async parseSessionFile(filePath, sessionId, projectPath) {
-    try {
-      const content = await fs.readFile(filePath, 'utf-8');
-      const lines = content.trim().split('\n').filter(line => line.trim());
+  static toIndexRecord(session, file) {
+    return {
+      filePath: file.filePath,
+      sessionId: file.sessionId,
+      projectPath: file.projectPath,
+      size: file.size,
+      mtimeMs: file.mtimeMs,
+      parsedOffset: session ? session.parsedOffset : 0,
+      messageCount: session ? session.messageCount : 0,
+      firstActivity: session?.firstActivity ?? null,
+      lastActivity: session?.lastActivity ?? null,
+      modelUsed: session?.modelUsed ?? null,
+      gitBranch: session?.gitBranch ?? null,
+      version: session?.version ?? null,
+      preview: session?.preview ?? null
+    };
+  }
 
-      if (lines.length === 0) {
-        return null;
+  static recordToSession(record) {
+    return {
+      id: record.sessionId,
+      projectPath: record.projectPath,
+      sessionId: record.sessionId,
+      messageCount: record.messageCount,
+      firstActivity: record.firstActivity,
+      lastActivity: record.lastActivity,
+      modelUsed: record.modelUsed || 'unknown',
+      gitBranch: record.gitBranch,
+      version: record.version,
+      preview: record.preview || NO_PREVIEW,
+      filePath: record.filePath
+    };
+  }
+
+  /**
+   * Preview text of a message's content (a string or content blocks)
+   */
+  static getPreviewText(content) {
+    if (typeof content === 'string') {
+      return content;
+    }
+    if (Array.isArray(content)) {
+      const text = content.filter(item => item?.type === 'text').map(item => item.text).join(' ');
+      return text || null;
+    }
+    return null;
+  }
+
+  /**
+   * Searchable text of a transcript entry: user and assistant text and the
+   * string values of tool inputs (paths, commands, patterns, edits). Tool
+   * results and thinking are left out. Null if there is nothing to index.
+   */
+  static getSearchText(entry) {
+    if (entry?.type === 'summary') {
+      return typeof entry.summary === 'string' && entry.summary.trim() ? entry.summary : null;
+    }
+    if (entry?.type !== 'user' && entry?.type !== 'assistant') {
+      return null;
+    }
+
+    const parts = [];
+    const content = entry.message?.content;
+    if (typeof content === 'string') {
+      parts.push(content);
+    } else if (Array.isArray(content)) {
+      for (const item of content) {
+        if (item?.type === 'text' && item.text) {
+          parts.push(item.text);
+        } else if (item?.type === 'tool_use') {
+          parts.push(item.name || '');
+          ClaudeCliHistory.collectInputStrings(item.input, parts, 0);
+        }
+      }
+    }
+
+    const text = parts.join('\n').trim();
+    if (!text) {
+      return null;
+    }
+    return text.length > SEARCH_DOC_MAX_CHARS ? text.slice(0, SEARCH_DOC_MAX_CHARS) : text;
+  }
+
+  static collectInputStrings(value, parts, depth) {
+    if (typeof value === 'string') {
+      parts.push(value.length > SEARCH_INPUT_MAX_CHARS ? value.slice(0, SEARCH_INPUT_MAX_CHARS) : value);
+    } else if (value && typeof value === 'object' && depth < 3) {
+      for (const item of Object.values(value)) {
+        ClaudeCliHistory.collectInputStrings(item, parts, depth + 1);
       }
+    }
+  }
 
-      const messages = [];
-      let firstMessage = null;
-      let lastMessage = null;
-      let modelUsed = 'unknown';
-      let gitBranch = null;
-      let version = null;
+  /**
+   * Summarize a single .jsonl session file without parsing all of it (see
+   * scanTranscript). With `base` (an index record whose summary covers the file
+   * up to base.parsedOffset) only the appended bytes are scanned and folded
+   * into the base summary. Resolves to null for a transcript without entries;
+   * read errors are thrown so the file is tried again on the next scan.
+   */
+  async parseSessionFile(filePath, sessionId, projectPath, base = null) {
+    const needFirstEntry = !base || base.messageCount === 0;
+    const needFirstUser = !base || base.preview === null;
+    const scan = await this.scanTranscript(filePath, base ? base.parsedOffset : 0, { needFirstEntry, needFirstUser });
 
-      for (const line of lines) {
-        try {
-          const entry = JSON.parse(line);
+    const messageCount = (base ? base.messageCount : 0) + scan.lineCount;
+    if (messageCount === 0) {
+      return null;
+    }
 
-          if (!firstMessage) {
-            firstMessage = entry;
-            gitBranch = entry.gitBranch;
-            version = entry.version;
-          }
+    let preview = base ? base.preview : null;
+    if (needFirstUser && scan.firstUserEntry) {
+      preview = ClaudeCliHistory.getPreviewText(scan.firstUserEntry.message?.content) || NO_PREVIEW;
+      preview = preview.length > 100 ? preview.substring(0, 100) + '...' : preview;
+    }
+    const firstEntry = needFirstEntry ? scan.firstEntry : null;
+
+    return {
+      id: sessionId,
+      projectPath: projectPath,
+      sessionId: sessionId,
+      messageCount: messageCount,
+      firstActivity: firstEntry ? firstEntry.timestamp ?? null : base?.firstActivity ?? null,
+      lastActivity: scan.lastEntry ? scan.lastEntry.timestamp ?? null : base?.lastActivity ?? null,
+      modelUsed: scan.lastModel || base?.modelUsed || 'unknown',
+      gitBranch: firstEntry ? firstEntry.gitBranch ?? null : base?.gitBranch ?? null,
+      version: firstEntry ? firstEntry.version ?? null : base?.version ?? null,
+      // Index records keep null until a user message shows up
+      preview: preview,
+      filePath: filePath,
+      parsedOffset: scan.endOffset
+    };
+  }
+
+  /**
+   * Streaming summary scan of a transcript from byte `offset` to EOF, in
+   * SCAN_CHUNK_BYTES reads so memory stays constant whatever the file size
+   * (a single line is only assembled when it has to be parsed).
+   *
+   * Forward pass: counts non-empty lines without parsing them, parsing only the
+   * first lines until the first entry and the first user message are found
+   * (when asked for, within HEAD_SCAN_MAX_LINES). Backward pass from EOF:
+   * parses the last entry, then only lines mentioning "model" until the last
+   * assistant model is found. Lines count as entries whether or not they parse.
+   *
+   * Resolves to { lineCount, firstEntry, firstUserEntry, lastEntry, lastModel,
+   * endOffset }; endOffset excludes a trailing line that is still being written.
+   */
+  async scanTranscript(filePath, offset, options = {}) {
+    const handle = await fs.open(filePath, 'r');
+    try {
+      const { size } = await handle.stat();
+      const result = { lineCount: 0, firstEntry: null, firstUserEntry: null, lastEntry: null, lastModel: null, endOffset: offset };
 
-          lastMessage = entry;
+      const wantsHead = () => (options.needFirstEntry && !result.firstEntry) || (options.needFirstUser && !result.firstUserEntry);
+      const takeHeadEntry = (entry) => {
+        if (options.needFirstEntry && !result.firstEntry) {
+          result.firstEntry = entry;
+        }
+        if (options.needFirstUser && !result.firstUserEntry && entry.type === 'user') {
+          result.firstUserEntry = entry;
+        }
+      };
 
-          // Extract model info from assistant messages
-          if (entry.type === 'assistant' && entry.message && entry.message.model) {
-            modelUsed = entry.message.model;
+      // Forward pass: count lines, parse the head
+      const buffer = Buffer.alloc(SCAN_CHUNK_BYTES);
+      let headLinesLeft = wantsHead() ? HEAD_SCAN_MAX_LINES : 0;
+      let lineParts = []; // pieces of the current line, kept only while parsing the head
+      let lineHasBytes = false;
+      let lastLineEnd = offset; // just past the last newline
+      let position = offset;
+
+      while (position < size) {
+        const { bytesRead } = await handle.read(buffer, 0, Math.min(buffer.length, size - position), position);
+        if (bytesRead === 0) {
+          break;
+        }
+        const chunk = buffer.subarray(0, bytesRead);
+        let lineStart = 0;
+        let newline;
+        while ((newline = chunk.indexOf(0x0A, lineStart)) !== -1) {
+          if (newline > lineStart || lineHasBytes) {
+            result.lineCount++;
+            if (headLinesLeft > 0) {
+              const piece = chunk.subarray(lineStart, newline);
+              const entry = ClaudeCliHistory.parseJsonLine(lineParts.length > 0 ? Buffer.concat([...lineParts, piece]) : piece);
+              if (entry) {
+                takeHeadEntry(entry);
+              }
+              headLinesLeft = wantsHead() ? headLinesLeft - 1 : 0;
+            }
+          }
+          lineParts = [];
+          lineHasBytes = false;
+          lineStart = newline + 1;
+        }
+        if (lineStart > 0) {
+          lastLineEnd = position + lineStart;
+        }
+        if (lineStart < chunk.length) {
+          lineHasBytes = true;
+          if (headLinesLeft > 0) {
+            // `buffer` is reused for the next read
+            lineParts.push(Buffer.from(chunk.subarray(lineStart)));
+          }
+        }
+        position += bytesRead;
+      }
+      result.endOffset = lastLineEnd;
+
+      const examineTailLine = (line) => {
+        if (!result.lastEntry) {
+          const entry = ClaudeCliHistory.parseJsonLine(line);
+          if (entry) {
+            result.lastEntry = entry;
+            if (entry.type === 'assistant' && entry.message?.model) {
+              result.lastModel = entry.message.model;
+            }
+            return;
+          }
+        }
+        if (!result.lastModel && line.includes('"model"')) {
+          const entry = ClaudeCliHistory.parseJsonLine(line);
+          if (entry?.type === 'assistant' && entry.message?.model) {
+            result.lastModel = entry.message.model;
           }
+        }
+      };
 
-          messages.push(entry);
-        } catch (parseError) {
-          console.warn(`Failed to parse line in ${filePath}:`, parseError.message);
+      // A last line without a newline counts once it parses; otherwise it is
+      // still being written and is left for the next scan
+      if (size > lastLineEnd) {
+        const rest = Buffer.alloc(size - lastLineEnd);
+        await handle.read(rest, 0, rest.length, lastLineEnd);
+        const entry = rest.toString('utf8').trim() ? ClaudeCliHistory.parseJsonLine(rest) : null;
+        if (entry) {
+          result.lineCount++;
+          result.endOffset = size;
+          if (wantsHead()) {
+            takeHeadEntry(entry);
+          }
+          examineTailLine(rest);
         }
       }
 
-      if (!firstMessage) {
-        return null;
+      // Backward pass over the complete lines: last entry and last model
+      let carry = Buffer.alloc(0); // the end of a line whose start is in an earlier chunk
+      position = lastLineEnd;
+      while (position > offset && !(result.lastEntry && result.lastModel)) {
+        const start = Math.max(offset, position - SCAN_CHUNK_BYTES);
+        const chunk = Buffer.alloc(position - start);
+        await handle.read(chunk, 0, chunk.length, start);
+        const data = carry.length > 0 ? Buffer.concat([chunk, carry]) : chunk;
+
+        let lineEnd = data.length;
+        for (;;) {
+          const newline = lineEnd > 0 ? data.lastIndexOf(0x0A, lineEnd - 1) : -1;
+          if (newline === -1 && start > offset) {
+            carry = Buffer.from(data.subarray(0, lineEnd));
+            break;
+          }
+          const line = data.subarray(newline + 1, lineEnd);
+          if (line.length > 0) {
+            examineTailLine(line);
+          }
+          if (newline === -1 || (result.lastEntry && result.lastModel)) {
+            break;
+          }
+          lineEnd = newline;
+        }
+        position = start;
       }
 
-      // Get the first user message content for preview
-      const firstUserMessage = messages.find(m => m.type === 'user');
-      const preview = firstUserMessage?.message?.content || 'No user message found';
+      return result;
+    } finally {
+      await handle.close();
+    }
+  }
 
-      return {
-        id: sessionId,
-        projectPath: projectPath,
-        sessionId: sessionId,
-        messageCount: messages.length,
-        firstActivity: firstMessage.timestamp,
-        lastActivity: lastMessage.timestamp,
-        modelUsed: modelUsed,
-        gitBranch: gitBranch,
-        version: version,
-        preview: preview.length > 100 ? preview.substring(0, 100) + '...' : preview,
-        filePath: filePath
-      };
-    } catch (error) {
-      console.warn(`Failed to parse session file ${filePath}:`, error.message);
+  static parseJsonLine(line) {
+    try {
+      return JSON.parse(line.toString('utf8'));
+    } catch (parseError) {
       return null;
     }
   }
 
   /**
-   * Get detailed conversation for a specific session
+   * Parse the lines of a transcript from byte `offset` on, calling
+   * onEntry(entry) for each entry. `partial` holds the bytes of an incomplete
+   * line that ended at `offset` on a previous read. Resolves to
+   * { offset, partial }: the end of the file as read, and the bytes of a
+   * trailing line that is still being written (empty if the file ended with a
+   * complete line). A trailing line without a newline that already parses as
+   * JSON counts as complete.
+   *
+   * With options.maxBytes the read stops after roughly that many bytes (at
+   * least one complete line), leaving the rest of the file for another call;
+   * `partial` then holds the start of the next line.
    */
-  async getSessionDetails(sessionId) {
+  async readEntriesFrom(filePath, offset, onEntry, partial = null, options = {}) {
+    const handle = await fs.open(filePath, 'r');
     try {
-      // First try to find in cache
-      const cachedSession = this.sessionsCache.get(sessionId);
-      if (!cachedSession) {
-        // If not in cache, refresh sessions and try again
-        await this.getAllSessions();
-        const refreshedSession = this.sessionsCache.get(sessionId);
-        if (!refreshedSession) {
-          throw new Error(`Session ${sessionId} not found`);
+      const buffer = Buffer.alloc(READ_CHUNK_BYTES);
+      let position = offset;
+      // Pieces of the line currently being assembled
+      let lineParts = partial && partial.length > 0 ? [partial] : [];
+      let linesRead = 0;
+
+      for (;;) {
+        if (options.maxBytes && position - offset >= options.maxBytes && linesRead > 0) {
+          return { offset: position, partial: lineParts.length > 0 ? Buffer.concat(lineParts) : Buffer.alloc(0) };
+        }
+        const { bytesRead } = await handle.read(buffer, 0, buffer.length, position);
+        if (bytesRead === 0) {
+          break;
+        }
+        position += bytesRead;
+
+        const chunk = buffer.subarray(0, bytesRead);
+        let lineStart = 0;
+        let newline;
+        while ((newline = chunk.indexOf(0x0A, lineStart)) !== -1) {
+          const piece = chunk.subarray(lineStart, newline);
+          const line = lineParts.length > 0 ? Buffer.concat([...lineParts, piece]) : piece;
+          lineParts = [];
+          this.parseTranscriptLine(line.toString('utf8'), filePath, onEntry);
+          lineStart = newline + 1;
+          linesRead++;
+        }
+        if (lineStart < chunk.length) {
+          // `buffer` is reused for the next read
+          lineParts.push(Buffer.from(chunk.subarray(lineStart)));
         }
       }
 
-      const session = this.sessionsCache.get(sessionId);
-      const content = await fs.readFile(session.filePath, 'utf-8');
-      const lines = content.trim().split('\n').filter(line => line.trim());
+      const rest = lineParts.length > 0 ? Buffer.concat(lineParts) : Buffer.alloc(0);
+      if (rest.length > 0) {
+        const text = rest.toString('utf8');
+        let entry;
+        try {
+          entry = text.trim() ? JSON.parse(text) : undefined;
+        } catch (parseError) {
+          // Still being written; parsed once its newline arrives
+          return { offset: position, partial: rest };
+        }
+        if (entry !== undefined) {
+          onEntry(entry);
+        }
+      }
+      return { offset: position, partial: Buffer.alloc(0) };
+    } finally {
+      await handle.close();
+    }
+  }
 
-      const conversation = [];
-      const toolCallMap = new Map(); // Track tool calls to pair with their results
+  parseTranscriptLine(line, filePath, onEntry) {
+    if (!line.trim()) {
+      return;
+    }
+    let entry;
+    try {
+      entry = JSON.parse(line);
+    } catch (parseError) {
+      log.warn(`Failed to parse line in ${filePath}:`, parseError.message);
+      return;
+    }
+    onEntry(entry);
+  }
 
-      for (const line of lines) {
-        try {
-          const entry = JSON.parse(line);
-
-          let messageContent = '';
-          let role = entry.type;
-          let toolCalls = [];
-          let isToolResultMessage = false;
-
-          if (entry.message) {
-            if (typeof entry.message.content === 'string') {
-              messageContent = entry.message.content;
-            } else if (Array.isArray(entry.message.content)) {
-              // Handle Claude's content array format with proper type handling
-              const contentParts = [];
-
-              for (const item of entry.message.content) {
-                switch (item.type) {
-                  case 'text':
-                    contentParts.push(item.text);
-                    break;
-                  case 'thinking':
-                    contentParts.push(`**Internal Reasoning:**\n${item.thinking}`);
-                    break;
-                  case 'tool_use':
-                    // Store tool call info for expandable display
-                    toolCalls.push({
-                      id: item.id,
-                      name: item.name,
-                      input: item.input
-                    });
-                    // Don't include tool call in main content - will be shown separately
-                    break;
-                  case 'tool_result':
-                    // Skip tool result messages - they'll be handled differently
-                    if (role === 'user') {
-                      isToolResultMessage = true;
-                      // Store the tool result to pair with its call
-                      if (item.tool_use_id) {
-                        toolCallMap.set(item.tool_use_id, item.content);
-                      }
-                    } else {
-                      contentParts.push(`**Tool Result:**\n${item.content}`);
-                    }
-                    break;
-                  default:
-                    contentParts.push(`[${item.type || 'Unknown'} content]`);
-                }
-              }
+  /**
+   * Parsed entries of a transcript, cached per file. On each call only the
+   * bytes appended since the previous one are read and parsed, and the cached
+   * conversation view is extended with the new entries; a file that shrank was
+   * rewritten and is parsed again from the start.
+   */
+  async loadTranscript(filePath) {
+    const stat = await fs.stat(filePath);
+    let transcript = this.transcripts.get(filePath);
 
-              messageContent = contentParts.filter(content => content.trim() !== '').join('\n\n');
-            } else if (entry.message.content && entry.message.content.text) {
-              messageContent = entry.message.content.text;
-            } else if (entry.message.role && entry.message.content) {
-              role = entry.message.role;
-              messageContent = entry.message.content;
-            }
-          }
+    if (transcript && stat.size < transcript.offset) {
+      log.debug(`CLI transcript shrank, parsing it again: ${filePath}`);
+      transcript = null;
+    }
+    if (!transcript) {
+      transcript = {
+        offset: 0,
+        partial: null,
+        size: -1,
+        mtimeMs: 0,
+        entries: [],
+        entryIndexByUuid: new Map(),
+        conversation: [],
+        toolCallMap: new Map() // tool_use id -> result content, for pairing
+      };
+    }
 
-          // Skip tool result messages (they'll be shown as expandable content)
-          if (isToolResultMessage) {
-            continue;
-          }
+    if (stat.size !== transcript.size || stat.mtimeMs !== transcript.mtimeMs) {
+      const { entries: newEntries, offset, partial } = await this.readTranscriptTail(filePath, transcript.offset, transcript.partial);
+      transcript.offset = offset;
+      transcript.partial = partial;
+      transcript.size = stat.size;
+      transcript.mtimeMs = stat.mtimeMs;
 
-          // For tool calls, pair them with their results
-          if (toolCalls.length > 0) {
-            toolCalls = toolCalls.map(toolCall => ({
-              ...toolCall,
-              result: toolCallMap.get(toolCall.id) || null
-            }));
-          }
+      for (const entry of newEntries) {
+        if (entry.uuid && !transcript.entryIndexByUuid.has(entry.uuid)) {
+          transcript.entryIndexByUuid.set(entry.uuid, transcript.entries.length);
+        }
+        transcript.entries.push(entry);
 
-          conversation.push({
-            id: entry.uuid,
-            role: role,
-            content: messageContent,
-            timestamp: entry.timestamp,
-            model: entry.message?.model || null,
-            usage: entry.message?.usage || null,
-            toolCalls: toolCalls,
-            hasToolCalls: toolCalls.length > 0
-          });
-        } catch (parseError) {
-          console.warn(`Failed to parse conversation entry:`, parseError.message);
+        const conversationEntry = this.buildConversationEntry(entry, transcript.toolCallMap);
+        if (conversationEntry) {
+          transcript.conversation.push(conversationEntry);
         }
       }
+      if (newEntries.length > 0) {
+        log.debug(`Parsed ${newEntries.length} new entries from ${filePath}`);
+      }
+    }
+
+    // Keep the most recently used transcripts only
+    this.transcripts.delete(filePath);
+    this.transcripts.set(filePath, transcript);
+    while (this.transcripts.size > this.transcriptCacheSize) {
+      this.transcripts.delete(this.transcripts.keys().next().value);
+    }
+
+    return transcript;
+  }
+
+  /**
+   * Read and parse a transcript from `offset` on a worker (in-process if the
+   * worker fails). Resolves to { entries, offset, partial } (see readEntriesFrom).
+   */
+  async readTranscriptTail(filePath, offset, partial) {
+    const pool = this.getWorkerPool();
+    if (pool) {
+      try {
+        const result = await pool.run('readEntries', { filePath, offset, partial });
+        return { ...result, partial: ClaudeCliHistory.toBuffer(result.partial) };
+      } catch (error) {
+        log.warn(`Parsing ${filePath} on a worker failed, parsing in-process:`, error.message);
+      }
+    }
+
+    const entries = [];
+    const result = await this.readEntriesFrom(filePath, offset, entry => entries.push(entry), partial);
+    return { entries, ...result };
+  }
+
+  /**
+   * Cached session summary by id, refreshing the session list once if unknown
+   */
+  async findSession(sessionId) {
+    if (!this.sessionsCache.has(sessionId)) {
+      await this.getAllSessions();
+    }
+    const session = this.sessionsCache.get(sessionId);
+    if (!session) {
+      throw new Error(`Session ${sessionId} not found`);
+    }
+    return session;
+  }
+
+  /**
+   * Get detailed conversation for a specific session
+   */
+  async getSessionDetails(sessionId) {
+    try {
+      const session = await this.findSession(sessionId);
+      const transcript = await this.loadTranscript(session.filePath);
 
       return {
         ...session,
-        conversation: conversation
+        conversation: transcript.conversation.slice()
       };
     } catch (error) {
-      console.error(`Error getting session details for ${sessionId}:`, error);
+      log.error(`Error getting session details for ${sessionId}:`, error);
       throw error;
     }
   }
 
+  /**
+   * Conversation view of one transcript entry, or null for tool result
+   * messages (their content is recorded in toolCallMap for pairing instead)
+   */
+  buildConversationEntry(entry, toolCallMap) {
+    let messageContent = '';
+    let role = entry.type;
+    let toolCalls = [];
+    let isToolResultMessage = false;
+
+    if (entry.message) {
+      if (typeof entry.message.content === 'string') {
+        messageContent = entry.message.content;
+      } else if (Array.isArray(entry.message.content)) {
+        // Handle Claude's content array format with proper type handling
+        const contentParts = [];
+
+        for (const item of entry.message.content) {
+          switch (item.type) {
+            case 'text':
+              contentParts.push(item.text);
+              break;
+            case 'thinking':
+              contentParts.push(`**Internal Reasoning:**\n${item.thinking}`);
+              break;
+            case 'tool_use':
+              // Store tool call info for expandable display
+              toolCalls.push({
+                id: item.id,
+                name: item.name,
+                input: item.input
+              });
+              // Don't include tool call in main content - will be shown separately
+              break;
+            case 'tool_result':
+              // Skip tool result messages - they'll be handled differently
+              if (role === 'user') {
+                isToolResultMessage = true;
+                // Store the tool result to pair with its call
+                if (item.tool_use_id) {
+                  toolCallMap.set(item.tool_use_id, item.content);
+                }
+              } else {
+                contentParts.push(`**Tool Result:**\n${item.content}`);
+              }
+              break;
+            default:
+              contentParts.push(`[${item.type || 'Unknown'} content]`);
+          }
+        }
+
+        messageContent = contentParts.filter(content => content.trim() !== '').join('\n\n');
+      } else if (entry.message.content && entry.message.content.text) {
+        messageContent = entry.message.content.text;
+      } else if (entry.message.role && entry.message.content) {
+        role = entry.message.role;
+        messageContent = entry.message.content;
+      }
+    }
+
+    // Skip tool result messages (they'll be shown as expandable content)
+    if (isToolResultMessage) {
+      return null;
+    }
+
+    // For tool calls, pair them with their results
+    if (toolCalls.length > 0) {
+      toolCalls = toolCalls.map(toolCall => ({
+        ...toolCall,
+        result: toolCallMap.get(toolCall.id) || null
+      }));
+    }
+
+    return {
+      id: entry.uuid,
+      role: role,
+      content: messageContent,
+      timestamp: entry.timestamp,
+      model: entry.message?.model || null,
+      usage: entry.message?.usage || null,
+      toolCalls: toolCalls,
+      hasToolCalls: toolCalls.length > 0
+    };
+  }
+
   /**
    * Decode project path (convert '-' back to '/')
    */
@@ -295,17 +876,175 @@ class ClaudeCliHistory {
   }
 
   /**
-   * Search sessions by content or project path
+   * Search sessions by what was said in them. With the index this is a ranked
+   * full-text search over message text, tool inputs and project paths, and
+   * each session carries its best match as `match` ({ snippet, messageId,
+   * role, timestamp, hitCount }; matched terms in the snippet are wrapped in
+   * \u0002 and \u0003). Without the index it falls back to substring matching
+   * on the session summaries. Resolves to { sessions, hasMore, indexing } for
+   * the page given by options.offset and options.limit; `indexing` is true
+   * while some transcripts are not fully indexed yet, so full-text results may
+   * be incomplete.
    */
-  async searchSessions(query) {
+  async searchSessions(query, options = {}) {
+    const limit = options.limit ?? 20;
+    const offset = options.offset ?? 0;
     const allSessions = await this.getAllSessions();
-    const lowerQuery = query.toLowerCase();
 
-    return allSessions.filter(session => {
+    const index = this.getIndex();
+    const searchQuery = ClaudeCliHistory.toSearchQuery(query);
+    if (index && searchQuery) {
+      try {
+        // Files changed since the last listing are picked up by the next search
+        this.updateSearchIndex();
+        const sessionsByFile = new Map(allSessions.map(session => [session.filePath, session]));
+        const hits = index.search(searchQuery, { limit: limit + 1, offset, open: SNIPPET_OPEN, close: SNIPPET_CLOSE });
+        const sessions = hits.slice(0, limit)
+          .map(hit => ({
+            // Files listed since the cached list was built come from their record
+            ...(sessionsByFile.get(hit.record.filePath) || ClaudeCliHistory.recordToSession(hit.record)),
+            match: {
+              snippet: hit.snippet,
+              messageId: hit.messageUuid,
+              role: hit.role,
+              timestamp: hit.timestamp,
+              hitCount: hit.hitCount
+            }
+          }));
+        return { sessions, hasMore: hits.length > limit, indexing: index.hasSearchBacklog() };
+      } catch (error) {
+        log.warn('Full-text search failed, matching summaries instead:', error.message);
+      }
+    }
+
+    const lowerQuery = String(query || '').toLowerCase();
+    const matches = allSessions.filter(session => {
       return session.projectPath.toLowerCase().includes(lowerQuery) ||
              session.preview.toLowerCase().includes(lowerQuery) ||
              session.sessionId.toLowerCase().includes(lowerQuery);
     });
+    return { sessions: matches.slice(offset, offset + limit), hasMore: matches.length > offset + limit, indexing: false };
+  }
+
+  /**
+   * FTS5 query for text typed by the user: every whitespace-separated term
+   * must match, each as a phrase (so `src/main.js` matches those tokens in a
+   * row), and the last one may be the start of a word. Null if there is
+   * nothing to search for.
+   */
+  static toSearchQuery(text) {
+    const terms = String(text || '').split(/\s+/).filter(term => /[\p{L}\p{N}]/u.test(term));
+    if (terms.length === 0) {
+      return null;
+    }
+    return terms
+      .map((term, i) => `"${term.replace(/"/g, '""')}"${i === terms.length - 1 ? '*' : ''}`)
+      .join(' ');
+  }
+
+  /**
+   * Bring the full-text index up to date in the background: each file is read
+   * (on workers) from where its indexed text ends. Concurrent calls share one
+   * run.
+   */
+  updateSearchIndex() {
+    if (!this.searchIndexing) {
+      this.searchIndexing = this.indexSearchBacklog()
+        .catch(error => log.warn('Failed to update CLI history search index:', error.message))
+        .finally(() => {
+          this.searchIndexing = null;
+        });
+    }
+    return this.searchIndexing;
+  }
+
+  async indexSearchBacklog() {
+    const index = this.getIndex();
+    if (!index) {
+      return;
+    }
+    const backlog = index.getSearchBacklog();
+    if (backlog.length === 0) {
+      return;
+    }
+
+    const startTime = Date.now();
+    const pending = backlog.slice();
+    let docCount = 0;
+    const pool = this.getWorkerPool();
+    const runners = Math.min(pool ? pool.size : 1, pending.length);
+    await Promise.all(Array.from({ length: runners }, async () => {
+      let record;
+      while ((record = pending.shift())) {
+        try {
+          docCount += await this.indexTranscriptText(index, record);
+        } catch (error) {
+          log.warn(`Failed to index ${record.filePath} for search:`, error.message);
+        }
+      }
+    }));
+    log.debug(`Indexed ${docCount} search documents from ${backlog.length} CLI transcripts in ${Date.now() - startTime}ms`);
+  }
+
+  /**
+   * Add a transcript's not yet indexed lines to the search index, a bounded
+   * number of bytes at a time. Resolves to the number of documents added.
+   */
+  async indexTranscriptText(index, record) {
+    let offset = record.searchOffset;
+    let docCount = 0;
+    while (offset < record.parsedOffset) {
+      const result = await this.readSearchDocs(record.filePath, offset);
+      if (!index.db) {
+        // Closed while reading
+        return docCount;
+      }
+      const docs = offset === 0
+        ? [{ messageUuid: null, role: 'session', timestamp: record.firstActivity, text: `${record.projectPath} ${record.sessionId}` }, ...result.docs]
+        : result.docs;
+      if (!index.addSearchDocs(record.filePath, docs, offset, result.offset)) {
+        // Reset (rewritten) or indexed elsewhere while this slice was read
+        return docCount;
+      }
+      docCount += docs.length;
+      if (result.offset <= offset) {
+        break;
+      }
+      offset = result.offset;
+    }
+    return docCount;
+  }
+
+  /**
+   * Search documents from byte `offset` of a transcript, read on a worker
+   * (in-process if the worker fails). Resolves to { docs, offset }.
+   */
+  async readSearchDocs(filePath, offset) {
+    const pool = this.getWorkerPool();
+    if (pool) {
+      try {
+        return await pool.run('readSearchDocs', { filePath, offset });
+      } catch (error) {
+        log.warn(`Reading ${filePath} on a worker failed, reading in-process:`, error.message);
+      }
+    }
+    return this.collectSearchDocs(filePath, offset);
+  }
+
+  /**
+   * Up to SEARCH_READ_BYTES of a transcript from `offset` (a line start) as
+   * search documents. Resolves to { docs, offset } with the offset of the
+   * first line not read.
+   */
+  async collectSearchDocs(filePath, offset) {
+    const docs = [];
+    const result = await this.readEntriesFrom(filePath, offset, (entry) => {
+      const text = ClaudeCliHistory.getSearchText(entry);
+      if (text) {
+        docs.push({ messageUuid: entry.uuid ?? null, role: entry.type, timestamp: entry.timestamp ?? null, text });
+      }
+    }, null, { maxBytes: SEARCH_READ_BYTES });
+    return { docs, offset: result.offset - result.partial.length };
   }
 
   /**
@@ -321,29 +1060,12 @@ class ClaudeCliHistory {
    */
   async extractFileChangesFromMessage(sessionId, messageId) {
     try {
-      // Get session details first
-      const session = this.sessionsCache.get(sessionId);
-      if (!session) {
-        throw new Error(`Session ${sessionId} not found`);
-      }
-
-      // Read the session file
-      const content = await fs.readFile(session.filePath, 'utf-8');
-      const lines = content.trim().split('\n').filter(line => line.trim());
+      const session = await this.findSession(sessionId);
+      const transcript = await this.loadTranscript(session.filePath);
 
       // Find the specific message
-      let targetMessage = null;
-      for (const line of lines) {
-        try {
-          const entry = JSON.parse(line);
-          if (entry.uuid === messageId) {
-            targetMessage = entry;
-            break;
-          }
-        } catch (parseError) {
-          continue;
-        }
-      }
+      const targetIndex = transcript.entryIndexByUuid.get(messageId);
+      const targetMessage = targetIndex === undefined ? null : transcript.entries[targetIndex];
 
       if (!targetMessage) {
         throw new Error(`Message ${messageId} not found`);
@@ -351,7 +1073,7 @@ class ClaudeCliHistory {
 
       return this.extractFileChangesFromMessageData(targetMessage);
     } catch (error) {
-      console.error(`Error extracting file changes for message ${messageId}:`, error);
+      log.error(`Error extracting file changes for message ${messageId}:`, error);
       throw error;
     }
   }
@@ -433,7 +1155,7 @@ class ClaudeCliHistory {
           return null;
       }
     } catch (error) {
-      console.warn(`Failed to parse tool call for ${toolName}:`, error);
+      log.warn(`Failed to parse tool call for ${toolName}:`, error);
       return null;
     }
   }
@@ -495,35 +1217,12 @@ class ClaudeCliHistory {
    */
   async extractConversationContext(sessionId, messageId) {
     try {
-      // Get session details first
-      const session = this.sessionsCache.get(sessionId);
-      if (!session) {
-        throw new Error(`Session ${sessionId} not found`);
-      }
-
-      // Read the session file and parse all entries
-      const content = await fs.readFile(session.filePath, 'utf-8');
-      const lines = content.trim().split('\n').filter(line => line.trim());
-
-      const allMessages = [];
-      for (const line of lines) {
-        try {
-          const entry = JSON.parse(line);
-          allMessages.push(entry);
-        } catch (parseError) {
-          console.warn(`Failed to parse conversation entry:`, parseError.message);
-          continue;
-        }
-      }
+      const session = await this.findSession(sessionId);
+      const transcript = await this.loadTranscript(session.filePath);
+      const allMessages = transcript.entries;
 
       // Find the target message index
-      let targetIndex = -1;
-      for (let i = 0; i < allMessages.length; i++) {
-        if (allMessages[i].uuid === messageId) {
-          targetIndex = i;
-          break;
-        }
-      }
+      const targetIndex = transcript.entryIndexByUuid.get(messageId) ?? -1;
 
       if (targetIndex === -1) {
         throw new Error(`Message ${messageId} not found`);
@@ -594,7 +1293,7 @@ class ClaudeCliHistory {
       };
 
     } catch (error) {
-      console.error(`Error extracting conversation context for message ${messageId}:`, error);
+      log.error(`Error extracting conversation context for message ${messageId}:`, error);
       throw error;
     }
   }
@@ -0,0 +1,115 @@
+const fs = require('fs').promises;
+const { constants } = require('fs');
+const path = require('path');
+const { spawn } = require('child_process');
+const Logger = require('./logger');
+
+const log = Logger.scope('claude');
+
+// Cached facts about the installed `claude` binary: where it is, its version
+// and whether it supports streaming input.
+//
+// The binary is located on PATH the same way spawn() finds it, and the probe
+// (`claude --version` and `claude --help`) runs only when the resolved file
+// changes - a different path, mtime or size, e.g. after an install or update.
+// Otherwise getInfo() costs a few stat calls. Concurrent callers share one
+// probe.
+class ClaudeCliProbe {
+  constructor(command = 'claude') {
+    this.command = command;
+    this.info = null;        // last probe result
+    this.fingerprint = null; // of the binary the result belongs to
+    this.pending = null;     // { fingerprint, promise } of a probe in flight
+  }
+
+  // { available, path, version, streamingInput, probedAt }
+  async getInfo() {
+    const binary = await this.resolveBinary();
+    const fingerprint = binary ? `${binary.realPath}:${binary.mtimeMs}:${binary.size}` : 'missing';
+
+    if (this.info && this.fingerprint === fingerprint) {
+      return this.info;
+    }
+    if (this.pending && this.pending.fingerprint === fingerprint) {
+      return this.pending.promise;
+    }
+
+    const promise = this.probe(binary).then((info) => {
+      if (this.pending && this.pending.promise === promise) {
+        this.pending = null;
+      }
+      this.info = info;
+      this.fingerprint = fingerprint;
+      return info;
+    });
+    this.pending = { fingerprint, promise };
+    return promise;
+  }
+
+  // Forget the cached result, e.g. after installing the CLI
+  invalidate() {
+    this.info = null;
+    this.fingerprint = null;
+  }
+
+  async probe(binary) {
+    const probedAt = new Date().toISOString();
+    if (!binary) {
+      log.debug('Claude CLI not found on PATH');
+      return { available: false, path: null, version: null, streamingInput: false, probedAt };
+    }
+
+    const [versionResult, helpResult] = await Promise.all([
+      this.run(['--version']),
+      this.run(['--help'])
+    ]);
+    const available = versionResult.code === 0;
+    const streamingInput = available && helpResult.output.includes('--input-format');
+    const version = available ? (versionResult.output.trim().split('\n')[0] || null) : null;
+
+    log.info(`Claude CLI probed: ${binary.path}`, available ? (version || '(unknown version)') : '(not runnable)');
+    if (available && !streamingInput) {
+      log.warn('Claude CLI does not support --input-format; spawning one process per message');
+    }
+    return { available, path: binary.path, version, streamingInput, probedAt };
+  }
+
+  // First executable match for the command on PATH, or null
+  async resolveBinary() {
+    const dirs = (process.env.PATH || '').split(path.delimiter).filter(Boolean);
+    const extensions = process.platform === 'win32'
+      ? (process.env.PATHEXT || '.EXE;.CMD;.BAT;.COM').split(';').filter(Boolean)
+      : [''];
+
+    for (const dir of dirs) {
+      for (const extension of extensions) {
+        const candidate = path.join(dir, this.command + extension);
+        try {
+          if (process.platform !== 'win32') {
+            await fs.access(candidate, constants.X_OK);
+          }
+          const realPath = await fs.realpath(candidate);
+          const stat = await fs.stat(realPath);
+          if (stat.isFile()) {
+            return { path: candidate, realPath, mtimeMs: stat.mtimeMs, size: stat.size };
+          }
+        } catch (error) {
+          // Not here (or not executable); keep looking
+        }
+      }
+    }
+    return null;
+  }
+
+  run(args) {
+    return new Promise((resolve) => {
+      let output = '';
+      const child = spawn(this.command, args, { stdio: ['ignore', 'pipe', 'pipe'] });
+      child.stdout.on('data', (data) => { output += data.toString(); });
+      child.on('close', (code) => resolve({ code, output }));
+      child.on('error', () => resolve({ code: -1, output }));
+    });
+  }
+}
+
+module.exports = ClaudeCliProbe;
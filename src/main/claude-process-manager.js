@@ -1,6 +1,19 @@
+const path = require('path');
 const { spawn } = require('child_process');
 const { v4: uuidv4 } = require('uuid');
 const McpServerManager = require('./mcp-server-manager');
+const NdjsonFramer = require('./ndjson-framer');
+const OutputRingBuffer = require('./output-ring-buffer');
+const RunScheduler = require('./run-scheduler');
+const ClaudeProcessPool = require('./claude-process-pool');
+const RunTimeline = require('./run-timeline');
+const RunLatencyStats = require('./run-latency-stats');
+const ProcessWatchdog = require('./process-watchdog');
+const ClaudeCliProbe = require('./claude-cli-probe');
+const ToolOutputSpool = require('./tool-output-spool');
+const Logger = require('./logger');
+
+const log = Logger.scope('claude');
 
 class ClaudeProcessManager {
   constructor(sessionManager, checkpointManager, fileOperations, mainWindow, modelConfig) {
@@ -10,6 +23,29 @@ class ClaudeProcessManager {
     this.mainWindow = mainWindow;
     this.modelConfig = modelConfig;
     this.claudeProcesses = new Map(); // Track running Claude processes
+    this.streamStates = new Map(); // Track per-session message-stream delta state
+    this.runScheduler = new RunScheduler(); // Limits concurrent Claude runs, queues the rest
+    this.processPool = new ClaudeProcessPool(); // Warm processes reused across turns
+    this.processPoolEnabled = true;
+    this.cliProbe = new ClaudeCliProbe(); // cached CLI path/version, re-probed when the binary changes
+    this.toolOutputSpool = new ToolOutputSpool(path.join(sessionManager.storageDir, 'tool-output')); // large tool outputs
+    this.runTimelines = new Map(); // sessionId -> RunTimeline of the run in progress
+    this.latencyStats = new RunLatencyStats(); // timelines of recent runs
+    this.watchdogs = new Map(); // sessionId -> ProcessWatchdog of the run in progress
+
+    // Inactivity limits for a run (see ProcessWatchdog); 0 disables a limit
+    this.watchdogSettings = {
+      idleTimeoutSeconds: 300,
+      toolIdleTimeoutSeconds: 1800,
+      maxRuntimeMinutes: 120,
+      killGraceSeconds: 5
+    };
+
+    // Bytes of raw stdout/stderr kept per run for logs and error reports
+    this.outputRetentionBytes = {
+      stdout: 64 * 1024,
+      stderr: 256 * 1024
+    };
 
     this.ALL_TOOLS = [
       "Task", "Bash", "Glob", "Grep", "LS", "exit_plan_mode", "Read", "Edit",
@@ -23,19 +59,27 @@ class ClaudeProcessManager {
     return Array.from(this.claudeProcesses.keys());
   }
 
+  // Queued runs in start order: [{ sessionId, priority, queuedAt, position }]
+  getQueuedRuns() {
+    return this.runScheduler.getQueuedRuns();
+  }
+
+  // Apply run scheduler settings from ModelConfig
+  configureRunScheduler(settings = {}) {
+    if (typeof settings.maxConcurrentRuns === 'number' && settings.maxConcurrentRuns >= 1) {
+      this.runScheduler.setMaxConcurrency(settings.maxConcurrentRuns);
+    }
+  }
+
   // Check if Claude Code CLI is available
   async checkClaudeCliAvailable() {
-    return new Promise((resolve) => {
-      const claude = spawn('claude', ['--version'], { stdio: 'pipe' });
-
-      claude.on('close', (code) => {
-        resolve(code === 0);
-      });
+    const info = await this.cliProbe.getInfo();
+    return info.available;
+  }
 
-      claude.on('error', () => {
-        resolve(false);
-      });
-    });
+  // { available, path, version, streamingInput, probedAt } of the installed CLI
+  getClaudeCliInfo() {
+    return this.cliProbe.getInfo();
   }
 
   // Check if API key is set
@@ -45,6 +89,9 @@ class ClaudeProcessManager {
 
   // Verify API key by making a test call
   async verifyApiKey(apiKey) {
+    if (!await this.checkClaudeCliAvailable()) {
+      throw new Error('API key verification failed: Claude Code CLI is not installed');
+    }
     try {
       const testProcess = spawn('claude', ['-p', 'Hello'], {
         stdio: 'pipe',
@@ -80,21 +127,20 @@ class ClaudeProcessManager {
     }
   }
 
-  // Send message to Claude
-  async sendMessage(sessionId, message) {
-    const session = this.sessionManager.getSession(sessionId);
-    if (!session) {
-      throw new Error('Session not found');
-    }
+  // Send message to Claude. options.priority: 'interactive' (default) or
+  // 'background'; the run waits in the scheduler queue if too many are active.
+  async sendMessage(sessionId, message, options = {}) {
+    // Hydrates the session's messages if only its header is loaded (throws if missing)
+    const session = await this.sessionManager.loadSessionMessages(sessionId);
 
     // Capture working directory for the session if this is the first message
     if (!session.cwd && session.messages.length === 0) {
       const currentCwd = this.fileOperations.getCurrentWorkingDirectory();
       try {
         await this.sessionManager.setSessionCwd(sessionId, currentCwd);
-        console.log(`Captured working directory for new session ${sessionId}: ${currentCwd}`);
+        log.debug(`Captured working directory for new session ${sessionId}: ${currentCwd}`);
       } catch (error) {
-        console.error('Failed to capture working directory for session:', error);
+        log.error('Failed to capture working directory for session:', error);
         // Continue with message sending even if cwd capture fails
       }
     }
@@ -115,9 +161,9 @@ class ClaudeProcessManager {
     const conversationType = session.claudeSessionId ?
       (session.status === 'historical' ? 'resuming' : 'continuing') :
       'new';
-    console.log(`Smart conversation detection: ${conversationType} conversation for session ${sessionId}`);
+    log.debug(`Smart conversation detection: ${conversationType} conversation for session ${sessionId}`);
 
-    console.log('User message saved to session:', userMessage.id);
+    log.debug('User message saved to session:', userMessage.id);
 
     // Notify frontend of the real user message ID for UI updates
     this.mainWindow.webContents.send('user-message-saved', {
@@ -134,10 +180,64 @@ class ClaudeProcessManager {
       status: 'waiting_for_response'
     });
 
-    // Before spawning, ensure enabled MCP servers are registered once per app run
-    await this.ensureMcpServersRegistered();
+    const timeline = new RunTimeline(sessionId);
+    const run = this.runScheduler.schedule(sessionId, () => this.startClaudeRun(sessionId, message, timeline), {
+      priority: options.priority
+    });
+    const queuePosition = this.runScheduler.getQueuePosition(sessionId);
+    if (queuePosition !== null) {
+      log.info(`Run for session ${sessionId} queued at position ${queuePosition}:`, this.runScheduler.getStats());
+    }
 
-    // Create Claude process - follow SDK best practices
+    try {
+      return await run;
+    } catch (error) {
+      if (error.cancelled) {
+        log.info('Queued run cancelled for session:', sessionId);
+        return null;
+      }
+      throw error;
+    }
+  }
+
+  // Run a scheduled turn - in a warm pooled process when the CLI supports
+  // streaming input, else in a process spawned for this message
+  async startClaudeRun(sessionId, message, timeline = new RunTimeline(sessionId)) {
+    timeline.mark('start');
+
+    // Keep the session's messages resident from hydration to the end of the
+    // run - the setup below can take seconds on first use. handleClaudeProcess
+    // releases them when the turn ends; releasing twice is harmless.
+    this.sessionManager.pinSession(sessionId);
+    let released = false;
+    const releaseSession = () => {
+      if (!released) {
+        released = true;
+        this.sessionManager.unpinSession(sessionId);
+      }
+    };
+
+    try {
+      // Hydrate again - the session may have been released while the run was queued
+      const session = await this.sessionManager.loadSessionMessages(sessionId);
+
+      // Before spawning, ensure enabled MCP servers are registered once per app run
+      await this.ensureMcpServersRegistered();
+
+      if (this.processPoolEnabled && await this.supportsStreamingInput()) {
+        timeline.mode = 'pooled';
+        return await this.runPooledTurn(session, sessionId, message, timeline, releaseSession);
+      }
+      timeline.mode = 'one-shot';
+      return await this.runOneShotTurn(session, sessionId, message, timeline, releaseSession);
+    } catch (error) {
+      releaseSession();
+      throw error;
+    }
+  }
+
+  // Arguments fixed for the lifetime of a process, shared by both modes
+  buildBaseArgs() {
     const claudeArgs = [];
 
     // Add system prompt if enabled
@@ -145,19 +245,27 @@ class ClaudeProcessManager {
     if (systemPromptConfig.enabled && systemPromptConfig.prompt) {
       if (systemPromptConfig.mode === 'override') {
         claudeArgs.push('--system-prompt', systemPromptConfig.prompt);
-        console.log('Using override system prompt.');
+        log.debug('Using override system prompt.');
       } else {
         claudeArgs.push('--append-system-prompt', systemPromptConfig.prompt);
-        console.log('Using append system prompt.');
+        log.debug('Using append system prompt.');
       }
     }
 
+    return claudeArgs;
+  }
+
+  // Spawn `claude -p <message>` for one turn; the process exits when it is done
+  async runOneShotTurn(session, sessionId, message, timeline, releaseSession) {
+    // Create Claude process - follow SDK best practices
+    const claudeArgs = this.buildBaseArgs();
+
     // Add session resume FIRST if we have a Claude session ID (before other flags)
     if (session.claudeSessionId) {
-      console.log('Resuming Claude session:', session.claudeSessionId);
+      log.debug('Resuming Claude session:', session.claudeSessionId);
       claudeArgs.push('--resume', session.claudeSessionId);
     } else {
-      console.log('Starting new Claude session for:', sessionId);
+      log.debug('Starting new Claude session for:', sessionId);
     }
 
     // Add non-interactive mode with the user's message
@@ -172,8 +280,8 @@ class ClaudeProcessManager {
     // Allow all tools by default
     claudeArgs.push('--allowedTools', this.ALL_TOOLS.join(','));
 
-    console.log('Spawning Claude process with command:', ['claude', ...claudeArgs]);
-    console.log('Environment has ANTHROPIC_API_KEY:', !!process.env.ANTHROPIC_API_KEY);
+    log.debug('Spawning Claude process with command:', ['claude', ...claudeArgs]);
+    log.debug('Environment has ANTHROPIC_API_KEY:', !!process.env.ANTHROPIC_API_KEY);
 
     const claudeProcess = spawn('claude', claudeArgs, {
       stdio: ['pipe', 'pipe', 'pipe'],
@@ -183,74 +291,196 @@ class ClaudeProcessManager {
       shell: false
     });
 
-    console.log('Claude process spawned with PID:', claudeProcess.pid);
+    log.info('Claude process spawned with PID:', claudeProcess.pid);
+    timeline.mark('spawn');
     this.claudeProcesses.set(sessionId, claudeProcess);
 
     // Close stdin immediately - Claude doesn't need stdin input in -p mode
     try {
       claudeProcess.stdin.end();
-      console.log('Stdin closed successfully');
+      log.debug('Stdin closed successfully');
     } catch (error) {
-      console.log('Error closing stdin:', error);
+      log.debug('Error closing stdin:', error);
     }
 
     // Add immediate process event logging
     claudeProcess.on('spawn', () => {
-      console.log('Claude process spawned successfully');
+      log.debug('Claude process spawned successfully');
     });
 
     claudeProcess.on('disconnect', () => {
-      console.log('Claude process disconnected');
+      log.debug('Claude process disconnected');
     });
 
     claudeProcess.on('exit', (code, signal) => {
-      console.log('Claude process exited with code:', code, 'signal:', signal);
+      log.debug('Claude process exited with code:', code, 'signal:', signal);
     });
 
-    return this.handleClaudeProcess(claudeProcess, sessionId);
+    return this.handleClaudeProcess(claudeProcess, sessionId, { timeline, releaseSession });
+  }
+
+  // What a pooled process for this session is spawned with. The signature
+  // covers everything a process can't change once running.
+  buildPoolSpec(sessionId, claudeSessionId) {
+    const baseArgs = this.buildBaseArgs();
+    const cwd = this.fileOperations.getCurrentWorkingDirectory();
+
+    const args = [...baseArgs];
+    if (claudeSessionId) {
+      args.push('--resume', claudeSessionId);
+    }
+    args.push(
+      '-p',
+      '--input-format', 'stream-json',
+      '--output-format', 'stream-json',
+      '--verbose',
+      '--allowedTools', this.ALL_TOOLS.join(',')
+    );
+
+    return {
+      signature: JSON.stringify([baseArgs, cwd, process.env.ANTHROPIC_MODEL || '', this.ALL_TOOLS, McpServerManager.getConfigHash()]),
+      args,
+      cwd,
+      sessionId,
+      claudeSessionId: claudeSessionId || null
+    };
   }
 
-  // Handle Claude process execution
-  async handleClaudeProcess(claudeProcess, sessionId) {
+  // Feed the message to a warm process as one stream-json user turn
+  async runPooledTurn(session, sessionId, message, timeline, releaseSession) {
+    if (session.claudeSessionId) {
+      log.debug('Continuing Claude session in pooled process:', session.claudeSessionId);
+    } else {
+      log.debug('Starting new Claude session in pooled process for:', sessionId);
+    }
+
+    const entry = this.processPool.acquire(this.buildPoolSpec(sessionId, session.claudeSessionId));
+    const claudeProcess = entry.process;
+    timeline.mark('acquire', { pid: claudeProcess.pid, turn: entry.turns });
+    this.claudeProcesses.set(sessionId, claudeProcess);
+    log.info(`Claude turn ${entry.turns} in pooled process ${claudeProcess.pid}:`, this.processPool.getStats());
+
+    const turn = this.handleClaudeProcess(claudeProcess, sessionId, {
+      persistent: true,
+      timeline,
+      releaseSession,
+      onTurnEnd: (reusable) => {
+        this.processPool.release(entry, reusable, session.claudeSessionId);
+        this.prewarm();
+      }
+    });
+
+    claudeProcess.stdin.write(`${JSON.stringify({
+      type: 'user',
+      message: { role: 'user', content: [{ type: 'text', text: message }] }
+    })}\n`);
+
+    return turn;
+  }
+
+  // Keep a spare process warm for the next new conversation
+  async prewarm() {
+    if (!this.processPoolEnabled) {
+      return;
+    }
+    try {
+      await this.ensureMcpServersRegistered();
+      if (await this.supportsStreamingInput()) {
+        this.processPool.warmSpare(this.buildPoolSpec(null, null));
+      }
+    } catch (error) {
+      log.warn('Failed to pre-warm a Claude process:', error.message);
+    }
+  }
+
+  // Whether the installed CLI accepts --input-format stream-json
+  async supportsStreamingInput() {
+    const info = await this.cliProbe.getInfo();
+    return info.streamingInput;
+  }
+
+  // Apply process pool settings from ModelConfig
+  configureProcessPool(settings = {}) {
+    if (typeof settings.enabled === 'boolean') {
+      this.processPoolEnabled = settings.enabled;
+    }
+    this.processPool.configure({
+      maxSize: settings.maxSize,
+      idleTimeoutMs: typeof settings.idleTimeoutSeconds === 'number' ? settings.idleTimeoutSeconds * 1000 : undefined
+    });
+    if (!this.processPoolEnabled) {
+      this.processPool.shutdown();
+    }
+  }
+
+  // Stop the warm process held for a session (e.g. it was deleted)
+  releaseSessionProcess(sessionId) {
+    this.processPool.discardSession(sessionId);
+  }
+
+  // Range of a spilled tool output: { data, offset, nextOffset, totalBytes, eof }
+  readToolOutput(sessionId, outputId, offset, length) {
+    return this.toolOutputSpool.readRange(sessionId, outputId, offset, length);
+  }
+
+  // Remove the spilled tool outputs of a deleted session
+  discardToolOutputs(sessionId) {
+    return this.toolOutputSpool.removeSession(sessionId);
+  }
+
+  // Handle Claude process execution. With options.persistent the process
+  // outlives the turn (pooled): the turn ends at the `result` message, the
+  // listeners are detached and options.onTurnEnd(reusable) hands it back.
+  // options.timeline (RunTimeline) records where the turn's time goes, and
+  // options.releaseSession() unpins the session's messages once it is over.
+  async handleClaudeProcess(claudeProcess, sessionId, options = {}) {
     const session = this.sessionManager.getSession(sessionId);
     const cwd = this.fileOperations.getCurrentWorkingDirectory();
+    const timeline = options.timeline || new RunTimeline(sessionId);
+    this.runTimelines.set(sessionId, timeline);
 
     return new Promise((resolve, reject) => {
-      let output = '';
-      let errorOutput = '';
+      // Only the tail of the raw output is retained; lines are framed as they arrive
+      const stdoutTail = new OutputRingBuffer(this.outputRetentionBytes.stdout);
+      const stderrTail = new OutputRingBuffer(this.outputRetentionBytes.stderr);
       let assistantMessage = {
         id: uuidv4(),
         type: 'assistant',
         content: [], // Initialize as empty array
         timestamp: new Date().toISOString()
       };
-      let jsonBuffer = ''; // Buffer for partial JSON lines
+      const framer = new NdjsonFramer(); // Splits stdout into complete JSON lines
+      const streamState = this.createStreamState(sessionId, assistantMessage, cwd);
+      const releaseSession = options.releaseSession || (() => {});
+      const persistent = Boolean(options.persistent);
+      let turnFinished = false;
 
       // Add stdout event listener setup logging
-      console.log('Setting up stdout event listener...');
-
-      claudeProcess.stdout.on('data', async (data) => {
-        const chunk = data.toString();
-        output += chunk;
-
-        // Add chunk to buffer
-        jsonBuffer += chunk;
+      log.debug('Setting up stdout event listener...');
 
-        // Split on newlines and process complete lines
-        const lines = jsonBuffer.split('\n');
+      const onStdout = async (data) => {
+        stdoutTail.write(data);
+        timeline.mark('first_stdout_byte');
+        timeline.stdoutBytes += data.length;
+        watchdog.touch();
 
-        // Keep the last line in buffer (might be incomplete)
-        jsonBuffer = lines.pop() || '';
+        // Complete lines only; a partial last line stays buffered in the framer
+        const lines = framer.push(data);
 
         for (const line of lines) {
+          if (turnFinished) break;
           const trimmedLine = line.trim();
           if (!trimmedLine) continue;
 
-          console.log('Processing line:', JSON.stringify(trimmedLine));
+          // Per-line events are sampled at debug; full payloads only at trace
+          if (log.isEnabled('debug') && log.sample('stream-line', 100)) {
+            log.debug(`Processing stream line ${framer.linesEmitted} (${trimmedLine.length} chars)`);
+          }
+          log.trace(() => ['Processing line:', trimmedLine]);
 
           try {
             const parsed = JSON.parse(trimmedLine);
-            console.log('Parsed JSON:', JSON.stringify(parsed, null, 2));
+            log.trace(() => ['Parsed JSON:', JSON.stringify(parsed, null, 2)]);
 
             // Update recovery state with successful parsing
             if (parsed.type === 'assistant' || parsed.type === 'message') {
@@ -259,7 +489,7 @@ class ClaudeProcessManager {
                 claudeSessionId: session.claudeSessionId,
                 status: 'receiving_response',
                 lastResponseTime: new Date().toISOString()
-              }).catch(err => console.error('Failed to update recovery state:', err));
+              }, { debounce: true }).catch(err => log.error('Failed to update recovery state:', err));
             }
 
             // Handle Claude session init (supports multiple schemas)
@@ -269,18 +499,19 @@ class ClaudeProcessManager {
               (parsed.type === 'init' && parsed.session_id)
             ) {
               const newClaudeSessionId = parsed.session_id || parsed.sessionId;
-              console.log('Captured Claude session ID:', newClaudeSessionId);
+              log.debug('Captured Claude session ID:', newClaudeSessionId);
+              timeline.mark('init');
 
               if (newClaudeSessionId && newClaudeSessionId !== session.claudeSessionId) {
                 session.claudeSessionId = newClaudeSessionId;
-                console.log('Updated session with Claude session ID:', newClaudeSessionId);
+                log.debug('Updated session with Claude session ID:', newClaudeSessionId);
 
                 // Save session immediately with new Claude session ID
                 try {
                   await this.sessionManager.saveSession(sessionId);
-                  console.log('Claude session ID saved to persistent storage');
+                  log.debug('Claude session ID saved to persistent storage');
                 } catch (error) {
-                  console.error('Failed to save Claude session ID:', error);
+                  log.error('Failed to save Claude session ID:', error);
                 }
               }
 
@@ -297,6 +528,7 @@ class ClaudeProcessManager {
               }
 
               if (assistantPayload) {
+                timeline.mark('first_token');
                 let thinkingContent = null;
 
                 // Extract thinking content separately
@@ -311,74 +543,77 @@ class ClaudeProcessManager {
 
                 // Check for tool_use blocks and create checkpoints
                 if (assistantPayload.content && Array.isArray(assistantPayload.content)) {
-                  for (const block of assistantPayload.content) {
-                    if (block.type === 'tool_use') {
-                        if (block.name === 'Write') {
-                            try {
-                                // Read the file content before writing to show a diff.
-                                const oldContent = await this.fileOperations.readFile(block.input.file_path);
-                                block.input.old_content_for_diff = oldContent || '';
-                            } catch (e) {
-                                // If the file doesn't exist, old content is an empty string.
-                                block.input.old_content_for_diff = '';
-                            }
-                        }
+                  const toolUseBlocks = assistantPayload.content.filter(block => block.type === 'tool_use');
+                  for (const block of toolUseBlocks) {
+                    timeline.toolStarted(block.id, block.name);
+                  }
+                  watchdog.setToolsInFlight(timeline.runningToolCount());
+
+                  // Read pre-write contents for Write diffs concurrently
+                  await timeline.measureCheckpoint(() => Promise.all(toolUseBlocks.filter(block => block.name === 'Write').map(async (block) => {
+                    try {
+                      // Read the file content before writing to show a diff.
+                      const oldContent = await this.fileOperations.readFile(block.input.file_path);
+                      block.input.old_content_for_diff = oldContent || '';
+                    } catch (e) {
+                      // If the file doesn't exist, old content is an empty string.
+                      block.input.old_content_for_diff = '';
+                    }
+                  })));
 
-                        const isFileModTool = ['Edit', 'MultiEdit', 'Write', 'NotebookEdit'].includes(block.name);
+                  const fileModBlocks = toolUseBlocks.filter(block => ['Edit', 'MultiEdit', 'Write', 'NotebookEdit'].includes(block.name));
 
-                                                if (isFileModTool) {
-                          console.log('=== CHECKPOINT CREATION DEBUG ===');
-                          console.log('Detected file modification tool, creating checkpoint:', block.name);
-                          console.log('Session ID for checkpoint:', sessionId);
-                          console.log('Assistant message ID for checkpoint:', assistantMessage.id);
+                  if (fileModBlocks.length > 0) {
+                    log.debug('=== CHECKPOINT CREATION DEBUG ===');
+                    log.debug(`Detected ${fileModBlocks.length} file modification tool(s), creating checkpoints:`, fileModBlocks.map(block => block.name));
+                    log.debug('Session ID for checkpoint:', sessionId);
+                    log.debug('Assistant message ID for checkpoint:', assistantMessage.id);
 
-                          // Normalize input for CheckpointManager
-                          const toolUseForCheckpoint = { ...block };
-                          if (block.name === 'NotebookEdit' && block.input.notebook_path) {
-                              toolUseForCheckpoint.input.file_path = block.input.notebook_path;
-                          }
+                    // Normalize input for CheckpointManager
+                    const toolUsesForCheckpoint = fileModBlocks.map(block => {
+                      const toolUseForCheckpoint = { ...block };
+                      if (block.name === 'NotebookEdit' && block.input.notebook_path) {
+                        toolUseForCheckpoint.input.file_path = block.input.notebook_path;
+                      }
+                      return toolUseForCheckpoint;
+                    });
 
-                          try {
-                            console.log('Calling createCheckpoint with:', {
-                              toolName: toolUseForCheckpoint.name,
-                              sessionId: sessionId,
-                              messageId: assistantMessage.id,
-                              filePath: toolUseForCheckpoint.input?.file_path
-                            });
-
-                            const checkpointId = await this.checkpointManager.createCheckpoint(toolUseForCheckpoint, sessionId, assistantMessage.id);
-
-                            if (checkpointId) {
-                              console.log('Checkpoint created successfully:', checkpointId);
-
-                              // Track checkpoint for message ID updates
-                              if (!assistantMessage._checkpointIds) {
-                                assistantMessage._checkpointIds = [];
-                              }
-                              assistantMessage._checkpointIds.push(checkpointId);
-                            } else {
-                              console.error('Checkpoint creation returned null/undefined - checkpoint system may be disabled');
-                              // Consider whether to continue or fail the message processing
-                              // For now, log the issue but continue processing
-                            }
-                          } catch (error) {
-                            console.error('CRITICAL: Failed to create checkpoint for tool use:', error);
-                            console.error('This may result in incomplete checkpoint tracking for file:', toolUseForCheckpoint.input?.file_path);
+                    try {
+                      // One batch per assistant payload: files read concurrently, rows committed in one transaction
+                      const checkpointIds = await timeline.measureCheckpoint(() => this.checkpointManager.createCheckpoints(toolUsesForCheckpoint, sessionId, assistantMessage.id));
 
-                            // Store error details for potential recovery
-                            if (!assistantMessage._checkpointErrors) {
-                              assistantMessage._checkpointErrors = [];
-                            }
-                            assistantMessage._checkpointErrors.push({
-                              toolName: block.name,
-                              filePath: toolUseForCheckpoint.input?.file_path,
-                              error: error.message,
-                              timestamp: new Date().toISOString()
-                            });
+                      checkpointIds.forEach((checkpointId, index) => {
+                        if (checkpointId) {
+                          log.debug('Checkpoint created successfully:', checkpointId);
+
+                          // Track checkpoint for message ID updates
+                          if (!assistantMessage._checkpointIds) {
+                            assistantMessage._checkpointIds = [];
                           }
-                          console.log('=== CHECKPOINT CREATION DEBUG END ===');
+                          assistantMessage._checkpointIds.push(checkpointId);
+                        } else {
+                          log.error('Checkpoint creation returned null/undefined - checkpoint system may be disabled');
+                          log.error('No checkpoint for file:', toolUsesForCheckpoint[index].input?.file_path);
                         }
+                      });
+                    } catch (error) {
+                      log.error('CRITICAL: Failed to create checkpoints for tool uses:', error);
+
+                      // Store error details for potential recovery
+                      if (!assistantMessage._checkpointErrors) {
+                        assistantMessage._checkpointErrors = [];
+                      }
+                      for (const toolUseForCheckpoint of toolUsesForCheckpoint) {
+                        log.error('This may result in incomplete checkpoint tracking for file:', toolUseForCheckpoint.input?.file_path);
+                        assistantMessage._checkpointErrors.push({
+                          toolName: toolUseForCheckpoint.name,
+                          filePath: toolUseForCheckpoint.input?.file_path,
+                          error: error.message,
+                          timestamp: new Date().toISOString()
+                        });
+                      }
                     }
+                    log.debug('=== CHECKPOINT CREATION DEBUG END ===');
                   }
                 }
 
@@ -388,20 +623,20 @@ class ClaudeProcessManager {
 
                 // If the message ID changed from local UUID to Claude's ID, update any checkpoints
                 if (assistantPayload.id && assistantPayload.id !== oldMessageId) {
-                  console.log('Message ID changed from', oldMessageId, 'to', assistantPayload.id, '- updating checkpoints');
+                  log.debug('Message ID changed from', oldMessageId, 'to', assistantPayload.id, '- updating checkpoints');
 
                   try {
-                    const updateSuccess = await this.checkpointManager.updateCheckpointMessageIds(sessionId, oldMessageId, assistantPayload.id);
+                    const updateSuccess = await timeline.measureCheckpoint(() => this.checkpointManager.updateCheckpointMessageIds(sessionId, oldMessageId, assistantPayload.id));
 
                     if (updateSuccess) {
-                      console.log('Successfully updated checkpoint message IDs');
+                      log.debug('Successfully updated checkpoint message IDs');
 
                       // Update tracked checkpoint IDs in the message
                       if (assistantMessage._checkpointIds) {
-                        console.log('Updated message IDs for', assistantMessage._checkpointIds.length, 'tracked checkpoints');
+                        log.debug('Updated message IDs for', assistantMessage._checkpointIds.length, 'tracked checkpoints');
                       }
                     } else {
-                      console.warn('Checkpoint message ID update reported failure - checkpoints may be orphaned');
+                      log.warn('Checkpoint message ID update reported failure - checkpoints may be orphaned');
 
                       // Add warning to message for debugging
                       if (!assistantMessage._checkpointWarnings) {
@@ -415,8 +650,8 @@ class ClaudeProcessManager {
                       });
                     }
                   } catch (error) {
-                    console.error('CRITICAL: Failed to update checkpoint message IDs:', error);
-                    console.error('This may result in orphaned checkpoints that cannot be found for revert operations');
+                    log.error('CRITICAL: Failed to update checkpoint message IDs:', error);
+                    log.error('This may result in orphaned checkpoints that cannot be found for revert operations');
 
                     // Store critical error for potential manual recovery
                     if (!assistantMessage._checkpointErrors) {
@@ -438,116 +673,142 @@ class ClaudeProcessManager {
                     assistantMessage.content = [...(assistantMessage.content || []), ...newContent];
                 }
 
-                // Send streaming update to renderer with structured data
-                this.mainWindow.webContents.send('message-stream', {
-                  sessionId,
-                  message: assistantMessage,
-                  isComplete: false,
-                  thinkingContent: thinkingContent,
-                  cwd: cwd
-                });
+                // Send only the newly appended blocks to the renderer
+                this.sendStreamDelta(sessionId, streamState, { thinkingContent });
               }
             } else if (parsed.type === 'user' && parsed.message?.content?.[0]?.type === 'tool_result') {
                 const toolResult = parsed.message.content[0];
                 const { tool_use_id, content, is_error } = toolResult;
+                timeline.toolFinished(tool_use_id, is_error);
+                watchdog.setToolsInFlight(timeline.runningToolCount());
 
                 if (tool_use_id && assistantMessage.content) {
-                    const toolCall = assistantMessage.content.find(
+                    const toolCallIndex = assistantMessage.content.findIndex(
                         (block) => block.type === 'tool_use' && block.id === tool_use_id
                     );
+                    const toolCall = toolCallIndex >= 0 ? assistantMessage.content[toolCallIndex] : null;
 
                     if (toolCall) {
-                        console.log(`[Checkpoint Debug] Found matching tool_use block:`, toolCall);
-                        toolCall.output = content;
+                        log.trace(`[Checkpoint Debug] Found matching tool_use block:`, toolCall);
+                        // Large outputs go to the spool; the message keeps a preview and a handle
+                        const spilled = this.toolOutputSpool.spill(sessionId, tool_use_id, content);
+                        if (spilled) {
+                            toolCall.output = spilled.preview;
+                            toolCall.outputSpill = spilled.handle;
+                        } else {
+                            toolCall.output = content;
+                        }
                         if (is_error) {
                             toolCall.status = 'failed';
-                            console.log(`[Checkpoint Debug] Tool failed.`);
+                            log.debug(`[Checkpoint Debug] Tool failed.`);
                         } else {
-                            console.log(`[Checkpoint Debug] Tool succeeded.`);
+                            log.debug(`[Checkpoint Debug] Tool succeeded.`);
                             // If a file modification tool ran successfully, update the pending checkpoint.
                             const isFileModTool = ['Edit', 'MultiEdit', 'Write', 'NotebookEdit'].includes(toolCall.name);
                             if (isFileModTool) {
-                                console.log(`Tool ${toolCall.name} succeeded, triggering checkpoint update.`);
-                                this.updatePendingCheckpointsForMessage(sessionId, assistantMessage.id);
+                                log.debug(`Tool ${toolCall.name} succeeded, triggering checkpoint update.`);
+                                timeline.measureCheckpoint(() => this.updatePendingCheckpointsForMessage(sessionId, assistantMessage.id));
                             }
                         }
-                        console.log(`Updated tool_use ${tool_use_id} with result.`);
-
-                        this.mainWindow.webContents.send('message-stream', {
-                            sessionId,
-                            message: assistantMessage,
-                            isComplete: false,
-                            cwd: cwd
+                        log.debug(`Updated tool_use ${tool_use_id} with result.`);
+
+                        // Patch the tool block in place instead of resending the message
+                        this.sendStreamDelta(sessionId, streamState, {
+                            patches: [{
+                                index: toolCallIndex,
+                                output: toolCall.output,
+                                outputSpill: toolCall.outputSpill,
+                                status: toolCall.status
+                            }]
                         });
                     } else {
-                        console.log(`[Checkpoint Debug] Could not find matching tool_use block for id ${tool_use_id}.`);
-                        console.log(`[Checkpoint Debug] Current assistantMessage.content:`, JSON.stringify(assistantMessage.content));
+                        log.debug(`[Checkpoint Debug] Could not find matching tool_use block for id ${tool_use_id}.`);
+                        log.trace(() => [`[Checkpoint Debug] Current assistantMessage.content:`, JSON.stringify(assistantMessage.content)]);
                     }
                 }
             } else if (parsed.type === 'message' && parsed.role === 'user') {
-              console.log('Received user message echo:', parsed);
+              log.trace('Received user message echo:', parsed);
             } else if (parsed.type === 'result') {
-              console.log('Received final result message. Stream is complete.');
+              log.debug('Received final result message. Stream is complete.');
+              timeline.mark('result');
 
               // The `result` message signals the end of the interaction.
               // We can now send the final, complete message to the renderer.
 
               // Process any remaining buffer content before finalizing
-              this.processRemainingBuffer(jsonBuffer, assistantMessage);
-              jsonBuffer = ''; // Clear buffer since we're done
+              this.processRemainingBuffer(framer.flush(), assistantMessage);
 
               // The `assistantMessage` object has been accumulated through the stream.
               // We can now mark it as complete.
 
-              console.log('Sending final message to renderer:', assistantMessage.id);
+              log.debug('Sending final message to renderer:', assistantMessage.id);
+              this.streamStates.delete(sessionId);
               this.mainWindow.webContents.send('message-stream', {
                 sessionId,
                 message: assistantMessage,
+                seq: streamState.seq + 1,
                 isComplete: true,
                 cwd: cwd
               });
 
-              // The 'close' event will handle saving the final state and resolving the promise.
+              // A one-shot process exits next and the 'close' event saves the final state and
+              // resolves the promise; a pooled process stays up, so the turn ends here.
+              if (persistent) {
+                if (parsed.is_error) {
+                  await finishTurn(1, stderrTail.toString() || String(parsed.result || ''));
+                } else {
+                  await finishTurn(0);
+                }
+              }
             } else {
-              console.log('Unhandled message type:', parsed.type, 'with role:', parsed.role);
+              log.debug('Unhandled message type:', parsed.type, 'with role:', parsed.role);
             }
           } catch (e) {
-            console.log('JSON parse error for line:', JSON.stringify(trimmedLine), 'Error:', e.message);
-
-            // Try to recover from malformed JSON by looking for partial objects
-            if (trimmedLine.includes('{') && !trimmedLine.includes('}')) {
-              console.log('Possible incomplete JSON object, adding back to buffer');
-              jsonBuffer = trimmedLine + '\n' + jsonBuffer;
-            } else if (trimmedLine.includes('"type"')) {
-              console.log('Line contains type field but failed to parse, logging for investigation');
-              console.error('Malformed JSON with type field:', trimmedLine);
+            log.debug(() => ['JSON parse error for line:', JSON.stringify(trimmedLine), 'Error:', e.message]);
+
+            // Lines are only framed once complete, so a parse failure is malformed output
+            if (trimmedLine.includes('"type"')) {
+              log.debug('Line contains type field but failed to parse, logging for investigation');
+              log.error('Malformed JSON with type field:', trimmedLine.slice(0, 2000));
             }
           }
         }
-      });
+      };
 
       // Add stderr event listener setup logging
-      console.log('Setting up stderr event listener...');
+      log.debug('Setting up stderr event listener...');
 
-      claudeProcess.stderr.on('data', (data) => {
-        const errorChunk = data.toString();
-        errorOutput += errorChunk;
-        console.log('Claude stderr received:', JSON.stringify(errorChunk));
-        console.log('Error chunk length:', errorChunk.length, 'bytes');
-      });
+      const onStderr = (data) => {
+        stderrTail.write(data);
+        timeline.stderrBytes += data.length;
+        log.trace(() => ['Claude stderr received:', JSON.stringify(data.toString())]);
+        log.debug('Error chunk length:', data.length, 'bytes');
+      };
 
-      claudeProcess.on('close', async (code) => {
+      // Runs once per turn: on 'close' for a one-shot process, at the `result`
+      // message for a pooled one
+      const finishTurn = async (code, errorOutput = stderrTail.toString()) => {
+        if (turnFinished) return;
+        turnFinished = true;
         this.claudeProcesses.delete(sessionId);
-        clearTimeout(timeout); // Clear the timeout
-        clearTimeout(initialTimeout); // Clear the initial timeout
+        this.clearStreamState(sessionId, streamState);
+        this.stopWatchdog(sessionId, watchdog);
+        if (persistent) {
+          detach();
+          // A process the watchdog is stopping can't take another turn
+          options.onTurnEnd(code === 0 && !watchdog.timeoutReason);
+        }
 
-        console.log('Claude process closed with code:', code);
-        console.log('Final stdout output:', JSON.stringify(output));
-        console.log('Final stderr output:', JSON.stringify(errorOutput));
-        console.log('Final assistant message:', JSON.stringify(assistantMessage));
+        log.info(persistent ? 'Claude turn completed with code:' : 'Claude process closed with code:', code);
+        log.debug(() => [`Final stdout: ${stdoutTail.totalBytes} bytes, ${framer.linesEmitted} lines${stdoutTail.truncated ? ' (tail shown)' : ''}:`, JSON.stringify(stdoutTail.toString())]);
+        log.debug(() => ['Final stderr output:', JSON.stringify(errorOutput)]);
+        log.trace(() => ['Final assistant message:', JSON.stringify(assistantMessage)]);
 
         // Process any remaining buffer content before finalizing
-        this.processRemainingBuffer(jsonBuffer, assistantMessage);
+        this.processRemainingBuffer(framer.flush(), assistantMessage);
+
+        // The timing breakdown is saved with the message
+        assistantMessage.timing = this.recordTimeline(sessionId, timeline, code);
 
         // Finalize the assistant message regardless of exit code
         const finalizeResult = await this.finalizeAssistantMessage(sessionId, assistantMessage, cwd, code, errorOutput);
@@ -557,13 +818,13 @@ class ClaudeProcessManager {
           await this.sessionManager.clearRecoveryState(sessionId);
           resolve(finalizeResult.savedMessage || assistantMessage);
         } else {
-          console.error('Claude process failed:', { code, errorOutput, sessionId });
+          log.error('Claude process failed:', { code, errorOutput, sessionId });
 
           // Keep recovery state on failure for potential retry, but include assistant message content
           await this.sessionManager.saveRecoveryState(sessionId, {
             lastUserMessage: session.messages[session.messages.length - 1]?.content,
             claudeSessionId: session.claudeSessionId,
-            status: code === 143 ? 'interrupted' : 'failed',
+            status: watchdog.timeoutReason ? 'timeout' : (code === 143 ? 'interrupted' : 'failed'),
             error: errorOutput,
             failedAt: new Date().toISOString(),
             // Include assistant message content for recovery
@@ -576,19 +837,32 @@ class ClaudeProcessManager {
           // For SIGTERM (code 143), resolve with the saved message instead of rejecting
           // This allows the UI to show the partial response that was captured
           if (code === 143 && finalizeResult.savedMessage) {
-            console.log('Process was interrupted (SIGTERM), but assistant message was saved:', finalizeResult.savedMessage.id);
+            log.debug('Process was interrupted (SIGTERM), but assistant message was saved:', finalizeResult.savedMessage.id);
             resolve(finalizeResult.savedMessage);
+          } else if (watchdog.timeoutReason) {
+            reject(new Error(this.describeWatchdogStop(watchdog)));
           } else if (code !== 0) { // Don't reject if the process was already handled (e.g., streaming result)
             reject(new Error(`Claude process failed with code ${code}: ${errorOutput}`));
           }
         }
-      });
 
-      claudeProcess.on('error', async (error) => {
+        releaseSession();
+      };
+
+      const onClose = (code) => finishTurn(code);
+
+      const onError = async (error) => {
+        if (persistent) {
+          if (turnFinished) return;
+          turnFinished = true;
+          detach();
+          options.onTurnEnd(false);
+        }
         this.claudeProcesses.delete(sessionId);
-        clearTimeout(timeout); // Clear the timeout
-        clearTimeout(initialTimeout); // Clear the initial timeout
-        console.log('Claude process error:', error);
+        this.clearStreamState(sessionId, streamState);
+        this.stopWatchdog(sessionId, watchdog);
+        this.recordTimeline(sessionId, timeline, null);
+        log.debug('Claude process error:', error);
 
         // Save recovery state on process error
         await this.sessionManager.saveRecoveryState(sessionId, {
@@ -598,41 +872,38 @@ class ClaudeProcessManager {
           error: error.message,
           failedAt: new Date().toISOString()
         });
+        releaseSession();
 
         reject(new Error(`Failed to start Claude process: ${error.message}`));
-      });
-
-      // Add timeout handling (5 minutes)
-      const timeout = setTimeout(async () => {
-        if (!claudeProcess.killed) {
-          console.log('Claude process timed out, killing...');
-          claudeProcess.kill('SIGTERM');
-          this.claudeProcesses.delete(sessionId);
+      };
 
-          // Save recovery state on timeout
-          await this.sessionManager.saveRecoveryState(sessionId, {
-            lastUserMessage: session.messages[session.messages.length - 1]?.content,
-            claudeSessionId: session.claudeSessionId,
-            status: 'timeout',
-            timedOutAt: new Date().toISOString()
-          });
+      // A pooled process keeps running between turns; its output is paused until the next one
+      const detach = () => {
+        claudeProcess.stdout.removeListener('data', onStdout);
+        claudeProcess.stderr.removeListener('data', onStderr);
+        claudeProcess.removeListener('close', onClose);
+        claudeProcess.removeListener('error', onError);
+        claudeProcess.stdout.pause();
+        claudeProcess.stderr.pause();
+      };
 
-          reject(new Error('Claude process timed out after 5 minutes'));
-        }
-      }, 5 * 60 * 1000);
+      claudeProcess.stdout.on('data', onStdout);
+      claudeProcess.stderr.on('data', onStderr);
+      claudeProcess.on('close', onClose);
+      claudeProcess.on('error', onError);
+      if (persistent) {
+        claudeProcess.stdout.resume();
+        claudeProcess.stderr.resume();
+      }
 
-      // Add shorter timeout to detect early hanging (30 seconds for initial response)
-      const initialTimeout = setTimeout(() => {
-        if (output.length === 0 && errorOutput.length === 0) {
-          console.log('⚠️  No output received after 30 seconds - process may be hanging');
-          console.log('⚠️  Checking if process is still alive...');
-          console.log('⚠️  Process killed:', claudeProcess.killed);
-          console.log('⚠️  Process exit code:', claudeProcess.exitCode);
-          console.log('⚠️  Process signal code:', claudeProcess.signalCode);
+      // Stop the turn when it goes quiet for too long (or runs past the cap)
+      const watchdog = new ProcessWatchdog(claudeProcess, {
+        ...this.getWatchdogOptions(),
+        onStateChange: (state, status) => {
+          this.sendProcessStatus(sessionId, state);
 
-          // Send a gentle ping to check if process is responsive
-          if (!claudeProcess.killed) {
-            console.log('⚠️  Process appears to be hanging, but keeping it alive for now');
+          if (state === 'quiet') {
+            log.debug(`No output from Claude for ${Math.round(status.idleMs / 1000)}s (session ${sessionId})`);
 
             // Update recovery state with hanging status
             this.sessionManager.saveRecoveryState(sessionId, {
@@ -640,40 +911,222 @@ class ClaudeProcessManager {
               claudeSessionId: session.claudeSessionId,
               status: 'hanging',
               hangingDetectedAt: new Date().toISOString()
-            }).catch(err => console.error('Failed to save hanging state:', err));
+            }, { debounce: true }).catch(err => log.error('Failed to save hanging state:', err));
+          } else if (state === 'hung') {
+            timeline.mark('watchdog', { reason: status.timeoutReason, idleMs: status.idleMs });
+
+            // Save recovery state on timeout
+            this.sessionManager.saveRecoveryState(sessionId, {
+              lastUserMessage: session.messages[session.messages.length - 1]?.content,
+              claudeSessionId: session.claudeSessionId,
+              status: 'timeout',
+              timeoutReason: status.timeoutReason,
+              timedOutAt: new Date().toISOString()
+            }).catch(err => log.error('Failed to save timeout state:', err));
           }
         }
-      }, 30000);
+      });
+      this.watchdogs.set(sessionId, watchdog);
     });
   }
 
+  // Create the delta-tracking state for a streaming assistant message
+  createStreamState(sessionId, assistantMessage, cwd) {
+    const streamState = {
+      seq: 0,
+      message: assistantMessage,
+      sentBlockCount: 0,
+      thinkingContent: null,
+      cwd
+    };
+    this.streamStates.set(sessionId, streamState);
+    return streamState;
+  }
+
+  // Drop the stream state for a session, unless a newer run has replaced it
+  clearStreamState(sessionId, streamState) {
+    if (this.streamStates.get(sessionId) === streamState) {
+      this.streamStates.delete(sessionId);
+    }
+  }
+
+  // Send a sequenced delta with appended blocks and in-place block patches.
+  // Blocks are keyed by their index in the accumulated message content.
+  sendStreamDelta(sessionId, streamState, { patches = [], thinkingContent } = {}) {
+    const content = streamState.message.content || [];
+    const appended = [];
+    for (let index = streamState.sentBlockCount; index < content.length; index++) {
+      appended.push({ index, block: content[index] });
+    }
+    streamState.sentBlockCount = content.length;
+    streamState.seq += 1;
+
+    const payload = {
+      sessionId,
+      messageId: streamState.message.id,
+      seq: streamState.seq,
+      isComplete: false,
+      delta: { appended, patches },
+      cwd: streamState.cwd
+    };
+
+    // Only assistant events carry thinking content; tool result patches leave it as-is
+    if (thinkingContent !== undefined) {
+      streamState.thinkingContent = thinkingContent;
+      payload.thinkingContent = thinkingContent;
+    }
+
+    this.mainWindow.webContents.send('message-stream', payload);
+  }
+
+  // Full snapshot of the in-flight assistant message, used by the renderer to resync
+  // after it missed a delta (e.g. after a reload or a session switch mid-stream)
+  getStreamSnapshot(sessionId) {
+    const streamState = this.streamStates.get(sessionId);
+    if (!streamState) {
+      return { active: false, sessionId };
+    }
+
+    return {
+      active: true,
+      sessionId,
+      seq: streamState.seq,
+      message: streamState.message,
+      thinkingContent: streamState.thinkingContent,
+      cwd: streamState.cwd
+    };
+  }
+
+  // Watchdog limits from the configured settings
+  getWatchdogOptions() {
+    return {
+      idleTimeoutMs: this.watchdogSettings.idleTimeoutSeconds * 1000,
+      toolIdleTimeoutMs: this.watchdogSettings.toolIdleTimeoutSeconds * 1000,
+      maxRuntimeMs: this.watchdogSettings.maxRuntimeMinutes * 60 * 1000,
+      killGraceMs: this.watchdogSettings.killGraceSeconds * 1000
+    };
+  }
+
+  // Apply watchdog settings from ModelConfig (used by runs started afterwards)
+  configureWatchdog(settings = {}) {
+    for (const key of Object.keys(this.watchdogSettings)) {
+      if (typeof settings[key] === 'number' && settings[key] >= 0) {
+        this.watchdogSettings[key] = settings[key];
+      }
+    }
+  }
+
+  stopWatchdog(sessionId, watchdog) {
+    watchdog.stop();
+    if (this.watchdogs.get(sessionId) === watchdog) {
+      this.watchdogs.delete(sessionId);
+    }
+  }
+
+  describeWatchdogStop(watchdog) {
+    if (watchdog.timeoutReason === 'max_runtime') {
+      return `Claude process stopped after reaching the maximum run time of ${this.watchdogSettings.maxRuntimeMinutes} minutes`;
+    }
+    return `Claude process stopped after ${Math.round(watchdog.getIdleMs() / 1000)} seconds without output`;
+  }
+
+  // Liveness of a session's run for the tasks UI, or null if none is running
+  getRunHealth(sessionId) {
+    const watchdog = this.watchdogs.get(sessionId);
+    if (!watchdog) {
+      return null;
+    }
+    const status = watchdog.getStatus();
+    return { ...status, status: ClaudeProcessManager.TASK_STATUS[status.state] };
+  }
+
+  // Push a task status change to the tasks sidebar and tabs
+  sendProcessStatus(sessionId, state) {
+    if (this.mainWindow && !this.mainWindow.isDestroyed()) {
+      this.mainWindow.webContents.send('process-status-changed', {
+        sessionId,
+        status: ClaudeProcessManager.TASK_STATUS[state],
+        action: 'status_changed'
+      });
+    }
+  }
+
+  // Close a run's timeline and add it to the latency stats
+  recordTimeline(sessionId, timeline, exitCode) {
+    const alreadyFinished = Boolean(timeline.finished);
+    const summary = timeline.finish(exitCode);
+    if (!alreadyFinished) {
+      this.latencyStats.record(summary);
+      log.debug(() => [`Run timing for session ${sessionId}:`, summary.durations, `total ${summary.totalMs}ms`]);
+    }
+    if (this.runTimelines.get(sessionId) === timeline) {
+      this.runTimelines.delete(sessionId);
+    }
+    return summary;
+  }
+
+  // Timing breakdown of a run: the one saved with messageId, else the session's
+  // run in progress, else its most recent run
+  async getRunTimeline(sessionId, messageId = null) {
+    if (messageId) {
+      const session = await this.sessionManager.loadSessionMessages(sessionId);
+      const message = session.messages.find(candidate => candidate.id === messageId);
+      return message?.timing || null;
+    }
+    const active = this.runTimelines.get(sessionId);
+    if (active) {
+      return active.toJSON();
+    }
+    return this.latencyStats.getLatest(sessionId);
+  }
+
+  // p50/p95/p99 across recent runs; options.mode: 'pooled' or 'one-shot'
+  getLatencyStats(options = {}) {
+    return this.latencyStats.getPercentiles(options);
+  }
+
   // Stop message processing
   async stopMessage(sessionId) {
+    // Queued runs of the session never start
+    const cancelled = this.runScheduler.cancel(sessionId);
+    if (cancelled > 0) {
+      log.debug(`Cancelled ${cancelled} queued run(s) for session:`, sessionId);
+    }
+
     const process = this.claudeProcesses.get(sessionId);
     if (process && !process.killed) {
-      console.log('Stopping Claude process for session:', sessionId);
+      log.debug('Stopping Claude process for session:', sessionId);
       process.kill();
       this.claudeProcesses.delete(sessionId);
       return true;
     }
+
+    if (cancelled > 0) {
+      await this.sessionManager.clearRecoveryState(sessionId);
+      return true;
+    }
     return false;
   }
 
   // Stop all running Claude processes
   async stopAllMessages() {
-    console.log('Stopping all Claude processes...');
+    log.debug('Stopping all Claude processes...');
+    const cancelledCount = this.runScheduler.cancel();
+    if (cancelledCount > 0) {
+      log.info(`Cancelled ${cancelledCount} queued runs`);
+    }
     let stoppedCount = 0;
 
     for (const [sessionId, process] of this.claudeProcesses.entries()) {
       if (!process.killed) {
-        console.log('Stopping Claude process for session:', sessionId);
+        log.debug('Stopping Claude process for session:', sessionId);
         process.kill();
         stoppedCount++;
       }
     }
 
     this.claudeProcesses.clear();
-    console.log(`Stopped ${stoppedCount} Claude processes`);
+    log.info(`Stopped ${stoppedCount} Claude processes`);
     return stoppedCount;
   }
 
@@ -685,13 +1138,20 @@ class ClaudeProcessManager {
 
     // Set environment variable for current process
     process.env.ANTHROPIC_API_KEY = apiKey;
+
+    // Warm processes were started with the previous key
+    this.processPool.shutdown();
   }
 
   // Cleanup all processes
   async cleanup() {
-    console.log('Cleaning up Claude processes...');
+    log.debug('Cleaning up Claude processes...');
+
+    // Queued runs keep their waiting_for_response recovery state and are offered
+    // for recovery on the next start
+    this.runScheduler.cancel();
 
-    // Save all pending recovery states for running processes
+    // Save all pending recovery states for running processes (written together below)
     for (const [sessionId, process] of this.claudeProcesses) {
       if (!process.killed) {
         const session = this.sessionManager.getSession(sessionId);
@@ -701,44 +1161,40 @@ class ClaudeProcessManager {
             claudeSessionId: session.claudeSessionId,
             status: 'app_closing',
             closingAt: new Date().toISOString()
-          });
+          }, { debounce: true });
         }
 
         // Gracefully terminate the process
-        console.log('Terminating Claude process for session:', sessionId);
+        log.debug('Terminating Claude process for session:', sessionId);
         process.kill('SIGTERM');
       }
     }
 
     this.claudeProcesses.clear();
+    this.processPool.shutdown();
+    await this.sessionManager.flushRecoveryState();
   }
 
   /* MCP registration helpers */
-  async ensureMcpServersRegistered() {
-    if (this._mcpRegistered) return;
-    try {
-      const servers = McpServerManager.getServers().filter(s => s.enabled);
-      for (const server of servers) {
-        await this.registerSingleMcpServerCLI(server);
-      }
-      this._mcpRegistered = true;
-    } catch (err) {
-      console.error('Failed to register MCP servers:', err);
+
+  // Register enabled MCP servers with the CLI once per app run (skipped by
+  // McpServerManager when the list is unchanged since the last sync)
+  ensureMcpServersRegistered() {
+    if (!this.mcpRegistration) {
+      this.mcpRegistration = McpServerManager.syncCli().catch((err) => {
+        log.error('Failed to register MCP servers:', err);
+      });
     }
+    return this.mcpRegistration;
   }
 
-  registerSingleMcpServerCLI(server) {
-    return new Promise((resolve) => {
-      const args = ['mcp', 'add', '--transport', server.transport, server.name, server.url];
-      if (server.headers) {
-        for (const [key, value] of Object.entries(server.headers)) {
-          args.push('--header', `${key}: ${value}`);
-        }
-      }
-      const proc = spawn('claude', args, { stdio: 'ignore' });
-      proc.on('close', () => resolve());
-      proc.on('error', () => resolve());
+  // Re-sync after the MCP server list changed. Warm processes started with the
+  // old list no longer match the pool signature and are replaced.
+  refreshMcpServers() {
+    this.mcpRegistration = McpServerManager.syncCli().catch((err) => {
+      log.error('Failed to register MCP servers:', err);
     });
+    return this.mcpRegistration;
   }
 
   // Handle tool execution results and update checkpoints with post-edit content
@@ -756,8 +1212,8 @@ class ClaudeProcessManager {
       const pendingCheckpoints = await this.checkpointManager.getPendingCheckpoints(sessionId, messageId);
 
       for (const checkpoint of pendingCheckpoints) {
-        if (checkpoint.new_content === '...PENDING_POST_EDIT_CONTENT...') {
-          console.log('Updating checkpoint with post-edit content:', checkpoint.id, 'for file:', checkpoint.file_path);
+        if (this.checkpointManager.isCheckpointPending(checkpoint)) {
+          log.debug('Updating checkpoint with post-edit content:', checkpoint.id, 'for file:', checkpoint.file_path);
 
           // Update the checkpoint with actual post-edit content
           const updateSuccess = await this.checkpointManager.updateCheckpointWithPostEditContent(
@@ -766,14 +1222,14 @@ class ClaudeProcessManager {
           );
 
           if (updateSuccess) {
-            console.log('Successfully updated checkpoint:', checkpoint.id);
+            log.debug('Successfully updated checkpoint:', checkpoint.id);
           } else {
-            console.warn('Failed to update checkpoint:', checkpoint.id);
+            log.warn('Failed to update checkpoint:', checkpoint.id);
           }
         }
       }
     } catch (error) {
-      console.error('Failed to update checkpoints from tool result:', error);
+      log.error('Failed to update checkpoints from tool result:', error);
     }
   }
 
@@ -789,11 +1245,11 @@ class ClaudeProcessManager {
       return;
     }
 
-    console.log('Processing remaining buffer content:', JSON.stringify(jsonBuffer));
+    log.debug(() => ['Processing remaining buffer content:', JSON.stringify(jsonBuffer)]);
 
     try {
       const parsed = JSON.parse(jsonBuffer);
-      console.log('Successfully parsed remaining buffer:', JSON.stringify(parsed, null, 2));
+      log.trace(() => ['Successfully parsed remaining buffer:', JSON.stringify(parsed, null, 2)]);
 
       // Handle any remaining assistant message content
       if (parsed.type === 'assistant' && parsed.message && parsed.message.role === 'assistant') {
@@ -804,11 +1260,11 @@ class ClaudeProcessManager {
         }
       }
     } catch (e) {
-      console.log('Failed to parse remaining buffer content:', e.message);
+      log.debug('Failed to parse remaining buffer content:', e.message);
       // Try to recover partial content if it looks like truncated JSON
       if (jsonBuffer.includes('"type"') || jsonBuffer.includes('"content"')) {
-        console.log('Buffer contains structured data but is malformed, logging for investigation');
-        console.error('Malformed remaining buffer:', jsonBuffer);
+        log.debug('Buffer contains structured data but is malformed, logging for investigation');
+        log.error('Malformed remaining buffer:', jsonBuffer);
       }
     }
   }
@@ -817,11 +1273,11 @@ class ClaudeProcessManager {
   async finalizeAssistantMessage(sessionId, assistantMessage, cwd, exitCode, errorOutput) {
     const session = this.sessionManager.getSession(sessionId);
     if (!session) {
-      console.error('Session not found for message finalization:', sessionId);
+      log.error('Session not found for message finalization:', sessionId);
       return { success: false, error: 'Session not found' };
     }
 
-    console.log('Finalizing assistant message:', assistantMessage.id, 'for session:', sessionId);
+    log.debug('Finalizing assistant message:', assistantMessage.id, 'for session:', sessionId);
 
     try {
       // Ensure message has valid content structure
@@ -831,7 +1287,7 @@ class ClaudeProcessManager {
 
       // Add error information to message if process failed
       if (exitCode !== 0 && errorOutput) {
-        console.log('Adding error information to assistant message due to process failure');
+        log.debug('Adding error information to assistant message due to process failure');
         assistantMessage.content.push({
           type: 'text',
           text: `\n\n*Process ended with error (code ${exitCode}):*\n\`\`\`\n${errorOutput}\n\`\`\``
@@ -841,7 +1297,7 @@ class ClaudeProcessManager {
       // Validate message structure before saving
       if (!assistantMessage.id) {
         assistantMessage.id = uuidv4();
-        console.warn('Assistant message missing ID, generated new one:', assistantMessage.id);
+        log.warn('Assistant message missing ID, generated new one:', assistantMessage.id);
       }
 
       if (!assistantMessage.timestamp) {
@@ -851,7 +1307,7 @@ class ClaudeProcessManager {
       // Save message to session with enhanced error handling
       try {
         const savedMessage = await this.sessionManager.addMessageToSession(sessionId, assistantMessage);
-        console.log('Assistant message saved successfully:', savedMessage.id);
+        log.debug('Assistant message saved successfully:', savedMessage.id);
 
         // Update session recovery state to indicate successful completion
         await this.sessionManager.saveRecoveryState(sessionId, {
@@ -864,7 +1320,7 @@ class ClaudeProcessManager {
 
         return { success: true, savedMessage };
       } catch (saveError) {
-        console.error('Failed to save assistant message to session:', saveError);
+        log.error('Failed to save assistant message to session:', saveError);
 
         // Even if we can't save, try to update recovery state with the message content
         await this.sessionManager.saveRecoveryState(sessionId, {
@@ -883,10 +1339,18 @@ class ClaudeProcessManager {
         return { success: false, error: saveError.message, unsavedMessage: assistantMessage };
       }
     } catch (error) {
-      console.error('Failed to finalize assistant message:', error);
+      log.error('Failed to finalize assistant message:', error);
       return { success: false, error: error.message };
     }
   }
 }
 
+// Watchdog state -> task status shown in the tasks sidebar and tabs
+ClaudeProcessManager.TASK_STATUS = {
+  active: 'processing',
+  quiet: 'stalled',
+  hung: 'hung',
+  killing: 'hung'
+};
+
 module.exports = ClaudeProcessManager;
\ No newline at end of file
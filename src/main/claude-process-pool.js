@@ -0,0 +1,201 @@
+const { spawn } = require('child_process');
+const Logger = require('./logger');
+
+const log = Logger.scope('claude-pool');
+
+// Long-lived `claude` processes in streaming-input mode
+// (--input-format stream-json), so a turn doesn't pay the CLI's cold start.
+//
+// A process belongs to one session once it has run a turn for it and is reused
+// for that session's later turns while idle. One unassigned spare is kept warm
+// for the next new conversation. Processes are keyed by a signature of
+// everything fixed at spawn time (arguments, working directory, model, MCP
+// servers), so a settings change simply stops matching old processes, which
+// then idle out.
+// Idle processes exit after idleTimeoutMs; when the pool is full the least
+// recently used idle process is stopped to make room.
+class ClaudeProcessPool {
+  constructor(options = {}) {
+    this.maxSize = options.maxSize ?? 4;
+    this.idleTimeoutMs = options.idleTimeoutMs ?? 5 * 60 * 1000;
+    this.entries = new Set();
+  }
+
+  configure(options = {}) {
+    if (typeof options.maxSize === 'number') {
+      this.maxSize = options.maxSize;
+    }
+    if (typeof options.idleTimeoutMs === 'number') {
+      this.idleTimeoutMs = options.idleTimeoutMs;
+    }
+    this.trimIdle(this.maxSize);
+  }
+
+  // Take a process for a turn: the session's own idle process, else the warm
+  // spare (new conversations only), else a freshly spawned one. spec:
+  // { signature, args, cwd, sessionId, claudeSessionId }
+  acquire(spec) {
+    let entry = null;
+    for (const candidate of this.entries) {
+      if (candidate.busy || candidate.signature !== spec.signature || !this.isAlive(candidate)) {
+        continue;
+      }
+      if (candidate.sessionId === spec.sessionId && candidate.claudeSessionId === spec.claudeSessionId) {
+        entry = candidate;
+        break;
+      }
+      if (!entry && candidate.sessionId === null && !spec.claudeSessionId) {
+        entry = candidate;
+      }
+    }
+
+    if (entry) {
+      log.debug(`Reusing ${entry.sessionId ? 'session' : 'spare'} process ${entry.process.pid} for session ${spec.sessionId}`);
+    } else {
+      this.trimIdle(this.maxSize - 1);
+      entry = this.spawnEntry(spec);
+    }
+
+    clearTimeout(entry.idleTimer);
+    entry.idleTimer = null;
+    entry.busy = true;
+    entry.sessionId = spec.sessionId;
+    entry.turns++;
+    return entry;
+  }
+
+  // Return a process after its turn; `reusable` is false if the turn failed
+  release(entry, reusable, claudeSessionId) {
+    entry.busy = false;
+    entry.lastUsedAt = Date.now();
+    entry.claudeSessionId = claudeSessionId || entry.claudeSessionId;
+
+    if (!reusable || !this.isAlive(entry)) {
+      this.discard(entry);
+      return;
+    }
+
+    entry.idleTimer = setTimeout(() => {
+      log.debug(`Stopping idle Claude process ${entry.process.pid} (session ${entry.sessionId})`);
+      this.discard(entry);
+    }, this.idleTimeoutMs);
+    if (entry.idleTimer.unref) entry.idleTimer.unref();
+    this.trimIdle(this.maxSize);
+  }
+
+  // Pre-spawn an unassigned process for the next new conversation
+  warmSpare(spec) {
+    for (const entry of this.entries) {
+      if (entry.sessionId === null && entry.signature === spec.signature && this.isAlive(entry)) {
+        return entry;
+      }
+    }
+    // Never stop a session's warm process for a speculative spare
+    if (this.entries.size >= this.maxSize) {
+      return null;
+    }
+
+    const entry = this.spawnEntry({ ...spec, sessionId: null, claudeSessionId: null });
+    entry.idleTimer = setTimeout(() => this.discard(entry), this.idleTimeoutMs);
+    if (entry.idleTimer.unref) entry.idleTimer.unref();
+    return entry;
+  }
+
+  // Stop the idle process held for a session (e.g. the session was deleted)
+  discardSession(sessionId) {
+    for (const entry of this.entries) {
+      if (entry.sessionId === sessionId && !entry.busy) {
+        this.discard(entry);
+      }
+    }
+  }
+
+  discard(entry) {
+    clearTimeout(entry.idleTimer);
+    entry.idleTimer = null;
+    this.entries.delete(entry);
+    if (this.isAlive(entry)) {
+      try {
+        // Closing stdin ends the CLI's input stream and lets it exit cleanly
+        entry.process.stdin.end();
+      } catch (error) {
+        log.debug('Error closing stdin of pooled process:', error.message);
+      }
+      entry.process.kill('SIGTERM');
+    }
+  }
+
+  // Stop idle processes, least recently used first, until at most `limit`
+  // processes remain; returns true if the pool is within the limit
+  trimIdle(limit) {
+    const idle = Array.from(this.entries)
+      .filter(entry => !entry.busy)
+      .sort((a, b) => a.lastUsedAt - b.lastUsedAt);
+    while (this.entries.size > Math.max(0, limit) && idle.length > 0) {
+      this.discard(idle.shift());
+    }
+    return this.entries.size <= Math.max(0, limit);
+  }
+
+  shutdown() {
+    for (const entry of Array.from(this.entries)) {
+      this.discard(entry);
+    }
+  }
+
+  getStats() {
+    const entries = Array.from(this.entries);
+    return {
+      size: entries.length,
+      busy: entries.filter(entry => entry.busy).length,
+      spare: entries.filter(entry => entry.sessionId === null).length,
+      maxSize: this.maxSize
+    };
+  }
+
+  isAlive(entry) {
+    return entry.process.exitCode === null && entry.process.signalCode === null && !entry.process.killed;
+  }
+
+  spawnEntry(spec) {
+    log.debug('Spawning pooled Claude process with command:', ['claude', ...spec.args]);
+    const claudeProcess = spawn('claude', spec.args, {
+      stdio: ['pipe', 'pipe', 'pipe'],
+      env: { ...process.env },
+      cwd: spec.cwd,
+      detached: false,
+      shell: false
+    });
+
+    const entry = {
+      process: claudeProcess,
+      signature: spec.signature,
+      sessionId: spec.sessionId,
+      claudeSessionId: spec.claudeSessionId || null,
+      busy: false,
+      turns: 0,
+      idleTimer: null,
+      lastUsedAt: Date.now()
+    };
+    this.entries.add(entry);
+
+    // Drop the entry as soon as the process goes away, whoever stopped it
+    claudeProcess.on('exit', (code, signal) => {
+      log.debug(`Pooled Claude process ${claudeProcess.pid} exited with code:`, code, 'signal:', signal);
+      clearTimeout(entry.idleTimer);
+      this.entries.delete(entry);
+    });
+    claudeProcess.on('error', (error) => {
+      log.debug('Pooled Claude process error:', error.message);
+      clearTimeout(entry.idleTimer);
+      this.entries.delete(entry);
+    });
+    // Writing a turn to a process that has just exited fails with EPIPE
+    claudeProcess.stdin.on('error', (error) => log.debug('Pooled process stdin error:', error.message));
+
+    log.info('Pooled Claude process spawned with PID:', claudeProcess.pid);
+    return entry;
+  }
+}
+
+module.exports = ClaudeProcessPool;
@@ -3,6 +3,9 @@ const path = require('path');
 const os = require('os');
 const { v4: uuidv4 } = require('uuid');
 const WindowDetector = require('./window-detector');
+const Logger = require('./logger');
+
+const log = Logger.scope('files');
 
 class FileOperations {
   constructor(modelConfig = null) {
@@ -42,7 +45,7 @@ class FileOperations {
           });
         } catch (statError) {
           // Skip files we can't stat (permission issues, etc.)
-          console.warn(`Could not stat ${entry.name}:`, statError.message);
+          log.warn(`Could not stat ${entry.name}:`, statError.message);
         }
       }
 
@@ -98,7 +101,7 @@ class FileOperations {
         contents: contents
       };
     } catch (error) {
-      console.error('Failed to get directory contents:', error);
+      log.error('Failed to get directory contents:', error);
       return {
         success: false,
         error: error.message,
@@ -124,7 +127,7 @@ class FileOperations {
       // Get contents of new directory
       const contents = await this.getDirectoryContents(resolvedPath);
 
-      console.log('Navigated to directory:', resolvedPath);
+      log.debug('Navigated to directory:', resolvedPath);
 
       return {
         success: true,
@@ -134,7 +137,7 @@ class FileOperations {
         canGoForward: this.historyIndex < this.directoryHistory.length - 1
       };
     } catch (error) {
-      console.error('Failed to navigate to directory:', error);
+      log.error('Failed to navigate to directory:', error);
       return {
         success: false,
         error: error.message,
@@ -155,7 +158,7 @@ class FileOperations {
         canGoForward: this.historyIndex < this.directoryHistory.length - 1
       };
     } catch (error) {
-      console.error('Failed to get current directory:', error);
+      log.error('Failed to get current directory:', error);
       return {
         success: false,
         error: error.message,
@@ -339,7 +342,7 @@ class FileOperations {
       this.currentWorkingDirectory = resolvedPath;
       this.updateDirectoryHistory(resolvedPath);
 
-      console.log('Set working directory from file (fallback):', filePath, '=>', resolvedPath);
+      log.debug('Set working directory from file (fallback):', filePath, '=>', resolvedPath);
 
       return {
         success: true,
@@ -348,7 +351,7 @@ class FileOperations {
         message: `Working directory set to ${resolvedPath}`
       };
     } catch (error) {
-      console.error('Failed to set working directory from file:', error);
+      log.error('Failed to set working directory from file:', error);
       return {
         success: false,
         error: error.message,
@@ -424,7 +427,7 @@ class FileOperations {
         };
       }
 
-      console.log('File read successfully:', filePath);
+      log.debug('File read successfully:', filePath);
 
       return {
         success: true,
@@ -435,7 +438,7 @@ class FileOperations {
       };
 
     } catch (error) {
-      console.error('Failed to read file:', error);
+      log.error('Failed to read file:', error);
       return {
         success: false,
         error: error.message,
@@ -481,7 +484,7 @@ class FileOperations {
         }, 5000);
       }
 
-      console.log('File written successfully:', filePath);
+      log.debug('File written successfully:', filePath);
 
       return {
         success: true,
@@ -490,7 +493,7 @@ class FileOperations {
       };
 
     } catch (error) {
-      console.error('Failed to write file:', error);
+      log.error('Failed to write file:', error);
       return {
         success: false,
         error: error.message,
@@ -560,10 +563,10 @@ class FileOperations {
                 // This can also fail if the file was, for example, deleted.
                 const rewatchResult = this.watchFile(filePath, callback);
                 if (!rewatchResult.success) {
-                  console.warn(`Failed to re-establish watcher for ${filePath}:`, rewatchResult.error);
+                  log.warn(`Failed to re-establish watcher for ${filePath}:`, rewatchResult.error);
                 }
               } catch (rewatchErr) {
-                console.error('Error while re-establishing file watcher:', rewatchErr);
+                log.error('Error while re-establishing file watcher:', rewatchErr);
                 // If closing the stale watcher or re-watching failed, it's probably invalid.
                 // Remove it to prevent errors on subsequent unwatch calls.
                 if (this.fileWatchers.has(resolvedPath)) {
@@ -577,7 +580,7 @@ class FileOperations {
 
       this.fileWatchers.set(resolvedPath, watcher);
 
-      console.log('Started watching file:', filePath);
+      log.debug('Started watching file:', filePath);
 
       return {
         success: true,
@@ -586,7 +589,7 @@ class FileOperations {
       };
 
     } catch (error) {
-      console.error('Failed to watch file:', error);
+      log.error('Failed to watch file:', error);
       return {
         success: false,
         error: error.message,
@@ -618,7 +621,7 @@ class FileOperations {
         this.fileWatcherTimers.delete(resolvedPath);
       }
 
-      console.log('Stopped watching file:', filePath);
+      log.debug('Stopped watching file:', filePath);
 
       return {
         success: true,
@@ -627,7 +630,7 @@ class FileOperations {
       };
 
     } catch (error) {
-      console.error('Failed to unwatch file:', error);
+      log.error('Failed to unwatch file:', error);
       return {
         success: false,
         error: error.message,
@@ -716,7 +719,7 @@ class FileOperations {
 
       this.directoryWatchers.set(resolvedPath, watcher);
 
-      console.log('Started watching directory:', dirPath);
+      log.debug('Started watching directory:', dirPath);
 
       return {
         success: true,
@@ -725,7 +728,7 @@ class FileOperations {
       };
 
     } catch (error) {
-      console.error('Failed to watch directory:', error);
+      log.error('Failed to watch directory:', error);
       return {
         success: false,
         error: error.message,
@@ -757,7 +760,7 @@ class FileOperations {
         this.directoryWatcherTimers.delete(resolvedPath);
       }
 
-      console.log('Stopped watching directory:', dirPath);
+      log.debug('Stopped watching directory:', dirPath);
 
       return {
         success: true,
@@ -766,7 +769,7 @@ class FileOperations {
       };
 
     } catch (error) {
-      console.error('Failed to unwatch directory:', error);
+      log.error('Failed to unwatch directory:', error);
       return {
         success: false,
         error: error.message,
@@ -792,7 +795,7 @@ class FileOperations {
         contents: contents
       };
     } catch (error) {
-      console.error('Failed to get directory contents only:', error);
+      log.error('Failed to get directory contents only:', error);
       return {
         success: false,
         error: error.message,
@@ -807,7 +810,7 @@ class FileOperations {
       const results = [];
       const searchStartPath = this.currentWorkingDirectory;
 
-      console.log(`Searching for files with prefix "${query}" in ${searchStartPath}`);
+      log.debug(`Searching for files with prefix "${query}" in ${searchStartPath}`);
 
       await this._searchFilesRecursive(searchStartPath, query.toLowerCase(), results, maxResults, 0, 5); // Max depth of 5
 
@@ -842,7 +845,7 @@ class FileOperations {
       };
 
     } catch (error) {
-      console.error('Failed to search files:', error);
+      log.error('Failed to search files:', error);
       return {
         success: false,
         error: error.message,
@@ -911,7 +914,7 @@ class FileOperations {
       }
     } catch (error) {
       // Skip directories we can't read
-      console.warn(`Could not read directory ${dirPath}:`, error.message);
+      log.warn(`Could not read directory ${dirPath}:`, error.message);
     }
   }
 
@@ -951,14 +954,14 @@ class FileOperations {
   // Get open application windows (VS Code, Cursor, etc.)
   async getOpenApplicationWindows() {
     try {
-      console.log('Detecting open application windows...');
+      log.debug('Detecting open application windows...');
       const result = await this.windowDetector.getOpenFiles();
 
       if (!result.success) {
         return result; // Return error result as-is
       }
 
-      console.log(`Found ${result.files.length} open files from ${result.runningApps?.length || 0} applications`);
+      log.debug(`Found ${result.files.length} open files from ${result.runningApps?.length || 0} applications`);
 
       return {
         success: true,
@@ -969,7 +972,7 @@ class FileOperations {
         }
       };
     } catch (error) {
-      console.error('Error getting open application windows:', error);
+      log.error('Error getting open application windows:', error);
       return {
         success: false,
         error: error.message,
@@ -981,7 +984,7 @@ class FileOperations {
 
   // Request accessibility permissions for window detection (deprecated)
   async requestWindowDetectionPermissions() {
-    console.warn('requestWindowDetectionPermissions is deprecated, use enableWindowDetectionWithPermissions instead');
+    log.warn('requestWindowDetectionPermissions is deprecated, use enableWindowDetectionWithPermissions instead');
     return await this.enableWindowDetectionWithPermissions();
   }
 
@@ -990,7 +993,7 @@ class FileOperations {
     try {
       return await this.windowDetector.enableWindowDetectionWithPermissions();
     } catch (error) {
-      console.error('Error enabling window detection with permissions:', error);
+      log.error('Error enabling window detection with permissions:', error);
       return {
         success: false,
         error: error.message,
@@ -1004,7 +1007,7 @@ class FileOperations {
     try {
       return await this.windowDetector.getPermissionStatus();
     } catch (error) {
-      console.error('Error getting window detection permission status:', error);
+      log.error('Error getting window detection permission status:', error);
       return {
         hasAccessibilityPermissions: false,
         userConsentForPermissions: false,
@@ -1043,7 +1046,7 @@ class FileOperations {
         diagnostics: diagnostics
       };
     } catch (error) {
-      console.error('Error getting window detection diagnostics:', error);
+      log.error('Error getting window detection diagnostics:', error);
       return {
         success: false,
         error: error.message
@@ -1060,7 +1063,7 @@ class FileOperations {
         test: result
       };
     } catch (error) {
-      console.error('Error testing AppleScript:', error);
+      log.error('Error testing AppleScript:', error);
       return {
         success: false,
         error: error.message
@@ -1095,14 +1098,14 @@ class FileOperations {
         this.workspaces.set(workspace.id, normalizedWorkspace);
       });
 
-      console.log(`Loaded ${this.workspaces.size} workspaces from storage`);
+      log.info(`Loaded ${this.workspaces.size} workspaces from storage`);
       return {
         success: true,
         workspaces: Array.from(this.workspaces.values())
       };
     } catch (error) {
       // File doesn't exist or is invalid, start with empty workspaces
-      console.log('No existing workspaces found, starting fresh');
+      log.debug('No existing workspaces found, starting fresh');
       return {
         success: true,
         workspaces: []
@@ -1119,13 +1122,13 @@ class FileOperations {
       const workspaceArray = Array.from(this.workspaces.values());
       await fs.writeFile(this.workspaceStoragePath, JSON.stringify(workspaceArray, null, 2));
 
-      console.log(`Saved ${workspaceArray.length} workspaces to storage`);
+      log.debug(`Saved ${workspaceArray.length} workspaces to storage`);
       return {
         success: true,
         message: `Saved ${workspaceArray.length} workspaces`
       };
     } catch (error) {
-      console.error('Failed to save workspaces:', error);
+      log.error('Failed to save workspaces:', error);
       return {
         success: false,
         error: error.message
@@ -1183,7 +1186,7 @@ class FileOperations {
       // Save to storage
       await this.saveWorkspaces();
 
-      console.log(`Created workspace "${workspace.name}" with ${workspace.folders.length} folders`);
+      log.debug(`Created workspace "${workspace.name}" with ${workspace.folders.length} folders`);
 
       return {
         success: true,
@@ -1191,7 +1194,7 @@ class FileOperations {
         message: `Workspace "${workspace.name}" created successfully`
       };
     } catch (error) {
-      console.error('Failed to create workspace:', error);
+      log.error('Failed to create workspace:', error);
       return {
         success: false,
         error: error.message
@@ -1218,7 +1221,7 @@ class FileOperations {
         activeWorkspace: this.activeWorkspace
       };
     } catch (error) {
-      console.error('Failed to get workspaces:', error);
+      log.error('Failed to get workspaces:', error);
       return {
         success: false,
         error: error.message,
@@ -1247,14 +1250,14 @@ class FileOperations {
       // Save to storage
       await this.saveWorkspaces();
 
-      console.log(`Deleted workspace "${workspace.name}"`);
+      log.debug(`Deleted workspace "${workspace.name}"`);
 
       return {
         success: true,
         message: `Workspace "${workspace.name}" deleted successfully`
       };
     } catch (error) {
-      console.error('Failed to delete workspace:', error);
+      log.error('Failed to delete workspace:', error);
       return {
         success: false,
         error: error.message
@@ -1291,7 +1294,7 @@ class FileOperations {
       // Save changes
       await this.saveWorkspaces();
 
-      console.log(`Activated workspace "${workspace.name}"`);
+      log.debug(`Activated workspace "${workspace.name}"`);
 
       return {
         success: true,
@@ -1300,7 +1303,7 @@ class FileOperations {
         currentDirectory: this.currentWorkingDirectory
       };
     } catch (error) {
-      console.error('Failed to set active workspace:', error);
+      log.error('Failed to set active workspace:', error);
       return {
         success: false,
         error: error.message
@@ -1328,7 +1331,7 @@ class FileOperations {
         this.activeWorkspace = null;
         await this.saveWorkspaces();
 
-        console.log('Cleared active workspace');
+        log.debug('Cleared active workspace');
       }
 
       return {
@@ -1336,7 +1339,7 @@ class FileOperations {
         message: 'Active workspace cleared'
       };
     } catch (error) {
-      console.error('Failed to clear active workspace:', error);
+      log.error('Failed to clear active workspace:', error);
       return {
         success: false,
         error: error.message
@@ -3,6 +3,9 @@ const McpServerManager = require('./mcp-server-manager');
 const ClaudeCliHistory = require('./claude-cli-history');
 const path = require('path');
 const { exec } = require('child_process');
+const Logger = require('./logger');
+
+const log = Logger.scope('ipc');
 
 class IPCHandlers {
   constructor(sessionManager, checkpointManager, fileOperations, modelConfig, claudeProcessManager, mainWindow) {
@@ -56,11 +59,14 @@ class IPCHandlers {
 
   registerSetupHandlers() {
     ipcMain.handle('check-setup', async () => {
-      const cliAvailable = await this.claudeProcessManager.checkClaudeCliAvailable();
+      const cliInfo = await this.claudeProcessManager.getClaudeCliInfo();
+      const cliAvailable = cliInfo.available;
       const apiKeySet = this.claudeProcessManager.checkApiKey();
 
       return {
         cliAvailable,
+        cliVersion: cliInfo.version,
+        cliPath: cliInfo.path,
         apiKeySet,
         canUseClaudeCode: cliAvailable && apiKeySet
       };
@@ -90,7 +96,7 @@ class IPCHandlers {
 
         exec(execCommand, (error) => {
           if (error) {
-            console.error(`exec error: ${error}`);
+            log.error(`exec error: ${error}`);
             // This error is for launching the terminal, not the command inside.
             resolve({ success: false, error: `Failed to open terminal: ${error.message}` });
             return;
@@ -138,6 +144,50 @@ class IPCHandlers {
     ipcMain.handle('set-window-detection-settings', async (event, settings) => {
       return await this.modelConfig.setWindowDetectionSettings(settings);
     });
+
+    // Checkpoint retention settings
+    ipcMain.handle('get-checkpoint-retention-settings', async () => {
+      return this.modelConfig.getCheckpointRetentionSettings();
+    });
+
+    ipcMain.handle('set-checkpoint-retention-settings', async (event, settings) => {
+      const updated = await this.modelConfig.setCheckpointRetentionSettings(settings);
+      this.checkpointManager.configureRetention(updated);
+      return updated;
+    });
+
+    // Run scheduler settings
+    ipcMain.handle('get-run-scheduler-settings', async () => {
+      return this.modelConfig.getRunSchedulerSettings();
+    });
+
+    ipcMain.handle('set-run-scheduler-settings', async (event, settings) => {
+      const updated = await this.modelConfig.setRunSchedulerSettings(settings);
+      this.claudeProcessManager.configureRunScheduler(updated);
+      return updated;
+    });
+
+    // Warm process pool settings
+    ipcMain.handle('get-process-pool-settings', async () => {
+      return this.modelConfig.getProcessPoolSettings();
+    });
+
+    ipcMain.handle('set-process-pool-settings', async (event, settings) => {
+      const updated = await this.modelConfig.setProcessPoolSettings(settings);
+      this.claudeProcessManager.configureProcessPool(updated);
+      return updated;
+    });
+
+    // Run watchdog settings
+    ipcMain.handle('get-watchdog-settings', async () => {
+      return this.modelConfig.getWatchdogSettings();
+    });
+
+    ipcMain.handle('set-watchdog-settings', async (event, settings) => {
+      const updated = await this.modelConfig.setWatchdogSettings(settings);
+      this.claudeProcessManager.configureWatchdog(updated);
+      return updated;
+    });
   }
 
   registerMcpHandlers() {
@@ -150,7 +200,7 @@ class IPCHandlers {
     ipcMain.handle('save-mcp-server', async (event, serverConfig) => {
       try {
         const saved = McpServerManager.saveServer(serverConfig);
-        McpServerManager.syncCli();
+        await this.claudeProcessManager.refreshMcpServers();
         return { success: true, server: saved };
       } catch (err) {
         return { success: false, error: err.message };
@@ -160,7 +210,7 @@ class IPCHandlers {
     // Delete a server
     ipcMain.handle('delete-mcp-server', async (event, serverId) => {
       const success = McpServerManager.deleteServer(serverId);
-      McpServerManager.syncCli();
+      await this.claudeProcessManager.refreshMcpServers();
       return { success };
     });
 
@@ -168,7 +218,7 @@ class IPCHandlers {
     ipcMain.handle('toggle-mcp-server', async (event, serverId, enabled) => {
       try {
         const server = McpServerManager.toggleServer(serverId, enabled);
-        McpServerManager.syncCli();
+        await this.claudeProcessManager.refreshMcpServers();
         return { success: true, server };
       } catch (err) {
         return { success: false, error: err.message };
@@ -213,10 +263,16 @@ class IPCHandlers {
     });
 
     ipcMain.handle('delete-session', async (event, sessionId) => {
-      // Clean up any running Claude process for this session
+      // Clean up any running or warm Claude process for this session
       await this.claudeProcessManager.stopMessage(sessionId);
+      this.claudeProcessManager.releaseSessionProcess(sessionId);
 
       const result = await this.sessionManager.deleteSession(sessionId);
+      this.claudeProcessManager.discardToolOutputs(sessionId);
+
+      if (this.modelConfig.getCheckpointRetentionSettings().removeDeletedSessions) {
+        this.checkpointManager.deleteSessionCheckpoints(sessionId);
+      }
 
       // Notify frontend
       if (this.mainWindow) {
@@ -231,7 +287,7 @@ class IPCHandlers {
     });
 
     ipcMain.handle('get-session-context', async (event, sessionId) => {
-      return this.sessionManager.getSessionContext(sessionId);
+      return await this.sessionManager.getSessionContext(sessionId);
     });
 
     // Session working directory management
@@ -266,7 +322,7 @@ class IPCHandlers {
         // Get the directory contents to return to frontend
         const result = await this.fileOperations.getCurrentDirectory();
 
-        console.log(`Restored working directory for session ${sessionId}: ${sessionCwd}`);
+        log.debug(`Restored working directory for session ${sessionId}: ${sessionCwd}`);
 
         return {
           success: true,
@@ -276,7 +332,7 @@ class IPCHandlers {
           canGoForward: result.canGoForward || false
         };
       } catch (error) {
-        console.error('Failed to restore session working directory:', error);
+        log.error('Failed to restore session working directory:', error);
         return { success: false, error: error.message };
       }
     });
@@ -321,7 +377,7 @@ class IPCHandlers {
           mismatchReason: validation.valid ? 'directory_changed' : 'original_directory_missing'
         };
       } catch (error) {
-        console.error('Failed to validate send directory:', error);
+        log.error('Failed to validate send directory:', error);
         return { success: false, error: error.message };
       }
     });
@@ -332,8 +388,22 @@ class IPCHandlers {
         await this.claudeProcessManager.stopAllMessages();
 
         // Clear all sessions
+        const clearedSessionIds = Array.from(this.sessionManager.sessions.keys());
         const result = await this.sessionManager.clearAllSessions();
 
+        for (const sessionId of clearedSessionIds) {
+          this.claudeProcessManager.releaseSessionProcess(sessionId);
+          if (result.success) {
+            this.claudeProcessManager.discardToolOutputs(sessionId);
+          }
+        }
+
+        if (result.success && this.modelConfig.getCheckpointRetentionSettings().removeDeletedSessions) {
+          for (const sessionId of clearedSessionIds) {
+            this.checkpointManager.deleteSessionCheckpoints(sessionId);
+          }
+        }
+
         // Notify frontend that all sessions were cleared
         if (result.success && this.mainWindow) {
           this.mainWindow.webContents.send('all-sessions-cleared', result.clearedCount);
@@ -341,7 +411,7 @@ class IPCHandlers {
 
         return result;
       } catch (error) {
-        console.error('Failed to clear all sessions:', error);
+        log.error('Failed to clear all sessions:', error);
         return {
           success: false,
           error: error.message,
@@ -352,14 +422,44 @@ class IPCHandlers {
   }
 
   registerMessagingHandlers() {
-    ipcMain.handle('send-message', async (event, sessionId, message) => {
-      return await this.claudeProcessManager.sendMessage(sessionId, message);
+    ipcMain.handle('send-message', async (event, sessionId, message, options) => {
+      return await this.claudeProcessManager.sendMessage(sessionId, message, options);
     });
 
     ipcMain.handle('stop-message', async (event, sessionId) => {
       return await this.claudeProcessManager.stopMessage(sessionId);
     });
 
+    // Full snapshot of an in-flight assistant message for message-stream resync
+    ipcMain.handle('get-message-stream-snapshot', async (event, sessionId) => {
+      return this.claudeProcessManager.getStreamSnapshot(sessionId);
+    });
+
+    // Per-run latency breakdown and percentiles across recent runs
+    ipcMain.handle('get-run-timeline', async (event, sessionId, messageId) => {
+      try {
+        return { success: true, timeline: await this.claudeProcessManager.getRunTimeline(sessionId, messageId) };
+      } catch (error) {
+        log.error('Failed to get run timeline:', error);
+        return { success: false, error: error.message, timeline: null };
+      }
+    });
+
+    ipcMain.handle('get-run-latency-stats', async (event, options) => {
+      return this.claudeProcessManager.getLatencyStats(options);
+    });
+
+    // Read a range of a tool output that was spilled to disk
+    ipcMain.handle('read-tool-output', async (event, sessionId, outputId, offset, length) => {
+      try {
+        const range = await this.claudeProcessManager.readToolOutput(sessionId, outputId, offset, length);
+        return { success: true, ...range };
+      } catch (error) {
+        log.error('Failed to read tool output:', error);
+        return { success: false, error: error.message };
+      }
+    });
+
     ipcMain.handle('get-running-tasks', async () => {
       try {
         const runningSessionIds = this.claudeProcessManager.getRunningSessionIds();
@@ -367,16 +467,36 @@ class IPCHandlers {
 
         for (const sessionId of runningSessionIds) {
           const session = this.sessionManager.getSession(sessionId);
-          const sessionContext = this.sessionManager.getSessionContext(sessionId);
+          const health = this.claudeProcessManager.getRunHealth(sessionId);
 
           if (session) {
             tasks.push({
               sessionId: sessionId,
               sessionTitle: session.title,
               startTime: session.lastActivity || session.updatedAt,
-              status: 'processing', // Could be enhanced with more specific status
+              status: health ? health.status : 'processing',
+              idleSeconds: health ? Math.floor(health.idleMs / 1000) : 0,
+              workingDirectory: session.cwd,
+              lastMessage: session.lastUserMessage,
+              queuePosition: null
+            });
+          }
+        }
+
+        // Runs waiting for a free slot, in the order they will start
+        for (const queued of this.claudeProcessManager.getQueuedRuns()) {
+          const session = this.sessionManager.getSession(queued.sessionId);
+
+          if (session && !tasks.some(task => task.sessionId === queued.sessionId)) {
+            tasks.push({
+              sessionId: queued.sessionId,
+              sessionTitle: session.title,
+              startTime: queued.queuedAt,
+              status: 'queued',
               workingDirectory: session.cwd,
-              lastMessage: session.lastUserMessage
+              lastMessage: session.lastUserMessage,
+              queuePosition: queued.position,
+              priority: queued.priority
             });
           }
         }
@@ -386,7 +506,7 @@ class IPCHandlers {
           tasks: tasks
         };
       } catch (error) {
-        console.error('Failed to get running tasks:', error);
+        log.error('Failed to get running tasks:', error);
         return {
           success: false,
           error: error.message,
@@ -398,31 +518,31 @@ class IPCHandlers {
 
   registerCheckpointHandlers() {
     ipcMain.handle('revert-to-message', async (event, sessionId, messageId) => {
-      console.log('=== REVERT TO MESSAGE IPC HANDLER START ===');
-      console.log('Parameters:', { sessionId, messageId });
+      log.debug('=== REVERT TO MESSAGE IPC HANDLER START ===');
+      log.debug('Parameters:', { sessionId, messageId });
 
       try {
         // Enhanced parameter validation
         if (!sessionId || !messageId) {
-          console.error('Invalid parameters for revert operation');
+          log.error('Invalid parameters for revert operation');
           return {
             success: false,
             error: 'Invalid session ID or message ID provided'
           };
         }
 
-        console.log('Reverting session', sessionId, 'to message', messageId);
+        log.debug('Reverting session', sessionId, 'to message', messageId);
 
         // Enhanced session validation with detailed reporting
         const sessionValidation = this.checkpointManager.validateSessionId(sessionId);
-        console.log('Session validation result:', sessionValidation);
+        log.debug('Session validation result:', sessionValidation);
 
         if (!sessionValidation.valid) {
-          console.error(`Cannot revert: Session validation failed - ${sessionValidation.reason}`);
+          log.error(`Cannot revert: Session validation failed - ${sessionValidation.reason}`);
 
           // Get session statistics for better error reporting
           const sessionStats = this.checkpointManager.getSessionStatistics(sessionId);
-          console.log('Session statistics:', sessionStats);
+          log.debug('Session statistics:', sessionStats);
 
           return {
             success: false,
@@ -431,14 +551,14 @@ class IPCHandlers {
           };
         }
 
-        console.log(`Session has ${sessionValidation.count} checkpoints`);
+        log.debug(`Session has ${sessionValidation.count} checkpoints`);
 
         // Check if the specific message has file changes before attempting revert
         const hasChanges = await this.checkpointManager.hasFileChanges(sessionId, messageId);
-        console.log(`Message ${messageId} has file changes: ${hasChanges}`);
+        log.debug(`Message ${messageId} has file changes: ${hasChanges}`);
 
         if (!hasChanges) {
-          console.warn('No file changes found for the specified message');
+          log.warn('No file changes found for the specified message');
           return {
             success: false,
             error: 'No file changes were made in this message to restore from',
@@ -446,45 +566,46 @@ class IPCHandlers {
           };
         }
 
-        const revertedFiles = await this.checkpointManager.revertToCheckpoint(sessionId, messageId);
+        const report = {};
+        const revertedFiles = await this.checkpointManager.revertToCheckpoint(sessionId, messageId, { report });
 
         // Mark messages after the revert point as invalidated so the UI can dim them
+        // Only when the files were actually changed; a failed revert is fully rolled back
         try {
-          const session = this.sessionManager.getSession(sessionId);
+          const session = Array.isArray(revertedFiles) ? await this.sessionManager.loadSessionMessages(sessionId) : null;
           if (session && Array.isArray(session.messages)) {
-            const messageIndex = session.messages.findIndex(m => m.id === messageId);
-            if (messageIndex >= 0) {
-              for (let i = messageIndex + 1; i < session.messages.length; i++) {
-                session.messages[i].invalidated = true;
-              }
+            const found = await this.sessionManager.setMessagesInvalidatedAfter(sessionId, messageId, true);
+            if (found) {
               // Mark the session as having an active revert
               session.currentRevertMessageId = messageId;
               await this.sessionManager.saveSession(sessionId);
-              console.log('Session state updated with revert information');
+              log.debug('Session state updated with revert information');
             } else {
-              console.warn(`Message ${messageId} not found in session messages for UI update`);
+              log.warn(`Message ${messageId} not found in session messages for UI update`);
             }
-          } else {
-            console.warn('Session not found or has no messages for UI update');
+          } else if (Array.isArray(revertedFiles)) {
+            log.warn('Session not found or has no messages for UI update');
           }
         } catch (sessionUpdateError) {
-          console.error('Failed to update session state after revert:', sessionUpdateError);
+          log.error('Failed to update session state after revert:', sessionUpdateError);
           // Don't fail the entire operation for this
         }
 
         // Handle both simple array response and enhanced error response
         if (Array.isArray(revertedFiles)) {
-          console.log(`Successfully reverted ${revertedFiles.length} files`);
-          console.log('=== REVERT TO MESSAGE IPC HANDLER END ===');
+          log.info(`Successfully reverted ${revertedFiles.length} files`);
+          log.debug('=== REVERT TO MESSAGE IPC HANDLER END ===');
           return {
             success: true,
             revertedFiles,
             message: `Successfully reverted ${revertedFiles.length} files`,
+            timings: report.timings || [],
+            totalMs: report.totalMs,
             sessionValidation
           };
         } else if (revertedFiles && revertedFiles.partialSuccess) {
-          console.log(`Partial success: reverted ${revertedFiles.revertedFiles.length} files, ${revertedFiles.failedFiles.length} failed`);
-          console.log('=== REVERT TO MESSAGE IPC HANDLER END ===');
+          log.info(`Partial success: reverted ${revertedFiles.revertedFiles.length} files, ${revertedFiles.failedFiles.length} failed`);
+          log.debug('=== REVERT TO MESSAGE IPC HANDLER END ===');
           return {
             success: true,
             revertedFiles: revertedFiles.revertedFiles,
@@ -493,8 +614,8 @@ class IPCHandlers {
             sessionValidation
           };
         } else if (revertedFiles && revertedFiles.failedFiles) {
-          console.error('All files failed to revert:', revertedFiles.failedFiles);
-          console.log('=== REVERT TO MESSAGE IPC HANDLER END ===');
+          log.error('All files failed to revert:', revertedFiles.failedFiles);
+          log.debug('=== REVERT TO MESSAGE IPC HANDLER END ===');
           return {
             success: false,
             error: `Failed to revert files: ${revertedFiles.failedFiles.map(f => f.error).join(', ')}`,
@@ -502,8 +623,8 @@ class IPCHandlers {
             sessionValidation
           };
         } else {
-          console.error('Unexpected revert result format:', revertedFiles);
-          console.log('=== REVERT TO MESSAGE IPC HANDLER END ===');
+          log.error('Unexpected revert result format:', revertedFiles);
+          log.debug('=== REVERT TO MESSAGE IPC HANDLER END ===');
           return {
             success: false,
             error: 'Unexpected error during revert operation',
@@ -511,10 +632,10 @@ class IPCHandlers {
           };
         }
       } catch (error) {
-        console.error('=== REVERT TO MESSAGE IPC HANDLER ERROR ===');
-        console.error('Failed to revert to message:', error);
-        console.error('Stack trace:', error.stack);
-        console.log('=== REVERT TO MESSAGE IPC HANDLER END ===');
+        log.error('=== REVERT TO MESSAGE IPC HANDLER ERROR ===');
+        log.error('Failed to revert to message:', error);
+        log.error('Stack trace:', error.stack);
+        log.debug('=== REVERT TO MESSAGE IPC HANDLER END ===');
         return {
           success: false,
           error: error.message,
@@ -525,31 +646,31 @@ class IPCHandlers {
     });
 
         ipcMain.handle('unrevert-from-message', async (event, sessionId, messageId) => {
-      console.log('=== UNREVERT FROM MESSAGE IPC HANDLER START ===');
-      console.log('Parameters:', { sessionId, messageId });
+      log.debug('=== UNREVERT FROM MESSAGE IPC HANDLER START ===');
+      log.debug('Parameters:', { sessionId, messageId });
 
       try {
         // Enhanced parameter validation
         if (!sessionId || !messageId) {
-          console.error('Invalid parameters for unrevert operation');
+          log.error('Invalid parameters for unrevert operation');
           return {
             success: false,
             error: 'Invalid session ID or message ID provided'
           };
         }
 
-        console.log('Unreverting session', sessionId, 'from message', messageId);
+        log.debug('Unreverting session', sessionId, 'from message', messageId);
 
         // Enhanced session validation with detailed reporting
         const sessionValidation = this.checkpointManager.validateSessionId(sessionId);
-        console.log('Session validation result:', sessionValidation);
+        log.debug('Session validation result:', sessionValidation);
 
         if (!sessionValidation.valid) {
-          console.error(`Cannot unrevert: Session validation failed - ${sessionValidation.reason}`);
+          log.error(`Cannot unrevert: Session validation failed - ${sessionValidation.reason}`);
 
           // Get session statistics for better error reporting
           const sessionStats = this.checkpointManager.getSessionStatistics(sessionId);
-          console.log('Session statistics:', sessionStats);
+          log.debug('Session statistics:', sessionStats);
 
           return {
             success: false,
@@ -558,14 +679,14 @@ class IPCHandlers {
           };
         }
 
-        console.log(`Session has ${sessionValidation.count} checkpoints`);
+        log.debug(`Session has ${sessionValidation.count} checkpoints`);
 
         // Check if the specific message has file changes before attempting unrevert
         const hasChanges = await this.checkpointManager.hasFileChanges(sessionId, messageId);
-        console.log(`Message ${messageId} has file changes: ${hasChanges}`);
+        log.debug(`Message ${messageId} has file changes: ${hasChanges}`);
 
         if (!hasChanges) {
-          console.warn('No file changes found for the specified message');
+          log.warn('No file changes found for the specified message');
           return {
             success: false,
             error: 'No file changes were made in this message to restore from',
@@ -573,45 +694,46 @@ class IPCHandlers {
           };
         }
 
-        const restoredFiles = await this.checkpointManager.unrevertFromCheckpoint(sessionId, messageId);
+        const report = {};
+        const restoredFiles = await this.checkpointManager.unrevertFromCheckpoint(sessionId, messageId, { report });
 
         // Remove invalidated flags from messages after the revert point
+        // Only when the files were actually changed; a failed unrevert is fully rolled back
         try {
-          const session = this.sessionManager.getSession(sessionId);
+          const session = Array.isArray(restoredFiles) ? await this.sessionManager.loadSessionMessages(sessionId) : null;
           if (session && Array.isArray(session.messages)) {
-            const messageIndex = session.messages.findIndex(m => m.id === messageId);
-            if (messageIndex >= 0) {
-              for (let i = messageIndex + 1; i < session.messages.length; i++) {
-                delete session.messages[i].invalidated;
-              }
+            const found = await this.sessionManager.setMessagesInvalidatedAfter(sessionId, messageId, false);
+            if (found) {
               // Clear the current revert state
               delete session.currentRevertMessageId;
               await this.sessionManager.saveSession(sessionId);
-              console.log('Session state updated to clear revert information');
+              log.debug('Session state updated to clear revert information');
             } else {
-              console.warn(`Message ${messageId} not found in session messages for UI update`);
+              log.warn(`Message ${messageId} not found in session messages for UI update`);
             }
-          } else {
-            console.warn('Session not found or has no messages for UI update');
+          } else if (Array.isArray(restoredFiles)) {
+            log.warn('Session not found or has no messages for UI update');
           }
         } catch (sessionUpdateError) {
-          console.error('Failed to update session state after unrevert:', sessionUpdateError);
+          log.error('Failed to update session state after unrevert:', sessionUpdateError);
           // Don't fail the entire operation for this
         }
 
         // Handle both simple array response and enhanced error response
         if (Array.isArray(restoredFiles)) {
-          console.log(`Successfully restored ${restoredFiles.length} files`);
-          console.log('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
+          log.info(`Successfully restored ${restoredFiles.length} files`);
+          log.debug('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
           return {
             success: true,
             restoredFiles,
             message: `Successfully restored ${restoredFiles.length} files`,
+            timings: report.timings || [],
+            totalMs: report.totalMs,
             sessionValidation
           };
         } else if (restoredFiles && restoredFiles.partialSuccess) {
-          console.log(`Partial success: restored ${restoredFiles.restoredFiles.length} files, ${restoredFiles.failedFiles.length} failed`);
-          console.log('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
+          log.info(`Partial success: restored ${restoredFiles.restoredFiles.length} files, ${restoredFiles.failedFiles.length} failed`);
+          log.debug('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
           return {
             success: true,
             restoredFiles: restoredFiles.restoredFiles,
@@ -620,8 +742,8 @@ class IPCHandlers {
             sessionValidation
           };
         } else if (restoredFiles && restoredFiles.failedFiles) {
-          console.error('All files failed to restore:', restoredFiles.failedFiles);
-          console.log('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
+          log.error('All files failed to restore:', restoredFiles.failedFiles);
+          log.debug('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
           return {
             success: false,
             error: `Failed to restore files: ${restoredFiles.failedFiles.map(f => f.error).join(', ')}`,
@@ -629,8 +751,8 @@ class IPCHandlers {
             sessionValidation
           };
         } else {
-          console.error('Unexpected unrevert result format:', restoredFiles);
-          console.log('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
+          log.error('Unexpected unrevert result format:', restoredFiles);
+          log.debug('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
           return {
             success: false,
             error: 'Unexpected error during unrevert operation',
@@ -638,10 +760,10 @@ class IPCHandlers {
           };
         }
       } catch (error) {
-        console.error('=== UNREVERT FROM MESSAGE IPC HANDLER ERROR ===');
-        console.error('Failed to unrevert from message:', error);
-        console.error('Stack trace:', error.stack);
-        console.log('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
+        log.error('=== UNREVERT FROM MESSAGE IPC HANDLER ERROR ===');
+        log.error('Failed to unrevert from message:', error);
+        log.error('Stack trace:', error.stack);
+        log.debug('=== UNREVERT FROM MESSAGE IPC HANDLER END ===');
         return {
           success: false,
           error: error.message,
@@ -655,80 +777,80 @@ class IPCHandlers {
       try {
         return await this.checkpointManager.getMessageCheckpoints(sessionId, messageId);
       } catch (error) {
-        console.error('Failed to get checkpoints:', error);
+        log.error('Failed to get checkpoints:', error);
         return [];
       }
     });
 
         ipcMain.handle('has-file-changes', async (event, sessionId, messageId) => {
-      console.log('=== HAS FILE CHANGES IPC HANDLER START ===');
-      console.log('Parameters:', { sessionId, messageId });
+      log.debug('=== HAS FILE CHANGES IPC HANDLER START ===');
+      log.debug('Parameters:', { sessionId, messageId });
 
       try {
         // Enhanced parameter validation
         if (!sessionId || !messageId) {
-          console.error('Invalid parameters for has-file-changes check');
-          console.log('=== HAS FILE CHANGES IPC HANDLER END ===');
+          log.error('Invalid parameters for has-file-changes check');
+          log.debug('=== HAS FILE CHANGES IPC HANDLER END ===');
           return false;
         }
 
         // Enhanced session validation with detailed reporting
         const sessionValidation = this.checkpointManager.validateSessionId(sessionId);
-        console.log('Session validation result:', sessionValidation);
+        log.debug('Session validation result:', sessionValidation);
 
         if (!sessionValidation.valid) {
-          console.log(`No checkpoints found for session ${sessionId}: ${sessionValidation.reason}`);
-          console.log('This may be expected for new sessions or sessions without file modifications');
+          log.debug(`No checkpoints found for session ${sessionId}: ${sessionValidation.reason}`);
+          log.debug('This may be expected for new sessions or sessions without file modifications');
 
           // Get session statistics for debugging
           const sessionStats = this.checkpointManager.getSessionStatistics(sessionId);
           if (sessionStats) {
-            console.log('Session statistics:', sessionStats);
+            log.debug('Session statistics:', sessionStats);
           }
 
-          console.log('=== HAS FILE CHANGES IPC HANDLER END ===');
+          log.debug('=== HAS FILE CHANGES IPC HANDLER END ===');
           return false;
         }
 
-        console.log(`Session has ${sessionValidation.count} total checkpoints`);
+        log.debug(`Session has ${sessionValidation.count} total checkpoints`);
 
         const hasChanges = await this.checkpointManager.hasFileChanges(sessionId, messageId);
-        console.log(`Final result: message ${messageId} has file changes: ${hasChanges}`);
-        console.log('=== HAS FILE CHANGES IPC HANDLER END ===');
+        log.debug(`Final result: message ${messageId} has file changes: ${hasChanges}`);
+        log.debug('=== HAS FILE CHANGES IPC HANDLER END ===');
 
         return hasChanges;
       } catch (error) {
-        console.error('=== HAS FILE CHANGES IPC HANDLER ERROR ===');
-        console.error('Failed to check file changes:', error);
-        console.error('Stack trace:', error.stack);
+        log.error('=== HAS FILE CHANGES IPC HANDLER ERROR ===');
+        log.error('Failed to check file changes:', error);
+        log.error('Stack trace:', error.stack);
 
         // Provide detailed error context for debugging
-        console.error('Error context:', {
+        log.error('Error context:', {
           sessionId,
           messageId,
           errorType: error.name,
           errorMessage: error.message
         });
 
-        console.log('=== HAS FILE CHANGES IPC HANDLER END ===');
+        log.debug('=== HAS FILE CHANGES IPC HANDLER END ===');
         return false;
       }
     });
 
         ipcMain.handle('get-all-checkpoints-for-session', async (event, sessionId) => {
       try {
-        console.log(`Getting all checkpoints for session: ${sessionId}`);
+        log.debug(`Getting all checkpoints for session: ${sessionId}`);
 
         if (!sessionId) {
-          console.warn('get-all-checkpoints-for-session called with missing sessionId');
+          log.warn('get-all-checkpoints-for-session called with missing sessionId');
           return [];
         }
 
         const checkpoints = await this.checkpointManager.getAllCheckpointsForSession(sessionId);
-        console.log(`Found ${checkpoints.length} checkpoints for session ${sessionId}`);
+        log.debug(`Found ${checkpoints.length} checkpoints for session ${sessionId}`);
         return checkpoints;
       } catch (error) {
-        console.error('IPC get-all-checkpoints-for-session error:', error);
+        log.error('IPC get-all-checkpoints-for-session error:', error);
         return [];
       }
     });
@@ -736,37 +858,55 @@ class IPCHandlers {
     // Add session statistics handler for debugging
     ipcMain.handle('get-session-statistics', async (event, sessionId) => {
       try {
-        console.log(`Getting session statistics for: ${sessionId}`);
+        log.debug(`Getting session statistics for: ${sessionId}`);
 
         if (!sessionId) {
-          console.warn('get-session-statistics called with missing sessionId');
+          log.warn('get-session-statistics called with missing sessionId');
           return null;
         }
 
         const stats = this.checkpointManager.getSessionStatistics(sessionId);
-        console.log(`Session statistics for ${sessionId}:`, stats);
+        log.debug(`Session statistics for ${sessionId}:`, stats);
         return stats;
       } catch (error) {
-        console.error('IPC get-session-statistics error:', error);
+        log.error('IPC get-session-statistics error:', error);
         return null;
       }
     });
 
+    // Apply the checkpoint retention policy now and report reclaimed space
+    ipcMain.handle('run-checkpoint-retention', async () => {
+      try {
+        const report = await this.checkpointManager.runRetention();
+        if (!report) {
+          return { success: false, error: 'Checkpoint retention is unavailable or already running' };
+        }
+        return { success: true, report };
+      } catch (error) {
+        log.error('IPC run-checkpoint-retention error:', error);
+        return { success: false, error: error.message };
+      }
+    });
+
+    ipcMain.handle('get-checkpoint-retention-report', async () => {
+      return this.checkpointManager.getLastRetentionReport();
+    });
+
     // Add enhanced session validation handler
     ipcMain.handle('validate-checkpoint-session', async (event, sessionId) => {
       try {
-        console.log(`Validating checkpoint session: ${sessionId}`);
+        log.debug(`Validating checkpoint session: ${sessionId}`);
 
         if (!sessionId) {
-          console.warn('validate-checkpoint-session called with missing sessionId');
+          log.warn('validate-checkpoint-session called with missing sessionId');
           return { valid: false, reason: 'No session ID provided' };
         }
 
         const validation = this.checkpointManager.validateSessionId(sessionId);
-        console.log(`Session validation result for ${sessionId}:`, validation);
+        log.debug(`Session validation result for ${sessionId}:`, validation);
         return validation;
       } catch (error) {
-        console.error('IPC validate-checkpoint-session error:', error);
+        log.error('IPC validate-checkpoint-session error:', error);
         return { valid: false, reason: `Validation error: ${error.message}` };
       }
     });
@@ -963,16 +1103,16 @@ class IPCHandlers {
     // Handle opening Excel files from tray menu
     ipcMain.handle('handle-tray-open-excel-file', async (event, filePath) => {
       try {
-        console.log('Handling tray open Excel file:', filePath);
+        log.debug('Handling tray open Excel file:', filePath);
 
         const navResult = await this.fileOperations.setWorkingDirectoryFromFile(filePath);
 
         if (!navResult.success) {
-          console.warn('Failed to navigate to Excel file directory:', navResult.error);
+          log.warn('Failed to navigate to Excel file directory:', navResult.error);
           return { success: false, error: navResult.error };
         }
 
-        console.log('Navigated to directory:', navResult.path);
+        log.debug('Navigated to directory:', navResult.path);
 
         // Return path info to renderer to update UI
         return {
@@ -982,7 +1122,7 @@ class IPCHandlers {
           relativePath: path.relative(navResult.path, filePath)
         };
       } catch (error) {
-        console.error('Error handling tray open Excel file:', error);
+        log.error('Error handling tray open Excel file:', error);
         return { success: false, error: error.message };
       }
     });
@@ -990,7 +1130,7 @@ class IPCHandlers {
     // Handle opening Excel files and loading into Claude Code Chat
     ipcMain.handle('open-excel-in-chat', async (event, filePath) => {
       try {
-        console.log('Opening Excel file in Claude Code Chat:', filePath);
+        log.debug('Opening Excel file in Claude Code Chat:', filePath);
 
         // First, open the file in Excel
         await shell.openPath(filePath);
@@ -1003,7 +1143,7 @@ class IPCHandlers {
           message: `Excel file opened: ${filePath}`
         };
       } catch (error) {
-        console.error('Error opening Excel file in chat:', error);
+        log.error('Error opening Excel file in chat:', error);
         return {
           success: false,
           error: error.message
@@ -1026,7 +1166,7 @@ class IPCHandlers {
         }
         return result;
       } catch (error) {
-        console.error('Error getting Excel files:', error);
+        log.error('Error getting Excel files:', error);
         return {
           success: false,
           error: error.message,
@@ -1042,16 +1182,16 @@ class IPCHandlers {
     // Handle opening Photoshop files from tray menu
     ipcMain.handle('handle-tray-open-photoshop-file', async (event, filePath) => {
       try {
-        console.log('Handling tray open Photoshop file:', filePath);
+        log.debug('Handling tray open Photoshop file:', filePath);
 
         const navResult = await this.fileOperations.setWorkingDirectoryFromFile(filePath);
 
         if (!navResult.success) {
-          console.warn('Failed to navigate to Photoshop file directory:', navResult.error);
+          log.warn('Failed to navigate to Photoshop file directory:', navResult.error);
           return { success: false, error: navResult.error };
         }
 
-        console.log('Navigated to directory:', navResult.path);
+        log.debug('Navigated to directory:', navResult.path);
 
         // Return path info to renderer to update UI
         return {
@@ -1061,7 +1201,7 @@ class IPCHandlers {
           relativePath: path.relative(navResult.path, filePath)
         };
       } catch (error) {
-        console.error('Error handling tray open Photoshop file:', error);
+        log.error('Error handling tray open Photoshop file:', error);
         return { success: false, error: error.message };
       }
     });
@@ -1069,7 +1209,7 @@ class IPCHandlers {
     // Handle opening Photoshop files and loading into Claude Code Chat
     ipcMain.handle('open-photoshop-in-chat', async (event, filePath) => {
       try {
-        console.log('Opening Photoshop file in Claude Code Chat:', filePath);
+        log.debug('Opening Photoshop file in Claude Code Chat:', filePath);
 
         // First, open the file in Photoshop
         await shell.openPath(filePath);
@@ -1082,7 +1222,7 @@ class IPCHandlers {
           message: `Photoshop file opened: ${filePath}`
         };
       } catch (error) {
-        console.error('Error opening Photoshop file in chat:', error);
+        log.error('Error opening Photoshop file in chat:', error);
         return {
           success: false,
           error: error.message
@@ -1105,7 +1245,7 @@ class IPCHandlers {
         }
         return result;
       } catch (error) {
-        console.error('Error getting Photoshop files:', error);
+        log.error('Error getting Photoshop files:', error);
         return {
           success: false,
           error: error.message,
@@ -1128,11 +1268,18 @@ class IPCHandlers {
 
   registerClaudeCliHistoryHandlers() {
     // Get all Claude CLI sessions
-    ipcMain.handle('get-claude-cli-sessions', async () => {
+    ipcMain.handle('get-claude-cli-sessions', async (event) => {
       try {
-        return await this.claudeCliHistory.getAllSessions();
+        return await this.claudeCliHistory.getAllSessions({
+          // Send each project's sessions as soon as it is scanned
+          onProgress: (sessions) => {
+            if (!event.sender.isDestroyed()) {
+              event.sender.send('claude-cli-sessions-progress', sessions);
+            }
+          }
+        });
       } catch (error) {
-        console.error('Error getting Claude CLI sessions:', error);
+        log.error('Error getting Claude CLI sessions:', error);
         return [];
       }
     });
@@ -1142,18 +1289,18 @@ class IPCHandlers {
       try {
         return await this.claudeCliHistory.getSessionDetails(sessionId);
       } catch (error) {
-        console.error('Error getting Claude CLI session details:', error);
+        log.error('Error getting Claude CLI session details:', error);
         throw error;
       }
     });
 
     // Search Claude CLI sessions
-    ipcMain.handle('search-claude-cli-sessions', async (event, query) => {
+    ipcMain.handle('search-claude-cli-sessions', async (event, query, options = {}) => {
       try {
-        return await this.claudeCliHistory.searchSessions(query);
+        return await this.claudeCliHistory.searchSessions(query, options);
       } catch (error) {
-        console.error('Error searching Claude CLI sessions:', error);
-        return [];
+        log.error('Error searching Claude CLI sessions:', error);
+        return { sessions: [], hasMore: false, indexing: false };
       }
     });
 
@@ -1163,7 +1310,7 @@ class IPCHandlers {
         this.claudeCliHistory.clearCache();
         return { success: true };
       } catch (error) {
-        console.error('Error clearing Claude CLI sessions cache:', error);
+        log.error('Error clearing Claude CLI sessions cache:', error);
         return { success: false, error: error.message };
       }
     });
@@ -1174,7 +1321,7 @@ class IPCHandlers {
         const result = await this.openTerminalAndResumeSession(sessionId, projectPath);
         return result;
       } catch (error) {
-        console.error('Error resuming Claude CLI session:', error);
+        log.error('Error resuming Claude CLI session:', error);
         return { success: false, error: error.message };
       }
     });
@@ -1185,7 +1332,7 @@ class IPCHandlers {
         const result = await this.claudeCliHistory.extractFileChangesFromMessage(sessionId, messageId);
         return { success: true, ...result };
       } catch (error) {
-        console.error('Error extracting file changes:', error);
+        log.error('Error extracting file changes:', error);
         return { success: false, error: error.message };
       }
     });
@@ -1196,7 +1343,7 @@ class IPCHandlers {
         const result = await this.claudeCliHistory.extractConversationContext(sessionId, messageId);
         return { success: true, ...result };
       } catch (error) {
-        console.error('Error extracting conversation context:', error);
+        log.error('Error extracting conversation context:', error);
         return { success: false, error: error.message };
       }
     });
@@ -1213,7 +1360,7 @@ class IPCHandlers {
     const { shell } = require('electron');
 
     try {
-      console.log(`Opening terminal to resume Claude session ${sessionId} in ${projectPath}`);
+      log.info(`Opening terminal to resume Claude session ${sessionId} in ${projectPath}`);
 
       // Create the command to run in terminal
       const command = `claude --resume ${sessionId}`;
@@ -1242,7 +1389,7 @@ class IPCHandlers {
       return { success: true };
       
     } catch (error) {
-      console.error('Error opening terminal:', error);
+      log.error('Error opening terminal:', error);
       return { success: false, error: error.message };
     }
   }
@@ -0,0 +1,142 @@
+const fs = require('fs').promises;
+const fsSync = require('fs');
+const path = require('path');
+
+// Appends log lines to <dir>/<fileName> without blocking the caller. Lines are
+// queued and written in batches by a single in-flight append; when the file
+// grows past maxBytes it is rotated (main.log -> main.1.log -> ... ->
+// main.<maxFiles - 1>.log, the oldest is dropped). If the queue grows past
+// maxQueuedBytes (disk stalled) new lines are dropped and counted.
+class LogFileSink {
+  constructor(options = {}) {
+    this.dir = options.dir;
+    this.fileName = options.fileName || 'main.log';
+    this.filePath = path.join(this.dir, this.fileName);
+    this.maxBytes = options.maxBytes ?? 5 * 1024 * 1024;
+    this.maxFiles = options.maxFiles ?? 5;
+    this.flushDelayMs = options.flushDelayMs ?? 200;
+    this.maxQueuedBytes = options.maxQueuedBytes ?? 4 * 1024 * 1024;
+
+    this.queue = [];
+    this.queuedBytes = 0;
+    this.droppedLines = 0;
+    this.currentSize = null;    // read from disk on first flush
+    this.flushTimer = null;
+    this.flushing = null;       // promise of the in-flight flush
+    this.closed = false;
+  }
+
+  write(line) {
+    if (this.closed) {
+      return;
+    }
+
+    if (this.queuedBytes + line.length > this.maxQueuedBytes) {
+      this.droppedLines++;
+      return;
+    }
+
+    this.queue.push(line);
+    this.queuedBytes += line.length;
+
+    if (!this.flushTimer && !this.flushing) {
+      this.flushTimer = setTimeout(() => this.flush(), this.flushDelayMs);
+      if (this.flushTimer.unref) this.flushTimer.unref();
+    }
+  }
+
+  // Write everything queued so far. Only one flush runs at a time; lines queued
+  // meanwhile are picked up by a follow-up flush.
+  async flush() {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    if (this.flushing) {
+      return this.flushing;
+    }
+    if (this.queue.length === 0) {
+      return;
+    }
+
+    this.flushing = (async () => {
+      try {
+        if (this.currentSize === null) {
+          await fs.mkdir(this.dir, { recursive: true });
+          this.currentSize = await fs.stat(this.filePath).then(stat => stat.size, () => 0);
+        }
+
+        const lines = this.takeQueue();
+        const data = lines.join('');
+        if (this.currentSize > 0 && this.currentSize + Buffer.byteLength(data) > this.maxBytes) {
+          await this.rotate();
+        }
+        await fs.appendFile(this.filePath, data);
+        this.currentSize += Buffer.byteLength(data);
+      } catch (error) {
+        // Logging must never take the app down; report once on stderr
+        process.stderr.write(`Log file write failed: ${error.message}\n`);
+      } finally {
+        this.flushing = null;
+      }
+
+      if (this.queue.length > 0 && !this.closed) {
+        this.flushTimer = setTimeout(() => this.flush(), this.flushDelayMs);
+        if (this.flushTimer.unref) this.flushTimer.unref();
+      }
+    })();
+
+    return this.flushing;
+  }
+
+  takeQueue() {
+    const lines = this.queue;
+    this.queue = [];
+    this.queuedBytes = 0;
+    if (this.droppedLines > 0) {
+      lines.push(`${JSON.stringify({
+        ts: new Date().toISOString(),
+        level: 'warn',
+        scope: 'logger',
+        msg: `dropped ${this.droppedLines} log lines while the log file was busy`
+      })}\n`);
+      this.droppedLines = 0;
+    }
+    return lines;
+  }
+
+  async rotate() {
+    const extension = path.extname(this.fileName);
+    const baseName = path.basename(this.fileName, extension);
+    const rotatedPath = (index) => path.join(this.dir, `${baseName}.${index}${extension}`);
+
+    await fs.unlink(rotatedPath(this.maxFiles - 1)).catch(() => {});
+    for (let index = this.maxFiles - 2; index >= 1; index--) {
+      await fs.rename(rotatedPath(index), rotatedPath(index + 1)).catch(() => {});
+    }
+    await fs.rename(this.filePath, rotatedPath(1)).catch(() => {});
+    this.currentSize = 0;
+  }
+
+  // Synchronously write whatever is still queued (used when the app quits)
+  close() {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    this.closed = true;
+
+    if (this.queue.length === 0) {
+      return;
+    }
+
+    try {
+      fsSync.mkdirSync(this.dir, { recursive: true });
+      fsSync.appendFileSync(this.filePath, this.takeQueue().join(''));
+    } catch (error) {
+      process.stderr.write(`Log file write failed: ${error.message}\n`);
+    }
+  }
+}
+
+module.exports = LogFileSink;
@@ -0,0 +1,152 @@
+const util = require('util');
+
+// Level-gated logging for the main process.
+//
+//   const log = Logger.scope('checkpoints');
+//   log.info('Checkpoint system initialized');
+//   log.debug('Parameters:', { sessionId, messageId });
+//   log.trace(() => ['Parsed JSON:', JSON.stringify(parsed, null, 2)]);
+//   if (log.sample('stream-line', 100)) log.debug('Processing line', line.length);
+//
+// Arguments are only formatted when the level is enabled. Pass a function to
+// defer building expensive arguments too: it is called only if the message
+// will be written and may return a single value or an array of arguments.
+// Records go to the console and, once configured, to a rotating log file as
+// JSON lines ({ ts, level, scope, msg }).
+const LEVELS = {
+  error: 0,
+  warn: 1,
+  info: 2,
+  debug: 3,
+  trace: 4
+};
+
+const CONSOLE_METHODS = {
+  error: 'error',
+  warn: 'warn',
+  info: 'log',
+  debug: 'log',
+  trace: 'log'
+};
+
+const state = {
+  level: LEVELS.info,
+  console: true,
+  fileSink: null,
+  sampleCounters: new Map(),
+  scopes: new Map()
+};
+
+class Logger {
+  constructor(scopeName) {
+    this.scopeName = scopeName;
+  }
+
+  // Shared logger for a component; scopes are cached by name
+  static scope(scopeName) {
+    if (!state.scopes.has(scopeName)) {
+      state.scopes.set(scopeName, new Logger(scopeName));
+    }
+    return state.scopes.get(scopeName);
+  }
+
+  // options: { level, console, fileSink }
+  static configure(options = {}) {
+    if (options.level !== undefined) {
+      const level = Logger.parseLevel(options.level);
+      if (level !== null) {
+        state.level = level;
+      }
+    }
+    if (typeof options.console === 'boolean') {
+      state.console = options.console;
+    }
+    if (options.fileSink !== undefined) {
+      state.fileSink = options.fileSink;
+    }
+  }
+
+  static parseLevel(level) {
+    if (typeof level === 'number' && level >= LEVELS.error && level <= LEVELS.trace) {
+      return level;
+    }
+    if (typeof level === 'string' && Object.prototype.hasOwnProperty.call(LEVELS, level.toLowerCase())) {
+      return LEVELS[level.toLowerCase()];
+    }
+    return null;
+  }
+
+  // One JSON object per line
+  static formatRecord(level, scopeName, message) {
+    return `${JSON.stringify({ ts: new Date().toISOString(), level, scope: scopeName, msg: message })}\n`;
+  }
+
+  static getLevel() {
+    return Object.keys(LEVELS).find(name => LEVELS[name] === state.level);
+  }
+
+  // Flush and detach the file sink (app quit)
+  static close() {
+    if (state.fileSink) {
+      state.fileSink.close();
+      state.fileSink = null;
+    }
+  }
+
+  isEnabled(level) {
+    return LEVELS[level] <= state.level;
+  }
+
+  // True for the first call for `key` and then every `every`th call, so per-line
+  // events can be logged at a fraction of their rate
+  sample(key, every) {
+    const counterKey = `${this.scopeName}:${key}`;
+    const count = state.sampleCounters.get(counterKey) || 0;
+    state.sampleCounters.set(counterKey, count + 1);
+    return count % every === 0;
+  }
+
+  error(...args) {
+    this.write('error', args);
+  }
+
+  warn(...args) {
+    this.write('warn', args);
+  }
+
+  info(...args) {
+    this.write('info', args);
+  }
+
+  debug(...args) {
+    this.write('debug', args);
+  }
+
+  trace(...args) {
+    this.write('trace', args);
+  }
+
+  write(level, args) {
+    if (LEVELS[level] > state.level) {
+      return;
+    }
+
+    if (args.length === 1 && typeof args[0] === 'function') {
+      const built = args[0]();
+      args = Array.isArray(built) ? built : [built];
+    }
+
+    if (state.console) {
+      console[CONSOLE_METHODS[level]](`[${this.scopeName}]`, ...args);
+    }
+
+    if (state.fileSink) {
+      const message = util.formatWithOptions({ depth: 4, breakLength: Infinity }, ...args);
+      state.fileSink.write(Logger.formatRecord(level, this.scopeName, message));
+    }
+  }
+}
+
+Logger.LEVELS = LEVELS;
+
+module.exports = Logger;
@@ -42,10 +42,17 @@ const FileOperations = require('./file-operations');
 const ModelConfig = require('./model-config');
 const ClaudeProcessManager = require('./claude-process-manager');
 const IPCHandlers = require('./ipc-handlers');
+const Logger = require('./logger');
+const LogFileSink = require('./log-file-sink');
+
+const log = Logger.scope('app');
 
 // Enable live reload for development
 const isDev = process.argv.includes('--dev');
 
+// Payload-heavy debug/trace logging is off unless asked for
+Logger.configure({ level: process.env.CLOUD_CODE_LOG_LEVEL || (isDev ? 'debug' : 'info') });
+
 // Global references
 let mainWindow;
 let tray;
@@ -69,15 +76,15 @@ function createTray() {
   try {
     trayIcon = nativeImage.createFromPath(iconPath);
     if (!trayIcon.isEmpty()) {
-      console.log('Using custom tray icon from:', iconPath);
+      log.debug('Using custom tray icon from:', iconPath);
     } else {
       throw new Error('Custom icon is empty');
     }
   } catch (error) {
-    console.log('Custom tray icon not found, creating fallback icon');
+    log.debug('Custom tray icon not found, creating fallback icon');
 
         // Create a programmatic icon - most reliable approach for macOS
-    console.log('Creating programmatic tray icon');
+    log.debug('Creating programmatic tray icon');
     const size = 16;
     const buffer = Buffer.alloc(size * size * 4); // RGBA
 
@@ -118,12 +125,12 @@ function createTray() {
     }
 
     trayIcon = nativeImage.createFromBuffer(buffer, { width: size, height: size });
-    console.log('Created programmatic "C" tray icon');
+    log.debug('Created programmatic "C" tray icon');
   }
 
   // Ensure we have a valid icon
   if (trayIcon.isEmpty()) {
-    console.error('Failed to create any valid tray icon, tray may not be visible');
+    log.error('Failed to create any valid tray icon, tray may not be visible');
     // Try one more time with a very simple approach
     trayIcon = nativeImage.createEmpty();
     const size = { width: 16, height: 16 };
@@ -133,16 +140,16 @@ function createTray() {
   // For macOS, template images work best - they automatically adapt to light/dark theme
   if (process.platform === 'darwin') {
     trayIcon.setTemplateImage(true);
-    console.log('Set tray icon as template image for macOS theme adaptation');
+    log.debug('Set tray icon as template image for macOS theme adaptation');
   }
 
   try {
     tray = new Tray(trayIcon);
-    console.log('Tray object created successfully');
+    log.debug('Tray object created successfully');
 
     // Verify tray is not destroyed
     if (tray.isDestroyed()) {
-      console.error('Tray was destroyed immediately after creation');
+      log.error('Tray was destroyed immediately after creation');
       return;
     }
 
@@ -172,7 +179,7 @@ function createTray() {
                     mainWindow.webContents.send('tray-select-session', session.id);
                   }
                 } catch (e) {
-                  console.error('Failed to handle task menu click:', e);
+                  log.error('Failed to handle task menu click:', e);
                 }
               }
             };
@@ -200,7 +207,7 @@ function createTray() {
                     mainWindow.webContents.send('tray-open-workspace', workspacePath);
                   }
                 } catch (e) {
-                  console.error('Failed to handle workspace menu click:', e);
+                  log.error('Failed to handle workspace menu click:', e);
                 }
               }
             };
@@ -247,7 +254,7 @@ function createTray() {
                     mainWindow.webContents.send('tray-open-excel-file', file.path);
                   }
                 } catch (e) {
-                  console.error('Failed to handle Excel file menu click:', e);
+                  log.error('Failed to handle Excel file menu click:', e);
                 }
               }
             };
@@ -285,7 +292,7 @@ function createTray() {
                     mainWindow.webContents.send('tray-open-photoshop-file', file.path);
                   }
                 } catch (e) {
-                  console.error('Failed to handle Photoshop file menu click:', e);
+                  log.error('Failed to handle Photoshop file menu click:', e);
                 }
               }
             };
@@ -364,7 +371,7 @@ function createTray() {
         const menu = Menu.buildFromTemplate(baseTemplate);
         tray.setContextMenu(menu);
       } catch (err) {
-        console.error('Failed to build tray context menu:', err);
+        log.error('Failed to build tray context menu:', err);
       }
     };
 
@@ -383,14 +390,14 @@ function createTray() {
     tray.setToolTip('Cloud Code - Click to show/hide window');
 
     // Add some debugging info
-    console.log('Tray properties:');
-    console.log('  - Title:', tray.getTitle ? tray.getTitle() : 'N/A');
-    console.log('  - ToolTip:', 'Cloud Code - Click to show/hide window');
-    console.log('  - Destroyed:', tray.isDestroyed());
+    log.debug('Tray properties:');
+    log.debug('  - Title:', tray.getTitle ? tray.getTitle() : 'N/A');
+    log.debug('  - ToolTip:', 'Cloud Code - Click to show/hide window');
+    log.debug('  - Destroyed:', tray.isDestroyed());
 
     // Handle tray click (double-click on macOS)
     tray.on('click', () => {
-      console.log('Tray clicked');
+      log.debug('Tray clicked');
       // Trigger window detection refresh
       if (mainWindow && mainWindow.webContents) {
         mainWindow.webContents.send('tray-interaction');
@@ -405,7 +412,7 @@ function createTray() {
     });
 
     tray.on('double-click', () => {
-      console.log('Tray double-clicked');
+      log.debug('Tray double-clicked');
       // Trigger window detection refresh
       if (mainWindow && mainWindow.webContents) {
         mainWindow.webContents.send('tray-interaction');
@@ -414,25 +421,25 @@ function createTray() {
     });
 
     tray.on('right-click', () => {
-      console.log('Tray right-clicked');
+      log.debug('Tray right-clicked');
       // Trigger window detection refresh for context menu
       if (mainWindow && mainWindow.webContents) {
         mainWindow.webContents.send('tray-interaction');
       }
     });
 
-    console.log('✅ System tray created successfully and should be visible in menu bar');
+    log.info('✅ System tray created successfully and should be visible in menu bar');
 
     // On macOS, provide additional guidance
     if (process.platform === 'darwin') {
-      console.log('📍 macOS: Look for the tray icon in the top-right menu bar');
-      console.log('📍 If not visible, try clicking the chevron (>>) icon to show hidden items');
-      console.log('📍 You can also drag it out to make it always visible');
+      log.debug('📍 macOS: Look for the tray icon in the top-right menu bar');
+      log.debug('📍 If not visible, try clicking the chevron (>>) icon to show hidden items');
+      log.debug('📍 You can also drag it out to make it always visible');
     }
 
   } catch (error) {
-    console.error('Failed to create system tray:', error);
-    console.error('The app will continue without tray functionality');
+    log.error('Failed to create system tray:', error);
+    log.error('The app will continue without tray functionality');
   }
 }
 
@@ -516,20 +523,20 @@ async function registerGlobalShortcut() {
     globalShortcut.unregisterAll();
 
     const isRegistered = globalShortcut.register(shortcut, () => {
-      console.log('Global shortcut triggered:', shortcut);
+      log.debug('Global shortcut triggered:', shortcut);
       toggleWindow();
     });
 
     if (isRegistered) {
-      console.log(`✅ Global shortcut ${shortcut} registered successfully`);
+      log.info(`✅ Global shortcut ${shortcut} registered successfully`);
     } else {
-      console.error(`❌ Failed to register global shortcut ${shortcut}`);
-      console.log('The shortcut may already be in use by another application');
+      log.error(`❌ Failed to register global shortcut ${shortcut}`);
+      log.debug('The shortcut may already be in use by another application');
     }
 
     return { success: isRegistered, shortcut };
   } catch (error) {
-    console.error('Error registering global shortcut:', error);
+    log.error('Error registering global shortcut:', error);
     return { success: false, error: error.message };
   }
 }
@@ -591,16 +598,16 @@ async function createWindow() {
   // Load the app
   try {
     await mainWindow.loadFile(path.join(__dirname, '../../renderer/index.html'));
-    console.log('HTML file loaded successfully');
+    log.debug('HTML file loaded successfully');
   } catch (error) {
-    console.error('Failed to load HTML file:', error);
+    log.error('Failed to load HTML file:', error);
     mainWindow.show(); // Show anyway for debugging
     return;
   }
 
   // Show window when ready
   mainWindow.once('ready-to-show', () => {
-    console.log('Window ready to show');
+    log.debug('Window ready to show');
     mainWindow.show();
 
     if (isDev) {
@@ -610,14 +617,14 @@ async function createWindow() {
 
   // Add error handling for renderer process
   mainWindow.webContents.on('did-fail-load', (event, errorCode, errorDescription) => {
-    console.error('Failed to load page:', errorCode, errorDescription);
+    log.error('Failed to load page:', errorCode, errorDescription);
     mainWindow.show(); // Show anyway for debugging
   });
 
   // Debug: Show window after a timeout if ready-to-show doesn't fire
   setTimeout(() => {
     if (mainWindow && !mainWindow.isVisible()) {
-      console.log('Window not visible after timeout, forcing show');
+      log.debug('Window not visible after timeout, forcing show');
       mainWindow.show();
       if (isDev) {
         mainWindow.webContents.openDevTools();
@@ -660,6 +667,9 @@ async function createWindow() {
 
 async function initializeApp() {
   try {
+    // Mirror logs into a rotating file under the app's logs directory
+    Logger.configure({ fileSink: new LogFileSink({ dir: app.getPath('logs') }) });
+
     // Initialize all managers
     sessionManager = new SessionManager();
     checkpointManager = new CheckpointManager(app); // Pass app object for pathing
@@ -687,22 +697,31 @@ async function initializeApp() {
 
     // Initialize everything
     await modelConfig.loadModelConfig();
+    sessionManager.configure(modelConfig.getSessionStorageSettings());
+    claudeProcessManager.configureRunScheduler(modelConfig.getRunSchedulerSettings());
+    claudeProcessManager.configureProcessPool(modelConfig.getProcessPoolSettings());
+    claudeProcessManager.configureWatchdog(modelConfig.getWatchdogSettings());
     await sessionManager.loadSessions();
     await sessionManager.recoverInterruptedSessions();
 
     // Try to initialize checkpoint system, but don't fail if it doesn't work
+    checkpointManager.configureRetention(modelConfig.getCheckpointRetentionSettings());
+    checkpointManager.getLiveSessionIds = () => Array.from(sessionManager.sessions.keys());
     try {
       await checkpointManager.initialize();
     } catch (error) {
-      console.warn('Checkpoint system failed to initialize, running without checkpointing:', error.message);
+      log.warn('Checkpoint system failed to initialize, running without checkpointing:', error.message);
     }
 
     // Register all IPC handlers
     ipcHandlers.registerHandlers();
 
-    console.log('App initialization completed successfully');
+    // Start a Claude process in the background so the first message skips the cold start
+    claudeProcessManager.prewarm();
+
+    log.info('App initialization completed successfully');
   } catch (error) {
-    console.error('Failed to initialize app:', error);
+    log.error('Failed to initialize app:', error);
     throw error;
   }
 }
@@ -734,7 +753,7 @@ app.whenReady().then(async () => {
     try {
       return await modelConfig.getGlobalShortcut();
     } catch (error) {
-      console.error('Failed to get global shortcut:', error);
+      log.error('Failed to get global shortcut:', error);
       return 'CommandOrControl+Shift+C'; // Default fallback
     }
   });
@@ -749,7 +768,7 @@ app.whenReady().then(async () => {
 
       return result;
     } catch (error) {
-      console.error('Failed to set global shortcut:', error);
+      log.error('Failed to set global shortcut:', error);
       return { success: false, error: error.message };
     }
   });
@@ -788,12 +807,12 @@ app.on('before-quit', async (event) => {
     event.preventDefault();
     isQuitting = true;
 
-    console.log('App closing, saving sessions and cleaning up...');
+    log.info('App closing, saving sessions and cleaning up...');
 
     try {
       // Unregister all global shortcuts
       globalShortcut.unregisterAll();
-      console.log('Global shortcuts unregistered');
+      log.debug('Global shortcuts unregistered');
 
       if (claudeProcessManager) {
         await claudeProcessManager.cleanup();
@@ -801,13 +820,20 @@ app.on('before-quit', async (event) => {
 
       if (sessionManager) {
         await sessionManager.saveSessions();
+        await sessionManager.flushRecoveryState();
       }
 
       if (checkpointManager) {
         checkpointManager.close();
       }
 
-      console.log('Cleanup completed');
+      if (ipcHandlers) {
+        // Stops CLI history parsing workers and closes its index
+        ipcHandlers.claudeCliHistory.close();
+      }
+
+      log.info('Cleanup completed');
+      Logger.close();
 
       // Destroy tray to clean up system resources
       if (tray && !tray.isDestroyed()) {
@@ -817,7 +843,7 @@ app.on('before-quit', async (event) => {
       // Now actually quit
       app.quit();
     } catch (error) {
-      console.error('Error during cleanup:', error);
+      log.error('Error during cleanup:', error);
       // Force quit even if cleanup fails
       app.quit();
     }
@@ -1,17 +1,30 @@
 const { app } = require('electron');
 const fs = require('fs');
 const path = require('path');
+const crypto = require('crypto');
 const { v4: uuidv4 } = require('uuid');
-const { spawnSync } = require('child_process');
+const { spawn } = require('child_process');
+const Logger = require('./logger');
+
+const log = Logger.scope('mcp');
 
 // Simple JSON-file backed store for remote MCP server configurations.
 // This will be loaded once per application session and mutated in-memory.
 // The file lives inside the userData directory so it is private to the user.
+// It holds { servers, pendingRemovals }: names of deleted or renamed servers
+// are kept until a sync has unregistered them from the CLI, across restarts.
+// (Older versions stored just the servers array; it is still read.)
 class McpServerManager {
   constructor() {
     // Derive the storage location lazily to avoid accessing app.getPath before Electron is ready.
     const userDataPath = app.isReady() ? app.getPath('userData') : path.join(process.cwd(), '.userDataFallback');
     this.filePath = path.join(userDataPath, 'mcp-servers.json');
+    // Hash of the server list last registered with the CLI successfully
+    this.syncStatePath = path.join(userDataPath, 'mcp-sync-state.json');
+    this.syncState = null;
+    this.syncChain = Promise.resolve();
+    // Names to unregister on the next sync (deleted or renamed servers); persisted
+    this.removedServerNames = new Set();
     this.servers = [];
     this._loadFromDisk();
   }
@@ -40,6 +53,9 @@ class McpServerManager {
     }
 
     if (existing) {
+      if (serverConfig.name && serverConfig.name !== existing.name) {
+        this.removedServerNames.add(existing.name);
+      }
       Object.assign(existing, serverConfig, { updated: now });
     } else {
       const newServer = {
@@ -65,6 +81,7 @@ class McpServerManager {
   deleteServer(serverId) {
     const idx = this.servers.findIndex(s => s.id === serverId);
     if (idx === -1) return false;
+    this.removedServerNames.add(this.servers[idx].name);
     this.servers.splice(idx, 1);
     this._saveToDisk();
     return true;
@@ -80,36 +97,145 @@ class McpServerManager {
     return server;
   }
 
-  /** Synchronize the claude CLI MCP registry with current enabled servers. */
-  syncCli() {
-    // Add or update all enabled servers
+  /**
+   * Hash of the registry state the CLI should be in: every enabled server's
+   * registration and every name that must be absent.
+   */
+  getConfigHash() {
+    const enabled = this.servers
+      .filter(s => s.enabled)
+      .map(s => ({
+        name: s.name,
+        transport: s.transport,
+        url: s.url,
+        headers: Object.entries(s.headers || {}).sort(([a], [b]) => a.localeCompare(b))
+      }))
+      .sort((a, b) => a.name.localeCompare(b.name));
+    const removed = this._getRemovedNames().sort();
+    return crypto.createHash('sha256').update(JSON.stringify({ enabled, removed })).digest('hex');
+  }
+
+  /**
+   * Synchronize the claude CLI MCP registry with current enabled servers.
+   * Skipped when nothing changed since the last successful sync (also across
+   * app runs) unless options.force is set. Runs one sync at a time, and the
+   * CLI calls within a sync one after another: each one rewrites the CLI's
+   * single config file, so concurrent calls would lose each other's changes.
+   * Resolves to { skipped, hash, added, removed, failed }.
+   */
+  syncCli(options = {}) {
+    const run = this.syncChain.catch(() => {}).then(() => this._syncCli(options));
+    this.syncChain = run;
+    return run;
+  }
+
+  async _syncCli(options) {
+    const hash = this.getConfigHash();
+    const state = await this._loadSyncState();
+    if (!options.force && state.hash === hash) {
+      log.debug('MCP servers unchanged since last sync, skipping registration');
+      return { skipped: true, hash, added: [], removed: [], failed: [] };
+    }
+
+    const startedAt = Date.now();
     const enabledServers = this.servers.filter(s => s.enabled);
+    const removedNames = this._getRemovedNames();
+    const failed = [];
+
+    for (const name of removedNames) {
+      // Best-effort: the name may not be registered at all
+      await this._runCli(['mcp', 'remove', name]);
+    }
     for (const server of enabledServers) {
-      const args = ['mcp', 'add', '--transport', server.transport, server.name, server.url];
-      if (server.headers) {
-        for (const [k, v] of Object.entries(server.headers)) {
-          args.push('--header', `${k}: ${v}`);
-        }
+      // `mcp add` refuses an existing name, so replace the registration
+      await this._runCli(['mcp', 'remove', server.name]);
+      if (await this._runCli(this._getAddArgs(server)) !== 0) {
+        failed.push(server.name);
+      }
+    }
+
+    if (failed.length === 0) {
+      if (removedNames.some(name => this.removedServerNames.delete(name))) {
+        this._saveToDisk();
       }
-      spawnSync('claude', args, { stdio: 'ignore' });
+      await this._saveSyncState({ hash, syncedAt: new Date().toISOString() });
+      log.info(`Registered ${enabledServers.length} MCP server(s), removed ${removedNames.length} in ${Date.now() - startedAt}ms`);
+    } else {
+      log.warn('Failed to register MCP servers, will retry on the next sync:', failed);
     }
 
-    // Remove disabled servers (best-effort)
-    const disabled = this.servers.filter(s => !s.enabled);
-    for (const server of disabled) {
-      spawnSync('claude', ['mcp', 'remove', server.name], { stdio: 'ignore' });
+    return {
+      skipped: false,
+      hash,
+      added: enabledServers.map(s => s.name).filter(name => !failed.includes(name)),
+      removed: removedNames,
+      failed
+    };
+  }
+
+  _getRemovedNames() {
+    const enabledNames = new Set(this.servers.filter(s => s.enabled).map(s => s.name));
+    const names = new Set([
+      ...this.servers.filter(s => !s.enabled).map(s => s.name),
+      ...this.removedServerNames
+    ]);
+    return Array.from(names).filter(name => !enabledNames.has(name));
+  }
+
+  _getAddArgs(server) {
+    const args = ['mcp', 'add', '--transport', server.transport, server.name, server.url];
+    if (server.headers) {
+      for (const [k, v] of Object.entries(server.headers)) {
+        args.push('--header', `${k}: ${v}`);
+      }
+    }
+    return args;
+  }
+
+  // Resolves to the exit code; never rejects
+  _runCli(args) {
+    return new Promise((resolve) => {
+      const proc = spawn('claude', args, { stdio: 'ignore' });
+      proc.on('close', (code) => resolve(code));
+      proc.on('error', (err) => {
+        log.debug('Failed to run claude', args[0], args[1], err.message);
+        resolve(-1);
+      });
+    });
+  }
+
+  async _loadSyncState() {
+    if (!this.syncState) {
+      try {
+        this.syncState = JSON.parse(await fs.promises.readFile(this.syncStatePath, 'utf8'));
+      } catch (err) {
+        this.syncState = {};
+      }
+    }
+    return this.syncState;
+  }
+
+  async _saveSyncState(state) {
+    this.syncState = state;
+    try {
+      await fs.promises.mkdir(path.dirname(this.syncStatePath), { recursive: true });
+      await fs.promises.writeFile(this.syncStatePath, JSON.stringify(state, null, 2), 'utf8');
+    } catch (err) {
+      log.error('Failed to save MCP sync state:', err);
     }
   }
 
   _loadFromDisk() {
     try {
       if (fs.existsSync(this.filePath)) {
-        const data = fs.readFileSync(this.filePath, 'utf8');
-        this.servers = JSON.parse(data);
+        const data = JSON.parse(fs.readFileSync(this.filePath, 'utf8'));
+        this.servers = Array.isArray(data) ? data : (data.servers || []);
+        this.removedServerNames = new Set(Array.isArray(data) ? [] : (data.pendingRemovals || []));
       }
     } catch (err) {
-      console.warn('Failed to load MCP servers file – starting fresh:', err.message);
+      log.warn('Failed to load MCP servers file – starting fresh:', err.message);
       this.servers = [];
+      this.removedServerNames = new Set();
     }
   }
 
@@ -119,9 +245,10 @@ class McpServerManager {
       if (!fs.existsSync(dir)) {
         fs.mkdirSync(dir, { recursive: true });
       }
-      fs.writeFileSync(this.filePath, JSON.stringify(this.servers, null, 2), 'utf8');
+      const data = { servers: this.servers, pendingRemovals: Array.from(this.removedServerNames) };
+      fs.writeFileSync(this.filePath, JSON.stringify(data, null, 2), 'utf8');
     } catch (err) {
-      console.error('Failed to save MCP servers to disk:', err);
+      log.error('Failed to save MCP servers to disk:', err);
     }
   }
 }
@@ -1,6 +1,9 @@
 const fs = require('fs').promises;
 const path = require('path');
 const os = require('os');
+const Logger = require('./logger');
+
+const log = Logger.scope('config');
 
 class ModelConfig {
   constructor() {
@@ -23,6 +26,40 @@ class ModelConfig {
       photoshop: false // default off
     };
 
+    // Session storage settings (applied to SessionManager before sessions load)
+    this.sessionStorageSettings = {
+      lazyLoading: true,        // load session headers only, hydrate messages on demand
+      messageCacheBudgetMB: 64  // approx. memory budget for hydrated message arrays
+    };
+
+    // Checkpoint retention settings (applied to CheckpointManager). Nothing is
+    // expired or evicted unless the user sets a limit.
+    this.checkpointRetentionSettings = {
+      maxAgeDays: 0,               // delete checkpoints older than this (0 = keep)
+      maxStorageMB: 0,             // evict oldest checkpoints above this (0 = unlimited)
+      removeDeletedSessions: true  // delete checkpoints of deleted sessions
+    };
+
+    // Run scheduler settings (applied to ClaudeProcessManager)
+    this.runSchedulerSettings = {
+      maxConcurrentRuns: 4 // Claude processes allowed at once; further runs are queued
+    };
+
+    // Warm process pool settings (applied to ClaudeProcessManager)
+    this.processPoolSettings = {
+      enabled: true,           // reuse long-lived streaming-input processes across turns
+      maxSize: 4,              // processes kept alive, busy or idle
+      idleTimeoutSeconds: 300  // stop a process after this long without a turn
+    };
+
+    // Run watchdog settings (applied to ClaudeProcessManager); 0 disables a limit
+    this.watchdogSettings = {
+      idleTimeoutSeconds: 300,       // stop a run after this long without output
+      toolIdleTimeoutSeconds: 1800,  // same, while a tool call is running
+      maxRuntimeMinutes: 120,        // stop a run after this long in total
+      killGraceSeconds: 5            // wait between SIGINT, SIGTERM and SIGKILL
+    };
+
     this.modelConfigPath = path.join(os.homedir(), '.claude-code-chat', 'model-config.json');
   }
 
@@ -54,17 +91,50 @@ class ModelConfig {
         photoshop: typeof config.windowDetectionSettings?.photoshop === 'boolean' ? config.windowDetectionSettings.photoshop : false
       };
 
+      // Load session storage settings
+      this.sessionStorageSettings = {
+        lazyLoading: typeof config.sessionStorageSettings?.lazyLoading === 'boolean' ? config.sessionStorageSettings.lazyLoading : true,
+        messageCacheBudgetMB: typeof config.sessionStorageSettings?.messageCacheBudgetMB === 'number' ? config.sessionStorageSettings.messageCacheBudgetMB : 64
+      };
+
+      // Load checkpoint retention settings
+      this.checkpointRetentionSettings = {
+        maxAgeDays: typeof config.checkpointRetentionSettings?.maxAgeDays === 'number' ? config.checkpointRetentionSettings.maxAgeDays : 0,
+        maxStorageMB: typeof config.checkpointRetentionSettings?.maxStorageMB === 'number' ? config.checkpointRetentionSettings.maxStorageMB : 0,
+        removeDeletedSessions: typeof config.checkpointRetentionSettings?.removeDeletedSessions === 'boolean' ? config.checkpointRetentionSettings.removeDeletedSessions : true
+      };
+
+      // Load run scheduler settings
+      this.runSchedulerSettings = {
+        maxConcurrentRuns: Number.isInteger(config.runSchedulerSettings?.maxConcurrentRuns) && config.runSchedulerSettings.maxConcurrentRuns >= 1 ? config.runSchedulerSettings.maxConcurrentRuns : 4
+      };
+
+      // Load process pool settings
+      this.processPoolSettings = {
+        enabled: typeof config.processPoolSettings?.enabled === 'boolean' ? config.processPoolSettings.enabled : true,
+        maxSize: Number.isInteger(config.processPoolSettings?.maxSize) && config.processPoolSettings.maxSize >= 0 ? config.processPoolSettings.maxSize : 4,
+        idleTimeoutSeconds: typeof config.processPoolSettings?.idleTimeoutSeconds === 'number' && config.processPoolSettings.idleTimeoutSeconds > 0 ? config.processPoolSettings.idleTimeoutSeconds : 300
+      };
+
+      // Load watchdog settings
+      this.watchdogSettings = {
+        idleTimeoutSeconds: typeof config.watchdogSettings?.idleTimeoutSeconds === 'number' ? config.watchdogSettings.idleTimeoutSeconds : 300,
+        toolIdleTimeoutSeconds: typeof config.watchdogSettings?.toolIdleTimeoutSeconds === 'number' ? config.watchdogSettings.toolIdleTimeoutSeconds : 1800,
+        maxRuntimeMinutes: typeof config.watchdogSettings?.maxRuntimeMinutes === 'number' ? config.watchdogSettings.maxRuntimeMinutes : 120,
+        killGraceSeconds: typeof config.watchdogSettings?.killGraceSeconds === 'number' ? config.watchdogSettings.killGraceSeconds : 5
+      };
+
       // Set the environment variable
       if (this.currentModel) {
         process.env.ANTHROPIC_MODEL = this.currentModel;
-        console.log('Model loaded from config:', this.currentModel);
+        log.info('Model loaded from config:', this.currentModel);
       } else {
         delete process.env.ANTHROPIC_MODEL;
-        console.log('Using default model (Sonnet)');
+        log.info('Using default model (Sonnet)');
       }
     } catch (error) {
       // File doesn't exist or is invalid, use default
-      console.log('No model config found, using default (Sonnet)');
+      log.info('No model config found, using default (Sonnet)');
       this.currentModel = '';
       this.taskTemplate = 'Create a new folder in the cwd and accomplish the following task into it:<task>\n\n</task> ultrathink through this task to complete it effectively:';
 
@@ -84,6 +154,39 @@ class ModelConfig {
         photoshop: false
       };
 
+      // Default session storage settings
+      this.sessionStorageSettings = {
+        lazyLoading: true,
+        messageCacheBudgetMB: 64
+      };
+
+      // Default checkpoint retention settings
+      this.checkpointRetentionSettings = {
+        maxAgeDays: 0,
+        maxStorageMB: 0,
+        removeDeletedSessions: true
+      };
+
+      // Default run scheduler settings
+      this.runSchedulerSettings = {
+        maxConcurrentRuns: 4
+      };
+
+      // Default process pool settings
+      this.processPoolSettings = {
+        enabled: true,
+        maxSize: 4,
+        idleTimeoutSeconds: 300
+      };
+
+      // Default watchdog settings
+      this.watchdogSettings = {
+        idleTimeoutSeconds: 300,
+        toolIdleTimeoutSeconds: 1800,
+        maxRuntimeMinutes: 120,
+        killGraceSeconds: 5
+      };
+
       delete process.env.ANTHROPIC_MODEL;
     }
   }
@@ -102,13 +205,18 @@ class ModelConfig {
         systemPromptMode: this.systemPromptMode,
         globalShortcut: this.globalShortcut,
         windowDetectionSettings: this.windowDetectionSettings,
+        sessionStorageSettings: this.sessionStorageSettings,
+        checkpointRetentionSettings: this.checkpointRetentionSettings,
+        runSchedulerSettings: this.runSchedulerSettings,
+        processPoolSettings: this.processPoolSettings,
+        watchdogSettings: this.watchdogSettings,
         updatedAt: new Date().toISOString()
       };
 
       await fs.writeFile(this.modelConfigPath, JSON.stringify(config, null, 2));
-      console.log('Model config saved:', this.currentModel || 'Default (Sonnet)');
+      log.debug('Model config saved:', this.currentModel || 'Default (Sonnet)');
     } catch (error) {
-      console.error('Failed to save model config:', error);
+      log.error('Failed to save model config:', error);
       throw error;
     }
   }
@@ -141,7 +249,7 @@ class ModelConfig {
     // Save to persistent storage
     await this.saveModelConfig();
 
-    console.log('Model updated to:', this.currentModel || 'Default (Sonnet)');
+    log.info('Model updated to:', this.currentModel || 'Default (Sonnet)');
     return this.currentModel;
   }
 
@@ -161,7 +269,7 @@ class ModelConfig {
     // Save to persistent storage
     await this.saveModelConfig();
 
-    console.log('Task template updated');
+    log.debug('Task template updated');
     return this.taskTemplate;
   }
 
@@ -187,10 +295,130 @@ class ModelConfig {
     }
 
     await this.saveModelConfig();
-    console.log('System prompt config updated');
+    log.debug('System prompt config updated');
     return this.getSystemPromptConfig();
   }
 
+  // Get session storage settings
+  getSessionStorageSettings() {
+    return {
+      lazyLoading: this.sessionStorageSettings.lazyLoading,
+      messageCacheBudgetMB: this.sessionStorageSettings.messageCacheBudgetMB
+    };
+  }
+
+  // Get checkpoint retention settings
+  getCheckpointRetentionSettings() {
+    return {
+      maxAgeDays: this.checkpointRetentionSettings.maxAgeDays,
+      maxStorageMB: this.checkpointRetentionSettings.maxStorageMB,
+      removeDeletedSessions: this.checkpointRetentionSettings.removeDeletedSessions
+    };
+  }
+
+  // Set checkpoint retention settings
+  async setCheckpointRetentionSettings(settings) {
+    if (!settings || typeof settings !== 'object') {
+      throw new Error('Invalid checkpoint retention settings');
+    }
+
+    if (typeof settings.maxAgeDays === 'number' && settings.maxAgeDays >= 0) {
+      this.checkpointRetentionSettings.maxAgeDays = settings.maxAgeDays;
+    }
+    if (typeof settings.maxStorageMB === 'number' && settings.maxStorageMB >= 0) {
+      this.checkpointRetentionSettings.maxStorageMB = settings.maxStorageMB;
+    }
+    if (typeof settings.removeDeletedSessions === 'boolean') {
+      this.checkpointRetentionSettings.removeDeletedSessions = settings.removeDeletedSessions;
+    }
+
+    await this.saveModelConfig();
+    log.info('Checkpoint retention settings updated:', this.checkpointRetentionSettings);
+    return this.getCheckpointRetentionSettings();
+  }
+
+  // Get run scheduler settings
+  getRunSchedulerSettings() {
+    return {
+      maxConcurrentRuns: this.runSchedulerSettings.maxConcurrentRuns
+    };
+  }
+
+  // Set run scheduler settings
+  async setRunSchedulerSettings(settings) {
+    if (!settings || typeof settings !== 'object') {
+      throw new Error('Invalid run scheduler settings');
+    }
+
+    if (Number.isInteger(settings.maxConcurrentRuns) && settings.maxConcurrentRuns >= 1) {
+      this.runSchedulerSettings.maxConcurrentRuns = settings.maxConcurrentRuns;
+    }
+
+    await this.saveModelConfig();
+    log.info('Run scheduler settings updated:', this.runSchedulerSettings);
+    return this.getRunSchedulerSettings();
+  }
+
+  // Get process pool settings
+  getProcessPoolSettings() {
+    return {
+      enabled: this.processPoolSettings.enabled,
+      maxSize: this.processPoolSettings.maxSize,
+      idleTimeoutSeconds: this.processPoolSettings.idleTimeoutSeconds
+    };
+  }
+
+  // Set process pool settings
+  async setProcessPoolSettings(settings) {
+    if (!settings || typeof settings !== 'object') {
+      throw new Error('Invalid process pool settings');
+    }
+
+    if (typeof settings.enabled === 'boolean') {
+      this.processPoolSettings.enabled = settings.enabled;
+    }
+    if (Number.isInteger(settings.maxSize) && settings.maxSize >= 0) {
+      this.processPoolSettings.maxSize = settings.maxSize;
+    }
+    if (typeof settings.idleTimeoutSeconds === 'number' && settings.idleTimeoutSeconds > 0) {
+      this.processPoolSettings.idleTimeoutSeconds = settings.idleTimeoutSeconds;
+    }
+
+    await this.saveModelConfig();
+    log.info('Process pool settings updated:', this.processPoolSettings);
+    return this.getProcessPoolSettings();
+  }
+
+  // Get watchdog settings
+  getWatchdogSettings() {
+    return {
+      idleTimeoutSeconds: this.watchdogSettings.idleTimeoutSeconds,
+      toolIdleTimeoutSeconds: this.watchdogSettings.toolIdleTimeoutSeconds,
+      maxRuntimeMinutes: this.watchdogSettings.maxRuntimeMinutes,
+      killGraceSeconds: this.watchdogSettings.killGraceSeconds
+    };
+  }
+
+  // Set watchdog settings
+  async setWatchdogSettings(settings) {
+    if (!settings || typeof settings !== 'object') {
+      throw new Error('Invalid watchdog settings');
+    }
+
+    for (const key of ['idleTimeoutSeconds', 'toolIdleTimeoutSeconds', 'maxRuntimeMinutes']) {
+      if (typeof settings[key] === 'number' && settings[key] >= 0) {
+        this.watchdogSettings[key] = settings[key];
+      }
+    }
+    if (typeof settings.killGraceSeconds === 'number' && settings.killGraceSeconds > 0) {
+      this.watchdogSettings.killGraceSeconds = settings.killGraceSeconds;
+    }
+
+    await this.saveModelConfig();
+    log.info('Watchdog settings updated:', this.watchdogSettings);
+    return this.getWatchdogSettings();
+  }
+
   // Get window detection settings
   getWindowDetectionSettings() {
     return {
@@ -222,7 +450,7 @@ class ModelConfig {
     }
 
     await this.saveModelConfig();
-    console.log('Window detection settings updated:', this.windowDetectionSettings);
+    log.info('Window detection settings updated:', this.windowDetectionSettings);
     return this.getWindowDetectionSettings();
   }
 
@@ -241,7 +469,7 @@ class ModelConfig {
 
     this.globalShortcut = shortcut;
     await this.saveModelConfig();
-    console.log('Global shortcut updated to:', this.globalShortcut);
+    log.debug('Global shortcut updated to:', this.globalShortcut);
     return this.globalShortcut;
   }
 }
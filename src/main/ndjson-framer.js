@@ -0,0 +1,68 @@
+// Splits a byte stream into newline-delimited JSON lines.
+//
+// Chunks are kept as Buffers until a line is complete: only the bytes of each new
+// chunk are scanned for '\n', and every line is decoded to a string exactly once
+// (straight from the chunk when it doesn't span chunks). Splitting on the raw
+// 0x0A byte is safe for UTF-8 because it never occurs inside a multi-byte
+// sequence, so characters split across chunks decode correctly.
+const NEWLINE = 0x0a;
+
+class NdjsonFramer {
+  constructor() {
+    this.pending = [];       // Buffers of the incomplete trailing line
+    this.pendingBytes = 0;
+    this.bytesReceived = 0;
+    this.linesEmitted = 0;
+  }
+
+  // Feed a chunk (Buffer or string) and return the complete lines it finished,
+  // without their trailing newline. Empty lines are skipped.
+  push(chunk) {
+    const data = typeof chunk === 'string' ? Buffer.from(chunk, 'utf8') : chunk;
+    const lines = [];
+    this.bytesReceived += data.length;
+
+    let start = 0;
+    let newlineIndex = data.indexOf(NEWLINE, start);
+    while (newlineIndex !== -1) {
+      let line;
+      if (this.pendingBytes > 0) {
+        this.pending.push(data.subarray(start, newlineIndex));
+        line = Buffer.concat(this.pending, this.pendingBytes + newlineIndex - start).toString('utf8');
+        this.pending = [];
+        this.pendingBytes = 0;
+      } else {
+        line = data.toString('utf8', start, newlineIndex);
+      }
+
+      if (line.length > 0 && line !== '\r') {
+        lines.push(line);
+        this.linesEmitted++;
+      }
+
+      start = newlineIndex + 1;
+      newlineIndex = data.indexOf(NEWLINE, start);
+    }
+
+    if (start < data.length) {
+      this.pending.push(data.subarray(start));
+      this.pendingBytes += data.length - start;
+    }
+
+    return lines;
+  }
+
+  // Return (and clear) whatever incomplete line is still buffered
+  flush() {
+    if (this.pendingBytes === 0) {
+      return '';
+    }
+
+    const rest = Buffer.concat(this.pending, this.pendingBytes).toString('utf8');
+    this.pending = [];
+    this.pendingBytes = 0;
+    return rest;
+  }
+}
+
+module.exports = NdjsonFramer;
@@ -0,0 +1,71 @@
+// Keeps the last `capacity` bytes written to it in a fixed-size buffer, so a
+// process's stdout/stderr can be retained for logs and error reports without
+// growing with the length of the run.
+class OutputRingBuffer {
+  constructor(capacity = 64 * 1024) {
+    this.capacity = capacity;
+    this.buffer = null;     // grows up to capacity, then wraps
+    this.writeOffset = 0;
+    this.length = 0;
+    this.totalBytes = 0;
+  }
+
+  write(chunk) {
+    const data = typeof chunk === 'string' ? Buffer.from(chunk, 'utf8') : chunk;
+    this.totalBytes += data.length;
+    if (this.capacity <= 0 || data.length === 0) {
+      return;
+    }
+
+    // Only the tail of an oversized chunk can survive
+    const source = data.length > this.capacity ? data.subarray(data.length - this.capacity) : data;
+
+    // Short outputs never pay for the full capacity. Until the buffer reaches
+    // capacity nothing has wrapped, so growing is a plain copy.
+    const bufferSize = this.buffer ? this.buffer.length : 0;
+    if (bufferSize < this.capacity && this.length + source.length > bufferSize) {
+      const grown = Buffer.allocUnsafe(Math.min(this.capacity, Math.max(bufferSize * 2, this.length + source.length, 4096)));
+      if (this.buffer) {
+        this.buffer.copy(grown, 0, 0, this.length);
+      }
+      this.buffer = grown;
+      this.writeOffset = this.length;
+    }
+
+    const firstPart = Math.min(source.length, this.buffer.length - this.writeOffset);
+    source.copy(this.buffer, this.writeOffset, 0, firstPart);
+    if (firstPart < source.length) {
+      source.copy(this.buffer, 0, firstPart);
+    }
+
+    this.writeOffset = (this.writeOffset + source.length) % this.buffer.length;
+    this.length = Math.min(this.capacity, this.length + source.length);
+  }
+
+  // True once earlier output has been overwritten
+  get truncated() {
+    return this.totalBytes > this.length;
+  }
+
+  toString() {
+    if (this.length === 0) {
+      return '';
+    }
+
+    let bytes;
+    if (this.length < this.capacity) {
+      bytes = this.buffer.subarray(0, this.length);
+    } else {
+      bytes = Buffer.concat([this.buffer.subarray(this.writeOffset), this.buffer.subarray(0, this.writeOffset)]);
+    }
+
+    // Don't start in the middle of a multi-byte UTF-8 character
+    let start = 0;
+    while (this.truncated && start < bytes.length && start < 3 && (bytes[start] & 0xc0) === 0x80) {
+      start++;
+    }
+    return bytes.toString('utf8', start);
+  }
+}
+
+module.exports = OutputRingBuffer;
@@ -23,6 +23,14 @@ class PreloadBridge {
       // Window detection settings
       getWindowDetectionSettings: () => ipcRenderer.invoke('get-window-detection-settings'),
       setWindowDetectionSettings: (settings) => ipcRenderer.invoke('set-window-detection-settings', settings),
+      getCheckpointRetentionSettings: () => ipcRenderer.invoke('get-checkpoint-retention-settings'),
+      setCheckpointRetentionSettings: (settings) => ipcRenderer.invoke('set-checkpoint-retention-settings', settings),
+      getRunSchedulerSettings: () => ipcRenderer.invoke('get-run-scheduler-settings'),
+      setRunSchedulerSettings: (settings) => ipcRenderer.invoke('set-run-scheduler-settings', settings),
+      getProcessPoolSettings: () => ipcRenderer.invoke('get-process-pool-settings'),
+      setProcessPoolSettings: (settings) => ipcRenderer.invoke('set-process-pool-settings', settings),
+      getWatchdogSettings: () => ipcRenderer.invoke('get-watchdog-settings'),
+      setWatchdogSettings: (settings) => ipcRenderer.invoke('set-watchdog-settings', settings),
 
       // Global shortcut management
       getGlobalShortcut: () => ipcRenderer.invoke('get-global-shortcut'),
@@ -44,9 +52,13 @@ class PreloadBridge {
       validateSendDirectory: (sessionId) => ipcRenderer.invoke('validate-send-directory', sessionId),
 
       // Messaging
-      sendMessage: (sessionId, message) => ipcRenderer.invoke('send-message', sessionId, message),
+      sendMessage: (sessionId, message, options) => ipcRenderer.invoke('send-message', sessionId, message, options),
       stopMessage: (sessionId) => ipcRenderer.invoke('stop-message', sessionId),
+      getMessageStreamSnapshot: (sessionId) => ipcRenderer.invoke('get-message-stream-snapshot', sessionId),
       getRunningTasks: () => ipcRenderer.invoke('get-running-tasks'),
+      getRunTimeline: (sessionId, messageId) => ipcRenderer.invoke('get-run-timeline', sessionId, messageId),
+      getRunLatencyStats: (options) => ipcRenderer.invoke('get-run-latency-stats', options),
+      readToolOutput: (sessionId, outputId, offset, length) => ipcRenderer.invoke('read-tool-output', sessionId, outputId, offset, length),
 
       // Checkpointing
       revertToMessage: (sessionId, messageId) => ipcRenderer.invoke('revert-to-message', sessionId, messageId),
@@ -56,6 +68,8 @@ class PreloadBridge {
       getAllCheckpointsForSession: (sessionId) => ipcRenderer.invoke('get-all-checkpoints-for-session', sessionId),
       getSessionStatistics: (sessionId) => ipcRenderer.invoke('get-session-statistics', sessionId),
       validateCheckpointSession: (sessionId) => ipcRenderer.invoke('validate-checkpoint-session', sessionId),
+      runCheckpointRetention: () => ipcRenderer.invoke('run-checkpoint-retention'),
+      getCheckpointRetentionReport: () => ipcRenderer.invoke('get-checkpoint-retention-report'),
 
       // File system & working directory operations
       getDirectoryContents: (dirPath) => ipcRenderer.invoke('get-directory-contents', dirPath),
@@ -124,6 +138,7 @@ class PreloadBridge {
       onAllSessionsCleared: (callback) => ipcRenderer.on('all-sessions-cleared', callback),
       onFileChanged: (callback) => ipcRenderer.on('file-changed', callback),
       onDirectoryChanged: (callback) => ipcRenderer.on('directory-changed', callback),
+      onProcessStatusChanged: (callback) => ipcRenderer.on('process-status-changed', callback),
 
       // Tray events
       onTrayOpenWorkspace: (callback) => ipcRenderer.on('tray-open-workspace', callback),
@@ -149,8 +164,9 @@ class PreloadBridge {
 
       // Claude CLI history management
       getClaudeCliSessions: () => ipcRenderer.invoke('get-claude-cli-sessions'),
+      onClaudeCliSessionsProgress: (callback) => ipcRenderer.on('claude-cli-sessions-progress', callback),
       getClaudeCliSessionDetails: (sessionId) => ipcRenderer.invoke('get-claude-cli-session-details', sessionId),
-      searchClaudeCliSessions: (query) => ipcRenderer.invoke('search-claude-cli-sessions', query),
+      searchClaudeCliSessions: (query, options) => ipcRenderer.invoke('search-claude-cli-sessions', query, options),
       clearClaudeCliSessionsCache: () => ipcRenderer.invoke('clear-claude-cli-sessions-cache'),
       resumeClaudeSession: (sessionId, projectPath) => ipcRenderer.invoke('resume-claude-session', sessionId, projectPath),
       extractFileChanges: (sessionId, messageId) => ipcRenderer.invoke('extract-file-changes', sessionId, messageId),
@@ -170,7 +186,7 @@ class PreloadBridge {
       'getSystemPromptConfig', 'setSystemPromptConfig',
       'getSessions', 'createSession', 'deleteSession', 'clearAllSessions', 'updateSessionTitle', 'getSessionContext',
       'setSessionCwd', 'getSessionCwd', 'validateSessionCwd', 'restoreSessionCwd', 'validateSendDirectory',
-      'sendMessage', 'stopMessage',
+      'sendMessage', 'stopMessage', 'getMessageStreamSnapshot',
       'revertToMessage', 'unrevertFromMessage', 'getMessageCheckpoints', 'hasFileChanges', 'getAllCheckpointsForSession',
       'getDirectoryContents', 'navigateToDirectory', 'getCurrentDirectory', 'getHomeDirectory',
       'getCommonDirectories', 'navigateBack', 'navigateForward', 'navigateUp',
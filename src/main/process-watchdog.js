@@ -0,0 +1,134 @@
+const Logger = require('./logger');
+
+const log = Logger.scope('watchdog');
+
+// Watches one Claude turn for inactivity instead of capping it at a fixed wall
+// clock time.
+//
+// touch() is called on every stdout chunk. The state goes active -> quiet after
+// quietAfterMs without output (reported only), and the turn is stopped once it
+// has been idle for idleTimeoutMs - or toolIdleTimeoutMs while a tool call is
+// in flight, since the CLI prints nothing while a tool runs - or has run for
+// maxRuntimeMs in total (0 = no limit). Stopping escalates: SIGINT lets the CLI
+// abort the turn cleanly, then SIGTERM and finally SIGKILL, each after
+// killGraceMs if the process is still alive.
+//
+// onStateChange(state, info) is called on every transition; states are
+// 'active', 'quiet', 'hung' (stop requested) and 'killing' (SIGKILL sent).
+class ProcessWatchdog {
+  constructor(childProcess, options = {}) {
+    this.process = childProcess;
+    this.idleTimeoutMs = options.idleTimeoutMs ?? 5 * 60 * 1000;
+    this.toolIdleTimeoutMs = options.toolIdleTimeoutMs ?? 30 * 60 * 1000;
+    this.maxRuntimeMs = options.maxRuntimeMs ?? 0;
+    this.quietAfterMs = options.quietAfterMs ?? 30 * 1000;
+    this.killGraceMs = options.killGraceMs ?? 5000;
+    this.onStateChange = options.onStateChange || (() => {});
+
+    this.startedAt = Date.now();
+    this.lastActivityAt = this.startedAt;
+    this.toolsInFlight = 0;
+    this.state = 'active';
+    this.timeoutReason = null; // 'idle' or 'max_runtime' once the watchdog fired
+    this.escalationTimer = null;
+
+    const shortestLimit = Math.min(...[this.quietAfterMs, this.idleTimeoutMs].filter(ms => ms > 0), 20000);
+    const intervalMs = Math.max(250, Math.min(5000, Math.floor(shortestLimit / 4)));
+    this.checkTimer = setInterval(() => this.check(), intervalMs);
+    if (this.checkTimer.unref) this.checkTimer.unref();
+  }
+
+  touch() {
+    this.lastActivityAt = Date.now();
+    if (this.state === 'quiet') {
+      this.setState('active');
+    }
+  }
+
+  setToolsInFlight(count) {
+    this.toolsInFlight = count;
+  }
+
+  getIdleMs() {
+    return Date.now() - this.lastActivityAt;
+  }
+
+  // Snapshot for the tasks UI
+  getStatus() {
+    return {
+      state: this.state,
+      idleMs: this.getIdleMs(),
+      runtimeMs: Date.now() - this.startedAt,
+      toolsInFlight: this.toolsInFlight,
+      timeoutReason: this.timeoutReason
+    };
+  }
+
+  check() {
+    if (this.timeoutReason) {
+      return;
+    }
+
+    const now = Date.now();
+    const idleMs = now - this.lastActivityAt;
+    const idleLimit = this.toolsInFlight > 0 ? this.toolIdleTimeoutMs : this.idleTimeoutMs;
+
+    if (this.maxRuntimeMs > 0 && now - this.startedAt >= this.maxRuntimeMs) {
+      this.fire('max_runtime');
+    } else if (idleLimit > 0 && idleMs >= idleLimit) {
+      this.fire('idle');
+    } else if (this.state === 'active' && idleMs >= this.quietAfterMs) {
+      this.setState('quiet');
+    }
+  }
+
+  fire(reason) {
+    this.timeoutReason = reason;
+    log.warn(`Stopping Claude process ${this.process.pid} (${reason}): idle ${Math.round(this.getIdleMs() / 1000)}s, running ${Math.round((Date.now() - this.startedAt) / 1000)}s`);
+    this.setState('hung');
+    this.escalate(['SIGINT', 'SIGTERM', 'SIGKILL']);
+  }
+
+  escalate(signals) {
+    if (!this.isAlive() || signals.length === 0) {
+      return;
+    }
+
+    const [signal, ...rest] = signals;
+    log.debug(`Sending ${signal} to Claude process ${this.process.pid}`);
+    try {
+      this.process.kill(signal);
+    } catch (error) {
+      log.debug(`Failed to send ${signal}:`, error.message);
+    }
+    if (signal === 'SIGKILL') {
+      this.setState('killing');
+    }
+
+    this.escalationTimer = setTimeout(() => this.escalate(rest), this.killGraceMs);
+    if (this.escalationTimer.unref) this.escalationTimer.unref();
+  }
+
+  // `killed` is set as soon as any signal was sent, so check the exit state
+  isAlive() {
+    return this.process.exitCode === null && this.process.signalCode === null;
+  }
+
+  setState(state) {
+    if (this.state !== state) {
+      this.state = state;
+      this.onStateChange(state, this.getStatus());
+    }
+  }
+
+  // Stop watching; a pending escalation still completes if the watchdog fired,
+  // so a process that ignored SIGINT cannot linger
+  stop() {
+    clearInterval(this.checkTimer);
+    if (!this.timeoutReason) {
+      clearTimeout(this.escalationTimer);
+    }
+  }
+}
+
+module.exports = ProcessWatchdog;
@@ -0,0 +1,123 @@
+const fs = require('fs').promises;
+const path = require('path');
+const Logger = require('./logger');
+
+const log = Logger.scope('recovery');
+
+// In-memory recovery state (recovery.json) with coalesced, serialized writes.
+//
+// Every update replaces the session's entry in memory. Updates made with
+// { debounce: true } (progress while a response streams in) only schedule a
+// write after debounceMs; all others - state transitions such as start,
+// completion, failure or app_closing - are written before the returned promise
+// resolves, as before. Writes never overlap: each one snapshots the whole state
+// and replaces the file with a temp file + rename, and calls arriving while a
+// write is queued share it.
+class RecoveryStateStore {
+  constructor(filePath, options = {}) {
+    this.filePath = filePath;
+    this.debounceMs = options.debounceMs ?? 1000;
+
+    this.states = null; // sessionId -> state, read from disk on first use
+    this.loading = null;
+    this.flushTimer = null;
+    this.writeChain = Promise.resolve();
+    this.queuedWrite = null; // write queued behind the current one, shared by callers
+  }
+
+  // Read recovery.json once; later reads come from memory
+  async load() {
+    if (this.states) {
+      return this.states;
+    }
+    if (!this.loading) {
+      this.loading = (async () => {
+        try {
+          const data = await fs.readFile(this.filePath, 'utf8');
+          this.states = new Map(Object.entries(JSON.parse(data)));
+        } catch (error) {
+          // File doesn't exist or is unreadable, start fresh
+          this.states = new Map();
+        }
+        return this.states;
+      })();
+    }
+    return this.loading;
+  }
+
+  async getAll() {
+    const states = await this.load();
+    return Object.fromEntries(states);
+  }
+
+  async update(sessionId, state, options = {}) {
+    const states = await this.load();
+    states.set(sessionId, {
+      ...state,
+      timestamp: new Date().toISOString()
+    });
+    return options.debounce ? this.scheduleFlush() : this.flush();
+  }
+
+  async clear(sessionId, options = {}) {
+    const states = await this.load();
+    if (!states.delete(sessionId)) {
+      return;
+    }
+    return options.debounce ? this.scheduleFlush() : this.flush();
+  }
+
+  // Keep only the entries for which keep(state, sessionId) returns true
+  async retain(keep) {
+    const states = await this.load();
+    for (const [sessionId, state] of states) {
+      if (!keep(state, sessionId)) {
+        states.delete(sessionId);
+      }
+    }
+    return this.flush();
+  }
+
+  scheduleFlush() {
+    if (!this.flushTimer) {
+      this.flushTimer = setTimeout(() => {
+        this.flushTimer = null;
+        this.flush().catch(error => log.error('Failed to write recovery state:', error));
+      }, this.debounceMs);
+    }
+  }
+
+  // Write the current state now, after any in-flight write
+  flush() {
+    if (this.flushTimer) {
+      clearTimeout(this.flushTimer);
+      this.flushTimer = null;
+    }
+    if (this.queuedWrite) {
+      return this.queuedWrite;
+    }
+
+    const write = this.writeChain.catch(() => {}).then(() => {
+      this.queuedWrite = null;
+      return this.writeFile();
+    });
+    this.queuedWrite = write;
+    this.writeChain = write;
+    return write;
+  }
+
+  async writeFile() {
+    if (!this.states) {
+      return;
+    }
+
+    // Snapshot synchronously so updates during the write go into the next one
+    const contents = JSON.stringify(Object.fromEntries(this.states), null, 2);
+    await fs.mkdir(path.dirname(this.filePath), { recursive: true });
+    const tempPath = this.filePath + '.tmp';
+    await fs.writeFile(tempPath, contents);
+    await fs.rename(tempPath, this.filePath);
+  }
+}
+
+module.exports = RecoveryStateStore;
@@ -0,0 +1,171 @@
+const fs = require('fs').promises;
+const path = require('path');
+const crypto = require('crypto');
+const Logger = require('./logger');
+const { mapWithConcurrency } = require('./concurrency');
+
+const log = Logger.scope('revert');
+
+// Applies a set of whole-file changes (write content / delete) as one unit.
+//
+// stage() reads every target's current content and writes the new content to a
+// temp file next to the target, using a bounded pool of concurrent workers.
+// commit() then swaps all temp files into place with renames (atomic per file)
+// and, if any file fails, restores every file already committed from the
+// captured originals (kept as Buffers so non-UTF-8 files survive a rollback).
+// Parent directories created for new files are removed again when the set is
+// discarded. Each file's stage/commit time is reported.
+class RevertEngine {
+  constructor(options = {}) {
+    this.concurrency = options.concurrency || 16;
+  }
+
+  static getTempPath(filePath, transactionId) {
+    return path.join(path.dirname(filePath), `.${path.basename(filePath)}.${transactionId}.revert-tmp`);
+  }
+
+  // operations: [{ filePath, content }] where content === null deletes the file.
+  // Throws (after removing any temp files) if a target can't be staged.
+  async stage(operations) {
+    const transactionId = crypto.randomBytes(6).toString('hex');
+    const staged = await mapWithConcurrency(operations, this.concurrency, async (operation) => {
+      const startedAt = process.hrtime.bigint();
+      const entry = {
+        filePath: operation.filePath,
+        content: operation.content,
+        action: operation.content === null ? 'delete' : 'write',
+        originalContent: null,
+        originalMode: null,
+        tempPath: null,
+        createdDir: null, // topmost parent directory created for the file
+        error: null,
+        stageMs: 0,
+        commitMs: 0
+      };
+
+      try {
+        try {
+          const [originalContent, stat] = await Promise.all([
+            fs.readFile(operation.filePath),
+            fs.stat(operation.filePath)
+          ]);
+          entry.originalContent = originalContent;
+          entry.originalMode = stat.mode;
+        } catch (error) {
+          if (error.code !== 'ENOENT') throw error;
+          // File doesn't exist yet (or anymore)
+        }
+
+        if (entry.action === 'write') {
+          entry.tempPath = RevertEngine.getTempPath(operation.filePath, transactionId);
+          entry.createdDir = await fs.mkdir(path.dirname(operation.filePath), { recursive: true }) || null;
+          await fs.writeFile(entry.tempPath, operation.content, entry.originalMode !== null ? { mode: entry.originalMode } : undefined);
+        }
+      } catch (error) {
+        entry.error = error;
+      }
+
+      entry.stageMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+      return entry;
+    });
+
+    const failed = staged.filter(entry => entry.error);
+    if (failed.length > 0) {
+      await this.discard(staged);
+      const error = new Error(`Failed to stage ${failed.length} file(s): ${failed.map(entry => `${entry.filePath}: ${entry.error.message}`).join(', ')}`);
+      error.failedFiles = failed.map(entry => ({ filePath: entry.filePath, error: entry.error.message }));
+      throw error;
+    }
+
+    return staged;
+  }
+
+  // Remove temp files of a staged set, and the directories staging created,
+  // without touching the targets
+  async discard(staged) {
+    await mapWithConcurrency(staged, this.concurrency, async (entry) => {
+      if (entry.tempPath) {
+        await fs.unlink(entry.tempPath).catch(() => {});
+      }
+    });
+    await this.removeCreatedDirectories(staged);
+  }
+
+  // Remove directories created during staging, deepest first. Only empty ones
+  // go, so anything written into them meanwhile is left alone.
+  async removeCreatedDirectories(staged) {
+    const directories = new Set();
+    for (const entry of staged) {
+      if (!entry.createdDir) continue;
+      // Every level from the file's directory up to the topmost created one
+      let dir = path.dirname(entry.filePath);
+      while (dir.startsWith(entry.createdDir)) {
+        directories.add(dir);
+        if (dir === entry.createdDir) break;
+        dir = path.dirname(dir);
+      }
+    }
+
+    const deepestFirst = Array.from(directories).sort((a, b) => b.length - a.length);
+    for (const dir of deepestFirst) {
+      await fs.rmdir(dir).catch(() => {});
+    }
+  }
+
+  // Swap staged content into place. On any failure every committed file is put
+  // back to its original content and the error lists the failing files.
+  async commit(staged) {
+    const committed = [];
+    const failures = [];
+
+    await mapWithConcurrency(staged, this.concurrency, async (entry) => {
+      const startedAt = process.hrtime.bigint();
+      try {
+        if (entry.action === 'write') {
+          await fs.rename(entry.tempPath, entry.filePath);
+          entry.tempPath = null;
+        } else if (entry.originalContent !== null) {
+          await fs.unlink(entry.filePath);
+        }
+        committed.push(entry);
+      } catch (error) {
+        failures.push({ filePath: entry.filePath, error: error.message });
+      }
+      entry.commitMs = Number(process.hrtime.bigint() - startedAt) / 1e6;
+    });
+
+    if (failures.length > 0) {
+      await this.rollback(committed);
+      await this.discard(staged);
+      const error = new Error(`Failed to apply ${failures.length} file(s), all changes rolled back`);
+      error.failedFiles = failures;
+      throw error;
+    }
+
+    return staged.map(entry => ({
+      filePath: entry.filePath,
+      action: entry.action,
+      stageMs: entry.stageMs,
+      commitMs: entry.commitMs
+    }));
+  }
+
+  // Restore committed files to the content captured during staging
+  async rollback(committed) {
+    await mapWithConcurrency(committed, this.concurrency, async (entry) => {
+      try {
+        if (entry.originalContent === null) {
+          await fs.unlink(entry.filePath).catch(() => {});
+        } else {
+          const tempPath = RevertEngine.getTempPath(entry.filePath, 'rollback');
+          await fs.writeFile(tempPath, entry.originalContent, entry.originalMode !== null ? { mode: entry.originalMode } : undefined);
+          await fs.rename(tempPath, entry.filePath);
+        }
+      } catch (error) {
+        log.error('Failed to roll back file:', entry.filePath, error);
+      }
+    });
+  }
+}
+
+module.exports = RevertEngine;
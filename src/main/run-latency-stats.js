@@ -0,0 +1,84 @@
+// Percentiles over the timelines of recent runs (see RunTimeline). Keeps the
+// last `capacity` run summaries in memory.
+const METRICS = {
+  queueMs: summary => summary.durations.queueMs,
+  processReadyMs: summary => summary.durations.processReadyMs,
+  timeToFirstByteMs: summary => summary.durations.timeToFirstByteMs,
+  timeToInitMs: summary => summary.durations.timeToInitMs,
+  timeToFirstTokenMs: summary => summary.durations.timeToFirstTokenMs,
+  responseMs: summary => summary.durations.responseMs,
+  totalMs: summary => summary.totalMs,
+  checkpointMs: summary => summary.checkpoint.totalMs,
+  stdoutBytes: summary => summary.bytes.stdout
+};
+
+class RunLatencyStats {
+  constructor(capacity = 500) {
+    this.capacity = capacity;
+    this.summaries = [];
+  }
+
+  record(summary) {
+    this.summaries.push(summary);
+    if (this.summaries.length > this.capacity) {
+      this.summaries.shift();
+    }
+  }
+
+  // Most recent summary for a session
+  getLatest(sessionId) {
+    for (let index = this.summaries.length - 1; index >= 0; index--) {
+      if (this.summaries[index].sessionId === sessionId) {
+        return this.summaries[index];
+      }
+    }
+    return null;
+  }
+
+  // { runs, metrics: { name: { count, p50, p95, p99, max } }, tools: { name: {...} } }
+  // options.mode limits the view to 'pooled' or 'one-shot' runs
+  getPercentiles(options = {}) {
+    const summaries = options.mode
+      ? this.summaries.filter(summary => summary.mode === options.mode)
+      : this.summaries;
+
+    const metrics = {};
+    for (const [name, pick] of Object.entries(METRICS)) {
+      metrics[name] = RunLatencyStats.describe(summaries.map(pick));
+    }
+
+    const toolDurations = new Map();
+    for (const summary of summaries) {
+      for (const tool of summary.tools) {
+        if (!toolDurations.has(tool.name)) {
+          toolDurations.set(tool.name, []);
+        }
+        toolDurations.get(tool.name).push(tool.durationMs);
+      }
+    }
+    const tools = {};
+    for (const [name, durations] of toolDurations) {
+      tools[name] = RunLatencyStats.describe(durations);
+    }
+
+    return { runs: summaries.length, metrics, tools };
+  }
+
+  // Nearest-rank percentiles of the non-null values
+  static describe(values) {
+    const sorted = values.filter(value => typeof value === 'number').sort((a, b) => a - b);
+    if (sorted.length === 0) {
+      return { count: 0, p50: null, p95: null, p99: null, max: null };
+    }
+    const rank = (p) => sorted[Math.min(sorted.length - 1, Math.ceil((p / 100) * sorted.length) - 1)];
+    return {
+      count: sorted.length,
+      p50: rank(50),
+      p95: rank(95),
+      p99: rank(99),
+      max: sorted[sorted.length - 1]
+    };
+  }
+}
+
+module.exports = RunLatencyStats;
@@ -0,0 +1,165 @@
+// Admits Claude runs up to a concurrency limit and queues the rest.
+//
+// Queued runs start in priority order (interactive before background), FIFO
+// within a priority. Runs for the same session never overlap and never overtake
+// each other: only the oldest queued run of a session is eligible, and only once
+// the session has no active run. A run holds its slot until the promise returned
+// by its start function settles.
+const PRIORITIES = {
+  interactive: 0,
+  background: 1
+};
+
+class RunScheduler {
+  constructor(options = {}) {
+    this.maxConcurrency = options.maxConcurrency ?? 4;
+    this.queue = [];             // waiting runs, in arrival order
+    this.activeSessions = new Set(); // sessions with a run in progress
+    this.nextSeq = 0;
+  }
+
+  static normalizePriority(priority) {
+    return Object.prototype.hasOwnProperty.call(PRIORITIES, priority) ? priority : 'interactive';
+  }
+
+  setMaxConcurrency(maxConcurrency) {
+    this.maxConcurrency = maxConcurrency;
+    this.pump();
+  }
+
+  // Run start() once a slot is free; resolves/rejects with its result. Rejects
+  // with an error flagged `cancelled` if the run is cancelled while queued.
+  schedule(sessionId, start, options = {}) {
+    return new Promise((resolve, reject) => {
+      this.queue.push({
+        seq: this.nextSeq++,
+        sessionId,
+        priority: RunScheduler.normalizePriority(options.priority),
+        start,
+        resolve,
+        reject,
+        queuedAt: new Date().toISOString()
+      });
+      this.pump();
+    });
+  }
+
+  // Drop the queued runs of a session (or of every session); returns how many
+  cancel(sessionId = null) {
+    const cancelled = this.queue.filter(run => sessionId === null || run.sessionId === sessionId);
+    if (cancelled.length === 0) {
+      return 0;
+    }
+
+    this.queue = this.queue.filter(run => !cancelled.includes(run));
+    for (const run of cancelled) {
+      const error = new Error('Run was cancelled before it started');
+      error.cancelled = true;
+      run.reject(error);
+    }
+    return cancelled.length;
+  }
+
+  isQueued(sessionId) {
+    return this.queue.some(run => run.sessionId === sessionId);
+  }
+
+  // Queued runs in the order they would start, with 1-based positions
+  getQueuedRuns() {
+    const ordered = [];
+    const pending = this.queue.slice();
+    const blocked = new Set(this.activeSessions);
+
+    while (pending.length > 0) {
+      const next = this.pickNext(pending, blocked);
+      if (!next) {
+        // The rest wait behind active runs of their own session
+        const byPriority = pending.slice().sort(RunScheduler.compare);
+        ordered.push(...byPriority);
+        break;
+      }
+      ordered.push(next);
+      pending.splice(pending.indexOf(next), 1);
+      blocked.add(next.sessionId);
+    }
+
+    return ordered.map((run, index) => ({
+      sessionId: run.sessionId,
+      priority: run.priority,
+      queuedAt: run.queuedAt,
+      position: index + 1
+    }));
+  }
+
+  // Position of the session's first queued run, or null if nothing is queued
+  getQueuePosition(sessionId) {
+    const run = this.getQueuedRuns().find(queued => queued.sessionId === sessionId);
+    return run ? run.position : null;
+  }
+
+  getStats() {
+    return {
+      active: this.activeSessions.size,
+      queued: this.queue.length,
+      maxConcurrency: this.maxConcurrency
+    };
+  }
+
+  static compare(a, b) {
+    return PRIORITIES[a.priority] - PRIORITIES[b.priority] || a.seq - b.seq;
+  }
+
+  // Highest-priority run that is its session's oldest queued run and whose
+  // session is not in `blocked`
+  pickNext(runs, blocked) {
+    const oldestPerSession = new Map();
+    for (const run of runs) {
+      if (!oldestPerSession.has(run.sessionId)) {
+        oldestPerSession.set(run.sessionId, run);
+      }
+    }
+
+    let best = null;
+    for (const run of oldestPerSession.values()) {
+      if (!blocked.has(run.sessionId) && (!best || RunScheduler.compare(run, best) < 0)) {
+        best = run;
+      }
+    }
+    return best;
+  }
+
+  pump() {
+    while (this.activeSessions.size < this.maxConcurrency) {
+      const run = this.pickNext(this.queue, new Set(this.activeSessions));
+      if (!run) {
+        return;
+      }
+      this.queue.splice(this.queue.indexOf(run), 1);
+      this.startRun(run);
+    }
+  }
+
+  startRun(run) {
+    this.activeSessions.add(run.sessionId);
+
+    const finish = () => {
+      this.activeSessions.delete(run.sessionId);
+      this.pump();
+    };
+
+    let result;
+    try {
+      result = Promise.resolve(run.start());
+    } catch (error) {
+      result = Promise.reject(error);
+    }
+    result.then(
+      (value) => { finish(); run.resolve(value); },
+      (error) => { finish(); run.reject(error); }
+    );
+  }
+}
+
+RunScheduler.PRIORITIES = PRIORITIES;
+
+module.exports = RunScheduler;
@@ -0,0 +1,141 @@
+const { performance } = require('perf_hooks');
+
+// Timeline of one Claude run, from the moment the message was sent to the end
+// of the turn. Times are milliseconds since the message was sent.
+//
+// Marks (each recorded once): start (left the run queue), spawn or acquire
+// (process ready - spawned, or taken from the warm pool), first_stdout_byte,
+// init, first_token (first assistant output; stream-json delivers whole
+// messages), result and close. Tools are tracked from their tool_use to their
+// tool_result. Checkpoint work done inline with the stream is summed
+// separately.
+class RunTimeline {
+  constructor(sessionId, options = {}) {
+    this.sessionId = sessionId;
+    this.mode = options.mode || null;
+    this.startedAt = new Date().toISOString();
+    this.origin = performance.now();
+
+    this.marks = {};
+    this.markData = {};
+    this.tools = new Map(); // tool_use id -> { name, startMs, endMs, status }
+    this.stdoutBytes = 0;
+    this.stderrBytes = 0;
+    this.checkpointMs = 0;
+    this.checkpointOps = 0;
+    this.exitCode = null;
+    this.finished = null;
+  }
+
+  now() {
+    return performance.now() - this.origin;
+  }
+
+  // Record `name` the first time only
+  mark(name, data) {
+    if (this.marks[name] === undefined) {
+      this.marks[name] = this.now();
+      if (data !== undefined) {
+        this.markData[name] = data;
+      }
+    }
+  }
+
+  toolStarted(id, name) {
+    if (id && !this.tools.has(id)) {
+      this.tools.set(id, { name, startMs: this.now(), endMs: null, status: 'running' });
+    }
+  }
+
+  toolFinished(id, isError) {
+    const tool = this.tools.get(id);
+    if (tool && tool.endMs === null) {
+      tool.endMs = this.now();
+      tool.status = isError ? 'failed' : 'succeeded';
+    }
+  }
+
+  runningToolCount() {
+    let count = 0;
+    for (const tool of this.tools.values()) {
+      if (tool.endMs === null) count++;
+    }
+    return count;
+  }
+
+  // Time `fn` as checkpoint overhead
+  async measureCheckpoint(fn) {
+    const started = performance.now();
+    try {
+      return await fn();
+    } finally {
+      this.checkpointMs += performance.now() - started;
+      this.checkpointOps++;
+    }
+  }
+
+  // Close the timeline; returns the summary stored with the assistant message
+  finish(exitCode) {
+    if (!this.finished) {
+      this.mark('close');
+      this.exitCode = exitCode;
+      this.finished = this.toJSON();
+    }
+    return this.finished;
+  }
+
+  // Milliseconds between two marks, or null if either is missing
+  between(from, to) {
+    if (this.marks[from] === undefined || this.marks[to] === undefined) {
+      return null;
+    }
+    return round(this.marks[to] - this.marks[from]);
+  }
+
+  toJSON() {
+    const marks = {};
+    for (const [name, at] of Object.entries(this.marks)) {
+      marks[name] = round(at);
+    }
+    const processReady = this.marks.spawn !== undefined ? 'spawn' : 'acquire';
+
+    return {
+      sessionId: this.sessionId,
+      mode: this.mode,
+      startedAt: this.startedAt,
+      exitCode: this.exitCode,
+      totalMs: round(this.marks.close !== undefined ? this.marks.close : this.now()),
+      marks,
+      markData: this.markData,
+      durations: {
+        queueMs: marks.start !== undefined ? marks.start : null,
+        processReadyMs: this.between('start', processReady),
+        timeToFirstByteMs: this.between('start', 'first_stdout_byte'),
+        timeToInitMs: this.between('start', 'init'),
+        timeToFirstTokenMs: this.between('start', 'first_token'),
+        responseMs: this.between('start', 'result')
+      },
+      tools: Array.from(this.tools.entries()).map(([id, tool]) => ({
+        id,
+        name: tool.name,
+        startMs: round(tool.startMs),
+        durationMs: tool.endMs === null ? null : round(tool.endMs - tool.startMs),
+        status: tool.status
+      })),
+      bytes: {
+        stdout: this.stdoutBytes,
+        stderr: this.stderrBytes
+      },
+      checkpoint: {
+        totalMs: round(this.checkpointMs),
+        operations: this.checkpointOps
+      }
+    };
+  }
+}
+
+function round(ms) {
+  return Math.round(ms * 10) / 10;
+}
+
+module.exports = RunTimeline;
@@ -2,30 +2,55 @@ const fs = require('fs').promises;
 const path = require('path');
 const os = require('os');
 const { v4: uuidv4 } = require('uuid');
+const SessionStore = require('./session-store');
+const RecoveryStateStore = require('./recovery-state-store');
+const Logger = require('./logger');
+
+const log = Logger.scope('sessions');
 
 class SessionManager {
   constructor() {
     this.sessions = new Map();
-    this.sessionStoragePath = path.join(os.homedir(), '.claude-code-chat', 'sessions.json');
-    this.recoveryStatePath = path.join(os.homedir(), '.claude-code-chat', 'recovery.json');
+    this.storageDir = path.join(os.homedir(), '.claude-code-chat');
+    this.recoveryStatePath = path.join(this.storageDir, 'recovery.json');
+    // Recovery state lives in memory; transitions are written immediately, streaming
+    // progress is coalesced (see RecoveryStateStore)
+    this.recoveryStates = new RecoveryStateStore(this.recoveryStatePath);
+    // Append-only per-session journals + metadata index (migrates sessions.json on first load)
+    this.store = new SessionStore(this.storageDir);
+
+    // Lazy loading keeps only session headers in memory at startup; message arrays
+    // are hydrated on demand and evicted least-recently-used past the budget
+    this.lazyLoading = true;
+    this.messageCacheBudgetBytes = 64 * 1024 * 1024;
+    this.hydratedSessions = new Map(); // sessionId -> approx bytes, in LRU order
+    this.hydrationPromises = new Map();
+    this.pinnedSessions = new Map(); // sessionId -> pin count (never evicted)
+  }
+
+  // Apply session storage settings (see ModelConfig.getSessionStorageSettings)
+  configure(settings = {}) {
+    if (typeof settings.lazyLoading === 'boolean') {
+      this.lazyLoading = settings.lazyLoading;
+    }
+    if (typeof settings.messageCacheBudgetMB === 'number' && settings.messageCacheBudgetMB > 0) {
+      this.messageCacheBudgetBytes = settings.messageCacheBudgetMB * 1024 * 1024;
+    }
   }
 
   // Load sessions from storage
   async loadSessions() {
     try {
-      const dir = path.dirname(this.sessionStoragePath);
-      await fs.mkdir(dir, { recursive: true });
-
-      const data = await fs.readFile(this.sessionStoragePath, 'utf8');
-      const sessionData = JSON.parse(data);
+      const sessionData = this.lazyLoading ? await this.store.loadHeaders() : await this.store.load();
 
       this.sessions.clear();
+      this.hydratedSessions.clear();
       sessionData.forEach(session => {
         // Ensure sessions have all required fields
         const normalizedSession = {
           id: session.id,
           title: session.title || 'Untitled Conversation',
-          messages: session.messages || [],
+          messageCount: Array.isArray(session.messages) ? session.messages.length : (session.messageCount || 0),
           createdAt: session.createdAt || new Date().toISOString(),
           updatedAt: session.updatedAt || new Date().toISOString(),
           claudeSessionId: session.claudeSessionId || null,
@@ -37,45 +62,121 @@ class SessionManager {
           workspaceId: session.workspaceId || null, // ID of the workspace this session belongs to
           workspaceName: session.workspaceName || null // Name of the workspace for quick reference
         };
+        // In lazy mode the messages property is only present once hydrated
+        if (!this.lazyLoading) {
+          normalizedSession.messages = session.messages || [];
+        }
         this.sessions.set(session.id, normalizedSession);
       });
 
-      console.log(`Loaded ${this.sessions.size} sessions from storage`);
+      log.info(`Loaded ${this.sessions.size} sessions from storage${this.lazyLoading ? ' (headers only)' : ''}`);
     } catch (error) {
-      // File doesn't exist or is invalid, start with empty sessions
-      console.log('No existing sessions found, starting fresh');
+      log.error('Failed to load sessions, starting fresh:', error);
     }
   }
 
-  // Atomic session save with backup
+  // Persist metadata for all sessions and flush pending journal writes.
+  // Message bodies are already on disk in the per-session journals.
   async saveSessions() {
     try {
-      const dir = path.dirname(this.sessionStoragePath);
-      await fs.mkdir(dir, { recursive: true });
-
       const sessionData = Array.from(this.sessions.values());
-      const tempPath = this.sessionStoragePath + '.tmp';
-      const backupPath = this.sessionStoragePath + '.backup';
+      await this.store.saveAll(sessionData);
 
-      // Write to temporary file first
-      await fs.writeFile(tempPath, JSON.stringify(sessionData, null, 2));
+      log.debug(`Saved ${sessionData.length} sessions to storage`);
+    } catch (error) {
+      log.error('Failed to save sessions:', error);
+      throw error; // Re-throw to allow callers to handle
+    }
+  }
 
-      // Create backup of existing file if it exists
-      try {
-        await fs.access(this.sessionStoragePath);
-        await fs.copyFile(this.sessionStoragePath, backupPath);
-      } catch (err) {
-        // Original file doesn't exist, that's fine
+  // Make sure a session's messages are in memory, loading them from its journal
+  // if needed. Returns the session.
+  async loadSessionMessages(sessionId) {
+    const session = this.sessions.get(sessionId);
+    if (!session) {
+      throw new Error('Session not found');
+    }
+
+    if (!Array.isArray(session.messages)) {
+      let hydration = this.hydrationPromises.get(sessionId);
+      if (!hydration) {
+        hydration = this.store.loadMessages(sessionId).then(messages => {
+          if (!Array.isArray(session.messages)) {
+            session.messages = messages;
+            session.messageCount = messages.length;
+          }
+        }).finally(() => {
+          this.hydrationPromises.delete(sessionId);
+        });
+        this.hydrationPromises.set(sessionId, hydration);
       }
+      await hydration;
+    }
 
-      // Atomically move temp file to final location
-      await fs.rename(tempPath, this.sessionStoragePath);
+    if (this.lazyLoading) {
+      this.touchHydratedSession(sessionId);
+    }
 
-      console.log(`Saved ${sessionData.length} sessions to storage`);
-    } catch (error) {
-      console.error('Failed to save sessions:', error);
-      throw error; // Re-throw to allow callers to handle
+    return session;
+  }
+
+  // Mark a session as most recently used and enforce the memory budget
+  touchHydratedSession(sessionId) {
+    this.hydratedSessions.delete(sessionId);
+    this.hydratedSessions.set(sessionId, this.store.getJournalBytes(sessionId));
+    this.evictHydratedSessions(sessionId);
+  }
+
+  // Drop message arrays of least recently used sessions until under budget
+  evictHydratedSessions(keepSessionId) {
+    let totalBytes = 0;
+    for (const bytes of this.hydratedSessions.values()) {
+      totalBytes += bytes;
     }
+
+    for (const [sessionId, bytes] of this.hydratedSessions) {
+      if (totalBytes <= this.messageCacheBudgetBytes) break;
+      if (sessionId === keepSessionId || this.pinnedSessions.has(sessionId)) continue;
+
+      const session = this.sessions.get(sessionId);
+      if (session && Array.isArray(session.messages)) {
+        session.messageCount = session.messages.length;
+        delete session.messages;
+      }
+      this.hydratedSessions.delete(sessionId);
+      totalBytes -= bytes;
+    }
+  }
+
+  // Keep a session's messages in memory while something (e.g. a Claude run) uses them
+  pinSession(sessionId) {
+    this.pinnedSessions.set(sessionId, (this.pinnedSessions.get(sessionId) || 0) + 1);
+  }
+
+  unpinSession(sessionId) {
+    const count = (this.pinnedSessions.get(sessionId) || 0) - 1;
+    if (count > 0) {
+      this.pinnedSessions.set(sessionId, count);
+    } else {
+      this.pinnedSessions.delete(sessionId);
+    }
+  }
+
+  // Run fn(session) with the session's messages loaded and pinned, so hydrating
+  // other sessions during fn's awaits can't evict them
+  async withHydratedSession(sessionId, fn) {
+    this.pinSession(sessionId);
+    try {
+      const session = await this.loadSessionMessages(sessionId);
+      return await fn(session);
+    } finally {
+      this.unpinSession(sessionId);
+    }
+  }
+
+  // Message count that works for both hydrated sessions and headers
+  getMessageCount(session) {
+    return Array.isArray(session.messages) ? session.messages.length : (session.messageCount || 0);
   }
 
   // Save individual session immediately
@@ -92,56 +193,100 @@ class SessionManager {
     session.lastActivity = new Date().toISOString();
     session.updatedAt = new Date().toISOString();
 
-    // Save all sessions (could be optimized to save just this session in the future)
-    await this.saveSessions();
+    // Append a metadata entry to this session's journal; the index write is coalesced
+    await this.store.writeMeta(session);
 
     return session;
   }
 
   // Add message to session and save immediately
   async addMessageToSession(sessionId, message) {
-    const session = this.sessions.get(sessionId);
-    if (!session) {
-      throw new Error('Session not found');
-    }
-
-    // Ensure message has required fields
-    const normalizedMessage = {
-      id: message.id || uuidv4(),
-      type: message.type || 'user',
-      content: message.content || '',
-      timestamp: message.timestamp || new Date().toISOString(),
-      ...message // Allow additional fields
-    };
+    return this.withHydratedSession(sessionId, async (session) => {
+      // Ensure message has required fields
+      const normalizedMessage = {
+        id: message.id || uuidv4(),
+        type: message.type || 'user',
+        content: message.content || '',
+        timestamp: message.timestamp || new Date().toISOString(),
+        ...message // Allow additional fields
+      };
 
-    session.messages.push(normalizedMessage);
-    await this.saveSession(sessionId);
+      session.messages.push(normalizedMessage);
+      session.messageCount = session.messages.length;
+      await this.store.appendMessage(sessionId, normalizedMessage);
+      await this.saveSession(sessionId);
+      this.compactSessionIfNeeded(session);
+      if (this.lazyLoading) {
+        this.touchHydratedSession(sessionId);
+      }
 
-    return normalizedMessage;
+      return normalizedMessage;
+    });
   }
 
   // Update message in session and save immediately
   async updateMessageInSession(sessionId, messageId, updates) {
-    const session = this.sessions.get(sessionId);
-    if (!session) {
-      throw new Error('Session not found');
-    }
+    return this.withHydratedSession(sessionId, async (session) => {
+      const messageIndex = session.messages.findIndex(m => m.id === messageId);
+      if (messageIndex === -1) {
+        throw new Error('Message not found');
+      }
 
-    const messageIndex = session.messages.findIndex(m => m.id === messageId);
-    if (messageIndex === -1) {
-      throw new Error('Message not found');
-    }
+      // Update message
+      const updatedMessage = {
+        ...session.messages[messageIndex],
+        ...updates,
+        updatedAt: new Date().toISOString()
+      };
+      session.messages[messageIndex] = updatedMessage;
 
-    // Update message
-    session.messages[messageIndex] = {
-      ...session.messages[messageIndex],
-      ...updates,
-      updatedAt: new Date().toISOString()
-    };
+      await this.store.updateMessage(sessionId, updatedMessage);
+      await this.saveSession(sessionId);
+      this.compactSessionIfNeeded(session);
 
-    await this.saveSession(sessionId);
+      return updatedMessage;
+    });
+  }
+
+  // Set or clear the invalidated flag on every message after the given one
+  // (used when reverting/unreverting file changes) and journal the changes
+  async setMessagesInvalidatedAfter(sessionId, messageId, invalidated) {
+    return this.withHydratedSession(sessionId, async (session) => {
+      const messages = session.messages;
 
-    return session.messages[messageIndex];
+      const messageIndex = messages.findIndex(m => m.id === messageId);
+      if (messageIndex === -1) {
+        return false;
+      }
+
+      for (let i = messageIndex + 1; i < messages.length; i++) {
+        const message = messages[i];
+        if (!!message.invalidated === invalidated) continue;
+
+        if (invalidated) {
+          message.invalidated = true;
+        } else {
+          delete message.invalidated;
+        }
+        await this.store.updateMessage(sessionId, message);
+      }
+
+      this.compactSessionIfNeeded(session);
+      return true;
+    });
+  }
+
+  // Compact the session journal once superseded entries dominate it. Only a
+  // hydrated session can be compacted; a header would be written out with no messages.
+  compactSessionIfNeeded(session) {
+    if (!Array.isArray(session.messages)) {
+      return;
+    }
+    if (this.store.needsCompaction(session.id, session.messages.length)) {
+      this.store.compact(session).catch(error => {
+        log.error(`Failed to compact journal for session ${session.id}:`, error);
+      });
+    }
   }
 
   // Create new session
@@ -152,6 +297,7 @@ class SessionManager {
       id: sessionId,
       title: title || 'New Conversation',
       messages: [],
+      messageCount: 0,
       createdAt: now,
       updatedAt: now,
       lastActivity: now,
@@ -163,6 +309,9 @@ class SessionManager {
     };
 
     this.sessions.set(sessionId, session);
+    if (this.lazyLoading) {
+      this.touchHydratedSession(sessionId);
+    }
     await this.saveSession(sessionId);
 
     return session;
@@ -176,7 +325,8 @@ class SessionManager {
     }
 
     this.sessions.delete(sessionId);
-    await this.saveSessions();
+    this.hydratedSessions.delete(sessionId);
+    await this.store.deleteSession(sessionId);
 
     return true;
   }
@@ -203,7 +353,7 @@ class SessionManager {
     if (!session.cwd) {
       session.cwd = cwd;
       await this.saveSession(sessionId);
-      console.log(`Set working directory for session ${sessionId}: ${cwd}`);
+      log.debug(`Set working directory for session ${sessionId}: ${cwd}`);
     }
 
     return session;
@@ -233,12 +383,9 @@ class SessionManager {
     }
   }
 
-  // Get session context
-  getSessionContext(sessionId) {
-    const session = this.sessions.get(sessionId);
-    if (!session) {
-      throw new Error('Session not found');
-    }
+  // Get session context (hydrates the session's messages on demand)
+  async getSessionContext(sessionId) {
+    const session = await this.loadSessionMessages(sessionId);
 
     return {
       ...session,
@@ -256,14 +403,18 @@ class SessionManager {
     };
   }
 
-  // Get all sessions
+  // Get all sessions. In lazy mode only headers are returned; message arrays are
+  // fetched per session through getSessionContext.
   getSessions() {
     const sessionList = Array.from(this.sessions.values());
     // Add status information to each session
-    return sessionList.map(session => ({
-      ...session,
-      statusInfo: this.getSessionStatusInfo(session)
-    }));
+    return sessionList.map(session => {
+      const { messages, ...header } = session;
+      return {
+        ...(this.lazyLoading ? header : session),
+        statusInfo: this.getSessionStatusInfo(session)
+      };
+    });
   }
 
   // Get session by ID
@@ -296,7 +447,7 @@ class SessionManager {
   canResumeSession(session) {
     return session.claudeSessionId &&
            (session.status === 'active' || session.status === 'historical') &&
-           session.messages && session.messages.length > 0;
+           this.getMessageCount(session) > 0;
   }
 
   // Helper function to get session status info
@@ -306,58 +457,45 @@ class SessionManager {
       status: session.status || 'active',
       lastUserMessage: session.lastUserMessage,
       lastAssistantMessage: session.lastAssistantMessage,
-      messageCount: session.messages ? session.messages.length : 0,
+      messageCount: this.getMessageCount(session),
       lastActivity: session.lastActivity || session.updatedAt,
       hasWorkingDirectory: !!session.cwd,
       workingDirectory: session.cwd
     };
   }
 
-  // Recovery state management
-  async saveRecoveryState(sessionId, state) {
+  // Recovery state management. Pass { debounce: true } for frequent progress
+  // updates that may be coalesced; everything else is on disk when this resolves.
+  async saveRecoveryState(sessionId, state, options = {}) {
     try {
-      const dir = path.dirname(this.recoveryStatePath);
-      await fs.mkdir(dir, { recursive: true });
-
-      let recoveryData = {};
-      try {
-        const existing = await fs.readFile(this.recoveryStatePath, 'utf8');
-        recoveryData = JSON.parse(existing);
-      } catch (err) {
-        // File doesn't exist, start fresh
-      }
-
-      recoveryData[sessionId] = {
-        ...state,
-        timestamp: new Date().toISOString()
-      };
-
-      await fs.writeFile(this.recoveryStatePath, JSON.stringify(recoveryData, null, 2));
-      console.log('Recovery state saved for session:', sessionId);
+      await this.recoveryStates.update(sessionId, state, options);
+      log.debug('Recovery state saved for session:', sessionId);
     } catch (error) {
-      console.error('Failed to save recovery state:', error);
+      log.error('Failed to save recovery state:', error);
     }
   }
 
   async clearRecoveryState(sessionId) {
     try {
-      const data = await fs.readFile(this.recoveryStatePath, 'utf8');
-      const recoveryData = JSON.parse(data);
-
-      delete recoveryData[sessionId];
+      await this.recoveryStates.clear(sessionId);
+      log.debug('Recovery state cleared for session:', sessionId);
+    } catch (error) {
+      log.error('Failed to clear recovery state:', error);
+    }
+  }
 
-      await fs.writeFile(this.recoveryStatePath, JSON.stringify(recoveryData, null, 2));
-      console.log('Recovery state cleared for session:', sessionId);
+  // Write any debounced recovery state now (app shutdown)
+  async flushRecoveryState() {
+    try {
+      await this.recoveryStates.flush();
     } catch (error) {
-      // File doesn't exist or other error, which is fine
-      console.log('No recovery state to clear for session:', sessionId);
+      log.error('Failed to flush recovery state:', error);
     }
   }
 
   async recoverInterruptedSessions() {
     try {
-      const data = await fs.readFile(this.recoveryStatePath, 'utf8');
-      const recoveryData = JSON.parse(data);
+      const recoveryData = await this.recoveryStates.getAll();
 
       const now = new Date();
       const recoveredSessions = [];
@@ -370,12 +508,13 @@ class SessionManager {
         if (timeDiff < 30 * 60 * 1000) {
           const session = this.sessions.get(sessionId);
           if (session && state.lastUserMessage) {
-            console.log('Found interrupted session to recover:', sessionId);
+            log.debug('Found interrupted session to recover:', sessionId);
+            await this.loadSessionMessages(sessionId);
 
             // Check if the last user message exists in the session
             const lastMessage = session.messages[session.messages.length - 1];
             if (lastMessage && lastMessage.type === 'user' && lastMessage.content === state.lastUserMessage) {
-              console.log('Session appears to be interrupted during Claude response');
+              log.debug('Session appears to be interrupted during Claude response');
 
               // Add recovery indicator to session
               session.needsRecovery = true;
@@ -391,26 +530,15 @@ class SessionManager {
       }
 
       if (recoveredSessions.length > 0) {
-        console.log(`Recovered ${recoveredSessions.length} interrupted sessions:`, recoveredSessions);
+        log.info(`Recovered ${recoveredSessions.length} interrupted sessions:`, recoveredSessions);
         await this.saveSessions();
       }
 
-      // Clear old recovery data
-      const cleanedData = {};
-      for (const [sessionId, state] of Object.entries(recoveryData)) {
-        const stateTime = new Date(state.timestamp);
-        const timeDiff = now - stateTime;
-
-        // Keep recovery data for the last hour
-        if (timeDiff < 60 * 60 * 1000) {
-          cleanedData[sessionId] = state;
-        }
-      }
-
-      await fs.writeFile(this.recoveryStatePath, JSON.stringify(cleanedData, null, 2));
+      // Clear old recovery data, keeping the last hour
+      await this.recoveryStates.retain(state => now - new Date(state.timestamp) < 60 * 60 * 1000);
 
     } catch (error) {
-      console.log('No recovery data found or failed to read recovery state');
+      log.debug('No recovery data found or failed to read recovery state');
     }
   }
 
@@ -431,14 +559,14 @@ class SessionManager {
       session.updatedAt = new Date().toISOString();
 
       await this.saveSession(sessionId);
-      console.log(`Associated session ${sessionId} with workspace ${workspaceName}`);
+      log.debug(`Associated session ${sessionId} with workspace ${workspaceName}`);
 
       return {
         success: true,
         session: session
       };
     } catch (error) {
-      console.error('Failed to set session workspace:', error);
+      log.error('Failed to set session workspace:', error);
       return {
         success: false,
         error: error.message
@@ -459,14 +587,14 @@ class SessionManager {
       session.updatedAt = new Date().toISOString();
 
       await this.saveSession(sessionId);
-      console.log(`Cleared workspace association from session ${sessionId}`);
+      log.debug(`Cleared workspace association from session ${sessionId}`);
 
       return {
         success: true,
         session: session
       };
     } catch (error) {
-      console.error('Failed to clear session workspace:', error);
+      log.error('Failed to clear session workspace:', error);
       return {
         success: false,
         error: error.message
@@ -486,7 +614,7 @@ class SessionManager {
         sessions: workspaceSessions
       };
     } catch (error) {
-      console.error('Failed to get sessions by workspace:', error);
+      log.error('Failed to get sessions by workspace:', error);
       return {
         success: false,
         error: error.message,
@@ -529,7 +657,7 @@ class SessionManager {
         grouped: groupedSessions
       };
     } catch (error) {
-      console.error('Failed to group sessions by workspace:', error);
+      log.error('Failed to group sessions by workspace:', error);
       return {
         success: false,
         error: error.message,
@@ -553,7 +681,7 @@ class SessionManager {
 
       if (updatedCount > 0) {
         await this.saveSessions();
-        console.log(`Updated workspace name for ${updatedCount} sessions`);
+        log.debug(`Updated workspace name for ${updatedCount} sessions`);
       }
 
       return {
@@ -561,7 +689,7 @@ class SessionManager {
         updatedCount: updatedCount
       };
     } catch (error) {
-      console.error('Failed to update workspace name in sessions:', error);
+      log.error('Failed to update workspace name in sessions:', error);
       return {
         success: false,
         error: error.message,
@@ -586,7 +714,7 @@ class SessionManager {
 
       if (clearedCount > 0) {
         await this.saveSessions();
-        console.log(`Cleared workspace association from ${clearedCount} sessions`);
+        log.debug(`Cleared workspace association from ${clearedCount} sessions`);
       }
 
       return {
@@ -594,7 +722,7 @@ class SessionManager {
         clearedCount: clearedCount
       };
     } catch (error) {
-      console.error('Failed to remove workspace from sessions:', error);
+      log.error('Failed to remove workspace from sessions:', error);
       return {
         success: false,
         error: error.message,
@@ -610,18 +738,19 @@ class SessionManager {
 
       // Clear all sessions from memory
       this.sessions.clear();
+      this.hydratedSessions.clear();
 
-      // Save empty sessions to storage
-      await this.saveSessions();
+      // Remove all session journals and the index
+      await this.store.clear();
 
-      console.log(`Cleared all ${sessionCount} sessions`);
+      log.info(`Cleared all ${sessionCount} sessions`);
 
       return {
         success: true,
         clearedCount: sessionCount
       };
     } catch (error) {
-      console.error('Failed to clear all sessions:', error);
+      log.error('Failed to clear all sessions:', error);
       return {
         success: false,
         error: error.message,
@@ -648,13 +777,13 @@ class SessionManager {
       // Check if lastUserMessage metadata matches actual last user message
       if (actualLastUserMessage && session.lastUserMessage) {
         if (session.lastUserMessage !== actualLastUserMessage.content) {
-          console.warn(`Session ${session.id}: lastUserMessage metadata doesn't match actual message`);
-          console.warn(`  Metadata: "${session.lastUserMessage}"`);
-          console.warn(`  Actual: "${actualLastUserMessage.content}"`);
+          log.warn(`Session ${session.id}: lastUserMessage metadata doesn't match actual message`);
+          log.warn(`  Metadata: "${session.lastUserMessage}"`);
+          log.warn(`  Actual: "${actualLastUserMessage.content}"`);
           
           // Auto-correct the metadata
           session.lastUserMessage = actualLastUserMessage.content;
-          console.log(`  Auto-corrected lastUserMessage for session ${session.id}`);
+          log.debug(`  Auto-corrected lastUserMessage for session ${session.id}`);
         }
       }
 
@@ -662,20 +791,20 @@ class SessionManager {
       if (actualLastAssistantMessage && session.lastAssistantMessage) {
         const actualContent = this.extractTextFromMessage(actualLastAssistantMessage.content);
         if (session.lastAssistantMessage !== actualContent) {
-          console.warn(`Session ${session.id}: lastAssistantMessage metadata doesn't match actual message`);
-          console.warn(`  Metadata length: ${session.lastAssistantMessage.length} chars`);
-          console.warn(`  Actual length: ${actualContent.length} chars`);
+          log.warn(`Session ${session.id}: lastAssistantMessage metadata doesn't match actual message`);
+          log.warn(`  Metadata length: ${session.lastAssistantMessage.length} chars`);
+          log.warn(`  Actual length: ${actualContent.length} chars`);
           
           // Auto-correct the metadata
           session.lastAssistantMessage = actualContent;
-          console.log(`  Auto-corrected lastAssistantMessage for session ${session.id}`);
+          log.debug(`  Auto-corrected lastAssistantMessage for session ${session.id}`);
         }
       }
     }
 
     // Validate claudeSessionId format (should be UUID)
     if (session.claudeSessionId && !this.isValidUUID(session.claudeSessionId)) {
-      console.warn(`Session ${session.id}: claudeSessionId is not a valid UUID: ${session.claudeSessionId}`);
+      log.warn(`Session ${session.id}: claudeSessionId is not a valid UUID: ${session.claudeSessionId}`);
     }
 
     // Validate working directory exists if set
@@ -683,10 +812,10 @@ class SessionManager {
       const fs = require('fs');
       try {
         if (!fs.existsSync(session.cwd)) {
-          console.warn(`Session ${session.id}: working directory no longer exists: ${session.cwd}`);
+          log.warn(`Session ${session.id}: working directory no longer exists: ${session.cwd}`);
         }
       } catch (error) {
-        console.warn(`Session ${session.id}: cannot validate working directory: ${error.message}`);
+        log.warn(`Session ${session.id}: cannot validate working directory: ${error.message}`);
       }
     }
 
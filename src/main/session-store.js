@@ -0,0 +1,511 @@
+const fs = require('fs').promises;
+const path = require('path');
+const Logger = require('./logger');
+
+const log = Logger.scope('session-store');
+
+// Append-only session storage engine.
+//
+// Each session gets its own JSONL journal (<sessionId>.jsonl) that only ever grows
+// between compactions, plus one small index.json holding session metadata (no
+// message bodies). Journal entries:
+//   { op: 'meta', rev, session }  - session metadata snapshot (without messages)
+//   { op: 'add', message }        - message appended to the session
+//   { op: 'update', message }     - full replacement of an existing message by id
+//
+// Every meta entry carries a per-session revision number. The index records the
+// revision it was written at, so on load only journal metadata newer than the
+// index is replayed - the index write can be coalesced without losing updates.
+class SessionStore {
+  constructor(baseDir, options = {}) {
+    this.baseDir = baseDir;
+    this.journalDir = path.join(baseDir, 'sessions');
+    this.indexPath = path.join(this.journalDir, 'index.json');
+    this.legacyStoragePath = path.join(baseDir, 'sessions.json');
+
+    this.indexFlushDelay = options.indexFlushDelay ?? 250;
+    this.compactionMinOps = options.compactionMinOps ?? 200;
+
+    this.index = new Map(); // sessionId -> metadata (with rev)
+    this.journalStats = new Map(); // sessionId -> { rev, ops, bytes }
+    this.writeChains = new Map(); // sessionId -> tail of serialized journal writes
+    this.sealedJournals = new Set(); // sessionIds whose journal is known to end with a newline
+    this.indexTimer = null;
+    this.indexWriteChain = Promise.resolve();
+  }
+
+  getJournalPath(sessionId) {
+    return path.join(this.journalDir, `${sessionId}.jsonl`);
+  }
+
+  // Split a session into its metadata and message list. Metadata keeps a
+  // messageCount so headers can be listed without loading the messages.
+  static splitSession(session) {
+    const { messages, ...meta } = session;
+    if (Array.isArray(messages)) {
+      meta.messageCount = messages.length;
+    }
+    return { meta, messages: messages || [] };
+  }
+
+  // Load all sessions (metadata + messages), migrating sessions.json on first run
+  async load() {
+    await fs.mkdir(this.journalDir, { recursive: true });
+    await this.migrateLegacyStorage();
+
+    this.index = await this.readIndex();
+    this.journalStats.clear();
+
+    const sessions = new Map();
+    for (const [sessionId, meta] of this.index) {
+      sessions.set(sessionId, { ...meta, messages: [] });
+      this.journalStats.set(sessionId, { rev: meta.rev || 0, ops: 0, bytes: 0 });
+    }
+
+    // Journals without an index entry belong to sessions created just before a crash
+    const files = await fs.readdir(this.journalDir);
+    const journalIds = files.filter(f => f.endsWith('.jsonl')).map(f => f.slice(0, -'.jsonl'.length));
+
+    let recovered = 0;
+    for (const sessionId of journalIds) {
+      const replayed = await this.replayJournal(sessionId);
+      const indexed = sessions.get(sessionId);
+
+      if (indexed) {
+        const meta = replayed.rev > (indexed.rev || 0) ? replayed.meta : null;
+        sessions.set(sessionId, { ...indexed, ...(meta || {}), messages: replayed.messages });
+      } else if (replayed.meta) {
+        sessions.set(sessionId, { ...replayed.meta, messages: replayed.messages });
+        recovered++;
+      } else {
+        continue;
+      }
+
+      const stats = this.journalStats.get(sessionId) || { rev: 0, ops: 0, bytes: 0 };
+      this.journalStats.set(sessionId, {
+        rev: Math.max(stats.rev, replayed.rev),
+        ops: replayed.ops,
+        bytes: replayed.bytes
+      });
+    }
+
+    if (recovered > 0) {
+      log.info(`Recovered ${recovered} sessions from journals missing in the index`);
+    }
+
+    // Index entries whose journal disappeared still keep their metadata
+    for (const session of sessions.values()) {
+      const { meta } = SessionStore.splitSession(session);
+      this.index.set(session.id, { ...meta, rev: this.journalStats.get(session.id)?.rev || 0 });
+    }
+
+    if (recovered > 0) {
+      await this.flushIndex();
+    }
+
+    return Array.from(sessions.values()).map(session => {
+      const { rev, ...rest } = session;
+      return rest;
+    });
+  }
+
+  // Load only session headers (metadata, messageCount, previews) from the index.
+  // Message bodies stay on disk until loadMessages is called. Journals missing from
+  // the index, or modified after it was written (app died inside the coalescing
+  // window), are replayed so their metadata is not lost.
+  async loadHeaders() {
+    await fs.mkdir(this.journalDir, { recursive: true });
+    await this.migrateLegacyStorage();
+
+    this.index = await this.readIndex();
+    this.journalStats.clear();
+
+    let indexMtime = 0;
+    try {
+      indexMtime = (await fs.stat(this.indexPath)).mtimeMs;
+    } catch (err) {
+      // No index yet
+    }
+
+    for (const [sessionId, meta] of this.index) {
+      this.journalStats.set(sessionId, { rev: meta.rev || 0, ops: 0, bytes: 0 });
+    }
+
+    const files = await fs.readdir(this.journalDir);
+    let replayedCount = 0;
+    for (const file of files) {
+      if (!file.endsWith('.jsonl')) continue;
+      const sessionId = file.slice(0, -'.jsonl'.length);
+
+      let journalStat;
+      try {
+        journalStat = await fs.stat(path.join(this.journalDir, file));
+      } catch (err) {
+        continue;
+      }
+
+      const stats = this.getStats(sessionId);
+      stats.bytes = journalStat.size;
+
+      const indexed = this.index.get(sessionId);
+      if (indexed && journalStat.mtimeMs <= indexMtime) continue;
+
+      const replayed = await this.replayJournal(sessionId);
+      replayedCount++;
+      stats.ops = replayed.ops;
+      if (replayed.meta && (!indexed || replayed.rev > (indexed.rev || 0))) {
+        this.index.set(sessionId, { ...replayed.meta, messageCount: replayed.messages.length, rev: replayed.rev });
+        stats.rev = replayed.rev;
+      } else if (indexed) {
+        indexed.messageCount = replayed.messages.length;
+      }
+    }
+
+    if (replayedCount > 0) {
+      log.info(`Replayed ${replayedCount} session journals newer than the index`);
+      await this.flushIndex();
+    }
+
+    return Array.from(this.index.values()).map(entry => {
+      const { rev, ...header } = entry;
+      return header;
+    });
+  }
+
+  // Load the message list for one session from its journal
+  async loadMessages(sessionId) {
+    // Let queued writes land first so the replay sees them
+    const pending = this.writeChains.get(sessionId);
+    if (pending) {
+      await pending.catch(() => {});
+    }
+
+    const replayed = await this.replayJournal(sessionId);
+    const stats = this.getStats(sessionId);
+    stats.ops = replayed.ops;
+    stats.bytes = replayed.bytes;
+    return replayed.messages;
+  }
+
+  // Approximate on-disk size of a session's journal, used for memory budgeting
+  getJournalBytes(sessionId) {
+    return this.journalStats.get(sessionId)?.bytes || 0;
+  }
+
+  async readIndex() {
+    const index = new Map();
+    try {
+      const data = await fs.readFile(this.indexPath, 'utf8');
+      const entries = JSON.parse(data);
+      for (const entry of entries) {
+        if (entry && entry.id) {
+          index.set(entry.id, entry);
+        }
+      }
+    } catch (error) {
+      if (error.code !== 'ENOENT') {
+        log.error('Failed to read session index, rebuilding from journals:', error.message);
+      }
+    }
+    return index;
+  }
+
+  // Rebuild a session's messages (and latest metadata) from its journal
+  async replayJournal(sessionId) {
+    const result = { meta: null, rev: 0, messages: [], ops: 0, bytes: 0 };
+
+    let raw;
+    try {
+      raw = await fs.readFile(this.getJournalPath(sessionId));
+    } catch (error) {
+      if (error.code !== 'ENOENT') {
+        log.error(`Failed to read journal for session ${sessionId}:`, error.message);
+      }
+      return result;
+    }
+
+    result.bytes = raw.length;
+    const data = raw.toString('utf8');
+    const positions = new Map(); // message id -> index in result.messages
+    const lines = data.split('\n');
+    for (let i = 0; i < lines.length; i++) {
+      const line = lines[i];
+      if (!line.trim()) continue;
+
+      let entry;
+      try {
+        entry = JSON.parse(line);
+      } catch (error) {
+        // A torn final line means the app died mid-append; anything else is corruption
+        if (i < lines.length - 1 && lines.slice(i + 1).some(l => l.trim())) {
+          log.warn(`Skipping corrupt journal entry ${i + 1} for session ${sessionId}`);
+        }
+        continue;
+      }
+
+      result.ops++;
+      if (entry.op === 'meta' && entry.session) {
+        if ((entry.rev || 0) >= result.rev) {
+          result.meta = entry.session;
+          result.rev = entry.rev || 0;
+        }
+      } else if (entry.op === 'add' && entry.message) {
+        positions.set(entry.message.id, result.messages.length);
+        result.messages.push(entry.message);
+      } else if (entry.op === 'update' && entry.message) {
+        const position = positions.get(entry.message.id);
+        if (position !== undefined) {
+          result.messages[position] = entry.message;
+        }
+      }
+    }
+
+    return result;
+  }
+
+  // One-time migration from the single whole-file sessions.json
+  async migrateLegacyStorage() {
+    try {
+      await fs.access(this.indexPath);
+      return; // Already migrated
+    } catch (err) {
+      // No index yet
+    }
+
+    let legacySessions;
+    try {
+      const data = await fs.readFile(this.legacyStoragePath, 'utf8');
+      legacySessions = JSON.parse(data);
+    } catch (error) {
+      return; // Nothing to migrate
+    }
+
+    if (!Array.isArray(legacySessions)) {
+      return;
+    }
+
+    log.info(`Migrating ${legacySessions.length} sessions from sessions.json to journal storage`);
+
+    for (const session of legacySessions) {
+      if (!session || !session.id) continue;
+      const { meta, messages } = SessionStore.splitSession(session);
+      await this.writeCompactedJournal(session.id, meta, messages, 1);
+      this.index.set(session.id, { ...meta, rev: 1 });
+    }
+
+    await this.writeIndexFile();
+
+    // Keep the original file around, but out of the way
+    await fs.rename(this.legacyStoragePath, this.legacyStoragePath + '.migrated');
+    log.info('Session migration complete, legacy file kept as sessions.json.migrated');
+  }
+
+  // Serialize all journal writes for a session so entries never interleave
+  enqueue(sessionId, task) {
+    const previous = this.writeChains.get(sessionId) || Promise.resolve();
+    const next = previous.catch(() => {}).then(task);
+    this.writeChains.set(sessionId, next);
+    next.finally(() => {
+      if (this.writeChains.get(sessionId) === next) {
+        this.writeChains.delete(sessionId);
+      }
+    }).catch(() => {});
+    return next;
+  }
+
+  appendEntry(sessionId, entry) {
+    // Serialize now so later in-memory mutations can't leak into this entry
+    const line = JSON.stringify(entry) + '\n';
+    const stats = this.getStats(sessionId);
+    stats.ops++;
+    stats.bytes += Buffer.byteLength(line);
+    return this.enqueue(sessionId, async () => {
+      const journalPath = this.getJournalPath(sessionId);
+      const prefix = this.sealedJournals.has(sessionId) ? '' : await SessionStore.getTornTailPrefix(journalPath);
+      await fs.appendFile(journalPath, prefix + line);
+      this.sealedJournals.add(sessionId);
+    });
+  }
+
+  // A crash mid-append leaves a final line without its newline; appending
+  // straight after it would merge the next entry into that torn line, so the
+  // first append of a process terminates it first
+  static async getTornTailPrefix(journalPath) {
+    let handle;
+    try {
+      handle = await fs.open(journalPath, 'r');
+    } catch (error) {
+      if (error.code === 'ENOENT') return '';
+      throw error;
+    }
+    try {
+      const { size } = await handle.stat();
+      if (size === 0) return '';
+      const lastByte = Buffer.alloc(1);
+      await handle.read(lastByte, 0, 1, size - 1);
+      if (lastByte[0] === 0x0A) return '';
+      log.warn(`Journal ${path.basename(journalPath)} ends with a torn entry; starting a new line`);
+      return '\n';
+    } finally {
+      await handle.close();
+    }
+  }
+
+  getStats(sessionId) {
+    let stats = this.journalStats.get(sessionId);
+    if (!stats) {
+      stats = { rev: 0, ops: 0, bytes: 0 };
+      this.journalStats.set(sessionId, stats);
+    }
+    return stats;
+  }
+
+  // Append a new message to the session journal
+  appendMessage(sessionId, message) {
+    return this.appendEntry(sessionId, { op: 'add', message });
+  }
+
+  // Record the new state of an existing message
+  updateMessage(sessionId, message) {
+    return this.appendEntry(sessionId, { op: 'update', message });
+  }
+
+  // Record session metadata in the journal and schedule a coalesced index write
+  writeMeta(session) {
+    const { meta } = SessionStore.splitSession(session);
+    const stats = this.getStats(session.id);
+    stats.rev++;
+
+    this.index.set(session.id, { ...meta, rev: stats.rev });
+    this.scheduleIndexFlush();
+
+    return this.appendEntry(session.id, { op: 'meta', rev: stats.rev, session: meta });
+  }
+
+  // Whether a session journal has accumulated enough superseded entries to compact.
+  // A compacted journal holds messageCount + 1 entries; allow each message an add
+  // and a metadata entry before counting the rest as overhead.
+  needsCompaction(sessionId, messageCount) {
+    const stats = this.journalStats.get(sessionId);
+    if (!stats) return false;
+    return stats.ops > this.compactionMinOps + messageCount * 2;
+  }
+
+  // Rewrite a journal as one metadata entry plus one entry per message
+  compact(session) {
+    const { meta, messages } = SessionStore.splitSession(session);
+    const stats = this.getStats(session.id);
+    stats.rev++;
+    const rev = stats.rev;
+
+    // Serialize the snapshot now; entries queued after this land after the rewrite
+    const contents = SessionStore.serializeCompacted(meta, messages, rev);
+    stats.ops = messages.length + 1;
+    stats.bytes = Buffer.byteLength(contents);
+
+    this.index.set(session.id, { ...meta, rev });
+    this.scheduleIndexFlush();
+
+    return this.enqueue(session.id, async () => {
+      await this.writeJournalAtomically(session.id, contents);
+      log.debug(`Compacted journal for session ${session.id} (${messages.length} messages)`);
+    });
+  }
+
+  static serializeCompacted(meta, messages, rev) {
+    const lines = [JSON.stringify({ op: 'meta', rev, session: meta })];
+    for (const message of messages) {
+      lines.push(JSON.stringify({ op: 'add', message }));
+    }
+    return lines.join('\n') + '\n';
+  }
+
+  async writeCompactedJournal(sessionId, meta, messages, rev) {
+    await this.writeJournalAtomically(sessionId, SessionStore.serializeCompacted(meta, messages, rev));
+  }
+
+  async writeJournalAtomically(sessionId, contents) {
+    const journalPath = this.getJournalPath(sessionId);
+    const tempPath = journalPath + '.tmp';
+    await fs.writeFile(tempPath, contents);
+    await fs.rename(tempPath, journalPath);
+  }
+
+  // Remove a session's journal and index entry
+  async deleteSession(sessionId) {
+    this.index.delete(sessionId);
+    this.journalStats.delete(sessionId);
+    this.sealedJournals.delete(sessionId);
+
+    await this.enqueue(sessionId, async () => {
+      try {
+        await fs.unlink(this.getJournalPath(sessionId));
+      } catch (error) {
+        if (error.code !== 'ENOENT') throw error;
+      }
+    });
+
+    await this.flushIndex();
+  }
+
+  // Remove every session
+  async clear() {
+    const sessionIds = Array.from(new Set([...this.index.keys(), ...this.journalStats.keys()]));
+    this.index.clear();
+    this.journalStats.clear();
+
+    await Promise.all(sessionIds.map(sessionId => this.enqueue(sessionId, async () => {
+      try {
+        await fs.unlink(this.getJournalPath(sessionId));
+      } catch (error) {
+        if (error.code !== 'ENOENT') throw error;
+      }
+    })));
+
+    await this.flushIndex();
+  }
+
+  // Persist metadata for all sessions straight to the index (bulk metadata changes).
+  // The revision stays at the journal's: nothing is journaled here, and at an
+  // equal revision the index metadata wins on load.
+  async saveAll(sessions) {
+    for (const session of sessions) {
+      const { meta } = SessionStore.splitSession(session);
+      const stats = this.getStats(session.id);
+      this.index.set(session.id, { ...meta, rev: stats.rev });
+    }
+    await this.flush();
+  }
+
+  scheduleIndexFlush() {
+    if (this.indexTimer) return;
+    this.indexTimer = setTimeout(() => {
+      this.indexTimer = null;
+      this.flushIndex().catch(error => log.error('Failed to write session index:', error));
+    }, this.indexFlushDelay);
+  }
+
+  // Write the index now, serialized with any in-flight index write
+  flushIndex() {
+    if (this.indexTimer) {
+      clearTimeout(this.indexTimer);
+      this.indexTimer = null;
+    }
+    this.indexWriteChain = this.indexWriteChain.catch(() => {}).then(() => this.writeIndexFile());
+    return this.indexWriteChain;
+  }
+
+  async writeIndexFile() {
+    const tempPath = this.indexPath + '.tmp';
+    await fs.writeFile(tempPath, JSON.stringify(Array.from(this.index.values())));
+    await fs.rename(tempPath, this.indexPath);
+  }
+
+  // Wait for all pending journal writes and write the index
+  async flush() {
+    await Promise.all(Array.from(this.writeChains.values()).map(p => p.catch(() => {})));
+    await this.flushIndex();
+  }
+}
+
+module.exports = SessionStore;
@@ -0,0 +1,172 @@
+const fs = require('fs').promises;
+const path = require('path');
+const Logger = require('./logger');
+
+const log = Logger.scope('tool-output');
+
+// Spills large tool outputs to disk so they don't live in the session, the
+// IPC payloads and the renderer.
+//
+// Outputs over thresholdBytes are written to <baseDir>/<sessionId>/<outputId>.txt
+// and the message keeps a preview (the head and tail of the output) plus a
+// handle { sessionId, outputId, bytes }. readRange() returns the full output in
+// byte ranges, cut at UTF-8 character boundaries.
+//
+// spill() decides and builds the preview synchronously, so it can be used in
+// the middle of stream processing without reordering it; the file is written
+// in the background and readRange() waits for a pending write.
+const DEFAULT_RANGE_BYTES = 256 * 1024;
+const MAX_RANGE_BYTES = 4 * 1024 * 1024;
+
+class ToolOutputSpool {
+  constructor(baseDir, options = {}) {
+    this.baseDir = baseDir;
+    this.thresholdBytes = options.thresholdBytes ?? 256 * 1024;
+    this.previewBytes = options.previewBytes ?? 16 * 1024;
+    this.pendingWrites = new Map(); // file path -> write promise
+  }
+
+  // Text of a tool_result's content: a string, or text blocks. Outputs with
+  // other blocks (e.g. images) return null and are never spilled.
+  static toText(content) {
+    if (typeof content === 'string') {
+      return content;
+    }
+    if (Array.isArray(content) && content.length > 0 && content.every(block => block?.type === 'text')) {
+      return content.map(block => block.text || '').join('\n');
+    }
+    return null;
+  }
+
+  // { preview, handle } if the output was spilled, null if it stays inline
+  spill(sessionId, outputId, content) {
+    const text = ToolOutputSpool.toText(content);
+    // A UTF-16 code unit encodes to at most 3 UTF-8 bytes
+    if (text === null || text.length * 3 <= this.thresholdBytes) {
+      return null;
+    }
+    const data = Buffer.from(text, 'utf8');
+    if (data.length <= this.thresholdBytes) {
+      return null;
+    }
+
+    const filePath = this.getFilePath(sessionId, outputId);
+    const write = fs.mkdir(path.dirname(filePath), { recursive: true })
+      .then(() => fs.writeFile(filePath, data))
+      .then(() => log.debug(`Spilled ${data.length} bytes of tool output ${outputId} for session ${sessionId}`))
+      .catch(error => log.error(`Failed to spill tool output ${outputId}:`, error.message))
+      .finally(() => {
+        if (this.pendingWrites.get(filePath) === write) {
+          this.pendingWrites.delete(filePath);
+        }
+      });
+    this.pendingWrites.set(filePath, write);
+
+    return {
+      preview: this.buildPreview(data),
+      handle: { sessionId, outputId, bytes: data.length }
+    };
+  }
+
+  buildPreview(data) {
+    const half = Math.floor(this.previewBytes / 2);
+    const head = data.subarray(0, ToolOutputSpool.charBoundary(data, half));
+    const tailStart = ToolOutputSpool.nextCharStart(data, data.length - half);
+    const tail = data.subarray(tailStart);
+    const omitted = tailStart - head.length;
+    return `${head.toString('utf8')}\n\n… ${omitted} bytes omitted …\n\n${tail.toString('utf8')}`;
+  }
+
+  // { data, offset, nextOffset, totalBytes, eof } for up to `length` bytes at
+  // `offset`; nextOffset is where the following range starts
+  async readRange(sessionId, outputId, offset = 0, length = DEFAULT_RANGE_BYTES) {
+    const filePath = this.getFilePath(sessionId, outputId);
+    await this.pendingWrites.get(filePath);
+    const handle = await fs.open(filePath, 'r');
+    try {
+      const { size } = await handle.stat();
+      const start = Math.max(0, Math.min(offset, size));
+      const wanted = Math.max(0, Math.min(length, MAX_RANGE_BYTES, size - start));
+      const buffer = Buffer.alloc(wanted);
+      const { bytesRead } = await handle.read(buffer, 0, wanted, start);
+
+      // Don't split a multi-byte character at the end, unless that is the file's end
+      const chunk = buffer.subarray(0, bytesRead);
+      const end = start + bytesRead >= size ? chunk.length : ToolOutputSpool.completeLength(chunk);
+      return {
+        data: chunk.subarray(0, end).toString('utf8'),
+        offset: start,
+        nextOffset: start + end,
+        totalBytes: size,
+        eof: start + end >= size
+      };
+    } finally {
+      await handle.close();
+    }
+  }
+
+  async removeSession(sessionId) {
+    const sessionDir = this.getSessionDir(sessionId);
+    await Promise.all(Array.from(this.pendingWrites)
+      .filter(([filePath]) => filePath.startsWith(sessionDir + path.sep))
+      .map(([, write]) => write));
+    try {
+      await fs.rm(sessionDir, { recursive: true, force: true });
+    } catch (error) {
+      log.warn(`Failed to remove tool outputs for session ${sessionId}:`, error.message);
+    }
+  }
+
+  getSessionDir(sessionId) {
+    return path.join(this.baseDir, ToolOutputSpool.safeName(sessionId));
+  }
+
+  getFilePath(sessionId, outputId) {
+    return path.join(this.getSessionDir(sessionId), `${ToolOutputSpool.safeName(outputId)}.txt`);
+  }
+
+  // Ids come from the renderer and the CLI; keep them to one path segment
+  static safeName(id) {
+    const name = String(id).replace(/[^A-Za-z0-9_-]/g, '_');
+    if (!name) {
+      throw new Error('Invalid tool output id');
+    }
+    return name;
+  }
+
+  // Largest offset <= `offset` that doesn't split a UTF-8 character
+  static charBoundary(data, offset) {
+    let index = Math.min(offset, data.length);
+    if (index >= data.length) {
+      return data.length;
+    }
+    while (index > 0 && (data[index] & 0xC0) === 0x80) {
+      index--;
+    }
+    return index;
+  }
+
+  // Length of `data` without a trailing, incomplete UTF-8 character
+  static completeLength(data) {
+    for (let index = data.length - 1; index >= Math.max(0, data.length - 4); index--) {
+      const byte = data[index];
+      if ((byte & 0xC0) === 0x80) {
+        continue;
+      }
+      const charLength = byte >= 0xF0 ? 4 : byte >= 0xE0 ? 3 : byte >= 0xC0 ? 2 : 1;
+      return index + charLength <= data.length ? data.length : index;
+    }
+    return data.length;
+  }
+
+  // Smallest offset >= `offset` that starts a UTF-8 character
+  static nextCharStart(data, offset) {
+    let index = Math.max(0, offset);
+    while (index < data.length && (data[index] & 0xC0) === 0x80) {
+      index++;
+    }
+    return index;
+  }
+}
+
+module.exports = ToolOutputSpool;
@@ -4,6 +4,9 @@ const path = require('path');
 const fs = require('fs');
 const os = require('os');
 const { URL } = require('url');
+const Logger = require('./logger');
+
+const log = Logger.scope('window-detector');
 
 /**
  * Window Detection Service
@@ -90,34 +93,34 @@ class WindowDetector {
       return this._runAppleScriptCache;
     }
 
-    console.log('Attempting to import run-applescript module...');
+    log.debug('Attempting to import run-applescript module...');
 
     // Try multiple import strategies
     const importStrategies = [
       // Strategy 1: Import runAppleScript function directly
       async () => {
-        console.log('Trying ES6 dynamic import with runAppleScript property...');
+        log.debug('Trying ES6 dynamic import with runAppleScript property...');
         const module = await import('run-applescript');
         return module.runAppleScript || module.default?.runAppleScript;
       },
 
       // Strategy 2: Import with destructuring
       async () => {
-        console.log('Trying destructured import...');
+        log.debug('Trying destructured import...');
         const { runAppleScript } = await import('run-applescript');
         return runAppleScript;
       },
 
       // Strategy 3: Direct module import fallback
       async () => {
-        console.log('Trying direct module import...');
+        log.debug('Trying direct module import...');
         const module = await import('run-applescript');
         return module.default || module;
       },
 
       // Strategy 4: CommonJS require (fallback)
       async () => {
-        console.log('Trying CommonJS require fallback...');
+        log.debug('Trying CommonJS require fallback...');
         // This should work in Node.js environments
         return require('run-applescript');
       }
@@ -125,40 +128,40 @@ class WindowDetector {
 
     for (let i = 0; i < importStrategies.length; i++) {
       try {
-        console.log(`Attempting import strategy ${i + 1}...`);
+        log.debug(`Attempting import strategy ${i + 1}...`);
         const runAppleScript = await importStrategies[i]();
 
         // Validate that we got a function
         if (typeof runAppleScript === 'function') {
-          console.log(`✅ Successfully imported run-applescript using strategy ${i + 1}`);
+          log.debug(`✅ Successfully imported run-applescript using strategy ${i + 1}`);
           this._runAppleScriptCache = runAppleScript;
           return runAppleScript;
         } else {
-          console.warn(`Strategy ${i + 1} returned non-function:`, typeof runAppleScript, runAppleScript);
+          log.warn(`Strategy ${i + 1} returned non-function:`, typeof runAppleScript, runAppleScript);
         }
       } catch (error) {
-        console.warn(`Strategy ${i + 1} failed:`, error.message);
+        log.warn(`Strategy ${i + 1} failed:`, error.message);
         if (error.stack) {
-          console.debug('Error stack:', error.stack);
+          log.debug('Error stack:', error.stack);
         }
       }
     }
 
     // All strategies failed
-    console.error('❌ All import strategies failed for run-applescript module');
-    console.error('This may be due to:');
-    console.error('1. Module not properly installed');
-    console.error('2. Electron/Node.js compatibility issues');
-    console.error('3. ESM/CommonJS module resolution problems');
+    log.error('❌ All import strategies failed for run-applescript module');
+    log.error('This may be due to:');
+    log.error('1. Module not properly installed');
+    log.error('2. Electron/Node.js compatibility issues');
+    log.error('3. ESM/CommonJS module resolution problems');
 
     // Try to provide more diagnostic info
     try {
       const packageInfo = require('../../package.json');
-      console.log('Package.json type:', packageInfo.type || 'commonjs');
-      console.log('Node.js version:', process.version);
-      console.log('Electron version:', process.versions.electron);
+      log.debug('Package.json type:', packageInfo.type || 'commonjs');
+      log.debug('Node.js version:', process.version);
+      log.debug('Electron version:', process.versions.electron);
     } catch (e) {
-      console.warn('Could not read package.json for diagnostics');
+      log.warn('Could not read package.json for diagnostics');
     }
 
     return null;
@@ -171,7 +174,7 @@ class WindowDetector {
     try {
       return systemPreferences.isTrustedAccessibilityClient(false);
     } catch (error) {
-      console.error('Error checking accessibility permissions:', error);
+      log.error('Error checking accessibility permissions:', error);
       return false;
     }
   }
@@ -185,20 +188,20 @@ class WindowDetector {
       // Only request permissions if user explicitly consents and we haven't already tried
       if (!userConsent || this.permissionRequestAttempted) {
         if (this.debugMode) {
-          console.log('Skipping permission request - userConsent:', userConsent, 'already attempted:', this.permissionRequestAttempted);
+          log.debug('Skipping permission request - userConsent:', userConsent, 'already attempted:', this.permissionRequestAttempted);
         }
         return await this.checkAccessibilityPermissions();
       }
 
       if (this.debugMode) {
-        console.log('User consented to accessibility permission request');
+        log.debug('User consented to accessibility permission request');
       }
 
       this.permissionRequestAttempted = true;
       this.userConsentForPermissions = true;
       return systemPreferences.isTrustedAccessibilityClient(true);
     } catch (error) {
-      console.error('Error requesting accessibility permissions:', error);
+      log.error('Error requesting accessibility permissions:', error);
       return false;
     }
   }
@@ -230,7 +233,7 @@ class WindowDetector {
           : 'Accessibility permissions required for window detection. Please grant permissions in System Preferences > Security & Privacy > Accessibility'
       };
     } catch (error) {
-      console.error('Error enabling window detection:', error);
+      log.error('Error enabling window detection:', error);
       return {
         success: false,
         hasPermissions: false,
@@ -252,7 +255,7 @@ class WindowDetector {
         windowDetectionEnabled: hasPermissions && this.userConsentForPermissions
       };
     } catch (error) {
-      console.error('Error getting permission status:', error);
+      log.error('Error getting permission status:', error);
       return {
         hasAccessibilityPermissions: false,
         userConsentForPermissions: false,
@@ -272,7 +275,7 @@ class WindowDetector {
           this.cache.lastUpdate &&
           Date.now() - this.cache.lastUpdate < this.cache.ttl) {
         if (this.debugMode) {
-          console.log('Returning cached running applications:', this.cache.runningApps);
+          log.debug('Returning cached running applications:', this.cache.runningApps);
         }
         return this.cache.runningApps;
       }
@@ -281,8 +284,8 @@ class WindowDetector {
       const runningApps = [];
 
       if (this.debugMode) {
-        console.log(`\n=== WINDOW DETECTION DEBUG ===`);
-        console.log(`Total processes found: ${processes.list.length}`);
+        log.debug(`\n=== WINDOW DETECTION DEBUG ===`);
+        log.debug(`Total processes found: ${processes.list.length}`);
 
         // Log all processes that might be related to our apps
         const relevantProcesses = processes.list.filter(p => {
@@ -294,19 +297,19 @@ class WindowDetector {
                  name.includes('microsoft excel') || command.includes('microsoft excel');
         });
 
-        console.log('\nPotentially relevant processes:');
+        log.debug('\nPotentially relevant processes:');
         relevantProcesses.forEach(p => {
-          console.log(`  - Name: "${p.name}", Command: "${p.command}", PID: ${p.pid}`);
+          log.debug(`  - Name: "${p.name}", Command: "${p.command}", PID: ${p.pid}`);
         });
       }
 
       // Filter for our supported applications
       for (const [appName, appConfig] of Object.entries(this.supportedApps)) {
         if (this.debugMode) {
-          console.log(`\nSearching for ${appName}:`);
-          console.log(`  - Primary process name: "${appConfig.processName}"`);
-          console.log(`  - Alternative names: [${appConfig.processNames.map(n => `"${n}"`).join(', ')}]`);
-          console.log(`  - Bundle ID: "${appConfig.bundleId}"`);
+          log.debug(`\nSearching for ${appName}:`);
+          log.debug(`  - Primary process name: "${appConfig.processName}"`);
+          log.debug(`  - Alternative names: [${appConfig.processNames.map(n => `"${n}"`).join(', ')}]`);
+          log.debug(`  - Bundle ID: "${appConfig.bundleId}"`);
         }
 
         // Enhanced process matching
@@ -359,9 +362,9 @@ class WindowDetector {
         });
 
         if (this.debugMode) {
-          console.log(`  - Found ${matchingProcesses.length} matching processes:`);
+          log.debug(`  - Found ${matchingProcesses.length} matching processes:`);
           matchingProcesses.forEach(p => {
-            console.log(`    * Name: "${p.name}", Command: "${p.command}", PID: ${p.pid}`);
+            log.debug(`    * Name: "${p.name}", Command: "${p.command}", PID: ${p.pid}`);
           });
         }
 
@@ -387,21 +390,21 @@ class WindowDetector {
           runningApps.push(appInfo);
 
           if (this.debugMode) {
-            console.log(`  ✅ Added ${appName} to running apps list`);
+            log.debug(`  ✅ Added ${appName} to running apps list`);
           }
         } else {
           if (this.debugMode) {
-            console.log(`  ❌ No matching process found for ${appName}`);
+            log.debug(`  ❌ No matching process found for ${appName}`);
           }
         }
       }
 
       if (this.debugMode) {
-        console.log(`\nFinal running apps: ${runningApps.length}`);
+        log.debug(`\nFinal running apps: ${runningApps.length}`);
         runningApps.forEach(app => {
-          console.log(`  - ${app.displayName} (${app.actualProcessName}, PID: ${app.pid})`);
+          log.debug(`  - ${app.displayName} (${app.actualProcessName}, PID: ${app.pid})`);
         });
-        console.log('=== END DEBUG ===\n');
+        log.debug('=== END DEBUG ===\n');
       }
 
       // Update cache
@@ -410,9 +413,9 @@ class WindowDetector {
 
       return runningApps;
     } catch (error) {
-      console.error('Error getting running applications:', error);
+      log.error('Error getting running applications:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
       return [];
     }
@@ -437,12 +440,12 @@ class WindowDetector {
     const workspaces = new Set();
 
     if (this.debugMode) {
-      console.log(`Searching for workspaces in: ${workspaceStoragePath}`);
+      log.debug(`Searching for workspaces in: ${workspaceStoragePath}`);
     }
 
     try {
       if (!fs.existsSync(workspaceStoragePath)) {
-        if (this.debugMode) console.log('Workspace storage path does not exist.');
+        if (this.debugMode) log.debug('Workspace storage path does not exist.');
         return [];
       }
 
@@ -465,18 +468,18 @@ class WindowDetector {
             }
           } catch (e) {
             if (this.debugMode) {
-              console.warn(`Could not parse ${workspaceJsonPath}:`, e.message);
+              log.warn(`Could not parse ${workspaceJsonPath}:`, e.message);
             }
           }
         }
       }
     } catch (e) {
-      console.error(`Error reading workspace storage for ${appName}:`, e);
+      log.error(`Error reading workspace storage for ${appName}:`, e);
     }
 
     const result = Array.from(workspaces);
     if (this.debugMode) {
-      console.log(`Found ${result.length} unique workspace paths for ${appName}.`);
+      log.debug(`Found ${result.length} unique workspace paths for ${appName}.`);
     }
     return result;
   }
@@ -488,12 +491,12 @@ class WindowDetector {
     try {
       const runAppleScript = await this.getRunAppleScript();
       if (!runAppleScript) {
-        console.warn('AppleScript runner not available');
+        log.warn('AppleScript runner not available');
         return [];
       }
 
       if (this.debugMode) {
-        console.log('\n=== VS CODE APPLESCRIPT DEBUG ===');
+        log.debug('\n=== VS CODE APPLESCRIPT DEBUG ===');
       }
 
       const script = `
@@ -522,28 +525,28 @@ class WindowDetector {
       `;
 
       if (this.debugMode) {
-        console.log('Executing VS Code AppleScript...');
+        log.debug('Executing VS Code AppleScript...');
       }
 
       const result = await runAppleScript(script);
 
       if (this.debugMode) {
-        console.log('VS Code AppleScript result:', result);
+        log.debug('VS Code AppleScript result:', result);
       }
 
       const parsedFiles = this.parseAppleScriptResult(result, 'VS Code', knownWorkspaces);
 
       if (this.debugMode) {
-        console.log(`✅ VS Code parsing complete, found ${parsedFiles.length} files`);
-        console.log('=== END VS CODE DEBUG ===\n');
+        log.debug(`✅ VS Code parsing complete, found ${parsedFiles.length} files`);
+        log.debug('=== END VS CODE DEBUG ===\n');
       }
 
       return parsedFiles;
     } catch (error) {
-      console.error('Error getting VS Code open files:', error);
+      log.error('Error getting VS Code open files:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
-        console.log('=== END VS CODE DEBUG ===\n');
+        log.error('Stack trace:', error.stack);
+        log.debug('=== END VS CODE DEBUG ===\n');
       }
       return [];
     }
@@ -556,12 +559,12 @@ class WindowDetector {
     try {
       const runAppleScript = await this.getRunAppleScript();
       if (!runAppleScript) {
-        console.warn('AppleScript runner not available');
+        log.warn('AppleScript runner not available');
         return [];
       }
 
       if (this.debugMode) {
-        console.log('\n=== CURSOR APPLESCRIPT DEBUG ===');
+        log.debug('\n=== CURSOR APPLESCRIPT DEBUG ===');
       }
 
       // Try multiple approaches for Cursor since it's built with ToDesktop
@@ -647,43 +650,43 @@ class WindowDetector {
       for (const approach of approaches) {
         try {
           if (this.debugMode) {
-            console.log(`Trying approach: ${approach.name}`);
+            log.debug(`Trying approach: ${approach.name}`);
           }
 
           const result = await runAppleScript(approach.script);
 
           if (this.debugMode) {
-            console.log(`Result from ${approach.name}:`, result);
+            log.debug(`Result from ${approach.name}:`, result);
           }
 
           if (result && result.trim() !== '') {
             const parsedFiles = this.parseAppleScriptResult(result, 'Cursor', knownWorkspaces);
             if (parsedFiles.length > 0) {
               if (this.debugMode) {
-                console.log(`✅ Success with ${approach.name}, found ${parsedFiles.length} files`);
-                console.log('=== END CURSOR DEBUG ===\n');
+                log.debug(`✅ Success with ${approach.name}, found ${parsedFiles.length} files`);
+                log.debug('=== END CURSOR DEBUG ===\n');
               }
               return parsedFiles;
             }
           }
         } catch (error) {
           if (this.debugMode) {
-            console.log(`❌ Failed with ${approach.name}:`, error.message);
+            log.debug(`❌ Failed with ${approach.name}:`, error.message);
           }
           // Continue to next approach
         }
       }
 
       if (this.debugMode) {
-        console.log('❌ All AppleScript approaches failed for Cursor');
-        console.log('=== END CURSOR DEBUG ===\n');
+        log.debug('❌ All AppleScript approaches failed for Cursor');
+        log.debug('=== END CURSOR DEBUG ===\n');
       }
 
       return [];
     } catch (error) {
-      console.error('Error getting Cursor open files:', error);
+      log.error('Error getting Cursor open files:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
       return [];
     }
@@ -696,12 +699,12 @@ class WindowDetector {
     try {
       const runAppleScript = await this.getRunAppleScript();
       if (!runAppleScript) {
-        console.warn('AppleScript runner not available');
+        log.warn('AppleScript runner not available');
         return [];
       }
 
       if (this.debugMode) {
-        console.log('\n=== EXCEL APPLESCRIPT DEBUG ===');
+        log.debug('\n=== EXCEL APPLESCRIPT DEBUG ===');
       }
 
       // Try multiple approaches for Excel
@@ -775,43 +778,43 @@ class WindowDetector {
       for (const approach of approaches) {
         try {
           if (this.debugMode) {
-            console.log(`Trying approach: ${approach.name}`);
+            log.debug(`Trying approach: ${approach.name}`);
           }
 
           const result = await runAppleScript(approach.script);
 
           if (this.debugMode) {
-            console.log(`Result from ${approach.name}:`, result);
+            log.debug(`Result from ${approach.name}:`, result);
           }
 
           if (result && result.trim() !== '') {
             const parsedFiles = this.parseExcelResult(result, 'Excel', knownWorkspaces);
             if (parsedFiles.length > 0) {
               if (this.debugMode) {
-                console.log(`✅ Success with ${approach.name}, found ${parsedFiles.length} files`);
-                console.log('=== END EXCEL DEBUG ===\n');
+                log.debug(`✅ Success with ${approach.name}, found ${parsedFiles.length} files`);
+                log.debug('=== END EXCEL DEBUG ===\n');
               }
               return parsedFiles;
             }
           }
         } catch (error) {
           if (this.debugMode) {
-            console.log(`❌ Failed with ${approach.name}:`, error.message);
+            log.debug(`❌ Failed with ${approach.name}:`, error.message);
           }
           // Continue to next approach
         }
       }
 
       if (this.debugMode) {
-        console.log('❌ All AppleScript approaches failed for Excel');
-        console.log('=== END EXCEL DEBUG ===\n');
+        log.debug('❌ All AppleScript approaches failed for Excel');
+        log.debug('=== END EXCEL DEBUG ===\n');
       }
 
       return [];
     } catch (error) {
-      console.error('Error getting Excel open files:', error);
+      log.error('Error getting Excel open files:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
       return [];
     }
@@ -824,12 +827,12 @@ class WindowDetector {
     try {
       const runAppleScript = await this.getRunAppleScript();
       if (!runAppleScript) {
-        console.warn('AppleScript runner not available');
+        log.warn('AppleScript runner not available');
         return [];
       }
 
       if (this.debugMode) {
-        console.log('\n=== PHOTOSHOP APPLESCRIPT DEBUG ===');
+        log.debug('\n=== PHOTOSHOP APPLESCRIPT DEBUG ===');
       }
 
       // Try multiple approaches for Photoshop since version names vary
@@ -947,43 +950,43 @@ class WindowDetector {
       for (const approach of approaches) {
         try {
           if (this.debugMode) {
-            console.log(`Trying approach: ${approach.name}`);
+            log.debug(`Trying approach: ${approach.name}`);
           }
 
           const result = await runAppleScript(approach.script);
 
           if (this.debugMode) {
-            console.log(`Result from ${approach.name}:`, result);
+            log.debug(`Result from ${approach.name}:`, result);
           }
 
           if (result && result.trim() !== '') {
             const parsedFiles = this.parsePhotoshopResult(result, 'Photoshop', knownWorkspaces);
             if (parsedFiles.length > 0) {
               if (this.debugMode) {
-                console.log(`✅ Success with ${approach.name}, found ${parsedFiles.length} files`);
-                console.log('=== END PHOTOSHOP DEBUG ===\n');
+                log.debug(`✅ Success with ${approach.name}, found ${parsedFiles.length} files`);
+                log.debug('=== END PHOTOSHOP DEBUG ===\n');
               }
               return parsedFiles;
             }
           }
         } catch (error) {
           if (this.debugMode) {
-            console.log(`❌ Failed with ${approach.name}:`, error.message);
+            log.debug(`❌ Failed with ${approach.name}:`, error.message);
           }
           // Continue to next approach
         }
       }
 
       if (this.debugMode) {
-        console.log('❌ All AppleScript approaches failed for Photoshop');
-        console.log('=== END PHOTOSHOP DEBUG ===\n');
+        log.debug('❌ All AppleScript approaches failed for Photoshop');
+        log.debug('=== END PHOTOSHOP DEBUG ===\n');
       }
 
       return [];
     } catch (error) {
-      console.error('Error getting Photoshop open files:', error);
+      log.error('Error getting Photoshop open files:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
       return [];
     }
@@ -996,12 +999,12 @@ class WindowDetector {
     try {
       const runAppleScript = await this.getRunAppleScript();
       if (!runAppleScript) {
-        console.warn('AppleScript runner not available for recent Excel files');
+        log.warn('AppleScript runner not available for recent Excel files');
         return [];
       }
 
       if (this.debugMode) {
-        console.log('\n=== RECENT EXCEL FILES DEBUG ===');
+        log.debug('\n=== RECENT EXCEL FILES DEBUG ===');
       }
 
       // AppleScript to get recent documents from Excel
@@ -1040,7 +1043,7 @@ class WindowDetector {
       const result = await runAppleScript(script);
 
       if (this.debugMode) {
-        console.log('Recent Excel files result:', result);
+        log.debug('Recent Excel files result:', result);
       }
 
       // For now, we'll focus on open files since recent files via AppleScript
@@ -1048,15 +1051,15 @@ class WindowDetector {
       const recentFiles = await this.getRecentExcelFilesFromSystem();
 
       if (this.debugMode) {
-        console.log(`✅ Found ${recentFiles.length} recent Excel files`);
-        console.log('=== END RECENT EXCEL DEBUG ===\n');
+        log.debug(`✅ Found ${recentFiles.length} recent Excel files`);
+        log.debug('=== END RECENT EXCEL DEBUG ===\n');
       }
 
       return recentFiles;
     } catch (error) {
-      console.error('Error getting recent Excel files:', error);
+      log.error('Error getting recent Excel files:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
       return [];
     }
@@ -1069,12 +1072,12 @@ class WindowDetector {
     try {
       const runAppleScript = await this.getRunAppleScript();
       if (!runAppleScript) {
-        console.warn('AppleScript runner not available for recent Photoshop files');
+        log.warn('AppleScript runner not available for recent Photoshop files');
         return [];
       }
 
       if (this.debugMode) {
-        console.log('\n=== RECENT PHOTOSHOP FILES DEBUG ===');
+        log.debug('\n=== RECENT PHOTOSHOP FILES DEBUG ===');
       }
 
       // For now, focus on file system search since Photoshop's AppleScript
@@ -1082,15 +1085,15 @@ class WindowDetector {
       const recentFiles = await this.getRecentPhotoshopFilesFromSystem();
 
       if (this.debugMode) {
-        console.log(`✅ Found ${recentFiles.length} recent Photoshop files`);
-        console.log('=== END RECENT PHOTOSHOP DEBUG ===\n');
+        log.debug(`✅ Found ${recentFiles.length} recent Photoshop files`);
+        log.debug('=== END RECENT PHOTOSHOP DEBUG ===\n');
       }
 
       return recentFiles;
     } catch (error) {
-      console.error('Error getting recent Photoshop files:', error);
+      log.error('Error getting recent Photoshop files:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
       return [];
     }
@@ -1124,7 +1127,7 @@ class WindowDetector {
       let searchErrors = 0;
 
       if (this.debugMode) {
-        console.log(`Searching for image files in ${searchPaths.length} locations...`);
+        log.debug(`Searching for image files in ${searchPaths.length} locations...`);
       }
 
       // Search for image files in common locations
@@ -1132,7 +1135,7 @@ class WindowDetector {
         try {
           if (!fs.existsSync(searchPath)) {
             if (this.debugMode) {
-              console.log(`Path does not exist: ${searchPath}`);
+              log.debug(`Path does not exist: ${searchPath}`);
             }
             continue;
           }
@@ -1161,7 +1164,7 @@ class WindowDetector {
                 filesInDir++;
               } catch (statError) {
                 if (this.debugMode) {
-                  console.warn(`Could not stat file ${filePath}: ${statError.message}`);
+                  log.warn(`Could not stat file ${filePath}: ${statError.message}`);
                 }
                 searchErrors++;
                 continue;
@@ -1170,11 +1173,11 @@ class WindowDetector {
           }
 
           if (this.debugMode && filesInDir > 0) {
-            console.log(`Found ${filesInDir} image files in ${searchPath}`);
+            log.debug(`Found ${filesInDir} image files in ${searchPath}`);
           }
         } catch (dirError) {
           if (this.debugMode) {
-            console.warn(`Could not read directory ${searchPath}: ${dirError.message}`);
+            log.warn(`Could not read directory ${searchPath}: ${dirError.message}`);
           }
           searchErrors++;
           continue;
@@ -1186,18 +1189,18 @@ class WindowDetector {
       recentFiles.push(...foundFiles);
 
       if (this.debugMode) {
-        console.log(`Search complete: ${recentFiles.length} image files found (${searchErrors} errors)`);
+        log.debug(`Search complete: ${recentFiles.length} image files found (${searchErrors} errors)`);
       }
 
       // Log warning if too many errors
       if (searchErrors > searchPaths.length / 2) {
-        console.warn(`Image file search encountered ${searchErrors} errors - may have permission issues`);
+        log.warn(`Image file search encountered ${searchErrors} errors - may have permission issues`);
       }
 
     } catch (error) {
-      console.error('Critical error searching for recent image files:', error);
+      log.error('Critical error searching for recent image files:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
     }
 
@@ -1225,7 +1228,7 @@ class WindowDetector {
       let searchErrors = 0;
 
       if (this.debugMode) {
-        console.log(`Searching for Excel files in ${searchPaths.length} locations...`);
+        log.debug(`Searching for Excel files in ${searchPaths.length} locations...`);
       }
 
       // Search for Excel files in common locations
@@ -1233,7 +1236,7 @@ class WindowDetector {
         try {
           if (!fs.existsSync(searchPath)) {
             if (this.debugMode) {
-              console.log(`Path does not exist: ${searchPath}`);
+              log.debug(`Path does not exist: ${searchPath}`);
             }
             continue;
           }
@@ -1262,7 +1265,7 @@ class WindowDetector {
                 filesInDir++;
               } catch (statError) {
                 if (this.debugMode) {
-                  console.warn(`Could not stat file ${filePath}: ${statError.message}`);
+                  log.warn(`Could not stat file ${filePath}: ${statError.message}`);
                 }
                 searchErrors++;
                 continue;
@@ -1271,11 +1274,11 @@ class WindowDetector {
           }
 
           if (this.debugMode && filesInDir > 0) {
-            console.log(`Found ${filesInDir} Excel files in ${searchPath}`);
+            log.debug(`Found ${filesInDir} Excel files in ${searchPath}`);
           }
         } catch (dirError) {
           if (this.debugMode) {
-            console.warn(`Could not read directory ${searchPath}: ${dirError.message}`);
+            log.warn(`Could not read directory ${searchPath}: ${dirError.message}`);
           }
           searchErrors++;
           continue;
@@ -1287,18 +1290,18 @@ class WindowDetector {
       recentFiles.push(...foundFiles);
 
       if (this.debugMode) {
-        console.log(`Search complete: ${recentFiles.length} Excel files found (${searchErrors} errors)`);
+        log.debug(`Search complete: ${recentFiles.length} Excel files found (${searchErrors} errors)`);
       }
 
       // Log warning if too many errors
       if (searchErrors > searchPaths.length / 2) {
-        console.warn(`Excel file search encountered ${searchErrors} errors - may have permission issues`);
+        log.warn(`Excel file search encountered ${searchErrors} errors - may have permission issues`);
       }
 
     } catch (error) {
-      console.error('Critical error searching for recent Excel files:', error);
+      log.error('Critical error searching for recent Excel files:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
     }
 
@@ -1360,12 +1363,12 @@ class WindowDetector {
       }
 
       if (this.debugMode) {
-        console.log('Excel detection capability check:', result);
+        log.debug('Excel detection capability check:', result);
       }
 
     } catch (error) {
       result.errors.push(`Excel capability check failed: ${error.message}`);
-      console.error('Error checking Excel detection capability:', error);
+      log.error('Error checking Excel detection capability:', error);
     }
 
     return result;
@@ -1376,14 +1379,14 @@ class WindowDetector {
    */
   parseExcelResult(result, appName, knownWorkspaces = []) {
     if (this.debugMode) {
-      console.log(`\n=== PARSING EXCEL RESULT ===`);
-      console.log('Raw result:', JSON.stringify(result));
+      log.debug(`\n=== PARSING EXCEL RESULT ===`);
+      log.debug(() => ['Raw result:', JSON.stringify(result)]);
     }
 
     if (!result || result.trim() === '') {
       if (this.debugMode) {
-        console.log('❌ Empty or null result');
-        console.log('=== END EXCEL PARSING ===\n');
+        log.debug('❌ Empty or null result');
+        log.debug('=== END EXCEL PARSING ===\n');
       }
       return [];
     }
@@ -1392,14 +1395,14 @@ class WindowDetector {
     const workbookEntries = result.split(',').map(entry => entry.trim());
 
     if (this.debugMode) {
-      console.log(`Found ${workbookEntries.length} workbook entries:`, workbookEntries);
+      log.debug(`Found ${workbookEntries.length} workbook entries:`, workbookEntries);
     }
 
     for (const entry of workbookEntries) {
       if (!entry || entry === '') continue;
 
       if (this.debugMode) {
-        console.log(`Processing entry: "${entry}"`);
+        log.debug(`Processing entry: "${entry}"`);
       }
 
       let fileName, filePath;
@@ -1427,7 +1430,7 @@ class WindowDetector {
 
       if (!isExcelFile && !isUnsavedWorkbook) {
         if (this.debugMode) {
-          console.log(`  ❌ Skipping non-Excel file: ${fileName}`);
+          log.debug(`  ❌ Skipping non-Excel file: ${fileName}`);
         }
         continue;
       }
@@ -1468,13 +1471,13 @@ class WindowDetector {
       files.push(fileInfo);
 
       if (this.debugMode) {
-        console.log(`  ✅ Added Excel file:`, fileInfo);
+        log.debug(`  ✅ Added Excel file:`, fileInfo);
       }
     }
 
     if (this.debugMode) {
-      console.log(`Final result: ${files.length} Excel files extracted`);
-      console.log('=== END EXCEL PARSING ===\n');
+      log.debug(`Final result: ${files.length} Excel files extracted`);
+      log.debug('=== END EXCEL PARSING ===\n');
     }
 
     return files;
@@ -1485,14 +1488,14 @@ class WindowDetector {
    */
   parsePhotoshopResult(result, appName, knownWorkspaces = []) {
     if (this.debugMode) {
-      console.log(`\n=== PARSING PHOTOSHOP RESULT ===`);
-      console.log('Raw result:', JSON.stringify(result));
+      log.debug(`\n=== PARSING PHOTOSHOP RESULT ===`);
+      log.debug(() => ['Raw result:', JSON.stringify(result)]);
     }
 
     if (!result || result.trim() === '') {
       if (this.debugMode) {
-        console.log('❌ Empty or null result');
-        console.log('=== END PHOTOSHOP PARSING ===\n');
+        log.debug('❌ Empty or null result');
+        log.debug('=== END PHOTOSHOP PARSING ===\n');
       }
       return [];
     }
@@ -1501,14 +1504,14 @@ class WindowDetector {
     const documentEntries = result.split(',').map(entry => entry.trim());
 
     if (this.debugMode) {
-      console.log(`Found ${documentEntries.length} document entries:`, documentEntries);
+      log.debug(`Found ${documentEntries.length} document entries:`, documentEntries);
     }
 
     for (const entry of documentEntries) {
       if (!entry || entry === '') continue;
 
       if (this.debugMode) {
-        console.log(`Processing entry: "${entry}"`);
+        log.debug(`Processing entry: "${entry}"`);
       }
 
       let fileName, filePath;
@@ -1541,7 +1544,7 @@ class WindowDetector {
 
       if (!isImageFile && !isUnsavedDocument) {
         if (this.debugMode) {
-          console.log(`  ❌ Skipping non-image file: ${fileName}`);
+          log.debug(`  ❌ Skipping non-image file: ${fileName}`);
         }
         continue;
       }
@@ -1582,13 +1585,13 @@ class WindowDetector {
       files.push(fileInfo);
 
       if (this.debugMode) {
-        console.log(`  ✅ Added Photoshop file:`, fileInfo);
+        log.debug(`  ✅ Added Photoshop file:`, fileInfo);
       }
     }
 
     if (this.debugMode) {
-      console.log(`Final result: ${files.length} Photoshop files extracted`);
-      console.log('=== END PHOTOSHOP PARSING ===\n');
+      log.debug(`Final result: ${files.length} Photoshop files extracted`);
+      log.debug('=== END PHOTOSHOP PARSING ===\n');
     }
 
     return files;
@@ -1599,14 +1602,14 @@ class WindowDetector {
    */
   parseAppleScriptResult(result, appName, knownWorkspaces = []) {
     if (this.debugMode) {
-      console.log(`\n=== PARSING APPLESCRIPT RESULT FOR ${appName.toUpperCase()} ===`);
-      console.log('Raw result:', JSON.stringify(result));
+      log.debug(`\n=== PARSING APPLESCRIPT RESULT FOR ${appName.toUpperCase()} ===`);
+      log.debug(() => ['Raw result:', JSON.stringify(result)]);
     }
 
     if (!result || result.trim() === '') {
       if (this.debugMode) {
-        console.log('❌ Empty or null result');
-        console.log('=== END PARSING ===\n');
+        log.debug('❌ Empty or null result');
+        log.debug('=== END PARSING ===\n');
       }
       return [];
     }
@@ -1616,14 +1619,14 @@ class WindowDetector {
     const windowTitles = result.split(',').map(title => title.trim());
 
     if (this.debugMode) {
-      console.log(`Found ${windowTitles.length} window titles:`, windowTitles);
+      log.debug(`Found ${windowTitles.length} window titles:`, windowTitles);
     }
 
     for (const title of windowTitles) {
       if (!title || title === '') continue;
 
       if (this.debugMode) {
-        console.log(`Processing title: "${title}"`);
+        log.debug(`Processing title: "${title}"`);
       }
 
       // Try to extract file path from window title
@@ -1631,18 +1634,18 @@ class WindowDetector {
       if (fileInfo) {
         files.push(fileInfo);
         if (this.debugMode) {
-          console.log(`  ✅ Extracted file info:`, fileInfo);
+          log.debug(`  ✅ Extracted file info:`, fileInfo);
         }
       } else {
         if (this.debugMode) {
-          console.log(`  ❌ Could not extract file info from title`);
+          log.debug(`  ❌ Could not extract file info from title`);
         }
       }
     }
 
     if (this.debugMode) {
-      console.log(`Final result: ${files.length} files extracted`);
-      console.log('=== END PARSING ===\n');
+      log.debug(`Final result: ${files.length} files extracted`);
+      log.debug('=== END PARSING ===\n');
     }
 
     return files;
@@ -1654,7 +1657,7 @@ class WindowDetector {
   extractFileInfoFromTitle(title, appName, knownWorkspaces = []) {
     try {
       if (this.debugMode) {
-        console.log(`    Extracting from title: "${title}"`);
+        log.debug(`    Extracting from title: "${title}"`);
       }
 
       // Common patterns in VS Code/Cursor window titles:
@@ -1678,7 +1681,7 @@ class WindowDetector {
         .trim();
 
       if (this.debugMode) {
-        console.log(`    Clean title: "${cleanTitle}"`);
+        log.debug(`    Clean title: "${cleanTitle}"`);
       }
 
       // Split by various separators (both hyphen and em-dash)
@@ -1693,7 +1696,7 @@ class WindowDetector {
       }
 
       if (this.debugMode) {
-        console.log(`    Title parts:`, parts);
+        log.debug(`    Title parts:`, parts);
       }
 
       if (parts.length < 1) return null;
@@ -1784,10 +1787,10 @@ class WindowDetector {
       const workspaceExists = workspaceDirectory ? fs.existsSync(workspaceDirectory) : false;
 
       if (this.debugMode) {
-        console.log(`    File path: "${filePath}"`);
-        console.log(`    Workspace directory: "${workspaceDirectory}"`);
-        console.log(`    File exists: ${exists}`);
-        console.log(`    Workspace exists: ${workspaceExists}`);
+        log.debug(`    File path: "${filePath}"`);
+        log.debug(`    Workspace directory: "${workspaceDirectory}"`);
+        log.debug(`    File exists: ${exists}`);
+        log.debug(`    Workspace exists: ${workspaceExists}`);
       }
 
       // Prioritize workspace information for better project navigation
@@ -1808,7 +1811,7 @@ class WindowDetector {
         };
 
         if (this.debugMode) {
-          console.log(`    ✅ Workspace file found:`, workspaceInfo);
+          log.debug(`    ✅ Workspace file found:`, workspaceInfo);
         }
 
         return workspaceInfo;
@@ -1827,14 +1830,14 @@ class WindowDetector {
       };
 
       if (this.debugMode) {
-        console.log(`    ⚠️ Basic info (no workspace detected):`, basicInfo);
+        log.debug(`    ⚠️ Basic info (no workspace detected):`, basicInfo);
       }
 
       return basicInfo;
     } catch (error) {
-      console.error('Error extracting file info from title:', error);
+      log.error('Error extracting file info from title:', error);
       if (this.debugMode) {
-        console.error('Stack trace:', error.stack);
+        log.error('Stack trace:', error.stack);
       }
       return null;
     }
@@ -1961,8 +1964,8 @@ class WindowDetector {
       });
 
       if (this.debugMode) {
-        console.log('Window detection settings:', detectionSettings);
-        console.log(`Filtered ${runningApps.length} running apps to ${enabledApps.length} enabled apps`);
+        log.debug('Window detection settings:', detectionSettings);
+        log.debug(`Filtered ${runningApps.length} running apps to ${enabledApps.length} enabled apps`);
       }
 
       // Check if we have accessibility permissions and user consent
@@ -1971,7 +1974,7 @@ class WindowDetector {
       
       if (!windowDetectionEnabled) {
         if (this.debugMode) {
-          console.log('Window detection disabled - hasPermissions:', hasPermissions, 'userConsent:', this.userConsentForPermissions);
+          log.debug('Window detection disabled - hasPermissions:', hasPermissions, 'userConsent:', this.userConsentForPermissions);
         }
         
         // Return graceful response instead of error
@@ -2014,7 +2017,7 @@ class WindowDetector {
 
           allOpenFiles.push(...files);
         } catch (error) {
-          console.error(`Error getting files from ${app.displayName}:`, error);
+          log.error(`Error getting files from ${app.displayName}:`, error);
         }
       }
 
@@ -2031,19 +2034,19 @@ class WindowDetector {
             allOpenFiles.push(...recentExcelFiles);
             
             if (this.debugMode) {
-              console.log(`Added ${recentExcelFiles.length} recent Excel files to results`);
+              log.debug(`Added ${recentExcelFiles.length} recent Excel files to results`);
             }
           } else if (this.debugMode) {
-            console.log('No recent Excel files found');
+            log.debug('No recent Excel files found');
           }
         } catch (error) {
-          console.error('Error getting recent Excel files:', error);
+          log.error('Error getting recent Excel files:', error);
           if (this.debugMode) {
-            console.error('Recent Excel files error stack:', error.stack);
+            log.error('Recent Excel files error stack:', error.stack);
           }
         }
       } else if (this.debugMode) {
-        console.log('Excel detection disabled, skipping recent Excel files');
+        log.debug('Excel detection disabled, skipping recent Excel files');
       }
 
       // Also get recent Photoshop files (even if Photoshop is not currently running), but only if Photoshop detection is enabled
@@ -2059,19 +2062,19 @@ class WindowDetector {
             allOpenFiles.push(...recentPhotoshopFiles);
             
             if (this.debugMode) {
-              console.log(`Added ${recentPhotoshopFiles.length} recent Photoshop files to results`);
+              log.debug(`Added ${recentPhotoshopFiles.length} recent Photoshop files to results`);
             }
           } else if (this.debugMode) {
-            console.log('No recent Photoshop files found');
+            log.debug('No recent Photoshop files found');
           }
         } catch (error) {
-          console.error('Error getting recent Photoshop files:', error);
+          log.error('Error getting recent Photoshop files:', error);
           if (this.debugMode) {
-            console.error('Recent Photoshop files error stack:', error.stack);
+            log.error('Recent Photoshop files error stack:', error.stack);
           }
         }
       } else if (this.debugMode) {
-        console.log('Photoshop detection disabled, skipping recent Photoshop files');
+        log.debug('Photoshop detection disabled, skipping recent Photoshop files');
       }
 
       // Remove duplicates and sort
@@ -2117,7 +2120,7 @@ class WindowDetector {
         }))
       };
     } catch (error) {
-      console.error('Error getting open files:', error);
+      log.error('Error getting open files:', error);
       return {
         success: false,
         error: error.message,
@@ -2156,7 +2159,7 @@ class WindowDetector {
    */
   setDebugMode(enabled) {
     this.debugMode = enabled;
-    console.log(`Window Detection debug mode ${enabled ? 'enabled' : 'disabled'}`);
+    log.debug(`Window Detection debug mode ${enabled ? 'enabled' : 'disabled'}`);
   }
 
   /**
@@ -2297,7 +2300,7 @@ class WindowDetector {
       }
 
       if (this.debugMode) {
-        console.log('\n=== TRYING SYSTEM EVENTS ALTERNATIVE ===');
+        log.debug('\n=== TRYING SYSTEM EVENTS ALTERNATIVE ===');
       }
 
       // Script to get all windows from all processes and filter for Cursor-like windows
@@ -2340,7 +2343,7 @@ class WindowDetector {
       const result = await runAppleScript(script);
 
       if (this.debugMode) {
-        console.log('System Events result:', result);
+        log.debug('System Events result:', result);
       }
 
       if (result && result.trim() !== '') {
@@ -2364,23 +2367,23 @@ class WindowDetector {
         });
 
         if (this.debugMode) {
-          console.log(`✅ System Events found ${files.length} files`);
-          console.log('=== END SYSTEM EVENTS ===\n');
+          log.debug(`✅ System Events found ${files.length} files`);
+          log.debug('=== END SYSTEM EVENTS ===\n');
         }
 
         return { success: true, files };
       }
 
       if (this.debugMode) {
-        console.log('❌ System Events returned no results');
-        console.log('=== END SYSTEM EVENTS ===\n');
+        log.debug('❌ System Events returned no results');
+        log.debug('=== END SYSTEM EVENTS ===\n');
       }
 
       return { success: false, error: 'No windows found' };
     } catch (error) {
       if (this.debugMode) {
-        console.error('❌ System Events approach failed:', error.message);
-        console.log('=== END SYSTEM EVENTS ===\n');
+        log.error('❌ System Events approach failed:', error.message);
+        log.debug('=== END SYSTEM EVENTS ===\n');
       }
       return { success: false, error: error.message };
     }
@@ -2459,7 +2462,7 @@ class WindowDetector {
       for (const approach of approaches) {
         try {
           if (this.debugMode) {
-            console.log(`\n🔄 Trying approach: ${approach.name}`);
+            log.debug(`\n🔄 Trying approach: ${approach.name}`);
           }
 
           const files = await approach.method();
@@ -2484,12 +2487,12 @@ class WindowDetector {
             results.finalFiles.push(...files);
 
             if (this.debugMode) {
-              console.log(`✅ ${approach.name} succeeded with ${files.length} files`);
+              log.debug(`✅ ${approach.name} succeeded with ${files.length} files`);
             }
             break; // Use first successful approach
           } else {
             if (this.debugMode) {
-              console.log(`⚠️ ${approach.name} succeeded but found no files`);
+              log.debug(`⚠️ ${approach.name} succeeded but found no files`);
             }
           }
         } catch (error) {
@@ -2500,7 +2503,7 @@ class WindowDetector {
           });
 
           if (this.debugMode) {
-            console.log(`❌ ${approach.name} failed:`, error.message);
+            log.debug(`❌ ${approach.name} failed:`, error.message);
           }
         }
       }
@@ -2527,7 +2530,7 @@ class WindowDetector {
       };
 
     } catch (error) {
-      console.error('Error in getOpenFilesWithFallback:', error);
+      log.error('Error in getOpenFilesWithFallback:', error);
       return {
         ...results,
         success: false,
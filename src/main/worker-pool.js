@@ -0,0 +1,144 @@
+const os = require('os');
+const { Worker } = require('worker_threads');
+const Logger = require('./logger');
+
+const log = Logger.scope('worker-pool');
+
+// A pool of worker_threads running one script, for CPU-heavy work that would
+// otherwise block the main process (and with it every IPC handler).
+//
+// run(type, payload) posts { id, type, payload } to an idle worker and resolves
+// with the worker's { id, result } reply (or rejects on { id, error }). Workers
+// are started on demand up to `size` and stopped after idleTimeoutMs without
+// work. A task whose worker dies is rejected; if workers keep dying before
+// finishing any task the pool gives up and rejects everything, so callers can
+// fall back to doing the work themselves.
+const MAX_STARTUP_FAILURES = 3;
+
+class WorkerPool {
+  constructor(scriptPath, options = {}) {
+    this.scriptPath = scriptPath;
+    this.size = options.size ?? Math.max(1, os.cpus().length - 1);
+    this.idleTimeoutMs = options.idleTimeoutMs ?? 30 * 1000;
+    this.workerData = options.workerData;
+
+    this.slots = [];  // { worker, task, idleTimer, completed }
+    this.queue = [];  // tasks waiting for a worker
+    this.nextTaskId = 0;
+    this.startupFailures = 0;
+    this.broken = false;
+  }
+
+  run(type, payload) {
+    if (this.broken) {
+      return Promise.reject(new Error('Worker pool is unavailable'));
+    }
+    return new Promise((resolve, reject) => {
+      this.queue.push({ id: this.nextTaskId++, type, payload, resolve, reject });
+      this.pump();
+    });
+  }
+
+  pump() {
+    while (this.queue.length > 0 && !this.broken) {
+      let slot = this.slots.find(candidate => !candidate.task);
+      if (!slot) {
+        if (this.slots.length >= this.size) {
+          return;
+        }
+        slot = this.spawn();
+      }
+
+      const task = this.queue.shift();
+      clearTimeout(slot.idleTimer);
+      slot.idleTimer = null;
+      slot.task = task;
+      slot.worker.postMessage({ id: task.id, type: task.type, payload: task.payload });
+    }
+  }
+
+  spawn() {
+    const worker = new Worker(this.scriptPath, { workerData: this.workerData });
+    const slot = { worker, task: null, idleTimer: null, completed: 0 };
+
+    worker.on('message', (message) => {
+      const task = slot.task;
+      if (!task || message.id !== task.id) {
+        return;
+      }
+      slot.task = null;
+      slot.completed++;
+      this.startupFailures = 0;
+      if (message.error) {
+        task.reject(new Error(message.error));
+      } else {
+        task.resolve(message.result);
+      }
+      this.scheduleIdleStop(slot);
+      this.pump();
+    });
+    worker.on('error', (error) => {
+      log.warn('Worker failed:', error.message);
+      this.removeSlot(slot, error);
+    });
+    worker.on('exit', (code) => {
+      this.removeSlot(slot, new Error(`Worker exited with code ${code}`));
+    });
+
+    this.slots.push(slot);
+    log.debug(`Started worker ${this.slots.length}/${this.size} for ${this.scriptPath}`);
+    return slot;
+  }
+
+  scheduleIdleStop(slot) {
+    slot.idleTimer = setTimeout(() => {
+      if (!slot.task) {
+        this.removeSlot(slot, null);
+        slot.worker.terminate();
+      }
+    }, this.idleTimeoutMs);
+    if (slot.idleTimer.unref) slot.idleTimer.unref();
+  }
+
+  removeSlot(slot, error) {
+    const index = this.slots.indexOf(slot);
+    if (index === -1) {
+      return;
+    }
+    this.slots.splice(index, 1);
+    clearTimeout(slot.idleTimer);
+
+    if (error && slot.completed === 0 && ++this.startupFailures >= MAX_STARTUP_FAILURES) {
+      log.error('Workers keep failing, disabling the pool:', error.message);
+      this.broken = true;
+    }
+    if (slot.task) {
+      slot.task.reject(error || new Error('Worker stopped'));
+      slot.task = null;
+    }
+    if (this.broken) {
+      this.rejectQueued(new Error('Worker pool is unavailable'));
+    } else {
+      this.pump();
+    }
+  }
+
+  rejectQueued(error) {
+    const queued = this.queue;
+    this.queue = [];
+    for (const task of queued) {
+      task.reject(error);
+    }
+  }
+
+  destroy() {
+    this.broken = true;
+    this.rejectQueued(new Error('Worker pool was destroyed'));
+    for (const slot of this.slots.slice()) {
+      this.removeSlot(slot, null);
+      slot.worker.terminate();
+    }
+  }
+}
+
+module.exports = WorkerPool;
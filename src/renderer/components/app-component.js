@@ -676,7 +676,7 @@ class AppComponent {
           internalId: currentSession.id,
           claudeSessionId: currentSession.claudeSessionId,
           title: currentSession.title,
-          messageCount: currentSession.messages?.length || 0,
+          messageCount: currentSession.messages?.length ?? currentSession.messageCount ?? 0,
           lastActivity: currentSession.lastActivity,
           cwd: currentSession.cwd
         } : null
@@ -796,7 +796,7 @@ class AppComponent {
       console.log('  Internal ID:', currentSession.id);
       console.log('  Claude Session ID:', currentSession.claudeSessionId || 'Not set');
       console.log('  Title:', currentSession.title);
-      console.log('  Message Count:', currentSession.messages?.length || 0);
+      console.log('  Message Count:', currentSession.messages?.length ?? currentSession.messageCount ?? 0);
       console.log('  Working Directory:', currentSession.cwd || 'Not set');
       console.log('  Last Activity:', currentSession.lastActivity);
       
@@ -1,10 +1,18 @@
 // Claude CLI History Viewer Component
+const SEARCH_PAGE_SIZE = 30;
+const SEARCH_DEBOUNCE_MS = 200;
+
 class ClaudeCliHistory {
   constructor() {
     console.log('ClaudeCliHistory: Constructor called');
     this.sessions = [];
     this.filteredSessions = [];
     this.searchQuery = '';
+    // Full-text search state; results replace the local filter when they arrive
+    this.searchTimer = null;
+    this.searchRequest = 0;
+    this.searchNextOffset = 0;
+    this.searchHasMore = false;
     this.isOpen = false;
     this.currentView = 'list'; // 'list' or 'conversation'
     this.currentConversation = null;
@@ -78,8 +86,12 @@ class ClaudeCliHistory {
       this.searchInput.addEventListener('input', (e) => {
         this.searchQuery = e.target.value.toLowerCase();
         this.filterSessions();
+        this.scheduleSearch();
       });
     }
+
+    // Sessions arrive project by project while a scan is running
+    window.electronAPI.onClaudeCliSessionsProgress((event, sessions) => this.handleSessionsProgress(sessions));
   }
 
   bindKeyboardEvents() {
@@ -194,9 +206,12 @@ class ClaudeCliHistory {
     this.showLoading(true);
 
     try {
+      // Progress batches collect here until the full list arrives
+      this.sessions = [];
       this.sessions = await window.electronAPI.getClaudeCliSessions();
       console.log('Loaded', this.sessions.length, 'Claude CLI sessions');
       this.filterSessions();
+      this.scheduleSearch();
     } catch (error) {
       console.error('Error loading Claude CLI sessions:', error);
       this.sessions = [];
@@ -207,6 +222,23 @@ class ClaudeCliHistory {
     }
   }
 
+  // Show a project's sessions as soon as its scan finishes; the full, sorted
+  // list from getClaudeCliSessions replaces them at the end
+  handleSessionsProgress(sessions) {
+    if (!this.loading || !Array.isArray(sessions)) return;
+
+    this.sessions.push(...sessions);
+    if (this.progressRenderPending) return;
+    this.progressRenderPending = true;
+    requestAnimationFrame(() => {
+      this.progressRenderPending = false;
+      if (!this.loading) return;
+      this.sessions.sort((a, b) => new Date(b.lastActivity) - new Date(a.lastActivity));
+      this.showLoading(false);
+      this.filterSessions();
+    });
+  }
+
   async refreshSessions() {
     console.log('ClaudeCliHistory: Refreshing sessions...');
     // Clear cache first
@@ -220,17 +252,61 @@ class ClaudeCliHistory {
   }
 
   filterSessions() {
-    if (!this.searchQuery) {
-      this.filteredSessions = [...this.sessions];
-    } else {
-      this.filteredSessions = this.sessions.filter(session => {
-        return session.projectPath.toLowerCase().includes(this.searchQuery) ||
-               session.preview.toLowerCase().includes(this.searchQuery) ||
-               session.sessionId.toLowerCase().includes(this.searchQuery);
-      });
+    this.searchHasMore = false;
+    this.filteredSessions = this.getLocalMatches();
+    this.renderSessionsList();
+  }
+
+  // Sessions whose summary (project path, preview, id) contains the query
+  getLocalMatches() {
+    if (!this.searchQuery) return [...this.sessions];
+    return this.sessions.filter(session => {
+      return session.projectPath.toLowerCase().includes(this.searchQuery) ||
+             session.preview.toLowerCase().includes(this.searchQuery) ||
+             session.sessionId.toLowerCase().includes(this.searchQuery);
+    });
+  }
+
+  // Search transcript contents in the main process once typing pauses; the
+  // local filter on the session summaries shows in the meantime
+  scheduleSearch() {
+    clearTimeout(this.searchTimer);
+    this.searchRequest++;
+    if (this.searchQuery.trim().length < 2) return;
+    this.searchTimer = setTimeout(() => this.runSearch(false), SEARCH_DEBOUNCE_MS);
+  }
+
+  async runSearch(append) {
+    const request = ++this.searchRequest;
+    const query = this.searchQuery;
+    const offset = append ? this.searchNextOffset : 0;
+
+    try {
+      const result = await window.electronAPI.searchClaudeCliSessions(query, { offset, limit: SEARCH_PAGE_SIZE });
+      // A newer query (or a cleared search) wins
+      if (request !== this.searchRequest || !result) return;
+
+      let sessions = append ? [...this.filteredSessions, ...result.sessions] : result.sessions;
+      if (result.indexing) {
+        // The index is still being built, so the hits may be incomplete;
+        // keep the summary matches already shown after them
+        sessions = [...sessions, ...(append ? [] : this.getLocalMatches())];
+      }
+      const seen = new Set();
+      this.filteredSessions = sessions.filter(session => !seen.has(session.id) && seen.add(session.id));
+      this.searchNextOffset = offset + SEARCH_PAGE_SIZE;
+      this.searchHasMore = result.hasMore;
+      this.renderSessionsList();
+    } catch (error) {
+      console.warn('Error searching Claude CLI sessions:', error);
     }
+  }
 
-    this.renderSessionsList();
+  // Search snippet with matched terms (wrapped in \u0002 and \u0003) highlighted
+  formatSnippet(snippet) {
+    return DOMUtils.escapeHTML(snippet)
+      .replace(/\u0002/g, '<mark>')
+      .replace(/\u0003/g, '</mark>');
   }
 
   renderSessionsList() {
@@ -275,7 +351,9 @@ class ClaudeCliHistory {
                 <span class="session-messages">${session.messageCount} messages</span>
               </div>
             </div>
-            <div class="session-preview">${DOMUtils.escapeHTML(session.preview)}</div>
+            ${session.match?.snippet
+              ? `<div class="session-preview session-match">${this.formatSnippet(session.match.snippet)}</div>`
+              : `<div class="session-preview">${DOMUtils.escapeHTML(session.preview)}</div>`}
             <div class="session-details">
               <span class="session-model">${session.modelUsed}</span>
               ${session.gitBranch ? `<span class="session-branch">${session.gitBranch}</span>` : ''}
@@ -293,7 +371,19 @@ class ClaudeCliHistory {
       `;
     }).join('');
 
-    this.sessionsList.innerHTML = sessionsHtml;
+    const loadMoreHtml = this.searchHasMore
+      ? '<button class="claude-cli-history-btn session-search-more">Load more results</button>'
+      : '';
+
+    this.sessionsList.innerHTML = sessionsHtml + loadMoreHtml;
+
+    const loadMoreBtn = this.sessionsList.querySelector('.session-search-more');
+    if (loadMoreBtn) {
+      loadMoreBtn.addEventListener('click', () => {
+        loadMoreBtn.disabled = true;
+        this.runSearch(true);
+      });
+    }
 
     // Add click event listeners
     this.sessionsList.querySelectorAll('.claude-cli-session-item').forEach(item => {
@@ -692,6 +692,7 @@ class FileBrowser {
       }
 
       messageInput.value = taskTemplate;
+      messageInput.dataset.runPriority = 'background';
 
       // Position cursor between the XML tags (after the first newline)
       const cursorPosition = taskTemplate.indexOf('\n') + 1;
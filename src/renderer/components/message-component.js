@@ -27,6 +27,9 @@ class MessageComponent {
     // Pending message update tracking
     this.pendingMessageUpdate = null;
 
+    // Per-session streaming message state rebuilt from message-stream deltas
+    this.streamStates = new Map();
+
     this.initializeElements();
     this.setupEventListeners();
     this.initializeLayoutState();
@@ -286,6 +289,10 @@ class MessageComponent {
 
   async proceedWithSendMessage(message, sessionId) {
     try {
+      // Messages started from the task template run as background work, behind interactive chat
+      const priority = this.messageInput.dataset.runPriority || 'interactive';
+      delete this.messageInput.dataset.runPriority;
+
       // Add user message to UI immediately
       this.addUserMessage(message);
 
@@ -304,7 +311,7 @@ class MessageComponent {
       this.setStreaming(true);
 
       // Send message to backend
-      await window.electronAPI.sendMessage(sessionId, message);
+      await window.electronAPI.sendMessage(sessionId, message, { priority });
 
     } catch (error) {
       console.error('Failed to proceed with send message:', error);
@@ -345,21 +352,111 @@ class MessageComponent {
   }
 
   handleMessageStream(data) {
-    const { sessionId, message, isComplete, thinkingContent, cwd } = data;
+    const { sessionId, message, isComplete, cwd } = data;
+    const isCurrentSession = sessionId === this.sessionManager.getCurrentSessionId();
 
-    // Only process streams for the current session
-    if (sessionId !== this.sessionManager.getCurrentSessionId()) {
+    if (isComplete) {
+      // The final event carries the full message, so no delta state is needed anymore
+      this.streamStates.delete(sessionId);
+      if (!isCurrentSession) return;
+
+      this.hideTypingIndicator();
+      this.setStreaming(false);
+      this.finalizeAssistantMessage(message, cwd);
+      return;
+    }
+
+    const streamState = this.applyStreamDelta(data, isCurrentSession);
+
+    // Only render streams for the current session
+    if (!streamState || !isCurrentSession) {
       return;
     }
 
     // Hide the typing indicator as soon as the first stream chunk arrives
     this.hideTypingIndicator();
+    this.updateStreamingMessage(streamState.message, streamState.thinkingContent, cwd);
+  }
 
-    if (isComplete) {
-      this.setStreaming(false);
-      this.finalizeAssistantMessage(message, cwd);
-    } else {
-      this.updateStreamingMessage(message, thinkingContent, cwd);
+  // Apply a sequenced delta (appended blocks + block patches) to the local copy of
+  // the streaming message. Returns null when the delta can't be applied yet.
+  applyStreamDelta(data, isCurrentSession) {
+    const { sessionId, messageId, seq, delta, thinkingContent } = data;
+    let streamState = this.streamStates.get(sessionId);
+
+    if (streamState && streamState.resyncing) {
+      return null;
+    }
+
+    // seq 1 always starts a new run, replacing anything left from a previous one
+    if (seq === 1) {
+      streamState = {
+        seq: 0,
+        message: { id: messageId, type: 'assistant', content: [] },
+        thinkingContent: null
+      };
+      this.streamStates.set(sessionId, streamState);
+    }
+
+    if (streamState && seq <= streamState.seq) {
+      // Stale delta already covered by a resync snapshot
+      return null;
+    }
+
+    if (!streamState || seq !== streamState.seq + 1) {
+      // Missed a delta - only fetch a snapshot if the stream is actually visible
+      this.streamStates.delete(sessionId);
+      if (isCurrentSession) {
+        this.resyncMessageStream(sessionId);
+      }
+      return null;
+    }
+
+    const content = streamState.message.content;
+    (delta?.appended || []).forEach(({ index, block }) => {
+      content[index] = block;
+    });
+    (delta?.patches || []).forEach(({ index, ...fields }) => {
+      if (content[index]) {
+        Object.assign(content[index], fields);
+      }
+    });
+
+    streamState.seq = seq;
+    streamState.message.id = messageId || streamState.message.id;
+    if (thinkingContent !== undefined) {
+      streamState.thinkingContent = thinkingContent;
+    }
+
+    return streamState;
+  }
+
+  // Replace the local streaming state with a full snapshot from the main process
+  async resyncMessageStream(sessionId) {
+    this.streamStates.set(sessionId, { resyncing: true });
+
+    try {
+      const snapshot = await window.electronAPI.getMessageStreamSnapshot(sessionId);
+
+      if (!snapshot || !snapshot.active) {
+        this.streamStates.delete(sessionId);
+        return;
+      }
+
+      const streamState = {
+        seq: snapshot.seq,
+        message: snapshot.message,
+        thinkingContent: snapshot.thinkingContent || null
+      };
+      this.streamStates.set(sessionId, streamState);
+
+      if (sessionId === this.sessionManager.getCurrentSessionId()) {
+        this.hideTypingIndicator();
+        this.updateStreamingMessage(streamState.message, streamState.thinkingContent, snapshot.cwd);
+      }
+    } catch (error) {
+      console.error('Failed to resync message stream:', error);
+      this.streamStates.delete(sessionId);
     }
   }
 
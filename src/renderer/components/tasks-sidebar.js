@@ -65,7 +65,12 @@ class TasksSidebar {
   createTaskHTML(task) {
     const timestamp = DOMUtils.formatTimestamp(task.startTime);
     const statusClass = this.getStatusClass(task.status);
-    const statusText = this.getStatusText(task.status);
+    let statusText = this.getStatusText(task.status);
+    if (task.status === 'queued') {
+      statusText += ` #${task.queuePosition}`;
+    } else if (task.status === 'stalled' && task.idleSeconds) {
+      statusText += ` (${task.idleSeconds}s)`;
+    }
     
     // Get session title or fallback
     const title = task.sessionTitle || `Session ${task.sessionId.substring(0, 8)}...`;
@@ -107,6 +112,9 @@ class TasksSidebar {
       case 'streaming': return 'status-streaming';
       case 'processing': return 'status-processing';
       case 'thinking': return 'status-thinking';
+      case 'queued': return 'status-queued';
+      case 'stalled': return 'status-stalled';
+      case 'hung': return 'status-hung';
       default: return 'status-active';
     }
   }
@@ -116,6 +124,9 @@ class TasksSidebar {
       case 'streaming': return 'Streaming';
       case 'processing': return 'Processing';
       case 'thinking': return 'Thinking';
+      case 'queued': return 'Queued';
+      case 'stalled': return 'No output';
+      case 'hung': return 'Not responding';
       default: return 'Active';
     }
   }
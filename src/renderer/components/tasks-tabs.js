@@ -162,7 +162,7 @@ class TasksTabs {
           <div class="task-tab-status ${statusClass}"></div>
           <div class="task-tab-title">${DOMUtils.escapeHTML(title)}</div>
           <div class="task-tab-meta">
-            <span class="task-tab-duration">${duration}</span>
+            <span class="task-tab-duration">${task.status === 'queued' ? `#${task.queuePosition} in queue` : duration}</span>
           </div>
         </div>
       </div>
@@ -174,6 +174,9 @@ class TasksTabs {
       case 'streaming': return 'streaming';
       case 'processing': return 'processing';
       case 'thinking': return 'thinking';
+      case 'queued': return 'queued';
+      case 'stalled': return 'stalled';
+      case 'hung': return 'hung';
       default: return 'active';
     }
   }
@@ -183,6 +186,9 @@ class TasksTabs {
       case 'streaming': return 'Streaming';
       case 'processing': return 'Processing';
       case 'thinking': return 'Thinking';
+      case 'queued': return 'Queued';
+      case 'stalled': return 'No output';
+      case 'hung': return 'Not responding';
       default: return 'Active';
     }
   }
@@ -339,6 +339,41 @@ class MessageUtils {
     }
   }
 
+  // Load the next range of a spilled tool output into its output block
+  static async loadToolOutput(button) {
+    const bar = button.closest('.tool-output-spill');
+    const content = bar.parentElement.querySelector('.tool-output-content');
+    const offset = Number(bar.dataset.offset) || 0;
+
+    button.disabled = true;
+    try {
+      const range = await window.electronAPI.readToolOutput(bar.dataset.sessionId, bar.dataset.outputId, offset);
+      if (!range.success) {
+        throw new Error(range.error);
+      }
+
+      // The first range replaces the preview
+      if (offset === 0) {
+        content.textContent = '';
+      }
+      content.appendChild(document.createTextNode(range.data));
+
+      if (range.eof) {
+        bar.remove();
+        return;
+      }
+      bar.dataset.offset = String(range.nextOffset);
+      bar.querySelector('.tool-output-spill-info').textContent =
+        `Showing ${DOMUtils.formatFileSize(range.nextOffset)} of ${DOMUtils.formatFileSize(range.totalBytes)}`;
+      button.textContent = 'Load more';
+      button.disabled = false;
+    } catch (error) {
+      console.error('Failed to load tool output:', error);
+      bar.querySelector('.tool-output-spill-info').textContent = 'Full output is no longer available';
+      button.remove();
+    }
+  }
+
   // Get tool icon based on tool name
   static getToolIcon(toolName) {
     const icons = {
@@ -443,9 +478,19 @@ class MessageUtils {
       // Apply file path formatting to output content
       outputContent = this.formatTextContent(outputContent, cwd);
 
+      // Spilled outputs only carry a preview; the rest is read from disk on demand
+      let spillBar = '';
+      if (toolCall.outputSpill) {
+        const { sessionId, outputId, bytes } = toolCall.outputSpill;
+        spillBar = `<div class="tool-output-spill" data-session-id="${this.escapeHTML(sessionId)}" data-output-id="${this.escapeHTML(outputId)}" data-offset="0">` +
+                   `<span class="tool-output-spill-info">Output truncated (${DOMUtils.formatFileSize(bytes)})</span>` +
+                   '<button class="tool-output-load" onclick="MessageUtils.loadToolOutput(this)">Load full output</button>' +
+                   '</div>';
+      }
+
       details += `<div class="tool-output ${toolCall.status === 'failed' ? 'error' : ''}"><strong>Output:</strong><div class="tool-output-content">` +
                   outputContent +
-                  '</div></div>';
+                  '</div>' + spillBar + '</div>';
     }
 
     return details;
@@ -25,8 +25,12 @@ const API_DEFINITIONS = {
 
   // Messaging
   messaging: {
-    sendMessage: (sessionId, message) => {},
-    stopMessage: (sessionId) => {}
+    sendMessage: (sessionId, message, options) => {},
+    stopMessage: (sessionId) => {},
+    getMessageStreamSnapshot: (sessionId) => {},
+    getRunTimeline: (sessionId, messageId) => {},
+    getRunLatencyStats: (options) => {},
+    readToolOutput: (sessionId, outputId, offset, length) => {}
   },
 
   // Checkpointing
@@ -34,7 +38,9 @@ const API_DEFINITIONS = {
     revertToMessage: (sessionId, messageId) => {},
     unrevertFromMessage: (sessionId, messageId) => {},
     getMessageCheckpoints: (sessionId, messageId) => {},
-    hasFileChanges: (sessionId, messageId) => {}
+    hasFileChanges: (sessionId, messageId) => {},
+    runCheckpointRetention: () => {},
+    getCheckpointRetentionReport: () => {}
   },
 
   // File system & working directory operations
@@ -56,6 +62,7 @@ const API_DEFINITIONS = {
     onSessionUpdated: (callback) => {},
     onSessionDeleted: (callback) => {},
     onSessionCreated: (callback) => {},
+    onProcessStatusChanged: (callback) => {},
     removeAllListeners: (channel) => {}
   }
 };
@@ -0,0 +1,60 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const path = require('path');
+const NdjsonFramer = require('../src/main/ndjson-framer');
+const { FIXTURES_DIR, toChunks, legacySplit, framerSplit } = require('../scripts/bench-ndjson-framer');
+
+const CHUNK_SIZES = [1, 7, 512, 4096, 64 * 1024];
+
+// Chunks that end on line boundaries, so the legacy splitter never decodes a
+// partial character and its output is the reference framing
+function toLineChunks(data) {
+  const chunks = [];
+  let start = 0;
+  let newlineIndex = data.indexOf(0x0a);
+  while (newlineIndex !== -1) {
+    chunks.push(data.subarray(start, newlineIndex + 1));
+    start = newlineIndex + 1;
+    newlineIndex = data.indexOf(0x0a, start);
+  }
+  if (start < data.length) chunks.push(data.subarray(start));
+  return chunks;
+}
+
+const fixtures = fs.readdirSync(FIXTURES_DIR).filter(name => name.endsWith('.ndjson'));
+
+test('stream-json fixtures are present', () => {
+  assert.ok(fixtures.length > 0);
+});
+
+for (const name of fixtures) {
+  const data = fs.readFileSync(path.join(FIXTURES_DIR, name));
+  const expected = legacySplit(toLineChunks(data)).lines;
+
+  for (const chunkSize of CHUNK_SIZES) {
+    test(`${name}: framed lines match the legacy split with ${chunkSize}-byte chunks`, () => {
+      assert.deepStrictEqual(framerSplit(toChunks(data, chunkSize)).lines, expected);
+    });
+  }
+}
+
+test('multi-byte characters split across chunks decode intact', () => {
+  const line = JSON.stringify({ type: 'assistant', text: 'héllo → wörld 🚀' });
+  const data = Buffer.from(`${line}\n${line}\n`, 'utf8');
+  for (let chunkSize = 1; chunkSize <= 8; chunkSize++) {
+    assert.deepStrictEqual(framerSplit(toChunks(data, chunkSize)).lines, [line, line]);
+  }
+});
+
+test('flush returns an unterminated final line', () => {
+  const framer = new NdjsonFramer();
+  assert.deepStrictEqual(framer.push('{"a":1}\n{"b"'), ['{"a":1}']);
+  assert.deepStrictEqual(framer.push(':2}'), []);
+  assert.strictEqual(framer.flush(), '{"b":2}');
+});
+
+test('empty lines are skipped', () => {
+  const framer = new NdjsonFramer();
+  assert.deepStrictEqual(framer.push('\n\n{"a":1}\n\n'), ['{"a":1}']);
+});
@@ -0,0 +1,106 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const RevertEngine = require('../src/main/revert-engine');
+
+async function createWorkspace(t) {
+  const dir = await fs.promises.mkdtemp(path.join(os.tmpdir(), 'revert-engine-'));
+  t.after(() => fs.promises.rm(dir, { recursive: true, force: true }));
+  return dir;
+}
+
+function listTree(dir) {
+  return fs.readdirSync(dir, { recursive: true }).sort();
+}
+
+test('commit writes, creates and deletes files', async (t) => {
+  const dir = await createWorkspace(t);
+  const edited = path.join(dir, 'edited.txt');
+  const removed = path.join(dir, 'removed.txt');
+  const created = path.join(dir, 'new', 'nested', 'created.txt');
+  fs.writeFileSync(edited, 'before');
+  fs.writeFileSync(removed, 'gone soon');
+
+  const engine = new RevertEngine({ concurrency: 2 });
+  const staged = await engine.stage([
+    { filePath: edited, content: 'after' },
+    { filePath: removed, content: null },
+    { filePath: created, content: 'brand new' }
+  ]);
+  const results = await engine.commit(staged);
+
+  assert.deepStrictEqual(results.map(result => result.action), ['write', 'delete', 'write']);
+  assert.strictEqual(fs.readFileSync(edited, 'utf8'), 'after');
+  assert.strictEqual(fs.existsSync(removed), false);
+  assert.strictEqual(fs.readFileSync(created, 'utf8'), 'brand new');
+  assert.ok(listTree(dir).every(name => !name.endsWith('.revert-tmp')));
+});
+
+test('a failed commit restores original bytes and removes created directories', async (t) => {
+  const dir = await createWorkspace(t);
+  const binary = path.join(dir, 'binary.dat');
+  const removed = path.join(dir, 'removed.txt');
+  const created = path.join(dir, 'new', 'nested', 'created.txt');
+  const failing = path.join(dir, 'failing.txt');
+  const originalBytes = Buffer.from([0xff, 0xfe, 0x00, 0x80, 0x0a]);
+  fs.writeFileSync(binary, originalBytes);
+  fs.writeFileSync(removed, 'keep me');
+  fs.writeFileSync(failing, 'untouched');
+  const before = listTree(dir);
+
+  const engine = new RevertEngine({ concurrency: 1 });
+  const staged = await engine.stage([
+    { filePath: binary, content: 'replaced' },
+    { filePath: removed, content: null },
+    { filePath: created, content: 'brand new' },
+    { filePath: failing, content: 'never applied' }
+  ]);
+  // Make the last rename fail after the others have been committed
+  fs.unlinkSync(staged[3].tempPath);
+
+  await assert.rejects(engine.commit(staged), (error) => {
+    assert.deepStrictEqual(error.failedFiles.map(failure => failure.filePath), [failing]);
+    return true;
+  });
+
+  assert.deepStrictEqual(fs.readFileSync(binary), originalBytes);
+  assert.strictEqual(fs.readFileSync(removed, 'utf8'), 'keep me');
+  assert.strictEqual(fs.readFileSync(failing, 'utf8'), 'untouched');
+  assert.deepStrictEqual(listTree(dir), before);
+});
+
+test('a failed stage leaves the tree as it was', async (t) => {
+  const dir = await createWorkspace(t);
+  const existing = path.join(dir, 'existing.txt');
+  const directoryTarget = path.join(dir, 'a-directory');
+  fs.writeFileSync(existing, 'original');
+  fs.mkdirSync(directoryTarget);
+  const before = listTree(dir);
+
+  const engine = new RevertEngine();
+  await assert.rejects(engine.stage([
+    { filePath: existing, content: 'changed' },
+    { filePath: path.join(dir, 'deep', 'er', 'file.txt'), content: 'new' },
+    { filePath: directoryTarget, content: 'cannot read a directory as a file' }
+  ]), (error) => {
+    assert.deepStrictEqual(error.failedFiles.map(failure => failure.filePath), [directoryTarget]);
+    return true;
+  });
+
+  assert.strictEqual(fs.readFileSync(existing, 'utf8'), 'original');
+  assert.deepStrictEqual(listTree(dir), before);
+});
+
+test('directories that gained other files are kept on discard', async (t) => {
+  const dir = await createWorkspace(t);
+  const created = path.join(dir, 'new', 'created.txt');
+
+  const engine = new RevertEngine();
+  const staged = await engine.stage([{ filePath: created, content: 'staged' }]);
+  fs.writeFileSync(path.join(dir, 'new', 'other.txt'), 'written meanwhile');
+  await engine.discard(staged);
+
+  assert.deepStrictEqual(listTree(dir), ['new', path.join('new', 'other.txt')]);
+});
@@ -0,0 +1,131 @@
+const test = require('node:test');
+const assert = require('node:assert');
+const fs = require('fs');
+const os = require('os');
+const path = require('path');
+const SessionStore = require('../src/main/session-store');
+
+async function createStore(t, options) {
+  const baseDir = await fs.promises.mkdtemp(path.join(os.tmpdir(), 'session-store-'));
+  const store = new SessionStore(baseDir, options);
+  t.after(async () => {
+    await store.flush();
+    await fs.promises.rm(baseDir, { recursive: true, force: true });
+  });
+  await store.load();
+  return store;
+}
+
+function readJournalLines(store, sessionId) {
+  return fs.readFileSync(store.getJournalPath(sessionId), 'utf8').split('\n').filter(Boolean).map(line => JSON.parse(line));
+}
+
+test('replay applies adds, updates and the newest metadata', async (t) => {
+  const store = await createStore(t);
+  const session = { id: 's1', name: 'First', messages: [] };
+
+  await store.writeMeta(session);
+  await store.appendMessage('s1', { id: 'm1', content: 'hello' });
+  await store.appendMessage('s1', { id: 'm2', content: 'world' });
+  await store.updateMessage('s1', { id: 'm1', content: 'hello, edited' });
+  session.name = 'Renamed';
+  await store.writeMeta(session);
+  await store.flush();
+
+  const replayed = await store.replayJournal('s1');
+  assert.strictEqual(replayed.ops, 5);
+  assert.strictEqual(replayed.rev, 2);
+  assert.strictEqual(replayed.meta.name, 'Renamed');
+  assert.deepStrictEqual(replayed.messages, [
+    { id: 'm1', content: 'hello, edited' },
+    { id: 'm2', content: 'world' }
+  ]);
+
+  const reloaded = new SessionStore(store.baseDir);
+  const sessions = await reloaded.load();
+  assert.strictEqual(sessions.length, 1);
+  assert.strictEqual(sessions[0].name, 'Renamed');
+  assert.strictEqual(sessions[0].messages.length, 2);
+});
+
+test('compaction rewrites the journal without changing its replay', async (t) => {
+  const store = await createStore(t, { compactionMinOps: 0 });
+  const session = { id: 's1', name: 'Chat', messages: [] };
+  await store.writeMeta(session);
+  for (let i = 0; i < 10; i++) {
+    const message = { id: `m${i}`, content: `draft ${i}` };
+    session.messages.push(message);
+    await store.appendMessage('s1', message);
+    message.content = `final ${i}`;
+    await store.updateMessage('s1', message);
+  }
+  await store.flush();
+
+  const before = await store.replayJournal('s1');
+  assert.ok(store.needsCompaction('s1', session.messages.length));
+
+  await store.compact(session);
+  await store.flush();
+
+  const entries = readJournalLines(store, 's1');
+  assert.strictEqual(entries.length, session.messages.length + 1);
+  assert.strictEqual(entries[0].op, 'meta');
+  assert.ok(entries.slice(1).every(entry => entry.op === 'add'));
+
+  const after = await store.replayJournal('s1');
+  assert.deepStrictEqual(after.messages, before.messages);
+  assert.ok(after.rev > before.rev);
+  assert.strictEqual(store.getJournalBytes('s1'), fs.statSync(store.getJournalPath('s1')).size);
+});
+
+test('appends after compaction land after the rewritten journal', async (t) => {
+  const store = await createStore(t);
+  const session = { id: 's1', messages: [{ id: 'm1', content: 'one' }] };
+  await store.writeMeta(session);
+  await store.appendMessage('s1', session.messages[0]);
+
+  const compacted = store.compact(session);
+  const appended = store.appendMessage('s1', { id: 'm2', content: 'two' });
+  await Promise.all([compacted, appended]);
+
+  const replayed = await store.replayJournal('s1');
+  assert.deepStrictEqual(replayed.messages.map(message => message.id), ['m1', 'm2']);
+});
+
+test('a torn final entry is skipped and the next append starts a new line', async (t) => {
+  const store = await createStore(t);
+  const journalPath = store.getJournalPath('s1');
+  const intact = JSON.stringify({ op: 'add', message: { id: 'm1', content: 'kept' } });
+  fs.writeFileSync(journalPath, `${intact}\n{"op":"add","message":{"id":"m2","con`);
+
+  const torn = await store.replayJournal('s1');
+  assert.deepStrictEqual(torn.messages.map(message => message.id), ['m1']);
+
+  await store.appendMessage('s1', { id: 'm3', content: 'after crash' });
+  const replayed = await store.replayJournal('s1');
+  assert.deepStrictEqual(replayed.messages.map(message => message.id), ['m1', 'm3']);
+});
+
+test('journal sizes are counted in bytes', async (t) => {
+  const store = await createStore(t);
+  await store.appendMessage('s1', { id: 'm1', content: 'naïve café 🚀 '.repeat(50) });
+  await store.flush();
+
+  const size = fs.statSync(store.getJournalPath('s1')).size;
+  assert.strictEqual(store.getJournalBytes('s1'), size);
+  assert.strictEqual((await store.replayJournal('s1')).bytes, size);
+});
+
+test('saveAll keeps the journal revision', async (t) => {
+  const store = await createStore(t);
+  const session = { id: 's1', name: 'Before', messages: [] };
+  await store.writeMeta(session);
+  await store.flush();
+
+  await store.saveAll([{ ...session, name: 'Bulk rename' }]);
+  assert.strictEqual(store.getStats('s1').rev, 1);
+
+  const reloaded = new SessionStore(store.baseDir);
+  const sessions = await reloaded.load();
+  assert.strictEqual(sessions[0].name, 'Bulk rename');
+});